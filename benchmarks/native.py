@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    native.py
+    ---------------------
+    Benchmark of the native LAStools backend against the LAStools binaries.
+    It generates synthetic tiles, runs the command lines of a tool once
+    natively and once with the binary through LAStoolsUtils.runLAStools,
+    and reports the time of both and whether the point records or raster
+    values of both outputs are the same. Ground classifications are not
+    expected to be the same, for them the share of points both classify
+    alike is reported.
+
+    python benchmarks/native.py --lastools C:/LAStools [--tool lasthin] [--density 20] [--size 500] [--runs 3]
+
+    It has to run in the Python environment of a QGIS installation.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import run
+import synthetic
+
+# the command lines of every tool, without input and output, and the
+# extension of their outputs
+
+CASES = {
+    "lasthin": ([["-step", "1", "-lowest"], ["-step", "1", "-highest"], ["-step", "2", "-central"],
+                 ["-step", "0.5", "-lowest", "-subcircle", "0.2"], ["-step", "1", "-lowest", "-classify_as", "8"],
+                 ["-step", "1", "-highest", "-keep_last", "-withheld"]], "las"),
+    "lasground": ([["-nature"], ["-town", "-fine"], ["-wilderness", "-all_returns"], ["-metro", "-coarse", "-compute_height"]], "las"),
+}
+
+# the tools whose outputs are compared by the classification of the points
+# and the least share of points classified alike that counts as the same
+
+AGREEMENT = {"lasground": 0.95}
+
+def loadLAStools(settings):
+    from qgis.core import QgsApplication
+    from processing.core.ProcessingConfig import ProcessingConfig
+    from lastools.LAStoolsProvider import LAStoolsProvider
+    provider = LAStoolsProvider()
+    QgsApplication.processingRegistry().addProvider(provider)
+    for key, value in settings.items():
+        ProcessingConfig.setSettingValue(key, value)
+    return provider
+
+def runTool(tool, arguments, native, lastools):
+    from qgis.core import QgsProcessingFeedback
+    from processing.core.ProcessingConfig import ProcessingConfig
+    from lastools.LAStoolsUtils import LAStoolsUtils
+    ProcessingConfig.setSettingValue("LASTOOLS_NATIVE", native)
+    feedback = QgsProcessingFeedback()
+    commands = ['"' + os.path.join(lastools, "bin", tool) + '"'] + arguments
+    start = time.perf_counter()
+    LAStoolsUtils.runLAStools(commands, feedback)
+    return time.perf_counter() - start
+
+def outputValues(path):
+    # the point records of a LAS file or the values of a raster
+    from lastools.LAStoolsNative.LASPoints import LASPoints
+    from lastools.LAStoolsNative.LASRaster import LASRaster
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".las", ".laz"):
+        points = LASPoints(path)
+        try:
+            return numpy.array(points.records).tobytes()
+        finally:
+            points.close()
+    if extension == ".bil":
+        return LASRaster.readBIL(path)[1].tobytes()
+    with open(path, "rb") as file:
+        return file.read()
+
+def classificationAgreement(native, binary):
+    # the binary may reorder the points, so they are matched by coordinates
+    from lastools.LAStoolsNative.LASPoints import LASPoints
+    classifications = []
+    for path in (native, binary):
+        points = LASPoints(path)
+        try:
+            records = numpy.array(points.records)
+            order = numpy.lexsort((records["Z"], records["Y"], records["X"]))
+            classifications.append(points.classification(records)[order])
+        finally:
+            points.close()
+    if len(classifications[0]) != len(classifications[1]):
+        return 0.0
+    return float(numpy.mean(classifications[0] == classifications[1])) if len(classifications[0]) else 1.0
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark the native LAStools backend against the binaries")
+    parser.add_argument("--lastools", required=True, help="folder of the LAStools installation")
+    parser.add_argument("--tool", default="lasthin", choices=sorted(CASES))
+    parser.add_argument("--size", type=float, default=500.0, help="side length of the tile")
+    parser.add_argument("--density", type=float, default=20.0, help="points per square meter")
+    parser.add_argument("--format", type=int, default=1, choices=sorted(synthetic.POINT_FORMATS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", default="native.json")
+    arguments = parser.parse_args()
+
+    application = run.startQgis()
+    loadLAStools({"LASTOOLS_FOLDER": arguments.lastools})
+    folder = tempfile.mkdtemp(prefix="native_")
+    results = {}
+    try:
+        source = os.path.join(folder, "tile.las")
+        synthetic.writeLAS(source, size=arguments.size, density=arguments.density, pointFormat=arguments.format)
+        cases, extension = CASES[arguments.tool]
+        for case in cases:
+            name = " ".join(case)
+            timings = {}
+            for native in (True, False):
+                output = os.path.join(folder, "{}.{}".format("native" if native else "binary", extension))
+                commandline = ["-i", '"' + source + '"'] + case + ["-o", '"' + output + '"']
+                timings[native] = min(runTool(arguments.tool, commandline, native, arguments.lastools) for i in range(arguments.runs))
+            native, binary = os.path.join(folder, "native." + extension), os.path.join(folder, "binary." + extension)
+            results[name] = {"native": timings[True], "binary": timings[False], "speedup": timings[False] / timings[True]}
+            if arguments.tool in AGREEMENT:
+                agreement = classificationAgreement(native, binary)
+                same = agreement >= AGREEMENT[arguments.tool]
+                results[name]["agreement"] = agreement
+                verdict = "{:.2%} alike".format(agreement)
+            else:
+                same = outputValues(native) == outputValues(binary)
+                verdict = "same" if same else "DIFFERENT"
+            results[name]["same"] = same
+            print("{:50} native {:8.3f} s  binary {:8.3f} s  {}".format(name, timings[True], timings[False], verdict))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    with open(arguments.output, "w") as output:
+        json.dump({"meta": run.metadata(), "tool": arguments.tool, "density": arguments.density, "results": results}, output, indent=1, sort_keys=True)
+    application.exitQgis()
+    return 0 if all(result["same"] for result in results.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    provider_import.py
+    ---------------------
+    Regression benchmark for the time it takes to import the LAStools
+    provider. Every measurement runs in a fresh Python interpreter, which
+    also reports how many algorithm modules the import pulled in; with the
+    lazy registry this has to stay at zero.
+
+    python benchmarks/provider_import.py [--runs N] [--update]
+
+    The median import time is compared against provider_import.json next
+    to this script, a regression fails with exit code 1 and --update stores
+    the current measurement as the new baseline.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "provider_import.json")
+
+# run in the child interpreter, the processing plugin that ships with QGIS
+# lives in the 'plugins' folder next to the qgis python package
+
+CHILD = """
+import os, sys, time, json
+import qgis
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(qgis.__file__)), 'plugins'))
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import lastools.LAStoolsProvider
+seconds = time.perf_counter() - start
+packages = ('lastools.LAStools.', 'lastools.LAStoolsProduction.', 'lastools.LAStoolsPipelines.', 'lastools.LAStoolsPipelinesOthers.')
+print(json.dumps({{'seconds': seconds, 'modules': sum(1 for name in sys.modules if name.startswith(packages))}}))
+"""
+
+def measure(runs):
+    results = []
+    for i in range(runs):
+        output = subprocess.run([sys.executable, "-c", CHILD.format(root=ROOT)], stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return {"seconds": statistics.median(r["seconds"] for r in results), "modules": max(r["modules"] for r in results)}
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark the import of the LAStools provider")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown relative to the baseline")
+    parser.add_argument("--update", action="store_true", help="store this measurement as the new baseline")
+    arguments = parser.parse_args()
+
+    result = measure(arguments.runs)
+    print("LAStools provider import: {:.1f} ms, {} algorithm modules imported".format(1000.0 * result["seconds"], result["modules"]))
+
+    if arguments.update:
+        with open(BASELINE, "w") as baseline:
+            json.dump(result, baseline, indent=1)
+        return 0
+
+    failed = False
+    if result["modules"] > 0:
+        print("regression: importing the provider imports algorithm modules")
+        failed = True
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as baseline:
+            expected = json.load(baseline)
+        if result["seconds"] > expected["seconds"] * (1.0 + arguments.tolerance):
+            print("regression: import took {:.1f} ms, baseline is {:.1f} ms".format(1000.0 * result["seconds"], 1000.0 * expected["seconds"]))
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
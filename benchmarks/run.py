@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    run.py
+    ---------------------
+    End to end benchmark of the LAStools, WhiteboxTools and TauDEM
+    providers. It generates synthetic LAS files and a synthetic DEM,
+    points the providers at the stand-in executables of stub.py (or at
+    real installations with --real), times loading every provider and
+    running every selected algorithm through processing.run, and writes
+    the results as JSON so that two commits or two QGIS versions can be
+    compared.
+
+    python benchmarks/run.py [--algorithms 'LAStools:las2dem*'] [--runs 3] [--output results.json]
+    python benchmarks/run.py --compare baseline.json [--tolerance 0.2]
+
+    It has to run in the Python environment of a QGIS installation.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import fnmatch
+import argparse
+import platform
+import datetime
+import tempfile
+import importlib
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import stub
+import synthetic
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the provider classes and the settings that activate them
+
+PROVIDERS = [("lastools.LAStoolsProvider", "LAStoolsProvider", "LASTOOLS_ACTIVATED"),
+             ("whitebox.whiteboxProvider", "WhiteboxProvider", "WHITEBOX_ACTIVE"),
+             ("taudem.taudemProvider", "TauDemProvider", "TAUDEM_ACTIVE")]
+
+# a few whitebox tools instead of all of them, which would only measure
+# the same wrapper hundreds of times
+
+DEFAULT_ALGORITHMS = ["LAStools:*", "taudem:*", "whitebox:slope", "whitebox:fillsinglecellpits", "whitebox:d8pointer", "whitebox:lidarinfo"]
+
+def startQgis():
+    from qgis.core import QgsApplication
+    application = QgsApplication([], False)
+    application.initQgis()
+    import qgis
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(qgis.__file__)), "plugins"))
+    sys.path.insert(0, ROOT)
+    from processing.core.Processing import Processing
+    Processing.initialize()
+    return application
+
+def loadProviders(settings):
+    from qgis.core import QgsApplication
+    from processing.core.ProcessingConfig import ProcessingConfig
+    timings = {}
+    providers = []
+    for module, className, active in PROVIDERS:
+        start = time.perf_counter()
+        provider = getattr(importlib.import_module(module), className)()
+        QgsApplication.processingRegistry().addProvider(provider)
+        timings["load:" + provider.id()] = time.perf_counter() - start
+        providers.append((provider, active))
+    # the settings only exist once the providers are loaded, after that
+    # the algorithms are loaded again as they depend on them
+    for key, value in settings.items():
+        ProcessingConfig.setSettingValue(key, value)
+    for provider, active in providers:
+        ProcessingConfig.setSettingValue(active, True)
+        start = time.perf_counter()
+        provider.refreshAlgorithms()
+        timings["refresh:" + provider.id()] = time.perf_counter() - start
+    return [provider for provider, active in providers], timings
+
+def prepareData(folder, size, tiles, width, height):
+    las = os.path.join(folder, "las")
+    os.makedirs(las, exist_ok=True)
+    # uncompressed points in files named .laz, which is what the default
+    # wildcards of the algorithms match and what LASlib reads all the same
+    for i in range(tiles):
+        synthetic.writeLAS(os.path.join(las, "tile_{}.laz".format(i)), size=size, origin=(500000.0 + i * size, 4000000.0), seed=i)
+    dem = os.path.join(folder, "dem.tif")
+    synthetic.writeDEM(dem, width, height)
+    return {"las": las, "laz": os.path.join(las, "tile_0.laz"), "dem": dem}
+
+def fillParameters(algorithm, data, folder):
+    """Values for all parameters of an algorithm, None if there are
+    parameters the generated data can not satisfy.
+    """
+    from qgis.core import QgsProcessingParameterFile, QgsProcessingParameterDefinition
+    parameters = {}
+    for definition in algorithm.parameterDefinitions():
+        name = definition.name()
+        kind = definition.type()
+        optional = definition.flags() & QgsProcessingParameterDefinition.FlagOptional
+        if kind == "file":
+            if definition.behavior() == QgsProcessingParameterFile.Folder:
+                parameters[name] = data["las"]
+            elif any(extension in (definition.extension() + definition.fileFilter()).lower() for extension in ("tif", "bil", "asc", "dem")):
+                parameters[name] = data["dem"]
+            elif optional:
+                continue
+            else:
+                parameters[name] = data["laz"]
+        elif kind == "raster":
+            parameters[name] = data["dem"]
+        elif kind == "multilayer":
+            parameters[name] = [data["dem"]]
+        elif kind == "folderDestination":
+            parameters[name] = tempfile.mkdtemp(dir=folder)
+        elif kind in ("fileDestination", "rasterDestination", "vectorDestination"):
+            extension = definition.defaultFileExtension() or "tif"
+            parameters[name] = os.path.join(tempfile.mkdtemp(dir=folder), "{}.{}".format(name.lower(), extension))
+        elif name.endswith("WILDCARDS"):
+            parameters[name] = "*.laz"
+        elif definition.defaultValue() is not None or optional:
+            continue
+        elif kind == "number":
+            parameters[name] = 1
+        elif kind == "boolean":
+            parameters[name] = False
+        elif kind == "enum":
+            parameters[name] = 0
+        elif kind == "string":
+            parameters[name] = ""
+        else:
+            return None
+    return parameters
+
+def runAlgorithms(patterns, data, folder, runs):
+    from qgis.core import QgsApplication, QgsProcessingContext, QgsProcessingFeedback
+    import processing
+    results = {}
+    for algorithm in sorted(QgsApplication.processingRegistry().algorithms(), key=lambda a: a.id()):
+        if not any(fnmatch.fnmatch(algorithm.id(), pattern) for pattern in patterns):
+            continue
+        algorithm = algorithm.create()
+        parameters = fillParameters(algorithm, data, folder)
+        if parameters is None:
+            results[algorithm.id()] = {"seconds": None, "runs": 0, "ok": False, "error": "unsupported parameters"}
+            continue
+        seconds = []
+        error = None
+        for i in range(runs):
+            context = QgsProcessingContext()
+            feedback = QgsProcessingFeedback()
+            start = time.perf_counter()
+            try:
+                processing.run(algorithm.id(), dict(parameters), context=context, feedback=feedback)
+            except Exception as e:
+                error = str(e)
+                break
+            seconds.append(time.perf_counter() - start)
+        results[algorithm.id()] = {"seconds": statistics.median(seconds) if seconds else None, "runs": len(seconds), "ok": error is None}
+        if error is not None:
+            results[algorithm.id()]["error"] = error
+        print("{:60} {}".format(algorithm.id(), "{:.3f} s".format(results[algorithm.id()]["seconds"]) if seconds else "failed: " + (error or "")))
+    return results
+
+def metadata():
+    from qgis.core import Qgis
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"commit": commit, "python": platform.python_version(), "qgis": Qgis.QGIS_VERSION, "platform": platform.platform(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"), "stub_delay": os.environ.get("BENCH_STUB_DELAY", "0")}
+
+def compare(results, baseline, tolerance):
+    # the entries that got slower by more than the tolerance or that
+    # stopped working
+    regressions = []
+    for key, old in sorted(baseline["results"].items()):
+        new = results.get(key)
+        if new is None:
+            continue
+        if old.get("ok") and not new.get("ok"):
+            regressions.append("{}: failed, {}".format(key, new.get("error", "")))
+        elif old.get("seconds") and new.get("seconds") and new["seconds"] > old["seconds"] * (1.0 + tolerance):
+            regressions.append("{}: {:.3f} s, baseline {:.3f} s".format(key, new["seconds"], old["seconds"]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark the processing providers end to end")
+    parser.add_argument("--algorithms", nargs="*", default=DEFAULT_ALGORITHMS, help="fnmatch patterns of algorithm ids")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--tiles", type=int, default=4, help="number of synthetic LAS files")
+    parser.add_argument("--size", type=float, default=250.0, help="side length of every LAS file")
+    parser.add_argument("--width", type=int, default=1000, help="columns of the synthetic DEM")
+    parser.add_argument("--height", type=int, default=1000, help="rows of the synthetic DEM")
+    parser.add_argument("--real", action="store_true", help="use the installed tools instead of the stand-ins")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown relative to the compared run")
+    parser.add_argument("--keep", action="store_true", help="keep the generated data and outputs")
+    arguments = parser.parse_args()
+
+    application = startQgis()
+    folder = tempfile.mkdtemp(prefix="benchmark_")
+    try:
+        settings = {} if arguments.real else stub.install(os.path.join(folder, "stub"))
+        if os.name == "nt":
+            settings.pop("WINE_FOLDER", None)
+        results = loadProviders(settings)[1]
+        results = dict((key, {"seconds": value, "runs": 1, "ok": True}) for key, value in results.items())
+        data = prepareData(folder, arguments.size, arguments.tiles, arguments.width, arguments.height)
+        results.update(runAlgorithms(arguments.algorithms, data, folder, arguments.runs))
+    finally:
+        if not arguments.keep:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    document = {"meta": metadata(), "results": results}
+    with open(arguments.output, "w") as output:
+        json.dump(document, output, indent=1, sort_keys=True)
+    application.exitQgis()
+
+    if arguments.compare:
+        with open(arguments.compare) as baseline:
+            regressions = compare(results, json.load(baseline), arguments.tolerance)
+        for regression in regressions:
+            print("regression: " + regression)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
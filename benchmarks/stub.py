@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    stub.py
+    ---------------------
+    Stand-ins for the LAStools, WhiteboxTools and TauDEM executables as
+    well as for wine and mpiexec. They parse the command lines the
+    providers build, write every output the real tool would write (copies
+    of the inputs, tiles for lastile, small GeoTIFFs for rasters) and
+    print the kind of console output the providers parse, so that the
+    benchmarks measure the overhead of the wrappers and not the tools.
+
+    python benchmarks/stub.py install FOLDER
+
+    writes one wrapper script per executable into FOLDER. The variable
+    BENCH_STUB_DELAY adds the given number of seconds of work per input
+    file to simulate the run time of the tools.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+import shutil
+import stat
+import subprocess
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import synthetic
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the format switches of LAStools and the extension of the files they write
+
+FORMATS = {"-olas": ".las", "-olaz": ".laz", "-obin": ".bin", "-otxt": ".txt", "-oqi": ".qi", "-obil": ".bil",
+           "-otif": ".tif", "-oasc": ".asc", "-oimg": ".img", "-opng": ".png", "-ojpg": ".jpg", "-oxyz": ".xyz",
+           "-oshp": ".shp", "-okml": ".kml", "-owkt": ".wkt", "-oply": ".ply", "-odtm": ".dtm"}
+RASTERS = (".tif", ".bil", ".asc", ".img", ".png", ".jpg", ".dtm")
+
+def lastoolsNames():
+    # every tool the LAStools algorithms call, found in their sources
+    names = set()
+    for path in glob.glob(os.path.join(ROOT, "lastools", "**", "*.py"), recursive=True):
+        with open(path, encoding="utf-8") as source:
+            names.update(re.findall(r'"bin",\s*"(\w+)(?:\.exe)?"', source.read()))
+    return sorted(names)
+
+def taudemNames():
+    ignored = ("__init__", "taudemAlgorithm", "taudemProvider", "taudemProviderPlugin", "taudemUtils")
+    names = [os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(ROOT, "taudem", "*.py"))]
+    return sorted(name for name in names if name not in ignored)
+
+def install(folder):
+    """Writes the wrapper scripts and returns the paths the provider
+    settings have to point at.
+    """
+    folder = os.path.abspath(folder)
+    layout = {"lastools": [os.path.join("lastools", "bin", name) for name in lastoolsNames()],
+              "whitebox": [os.path.join("whitebox", "whitebox_tools")],
+              "taudem": [os.path.join("taudem", name) for name in taudemNames()],
+              "mpich": [os.path.join("mpich", "mpiexec")],
+              "wine": [os.path.join("wine", "wine")]}
+    for relatives in layout.values():
+        for relative in relatives:
+            path = os.path.join(folder, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            name = os.path.basename(relative)
+            if os.name == "nt":
+                with open(path + ".bat", "w") as script:
+                    script.write('@"{}" "{}" {} %*\n'.format(sys.executable, os.path.abspath(__file__), name))
+            else:
+                for target in (path, path + ".exe"):
+                    with open(target, "w") as script:
+                        script.write('#!/bin/sh\nexec "{}" "{}" {} "$@"\n'.format(sys.executable, os.path.abspath(__file__), name))
+                    os.chmod(target, os.stat(target).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return {"LASTOOLS_FOLDER": os.path.join(folder, "lastools"),
+            "WINE_FOLDER": os.path.join(folder, "wine"),
+            "WHITEBOX_EXECUTABLE": os.path.join(folder, "whitebox", "whitebox_tools"),
+            "TAUDEM_DIRECTORY": os.path.join(folder, "taudem"),
+            "TAUDEM_MPICH": os.path.join(folder, "mpich")}
+
+def work(inputs):
+    delay = float(os.environ.get("BENCH_STUB_DELAY", "0") or 0)
+    if delay > 0:
+        time.sleep(delay * max(1, len(inputs)))
+
+def produce(source, target):
+    # rasters get a small GeoTIFF, everything else a copy of the input
+    directory = os.path.dirname(target)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if os.path.splitext(target)[1].lower() in RASTERS:
+        synthetic.writeGeoTIFF(target, numpy.zeros((64, 64), dtype=numpy.float32))
+    elif source is not None and os.path.isfile(source):
+        shutil.copyfile(source, target)
+    else:
+        open(target, "wb").close()
+
+def lastools(name, arguments):
+    inputs = []
+    output = None
+    odir = None
+    odix = ""
+    extension = None
+    tileSize = None
+    i = 0
+    while i < len(arguments):
+        argument = arguments[i]
+        if argument == "-i":
+            while i + 1 < len(arguments) and not arguments[i + 1].startswith("-"):
+                i += 1
+                inputs.extend(sorted(glob.glob(arguments[i])) or [arguments[i]])
+        elif argument == "-lof" and i + 1 < len(arguments):
+            i += 1
+            with open(arguments[i]) as listOfFiles:
+                inputs.extend(line.strip() for line in listOfFiles if line.strip())
+        elif argument == "-o" and i + 1 < len(arguments):
+            i += 1
+            output = arguments[i]
+        elif argument == "-odir" and i + 1 < len(arguments):
+            i += 1
+            odir = arguments[i]
+        elif argument == "-odix" and i + 1 < len(arguments):
+            i += 1
+            odix = arguments[i]
+        elif argument == "-tile_size" and i + 1 < len(arguments):
+            i += 1
+            tileSize = arguments[i]
+        elif argument in FORMATS:
+            extension = FORMATS[argument]
+        i += 1
+    print("{} (stub) processing {} file(s)".format(name, len(inputs)))
+    sys.stdout.flush()
+    work(inputs)
+
+    if name == "lastile":
+        # four tiles per run named like the real ones
+        base, ext = os.path.splitext(os.path.basename(output)) if output else ("tile", extension or ".laz")
+        directory = odir or (os.path.dirname(output) if output else os.getcwd())
+        size = int(float(tileSize or 1000))
+        for x in (0, size):
+            for y in (0, size):
+                produce(inputs[0] if inputs else None, os.path.join(directory, "{}_{}_{}{}".format(base, x, y, extension or ext or ".laz")))
+        return 0
+    if name == "lasindex":
+        for path in inputs:
+            produce(None, os.path.splitext(path)[0] + ".lax")
+        return 0
+    if output is not None:
+        if extension is not None and not os.path.splitext(output)[1]:
+            output += extension
+        produce(inputs[0] if inputs else None, output)
+        return 0
+    if odir is None and not odix and extension is None:
+        # tools that only print, like lasinfo without -otxt
+        for path in inputs:
+            print("reporting all LAS header entries of '{}'".format(path))
+        return 0
+    for path in inputs:
+        base, ext = os.path.splitext(os.path.basename(path))
+        produce(path, os.path.join(odir or os.path.dirname(path), base + odix + (extension or ext)))
+    return 0
+
+def whitebox(arguments):
+    options = {}
+    for argument in arguments:
+        key, sep, value = argument.partition("=")
+        options[key.lstrip("-")] = value.strip('"') if sep else True
+    if "version" in options:
+        print("WhiteboxTools v2.4.0 (stub)")
+        return 0
+    if "listtools" in options:
+        tools = sorted(os.path.splitext(name)[0] for name in os.listdir(os.path.join(ROOT, "whitebox", "descriptions")))
+        print("All {} Available Tools:".format(len(tools)))
+        for tool in tools:
+            print("{}: stand-in for {}".format(tool, tool))
+        return 0
+    if "toolparameters" in options:
+        print('{"parameters": []}')
+        return 0
+    if "toolbox" in options:
+        print("Other Tools")
+        return 0
+    values = [value for key, value in options.items() if key not in ("run", "wd", "v") and isinstance(value, str)]
+    files = [value for value in values if os.path.splitext(value)[1]]
+    inputs = [value for value in files if os.path.isfile(value)]
+    work(inputs)
+    for progress in range(0, 101, 25):
+        print("Progress: {}%".format(progress))
+    for value in files:
+        if not os.path.exists(value) and os.path.isdir(os.path.dirname(value) or "."):
+            produce(inputs[0] if inputs else None, value)
+    print("Elapsed Time (excluding I/O): 0.0s")
+    return 0
+
+def taudem(name, arguments):
+    values = [argument for argument in arguments if not argument.startswith("-") and os.path.splitext(argument)[1]]
+    inputs = [value for value in values if os.path.isfile(value)]
+    print("{} (stub) version 5.3.8".format(name))
+    sys.stdout.flush()
+    work(inputs)
+    for value in values:
+        if not os.path.exists(value):
+            produce(inputs[0] if inputs else None, value)
+    return 0
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "install":
+        for key, value in install(sys.argv[2]).items():
+            print("{}={}".format(key, value))
+        return 0
+    if len(sys.argv) < 2:
+        print("usage: stub.py install FOLDER | stub.py NAME ARGUMENTS")
+        return 2
+    name = sys.argv[1]
+    if name.lower().endswith(".exe"):
+        name = name[:-4]
+    arguments = sys.argv[2:]
+    if name == "wine":
+        return subprocess.call(arguments)
+    if name == "mpiexec":
+        if len(arguments) > 1 and arguments[0] == "-n":
+            arguments = arguments[2:]
+        return subprocess.call(arguments)
+    if name == "whitebox_tools":
+        return whitebox(arguments)
+    if name in taudemNames():
+        return taudem(name, arguments)
+    return lastools(name, arguments)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    synthetic.py
+    ---------------------
+    Deterministic generators for benchmark data: LAS files of a given
+    extent, density and point format sampled from a fractal terrain with
+    some vegetation on top of it, and DEM GeoTIFFs of fractal terrain with
+    pits cut into it. The same seed always gives the same bytes.
+
+    python benchmarks/synthetic.py las OUT.las [--size 500] [--density 4] [--format 1]
+    python benchmarks/synthetic.py dem OUT.tif [--width 1000] [--height 1000] [--pits 50]
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import sys
+import struct
+import argparse
+
+import numpy
+
+# point record layouts of the point formats LAS 1.2 and LAS 1.4 define
+
+POINT_FORMATS = {
+    0: [("X", "<i4"), ("Y", "<i4"), ("Z", "<i4"), ("intensity", "<u2"), ("returns", "u1"), ("classification", "u1"),
+        ("scan_angle", "i1"), ("user_data", "u1"), ("point_source", "<u2")],
+    6: [("X", "<i4"), ("Y", "<i4"), ("Z", "<i4"), ("intensity", "<u2"), ("returns", "u1"), ("flags", "u1"),
+        ("classification", "u1"), ("user_data", "u1"), ("scan_angle", "<i2"), ("point_source", "<u2"), ("gps_time", "<f8")],
+}
+POINT_FORMATS[1] = POINT_FORMATS[0] + [("gps_time", "<f8")]
+POINT_FORMATS[2] = POINT_FORMATS[0] + [("red", "<u2"), ("green", "<u2"), ("blue", "<u2")]
+POINT_FORMATS[3] = POINT_FORMATS[1] + [("red", "<u2"), ("green", "<u2"), ("blue", "<u2")]
+POINT_FORMATS[7] = POINT_FORMATS[6] + [("red", "<u2"), ("green", "<u2"), ("blue", "<u2")]
+POINT_FORMATS[8] = POINT_FORMATS[7] + [("nir", "<u2")]
+
+def fractalTerrain(width, height, seed=0, roughness=2.4, relief=50.0):
+    # spectral synthesis, the amplitude of every frequency falls off with
+    # a power of the frequency which gives natural looking hills
+    random = numpy.random.RandomState(seed)
+    fy = numpy.fft.fftfreq(height)[:, None]
+    fx = numpy.fft.rfftfreq(width)[None, :]
+    frequency = numpy.hypot(fx, fy)
+    frequency[0, 0] = 1.0
+    spectrum = (random.normal(size=frequency.shape) + 1j * random.normal(size=frequency.shape)) / frequency ** (roughness / 2.0)
+    spectrum[0, 0] = 0.0
+    terrain = numpy.fft.irfft2(spectrum, s=(height, width))
+    terrain -= terrain.min()
+    terrain *= relief / max(terrain.max(), 1e-9)
+    return terrain.astype(numpy.float32)
+
+def addPits(terrain, count, seed=0, depth=5.0, radius=6):
+    # round depressions of a few cells plus as many single cell pits
+    random = numpy.random.RandomState(seed + 1)
+    height, width = terrain.shape
+    y, x = numpy.mgrid[-radius:radius + 1, -radius:radius + 1]
+    bowl = numpy.clip(1.0 - (x * x + y * y) / float(radius * radius), 0.0, None) * depth
+    for i in range(count):
+        row = random.randint(radius, max(radius + 1, height - radius))
+        col = random.randint(radius, max(radius + 1, width - radius))
+        window = terrain[row - radius:row + radius + 1, col - radius:col + radius + 1]
+        window -= bowl[:window.shape[0], :window.shape[1]].astype(numpy.float32)
+        row = random.randint(1, max(2, height - 1))
+        col = random.randint(1, max(2, width - 1))
+        terrain[row, col] = terrain[max(0, row - 1):row + 2, max(0, col - 1):col + 2].min() - depth
+    return terrain
+
+def writeLAS(path, size=500.0, density=4.0, pointFormat=1, origin=(500000.0, 4000000.0), seed=0, epsg=32633, vegetation=0.3):
+    """Writes a LAS file covering a square of the given side length with
+    the given number of points per square unit. The points sample a
+    fractal terrain, a share of them hit vegetation above it.
+    """
+    random = numpy.random.RandomState(seed)
+    count = int(size * size * density)
+    cells = max(16, int(size))
+    terrain = fractalTerrain(cells, cells, seed)
+    x = random.uniform(0.0, size, count)
+    y = random.uniform(0.0, size, count)
+    ground = terrain[numpy.minimum((y / size * cells).astype(int), cells - 1), numpy.minimum((x / size * cells).astype(int), cells - 1)]
+    tall = random.random_sample(count) < vegetation
+    z = ground + numpy.where(tall, random.gamma(2.0, 5.0, count), random.normal(0.0, 0.05, count))
+    numberOfReturns = numpy.where(tall, random.randint(1, 4, count), 1)
+    returnNumber = numpy.minimum(numpy.where(tall, random.randint(1, 4, count), 1), numberOfReturns)
+
+    scale = 0.01
+    points = numpy.zeros(count, dtype=POINT_FORMATS[pointFormat])
+    points["X"] = numpy.round(x / scale)
+    points["Y"] = numpy.round(y / scale)
+    points["Z"] = numpy.round(z / scale)
+    points["intensity"] = random.randint(0, 4096, count)
+    points["classification"] = 1
+    points["point_source"] = 1
+    if pointFormat < 6:
+        points["returns"] = returnNumber | (numberOfReturns << 3)
+        points["scan_angle"] = random.randint(-20, 21, count)
+    else:
+        points["returns"] = returnNumber | (numberOfReturns << 4)
+        points["scan_angle"] = random.randint(-3333, 3334, count)
+    if "gps_time" in points.dtype.names:
+        points["gps_time"] = numpy.arange(count) * 1e-5
+    for band in ("red", "green", "blue", "nir"):
+        if band in points.dtype.names:
+            points[band] = random.randint(0, 65536, count)
+
+    # the GeoKeyDirectoryTag with the EPSG code of the projected CRS
+    keys = struct.pack("<12H", 1, 1, 0, 2, 1024, 0, 1, 1, 3072, 0, 1, epsg)
+    vlr = struct.pack("<H16sHH32s", 0, b"LASF_Projection", 34735, len(keys), b"GeoKeyDirectoryTag") + keys
+
+    legacy = pointFormat < 6
+    headerSize = 227 if legacy else 375
+    byReturn = [int(numpy.count_nonzero(returnNumber == r)) for r in range(1, 16)]
+    minimum = [origin[0] + points["X"].min() * scale, origin[1] + points["Y"].min() * scale, points["Z"].min() * scale]
+    maximum = [origin[0] + points["X"].max() * scale, origin[1] + points["Y"].max() * scale, points["Z"].max() * scale]
+    header = struct.pack("<4sHH16sBB32s32sHHHIIBHI5I3d3d6d", b"LASF", 1, 0, b"\0" * 16, 1, 2 if legacy else 4,
+                         b"synthetic", b"benchmarks/synthetic.py", 1, 2026, headerSize, headerSize + len(vlr), 1,
+                         pointFormat, points.dtype.itemsize, count if legacy else 0, *(byReturn[:5] if legacy else [0] * 5),
+                         scale, scale, scale, origin[0], origin[1], 0.0,
+                         maximum[0], minimum[0], maximum[1], minimum[1], maximum[2], minimum[2])
+    if not legacy:
+        header += struct.pack("<QQIQ15Q", 0, 0, 0, count, *byReturn)
+    with open(path, "wb") as file:
+        file.write(header)
+        file.write(vlr)
+        points.tofile(file)
+    return count
+
+def writeGeoTIFF(path, raster, cellSize=1.0, origin=(500000.0, 4000000.0), epsg=32633, nodata=-32768.0):
+    """Writes a float32 raster as an uncompressed single strip GeoTIFF,
+    origin is the upper left corner.
+    """
+    raster = numpy.ascontiguousarray(raster, dtype="<f4")
+    height, width = raster.shape
+    geoKeys = [1, 1, 0, 3, 1024, 0, 1, 1, 1025, 0, 1, 1, 3072, 0, 1, epsg]
+    nodataText = "{:g}".format(nodata).encode("ascii") + b"\0"
+    # (tag, type, values) with the TIFF types 3 = SHORT, 4 = LONG, 12 = DOUBLE, 2 = ASCII
+    tags = [(256, 4, [width]), (257, 4, [height]), (258, 3, [32]), (259, 3, [1]), (262, 3, [1]),
+            (273, 4, [0]), (277, 3, [1]), (278, 4, [height]), (279, 4, [raster.nbytes]), (284, 3, [1]),
+            (339, 3, [3]), (33550, 12, [cellSize, cellSize, 0.0]), (33922, 12, [0.0, 0.0, 0.0, origin[0], origin[1], 0.0]),
+            (34735, 3, geoKeys), (42113, 2, nodataText)]
+    formats = {2: "s", 3: "H", 4: "I", 12: "d"}
+    blocks = []
+    for tag, kind, values in tags:
+        if kind == 2:
+            blocks.append(struct.pack("<{}s".format(len(values)), values))
+        else:
+            blocks.append(struct.pack("<{}{}".format(len(values), formats[kind]), *values))
+    # values longer than 4 bytes follow the IFD, the raster follows them
+    offset = 8 + 2 + 12 * len(tags) + 4
+    entries = b""
+    payload = b""
+    for (tag, kind, values), block in zip(tags, blocks):
+        if len(block) <= 4:
+            entries += struct.pack("<HHI", tag, kind, len(values)) + block.ljust(4, b"\0")
+        else:
+            entries += struct.pack("<HHII", tag, kind, len(values), offset + len(payload))
+            payload += block + b"\0" * (len(block) % 2)
+    stripOffset = struct.pack("<I", offset + len(payload))
+    entries = entries[:5 * 12 + 8] + stripOffset + entries[6 * 12:]
+    with open(path, "wb") as file:
+        file.write(b"II*\0" + struct.pack("<I", 8))
+        file.write(struct.pack("<H", len(tags)) + entries + struct.pack("<I", 0))
+        file.write(payload)
+        file.write(raster.tobytes())
+
+def writeDEM(path, width=1000, height=1000, cellSize=1.0, pits=50, seed=0):
+    terrain = addPits(fractalTerrain(width, height, seed), pits, seed)
+    writeGeoTIFF(path, terrain, cellSize)
+    return terrain
+
+def main():
+    parser = argparse.ArgumentParser(description="write synthetic benchmark data")
+    subparsers = parser.add_subparsers(dest="kind", required=True)
+    las = subparsers.add_parser("las")
+    las.add_argument("output")
+    las.add_argument("--size", type=float, default=500.0)
+    las.add_argument("--density", type=float, default=4.0)
+    las.add_argument("--format", type=int, default=1, choices=sorted(POINT_FORMATS))
+    las.add_argument("--seed", type=int, default=0)
+    dem = subparsers.add_parser("dem")
+    dem.add_argument("output")
+    dem.add_argument("--width", type=int, default=1000)
+    dem.add_argument("--height", type=int, default=1000)
+    dem.add_argument("--cell-size", type=float, default=1.0)
+    dem.add_argument("--pits", type=int, default=50)
+    dem.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+    if arguments.kind == "las":
+        writeLAS(arguments.output, arguments.size, arguments.density, arguments.format, seed=arguments.seed)
+    else:
+        writeDEM(arguments.output, arguments.width, arguments.height, arguments.cell_size, arguments.pits, arguments.seed)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -26,19 +26,27 @@ __date__ = 'August 2012'
 __copyright__ = '(C) 2012, Victor Olaya'
 
 import os
+import glob
+import heapq
+import hashlib
+import tempfile
 from qgis.PyQt import QtGui
 from PyQt5.QtGui import QIcon
 from qgis.core import (QgsProcessing,
+                       QgsCoordinateReferenceSystem,
                        QgsProcessingAlgorithm,
                        QgsProcessingParameterBoolean,
                        QgsProcessingParameterNumber,
                        QgsProcessingParameterString,
                        QgsProcessingParameterEnum,
                        QgsProcessingParameterFile,
+                       QgsProcessingParameterExtent,
                        QgsProcessingParameterFileDestination,
                        QgsProcessingParameterFolderDestination)
 
 from .LAStoolsUtils import LAStoolsUtils
+from .LAStoolsIndex import LAStoolsIndex
+from .LAStoolsPipeline import LAStoolsPipeline
 
 class LAStoolsAlgorithm(QgsProcessingAlgorithm):
 
@@ -46,12 +54,14 @@ class LAStoolsAlgorithm(QgsProcessingAlgorithm):
     CPU64 = "CPU64"
     GUI = "GUI"
     CORES = "CORES"
+    SHARDS = "SHARDS"
     INPUT_GENERIC = "INPUT_GENERIC"
     INPUT_GENERIC_DIRECTORY = "INPUT_GENERIC_DIRECTORY"
     INPUT_GENERIC_WILDCARDS = "INPUT_GENERIC_WILDCARDS"
     INPUT_LASLAZ = "INPUT_LASLAZ"
     INPUT_DIRECTORY = "INPUT_DIRECTORY"
     INPUT_WILDCARDS = "INPUT_WILDCARDS"
+    AREA_OF_INTEREST = "AREA_OF_INTEREST"
     MERGED = "MERGED"
     OUTPUT_GENERIC = "OUTPUT_GENERIC"
     OUTPUT_LASLAZ = "OUTPUT_LASLAZ"
@@ -67,6 +77,8 @@ class LAStoolsAlgorithm(QgsProcessingAlgorithm):
     OUTPUT_VECTOR_FORMATS = ["shp", "wkt", "kml", "txt"]
     ADDITIONAL_OPTIONS = "ADDITIONAL_OPTIONS"
     TEMPORARY_DIRECTORY = "TEMPORARY_DIRECTORY"
+    RESUME_PIPELINE = "RESUME_PIPELINE"
+    WAVEFRONT_PIPELINE = "WAVEFRONT_PIPELINE"
     HORIZONTAL_FEET = "HORIZONTAL_FEET"
     VERTICAL_FEET = "VERTICAL_FEET"
     FILES_ARE_FLIGHTLINES = "FILES_ARE_FLIGHTLINES"
@@ -152,6 +164,45 @@ class LAStoolsAlgorithm(QgsProcessingAlgorithm):
             commands.append("-cores")
             commands.append(unicode(cores))
 
+    def addParametersShardsGUI(self):
+        self.addParameter(QgsProcessingParameterNumber(LAStoolsAlgorithm.SHARDS, "number of instances running at once on shards of the input files (0 = one instance)", QgsProcessingParameterNumber.Integer, 0, False, 0, 64))
+
+    def runLAStoolsSharded(self, parameters, context, feedback, commands):
+        # instead of relying on '-cores' of a single binary the input files
+        # are split into shards of about the same size and every shard is
+        # processed by its own single-core instance with its own '-lof'. all
+        # instances write into the same output directory, so runs merging
+        # all inputs or writing a single output file are not sharded.
+        shards = self.parameterAsInt(parameters, LAStoolsAlgorithm.SHARDS, context)
+        files = set()
+        for wildcard in self.getParametersPointInputFolderValues(parameters, context):
+            files.update(os.path.normpath(path) for path in glob.glob(wildcard) if os.path.isfile(path))
+        if shards < 2 or len(files) < 2 or "-merged" in commands or "-o" in commands:
+            return LAStoolsUtils.runLAStools(commands, feedback)
+        # largest files first, each onto the shard holding the fewest bytes
+        heap = [(0, i, []) for i in range(min(shards, len(files)))]
+        for size, path in sorted(((os.path.getsize(path), path) for path in files), reverse=True):
+            total, i, paths = heapq.heappop(heap)
+            paths.append(path)
+            heapq.heappush(heap, (total + size, i, paths))
+        inputs = []
+        self.addParametersPointInputFolderCommands(parameters, context, inputs)
+        starts = [i for i in range(len(commands) - len(inputs) + 1) if commands[i:i + len(inputs)] == inputs]
+        if not starts:
+            return LAStoolsUtils.runLAStools(commands, feedback)
+        prefix, suffix = commands[:starts[0]], commands[starts[0] + len(inputs):]
+        if "-cores" in suffix:
+            del suffix[suffix.index("-cores"):suffix.index("-cores") + 2]
+        feedback.pushInfo("processing {} input files in {} shards".format(len(files), len(heap)))
+        pipeline = LAStoolsPipeline(tempfile.gettempdir(), budget=len(heap))
+        for total, i, paths in sorted(heap, key=lambda shard: shard[1]):
+            shard = prefix + ["-lof", '"' + LAStoolsAlgorithm.writeListOfFiles(sorted(paths)) + '"'] + suffix
+            pipeline.addStage("shard {}".format(i + 1), shard, sorted(paths), [])
+        # a failed shard or a cancel leaves outputs missing, so the
+        # algorithm fails instead of reporting them
+        pipeline.run(feedback)
+        return 0
+
     def addParametersGenericInputGUI(self, description, extension, optional):
         self.addParameter(QgsProcessingParameterFile(LAStoolsAlgorithm.INPUT_GENERIC, description, QgsProcessingParameterFile.File, extension, None, optional))
 
@@ -184,11 +235,20 @@ class LAStoolsAlgorithm(QgsProcessingAlgorithm):
             commands.append("-i")
             commands.append('"' + input + '"')
 
+    def getParametersPointInputValue(self, parameters, context):
+        input = self.parameterAsString(parameters, LAStoolsAlgorithm.INPUT_LASLAZ, context)
+        return input
+
     def addParametersPointInputFolderGUI(self):
         self.addParameter(QgsProcessingParameterFile(LAStoolsAlgorithm.INPUT_DIRECTORY, "input directory", QgsProcessingParameterFile.Folder))
         self.addParameter(QgsProcessingParameterString(LAStoolsAlgorithm.INPUT_WILDCARDS, "input wildcard(s)", "*.laz"))
 
     def addParametersPointInputFolderCommands(self, parameters, context, commands):
+        files = self.getParametersPointInputFolderFiles(parameters, context)
+        if files is not None:
+            commands.append("-lof")
+            commands.append('"' + LAStoolsAlgorithm.writeListOfFiles([f["path"] for f in files]) + '"')
+            return
         input = self.parameterAsString(parameters, LAStoolsAlgorithm.INPUT_DIRECTORY, context)
         wildcards = self.parameterAsString(parameters, LAStoolsAlgorithm.INPUT_WILDCARDS, context).split()
         for wildcard in wildcards:
@@ -198,6 +258,69 @@ class LAStoolsAlgorithm(QgsProcessingAlgorithm):
             else:
                 commands.append('"' + wildcard + '"')
 
+    def getParametersPointInputFolderValues(self, parameters, context):
+        input = self.parameterAsString(parameters, LAStoolsAlgorithm.INPUT_DIRECTORY, context)
+        wildcards = self.parameterAsString(parameters, LAStoolsAlgorithm.INPUT_WILDCARDS, context).split()
+        files = self.getParametersPointInputFolderFiles(parameters, context)
+        if files is not None:
+            return [f["path"] for f in files]
+        if input is None:
+            return wildcards
+        return [os.path.join(input, wildcard) for wildcard in wildcards]
+
+    def addParametersAreaOfInterestGUI(self):
+        self.addParameter(QgsProcessingParameterExtent(LAStoolsAlgorithm.AREA_OF_INTEREST, "only use input files touching this area", None, True))
+
+    def getParametersAreaOfInterestValue(self, parameters, context, crs=""):
+        # the area of interest in the CRS of the index given as an 'EPSG:'
+        # code or as WKT, or as entered for files without a CRS
+        if self.parameterDefinition(LAStoolsAlgorithm.AREA_OF_INTEREST) is None or parameters.get(LAStoolsAlgorithm.AREA_OF_INTEREST) is None:
+            return None
+        area = self.parameterAsExtent(parameters, LAStoolsAlgorithm.AREA_OF_INTEREST, context, self.coordinateReferenceSystem(crs))
+        if area.isNull():
+            return None
+        return (area.xMinimum(), area.yMinimum(), area.xMaximum(), area.yMaximum())
+
+    @staticmethod
+    def coordinateReferenceSystem(crs):
+        if not crs:
+            return QgsCoordinateReferenceSystem()
+        if crs.startswith("EPSG:"):
+            return QgsCoordinateReferenceSystem(crs)
+        return QgsCoordinateReferenceSystem.fromWkt(crs)
+
+    def getParametersPointInputFolderFiles(self, parameters, context, feedback=None):
+        # the headers of the input files whose bounding box touches the area
+        # of interest as found in the index of the input directory, or None
+        # when there is no area of interest
+        input = self.parameterAsString(parameters, LAStoolsAlgorithm.INPUT_DIRECTORY, context)
+        if self.getParametersAreaOfInterestValue(parameters, context) is None or not input:
+            return None
+        wildcards = self.parameterAsString(parameters, LAStoolsAlgorithm.INPUT_WILDCARDS, context).split()
+        index = LAStoolsIndex(input)
+        try:
+            # the bounding boxes of the headers are in the CRS of each file,
+            # so the area of interest is looked up in every one of them
+            files = []
+            for crs in index.coordinateReferenceSystems(wildcards):
+                area = self.getParametersAreaOfInterestValue(parameters, context, crs)
+                files.extend(index.files(wildcards, area, crs))
+        finally:
+            index.close()
+        files.sort(key=lambda f: f["path"])
+        if feedback is not None:
+            feedback.pushInfo("{} input files with {} points touch the area of interest".format(len(files), sum(f["point_count"] for f in files)))
+        return files
+
+    @staticmethod
+    def writeListOfFiles(paths):
+        # named after its content so that re-runs use the same command line
+        content = "".join(path + "\n" for path in paths)
+        path = os.path.join(tempfile.gettempdir(), "lastools_" + hashlib.sha1(content.encode("utf-8")).hexdigest()[:16] + ".txt")
+        with open(path, "w") as list:
+            list.write(content)
+        return path
+
     def addParametersPointInputMergedGUI(self):
         self.addParameter(QgsProcessingParameterBoolean(LAStoolsAlgorithm.MERGED, "merge all input files on-the-fly into one", False))
 
@@ -272,6 +395,10 @@ class LAStoolsAlgorithm(QgsProcessingAlgorithm):
             commands.append("-o")
             commands.append('"' + output + '"')
 
+    def getParametersPointOutputValue(self, parameters, context):
+        output = self.parameterAsString(parameters, LAStoolsAlgorithm.OUTPUT_LASLAZ, context)
+        return output
+
     def addParametersPointOutputFormatGUI(self):
         self.addParameter(QgsProcessingParameterEnum(LAStoolsAlgorithm.OUTPUT_POINT_FORMAT, "output format", LAStoolsAlgorithm.OUTPUT_POINT_FORMATS, False, 0))
 
@@ -288,6 +415,10 @@ class LAStoolsAlgorithm(QgsProcessingAlgorithm):
             commands.append("-o")
             commands.append('"' + output + '"')
 
+    def getParametersRasterOutputValue(self, parameters, context):
+        output = self.parameterAsString(parameters, LAStoolsAlgorithm.OUTPUT_RASTER, context)
+        return output
+
     def addParametersRasterOutputFormatGUI(self):
         self.addParameter(QgsProcessingParameterEnum(LAStoolsAlgorithm.OUTPUT_RASTER_FORMAT, "output format", LAStoolsAlgorithm.OUTPUT_RASTER_FORMATS, False, 0))
 
@@ -320,6 +451,10 @@ class LAStoolsAlgorithm(QgsProcessingAlgorithm):
             commands.append("-odir")
             commands.append('"' + odir + '"')
 
+    def getParametersOutputDirectoryValue(self, parameters, context):
+        odir = self.parameterAsString(parameters, LAStoolsAlgorithm.OUTPUT_DIRECTORY, context)
+        return odir
+
     def addParametersOutputAppendixGUI(self):
         self.addParameter(QgsProcessingParameterString(LAStoolsAlgorithm.OUTPUT_APPENDIX, "output appendix", None, False, True))
 
@@ -344,6 +479,22 @@ class LAStoolsAlgorithm(QgsProcessingAlgorithm):
             commands.append("-i")
             commands.append(idir + '\\' + files)    
 
+    def getParametersTemporaryDirectoryValue(self, parameters, context):
+        tdir = self.parameterAsString(parameters, LAStoolsAlgorithm.TEMPORARY_DIRECTORY, context)
+        return tdir
+
+    def addParametersResumePipelineGUI(self):
+        self.addParameter(QgsProcessingParameterBoolean(LAStoolsAlgorithm.RESUME_PIPELINE, "reuse still valid results of an earlier run in the temporary directory", False))
+
+    def getParametersResumePipelineValue(self, parameters, context):
+        return self.parameterAsBool(parameters, LAStoolsAlgorithm.RESUME_PIPELINE, context)
+
+    def addParametersWavefrontPipelineGUI(self):
+        self.addParameter(QgsProcessingParameterBoolean(LAStoolsAlgorithm.WAVEFRONT_PIPELINE, "move every tile through all stages on its own and delete its intermediate files early", False))
+
+    def getParametersWavefrontPipelineValue(self, parameters, context):
+        return self.parameterAsBool(parameters, LAStoolsAlgorithm.WAVEFRONT_PIPELINE, context)
+
     def addParametersAdditionalGUI(self):
         self.addParameter(QgsProcessingParameterString(LAStoolsAlgorithm.ADDITIONAL_OPTIONS, "additional command line parameter(s)", None, False, True))
 
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    LAStoolsBackend.py
+    ---------------------
+    This script decides whether a LAStools command line runs the binary or
+    the native implementation of the tool in LAStoolsNative. With the
+    LASTOOLS_NATIVE setting on, every command line of a tool that has a
+    native implementation runs in-process, unless it has an option the
+    native implementation does not support, in which case the binary runs
+    as before.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import shlex
+import importlib
+
+from qgis.core import QgsProcessingException
+from processing.core.ProcessingConfig import ProcessingConfig
+
+# the tools with a module of the same name in LAStoolsNative
+
+NATIVE_TOOLS = ["las2las", "lasgrid", "lasthin", "las2dem", "blast2dem", "lasheight", "lasground",
+                "lasground_new", "lastile", "lascanopy", "lasboundary", "lasduplicate", "lasnoise"]
+
+# the algorithms that need Windows or Wine for the binaries but whose every
+# command line the native tools run, so that they are also available on
+# other platforms when the native backend is on
+
+NATIVE_ALGORITHMS = ["lasgrid", "lasgridPro", "lasthin", "lasthinPro", "las2dem", "las2demPro", "blast2dem", "blast2demPro",
+                     "lasheight", "lasheightPro", "lasheight_classify", "lasheightPro_classify",
+                     "lasground", "lasgroundPro", "lasground_new", "lasgroundPro_new",
+                     "lastile", "lastilePro"]
+
+class LAStoolsBackend:
+
+    @staticmethod
+    def isNative():
+        return bool(ProcessingConfig.getSetting("LASTOOLS_NATIVE"))
+
+    @staticmethod
+    def toolArguments(commands):
+        # the name of the tool and its arguments, without the wine loader
+        # and without the quotes the algorithms put around paths, whose
+        # backslashes before wildcards become separators of this platform
+        commandline = " ".join(commands)
+        arguments = shlex.split(commandline, posix=False)
+        arguments = [argument.strip('"').replace("\\", os.sep) for argument in arguments]
+        i = 0
+        while i < len(arguments) - 1 and os.path.basename(arguments[i]).lower().startswith("wine"):
+            i += 1
+        if i >= len(arguments):
+            return None, []
+        tool = os.path.basename(arguments[i]).lower()
+        if tool.endswith(".exe"):
+            tool = tool[:-4]
+        if tool.endswith("64"):
+            tool = tool[:-2]
+        return tool, arguments[i + 1:]
+
+    @staticmethod
+    def run(commands, feedback):
+        """Runs the command line natively and returns the exit code, or
+        None if the binary has to run.
+        """
+        if not LAStoolsBackend.isNative():
+            return None
+        tool, arguments = LAStoolsBackend.toolArguments(commands)
+        if tool not in NATIVE_TOOLS:
+            return None
+        from .LAStoolsNative.LAStoolsCommand import LAStoolsCommand, LAStoolsNativeUnsupported
+        try:
+            command = LAStoolsCommand(tool, arguments)
+            module = importlib.import_module(".LAStoolsNative." + tool, __package__)
+            feedback.pushConsoleInfo("running native {}".format(tool))
+            return module.run(command, feedback)
+        except LAStoolsNativeUnsupported as e:
+            feedback.pushConsoleInfo("native {} does not support '{}', running the binary".format(tool, e))
+            return None
+        except QgsProcessingException:
+            raise
+        except Exception as e:
+            # the binary may not even exist here, so the error is not hidden
+            # behind a run of it
+            raise QgsProcessingException("native {} failed: {}".format(tool, e)) from e
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    LAStoolsIndex.py
+    ---------------------
+    This script reads the public header, the VLRs and the EVLRs of LAS and
+    LAZ files without touching their points and keeps bounding box, point
+    count, point format and CRS of all files of a folder in a persistent
+    SQLite R-tree, so that files missing an area of interest can be skipped
+    without running lasinfo on every one of them.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import glob
+import fnmatch
+import struct
+import sqlite3
+import hashlib
+
+from qgis.core import QgsApplication
+
+class LASHeader:
+
+    # the fields of the public header block every LAS version has
+
+    FORMAT = "<4sHH16sBB32s32sHHHIIBHI5I3d3d6d"
+    SIZE = struct.calcsize(FORMAT)
+
+    # the geokeys holding the EPSG code of projected and geographic CRSs
+
+    PROJECTED_CS_TYPE = 3072
+    GEOGRAPHIC_TYPE = 2048
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            data = file.read(375)
+            if len(data) < LASHeader.SIZE or data[0:4] != b"LASF":
+                raise ValueError("{} is not a LAS or LAZ file".format(path))
+            fields = struct.unpack_from(LASHeader.FORMAT, data)
+            self.globalEncoding = fields[2]
+            self.version = "{}.{}".format(fields[4], fields[5])
+            self.headerSize = fields[10]
+            self.offsetToPointData = fields[11]
+            self.numberOfVLRs = fields[12]
+            # LASzip marks compressed points by setting the two upper bits
+            self.compressed = (fields[13] & 0xC0) != 0
+            self.pointFormat = fields[13] & 0x3F
+            self.pointRecordLength = fields[14]
+            self.pointCount = fields[15]
+            self.scale = fields[21:24]
+            self.offset = fields[24:27]
+            self.maxX, self.minX, self.maxY, self.minY, self.maxZ, self.minZ = fields[27:33]
+            self.firstEVLR = 0
+            self.numberOfEVLRs = 0
+            if fields[5] >= 4 and self.headerSize >= 375 and len(data) >= 375:
+                self.firstEVLR, self.numberOfEVLRs, count = struct.unpack_from("<QIQ", data, 235)
+                if count:
+                    self.pointCount = count
+            self.vlrs = []
+            file.seek(self.headerSize)
+            for i in range(self.numberOfVLRs):
+                header = file.read(54)
+                if len(header) < 54:
+                    break
+                _, userId, recordId, length, _ = struct.unpack("<H16sHH32s", header)
+                self.vlrs.append((LASHeader.text(userId), recordId, file.read(length)))
+            if self.numberOfEVLRs and self.firstEVLR:
+                file.seek(self.firstEVLR)
+                for i in range(self.numberOfEVLRs):
+                    header = file.read(60)
+                    if len(header) < 60:
+                        break
+                    _, userId, recordId, length, _ = struct.unpack("<H16sHQ32s", header)
+                    if userId.startswith(b"LASF_Projection") or userId.startswith(b"laszip encoded"):
+                        self.vlrs.append((LASHeader.text(userId), recordId, file.read(length)))
+                    else:
+                        file.seek(length, os.SEEK_CUR)
+        if any(userId == "laszip encoded" for userId, _, _ in self.vlrs):
+            self.compressed = True
+        self.crs = self.coordinateReferenceSystem()
+
+    @staticmethod
+    def text(data):
+        return data.split(b"\0", 1)[0].decode("ascii", "replace")
+
+    def coordinateReferenceSystem(self):
+        # an 'EPSG:' code from the GeoKeyDirectoryTag or else the OGC WKT
+        for userId, recordId, data in self.vlrs:
+            if userId == "LASF_Projection" and recordId == 34735 and len(data) >= 8:
+                keys = struct.unpack("<{}H".format(len(data) // 2), data[:len(data) // 2 * 2])
+                for i in range(4, 4 + 4 * keys[3], 4):
+                    if i + 3 < len(keys) and keys[i] in (LASHeader.PROJECTED_CS_TYPE, LASHeader.GEOGRAPHIC_TYPE) and keys[i + 1] == 0 and 0 < keys[i + 3] < 32767:
+                        return "EPSG:{}".format(keys[i + 3])
+        for userId, recordId, data in self.vlrs:
+            if userId == "LASF_Projection" and recordId == 2112:
+                return data.split(b"\0", 1)[0].decode("utf-8", "replace")
+        return ""
+
+class LAStoolsIndex:
+
+    # bounding boxes, point counts, point formats and CRSs of the LAS and
+    # LAZ files of one folder, refreshed for files whose size or mtime
+    # changed since they were last indexed
+
+    COLUMNS = ["path", "size", "mtime", "version", "compressed", "point_format", "point_count",
+               "min_x", "min_y", "min_z", "max_x", "max_y", "max_z", "crs"]
+
+    def __init__(self, directory, database=None):
+        self.directory = os.path.normcase(os.path.normpath(directory))
+        if database is None:
+            database = LAStoolsIndex.databasePath(self.directory)
+        self.connection = sqlite3.connect(database)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, size INTEGER, mtime INTEGER, version TEXT, compressed INTEGER, "
+                                "point_format INTEGER, point_count INTEGER, min_x REAL, min_y REAL, min_z REAL, max_x REAL, max_y REAL, max_z REAL, crs TEXT)")
+        try:
+            self.connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS files_rtree USING rtree(id, min_x, max_x, min_y, max_y)")
+            self.rtree = True
+        except sqlite3.OperationalError:
+            # SQLite was built without the R-tree module
+            self.rtree = False
+        self.connection.commit()
+
+    @staticmethod
+    def databasePath(directory):
+        folder = os.path.join(QgsApplication.qgisSettingsDirPath(), "lastools", "index")
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, hashlib.sha1(directory.encode("utf-8")).hexdigest() + ".sqlite")
+
+    def close(self):
+        self.connection.close()
+
+    def update(self, wildcards, feedback=None):
+        paths = set()
+        for wildcard in wildcards:
+            for path in glob.glob(os.path.join(self.directory, wildcard)):
+                if os.path.isfile(path):
+                    paths.add(os.path.normcase(os.path.normpath(path)))
+        known = dict((row[1], row) for row in self.connection.execute("SELECT id, path, size, mtime FROM files"))
+        for path in sorted(paths):
+            status = os.stat(path)
+            row = known.get(path)
+            if row is not None and row[2] == status.st_size and row[3] == status.st_mtime_ns:
+                continue
+            try:
+                header = LASHeader(path)
+            except (OSError, ValueError, struct.error) as e:
+                if feedback is not None:
+                    feedback.pushInfo("skipping {}: {}".format(path, e))
+                continue
+            if row is not None:
+                self.remove(row[0])
+            cursor = self.connection.execute("INSERT INTO files (" + ", ".join(LAStoolsIndex.COLUMNS) + ") VALUES (" + ", ".join("?" * len(LAStoolsIndex.COLUMNS)) + ")",
+                                             (path, status.st_size, status.st_mtime_ns, header.version, int(header.compressed), header.pointFormat, header.pointCount,
+                                              header.minX, header.minY, header.minZ, header.maxX, header.maxY, header.maxZ, header.crs))
+            if self.rtree:
+                self.connection.execute("INSERT INTO files_rtree VALUES (?, ?, ?, ?, ?)", (cursor.lastrowid, header.minX, header.maxX, header.minY, header.maxY))
+        # files that were deleted since the last update
+        for path, row in known.items():
+            if not os.path.exists(path):
+                self.remove(row[0])
+        self.connection.commit()
+
+    def remove(self, id):
+        self.connection.execute("DELETE FROM files WHERE id = ?", (id,))
+        if self.rtree:
+            self.connection.execute("DELETE FROM files_rtree WHERE id = ?", (id,))
+
+    def files(self, wildcards, area=None, crs=None):
+        # the indexed files matching the wildcards whose bounding box touches
+        # the area given as (min_x, min_y, max_x, max_y) and whose CRS is
+        # crs, as dictionaries with the columns of the index
+        self.update(wildcards)
+        query = "SELECT " + ", ".join("files." + column for column in LAStoolsIndex.COLUMNS) + " FROM files"
+        conditions = []
+        arguments = []
+        if area is not None:
+            if self.rtree:
+                query += " JOIN files_rtree ON files.id = files_rtree.id"
+                conditions.append("files_rtree.max_x >= ? AND files_rtree.min_x <= ? AND files_rtree.max_y >= ? AND files_rtree.min_y <= ?")
+            else:
+                conditions.append("files.max_x >= ? AND files.min_x <= ? AND files.max_y >= ? AND files.min_y <= ?")
+            arguments.extend((area[0], area[2], area[1], area[3]))
+        if crs is not None:
+            conditions.append("files.crs = ?")
+            arguments.append(crs)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        patterns = [os.path.normcase(os.path.normpath(os.path.join(self.directory, wildcard))) for wildcard in wildcards]
+        files = []
+        for row in self.connection.execute(query + " ORDER BY files.path", arguments):
+            entry = dict(zip(LAStoolsIndex.COLUMNS, row))
+            if any(fnmatch.fnmatchcase(entry["path"], pattern) for pattern in patterns):
+                files.append(entry)
+        return files
+
+    def coordinateReferenceSystems(self, wildcards):
+        # the CRSs of the indexed files matching the wildcards, with "" for
+        # files without one
+        return sorted(set(f["crs"] for f in self.files(wildcards)))
+
+    @staticmethod
+    def extent(files):
+        if not files:
+            return None
+        return (min(f["min_x"] for f in files), min(f["min_y"] for f in files), max(f["max_x"] for f in files), max(f["max_y"] for f in files))
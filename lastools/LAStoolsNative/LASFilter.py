@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    LASFilter.py
+    ---------------------
+    This script evaluates the point filters of LAStools (-keep_class,
+    -drop_z_below, -keep_last, ...) on chunks of point records as
+    vectorized masks. Filters that depend on the order in which points
+    are read, like -keep_every_nth or -thin_with_grid, are not supported.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import numpy
+
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+
+# filters without values, as functions of the points and a chunk of their
+# records that return the mask of the points to keep
+
+FLAGS = {
+    "keep_first": lambda p, r: p.returnNumber(r) == 1,
+    "drop_first": lambda p, r: p.returnNumber(r) != 1,
+    "keep_last": lambda p, r: p.returnNumber(r) >= p.numberOfReturns(r),
+    "drop_last": lambda p, r: p.returnNumber(r) < p.numberOfReturns(r),
+    "keep_middle": lambda p, r: (p.returnNumber(r) > 1) & (p.returnNumber(r) < p.numberOfReturns(r)),
+    "drop_middle": lambda p, r: (p.returnNumber(r) == 1) | (p.returnNumber(r) >= p.numberOfReturns(r)),
+    "keep_first_of_many": lambda p, r: (p.returnNumber(r) == 1) & (p.numberOfReturns(r) > 1),
+    "keep_last_of_many": lambda p, r: (p.returnNumber(r) >= p.numberOfReturns(r)) & (p.numberOfReturns(r) > 1),
+    "keep_single": lambda p, r: p.numberOfReturns(r) == 1,
+    "drop_single": lambda p, r: p.numberOfReturns(r) != 1,
+    "keep_double": lambda p, r: p.numberOfReturns(r) == 2,
+    "drop_double": lambda p, r: p.numberOfReturns(r) != 2,
+    "keep_triple": lambda p, r: p.numberOfReturns(r) == 3,
+    "drop_triple": lambda p, r: p.numberOfReturns(r) != 3,
+    "keep_synthetic": lambda p, r: p.flag(r, 0),
+    "drop_synthetic": lambda p, r: ~p.flag(r, 0),
+    "keep_keypoint": lambda p, r: p.flag(r, 1),
+    "drop_keypoint": lambda p, r: ~p.flag(r, 1),
+    "keep_withheld": lambda p, r: p.flag(r, 2),
+    "drop_withheld": lambda p, r: ~p.flag(r, 2),
+    "keep_overlap": lambda p, r: p.flag(r, 3),
+    "drop_overlap": lambda p, r: ~p.flag(r, 3),
+}
+
+# filters with one value, as attribute and comparison, where the
+# comparison tells which points are kept
+
+def attribute(name):
+    return {
+        "x": lambda p, r: p.x(r),
+        "y": lambda p, r: p.y(r),
+        "z": lambda p, r: p.z(r),
+        "intensity": lambda p, r: r["intensity"],
+        "gps_time": lambda p, r: r["gps_time"],
+        "scan_angle": lambda p, r: p.scanAngle(r),
+        "point_source": lambda p, r: r["point_source_id"],
+        "user_data": lambda p, r: r["user_data"],
+    }[name]
+
+THRESHOLDS = {}
+for name in ("x", "y", "z", "intensity", "gps_time", "scan_angle", "point_source", "user_data"):
+    THRESHOLDS["drop_{}_above".format(name)] = (name, numpy.less_equal)
+    THRESHOLDS["drop_{}_below".format(name)] = (name, numpy.greater_equal)
+for name in ("point_source", "user_data"):
+    THRESHOLDS["keep_{}".format(name)] = (name, numpy.equal)
+    THRESHOLDS["drop_{}".format(name)] = (name, numpy.not_equal)
+
+# filters with a range, keeping or dropping minimum <= value < maximum
+
+RANGES = {"keep_z": "z", "drop_z": "z", "keep_intensity": "intensity", "drop_intensity": "intensity",
+          "keep_gps_time": "gps_time", "drop_gps_time": "gps_time", "keep_scan_angle": "scan_angle", "drop_scan_angle": "scan_angle"}
+
+class LASFilter:
+
+    def __init__(self):
+        self.keepClasses = set()
+        self.dropClasses = set()
+        self.keepReturns = set()
+        self.dropReturns = set()
+        self.criteria = []
+        self.arguments = []
+
+    def add(self, option, values):
+        # takes a filter of the command line, False if it is not a filter
+        name = option.lstrip("-")
+        try:
+            if name in FLAGS and not values:
+                self.criteria.append(FLAGS[name])
+            elif name in ("keep_class", "keep_classification") and values:
+                self.keepClasses.update(int(value) for value in values)
+            elif name in ("drop_class", "drop_classification") and values:
+                self.dropClasses.update(int(value) for value in values)
+            elif name == "keep_return" and values:
+                self.keepReturns.update(int(value) for value in values)
+            elif name == "drop_return" and values:
+                self.dropReturns.update(int(value) for value in values)
+            elif name in THRESHOLDS and len(values) == 1:
+                field, compare = THRESHOLDS[name]
+                get = attribute(field)
+                threshold = float(values[0])
+                self.criteria.append(lambda p, r: compare(get(p, r), threshold))
+            elif name in RANGES and len(values) == 2:
+                get = attribute(RANGES[name])
+                minimum, maximum = float(values[0]), float(values[1])
+                if name.startswith("keep"):
+                    self.criteria.append(lambda p, r: (get(p, r) >= minimum) & (get(p, r) < maximum))
+                else:
+                    self.criteria.append(lambda p, r: (get(p, r) < minimum) | (get(p, r) >= maximum))
+            elif name == "keep_xy" and len(values) == 4:
+                minX, minY, maxX, maxY = [float(value) for value in values]
+                self.criteria.append(lambda p, r: (p.x(r) >= minX) & (p.x(r) < maxX) & (p.y(r) >= minY) & (p.y(r) < maxY))
+            elif name in ("keep_every_nth", "keep_random_fraction", "thin_with_grid", "thin_with_voxel", "keep_circle", "keep_tile"):
+                raise LAStoolsNativeUnsupported(" ".join([option] + values))
+            else:
+                return False
+        except ValueError:
+            raise LAStoolsNativeUnsupported(" ".join([option] + values))
+        self.arguments.append([option] + list(values))
+        return True
+
+    def split(self, names):
+        """The filters of the given names and the other filters, as two
+        filters that together keep the same points as this one.
+        """
+        selected = LASFilter()
+        others = LASFilter()
+        for argument in self.arguments:
+            (selected if argument[0] in names else others).add(argument[0], argument[1:])
+        return selected, others
+
+    def isEmpty(self):
+        return not (self.keepClasses or self.dropClasses or self.keepReturns or self.dropReturns or self.criteria)
+
+    def mask(self, points, records):
+        """The mask of the records that pass all filters."""
+        keep = numpy.ones(len(records), dtype=bool)
+        if self.keepClasses or self.dropClasses:
+            classification = points.classification(records)
+            if self.keepClasses:
+                keep &= numpy.isin(classification, sorted(self.keepClasses))
+            if self.dropClasses:
+                keep &= ~numpy.isin(classification, sorted(self.dropClasses))
+        if self.keepReturns or self.dropReturns:
+            returnNumber = points.returnNumber(records)
+            if self.keepReturns:
+                keep &= numpy.isin(returnNumber, sorted(self.keepReturns))
+            if self.dropReturns:
+                keep &= ~numpy.isin(returnNumber, sorted(self.dropReturns))
+        for criterion in self.criteria:
+            keep &= criterion(points, records)
+        return keep
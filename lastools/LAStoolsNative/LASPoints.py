@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    LASPoints.py
+    ---------------------
+    This script maps the point records of uncompressed LAS files into
+    memory as NumPy structured arrays and writes selections of them back
+    to LAS files. LAZ files are decompressed and compressed with the
+    laszip executable, which LAStools ships for every platform.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import copy
+import struct
+import tempfile
+
+import numpy
+
+from qgis.core import QgsProcessingFeedback
+from processing.core.ProcessingConfig import ProcessingConfig
+
+from ..LAStoolsUtils import LAStoolsUtils
+from ..LAStoolsIndex import LASHeader
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+
+# the fields of the point records of all point formats, the classification
+# of the formats 0 to 5 shares its byte with the synthetic, keypoint and
+# withheld flags and the formats 6 to 10 keep all flags in their own byte
+
+LEGACY_FIELDS = [("X", "<i4"), ("Y", "<i4"), ("Z", "<i4"), ("intensity", "<u2"), ("returns", "u1"), ("classification", "u1"),
+                 ("scan_angle", "i1"), ("user_data", "u1"), ("point_source_id", "<u2")]
+EXTENDED_FIELDS = [("X", "<i4"), ("Y", "<i4"), ("Z", "<i4"), ("intensity", "<u2"), ("returns", "u1"), ("flags", "u1"),
+                   ("classification", "u1"), ("user_data", "u1"), ("scan_angle", "<i2"), ("point_source_id", "<u2"), ("gps_time", "<f8")]
+GPS_TIME = [("gps_time", "<f8")]
+RGB = [("red", "<u2"), ("green", "<u2"), ("blue", "<u2")]
+NIR = [("nir", "<u2")]
+WAVE_PACKET = [("wave_packet", "V29")]
+
+POINT_FIELDS = {
+    0: LEGACY_FIELDS,
+    1: LEGACY_FIELDS + GPS_TIME,
+    2: LEGACY_FIELDS + RGB,
+    3: LEGACY_FIELDS + GPS_TIME + RGB,
+    4: LEGACY_FIELDS + GPS_TIME + WAVE_PACKET,
+    5: LEGACY_FIELDS + GPS_TIME + RGB + WAVE_PACKET,
+    6: EXTENDED_FIELDS,
+    7: EXTENDED_FIELDS + RGB,
+    8: EXTENDED_FIELDS + RGB + NIR,
+    9: EXTENDED_FIELDS + WAVE_PACKET,
+    10: EXTENDED_FIELDS + RGB + NIR + WAVE_PACKET,
+}
+
+# the numpy types of the data types of extra bytes attributes
+
+EXTRA_BYTES_TYPES = {1: "u1", 2: "i1", 3: "<u2", 4: "<i2", 5: "<u4", 6: "<i4", 7: "<u8", 8: "<i8", 9: "<f4", 10: "<f8"}
+
+# points processed at once by the native tools
+
+CHUNK = 1 << 22
+
+def pointType(pointFormat, recordLength):
+    if pointFormat not in POINT_FIELDS:
+        raise LAStoolsNativeUnsupported("point format {}".format(pointFormat))
+    fields = list(POINT_FIELDS[pointFormat])
+    size = numpy.dtype(fields).itemsize
+    if recordLength < size:
+        raise LAStoolsNativeUnsupported("point records of {} bytes for point format {}".format(recordLength, pointFormat))
+    if recordLength > size:
+        fields.append(("extra_bytes", "V{}".format(recordLength - size)))
+    return numpy.dtype(fields)
+
+def laszipCommand():
+    # the laszip executable next to the other tools, without it LAZ files
+    # can not be read or written natively
+    folder = ProcessingConfig.getSetting("LASTOOLS_FOLDER") or ""
+    name = "laszip.exe" if LAStoolsUtils.hasWine() or os.name == "nt" else "laszip"
+    if not os.path.isfile(os.path.join(folder, "bin", name)):
+        raise LAStoolsNativeUnsupported("LAZ files without {}".format(os.path.join(folder, "bin", name)))
+    return os.path.join(LAStoolsUtils.LAStoolsPath(), "bin", name)
+
+def laszip(source, target, feedback=None):
+    if feedback is None:
+        feedback = QgsProcessingFeedback()
+    LAStoolsUtils.runLAStools([laszipCommand(), "-i", '"' + source + '"', "-o", '"' + target + '"'], feedback)
+    if not os.path.isfile(target):
+        raise OSError("laszip could not convert {} to {}".format(source, target))
+
+class LASPoints:
+
+    # the points of one LAS file, records is a read-only memory map of
+    # all point records
+
+    def __init__(self, path, feedback=None):
+        self.path = path
+        self.temporary = None
+        header = LASHeader(path)
+        if header.compressed:
+            laszipCommand()
+            handle, self.temporary = tempfile.mkstemp(suffix=".las")
+            os.close(handle)
+            laszip(path, self.temporary, feedback)
+            header = LASHeader(self.temporary)
+        self.header = header
+        self.pointFormat = header.pointFormat
+        self.extended = header.pointFormat >= 6
+        self.scale = numpy.array(header.scale)
+        self.offset = numpy.array(header.offset)
+        self.dtype = pointType(header.pointFormat, header.pointRecordLength)
+        source = self.temporary or path
+        size = os.path.getsize(source)
+        count = min(header.pointCount, max(0, size - header.offsetToPointData) // self.dtype.itemsize)
+        if count > 0:
+            self.records = numpy.memmap(source, dtype=self.dtype, mode="r", offset=header.offsetToPointData, shape=(count,))
+        else:
+            self.records = numpy.zeros(0, dtype=self.dtype)
+        with open(source, "rb") as file:
+            self.headerBytes = file.read(header.offsetToPointData)
+            self.evlrBytes = b""
+            if header.numberOfEVLRs and header.firstEVLR:
+                file.seek(header.firstEVLR)
+                self.evlrBytes = file.read()
+
+    def __len__(self):
+        return len(self.records)
+
+    def close(self):
+        self.records = None
+        if self.temporary is not None:
+            try:
+                os.remove(self.temporary)
+            except OSError:
+                pass
+            self.temporary = None
+
+    def chunks(self, size=CHUNK):
+        for start in range(0, len(self.records), size):
+            yield start, self.records[start:start + size]
+
+    def x(self, records):
+        return records["X"] * self.scale[0] + self.offset[0]
+
+    def y(self, records):
+        return records["Y"] * self.scale[1] + self.offset[1]
+
+    def z(self, records):
+        return records["Z"] * self.scale[2] + self.offset[2]
+
+    def classification(self, records):
+        if self.extended:
+            return records["classification"]
+        return records["classification"] & 0x1F
+
+    def returnNumber(self, records):
+        if self.extended:
+            return records["returns"] & 0x0F
+        return records["returns"] & 0x07
+
+    def numberOfReturns(self, records):
+        if self.extended:
+            return records["returns"] >> 4
+        return (records["returns"] >> 3) & 0x07
+
+    def flag(self, records, bit):
+        # bit 0 synthetic, 1 keypoint, 2 withheld and 3 overlap
+        if self.extended:
+            return (records["flags"] & (1 << bit)) != 0
+        if bit == 3:
+            return (records["classification"] & 0x1F) == 12
+        return (records["classification"] & (0x20 << bit)) != 0
+
+    @staticmethod
+    def geoKeys(header):
+        # the GeoKeyDirectoryTag, GeoDoubleParamsTag and GeoAsciiParamsTag
+        # records, which GeoTIFF stores in the tags of the same numbers
+        keys = {}
+        for userId, recordId, data in header.vlrs:
+            if userId == "LASF_Projection" and recordId in (34735, 34736, 34737):
+                keys[recordId] = data
+        return keys
+
+    @staticmethod
+    def tileBoundingBox(header):
+        """The bounding box (min_x, min_y, max_x, max_y) of the tile
+        lastile stored in its VLR, None for files that are not tiles.
+        """
+        for userId, recordId, data in header.vlrs:
+            if userId == "LAStools" and recordId == 10 and len(data) >= 28:
+                level, levelIndex, flags, minX, maxX, minY, maxY = struct.unpack_from("<III4f", data)
+                # the quadtree cell of the tile at its level
+                while level > 0:
+                    level -= 1
+                    child = (levelIndex >> (2 * level)) & 3
+                    midX = (minX + maxX) / 2.0
+                    midY = (minY + maxY) / 2.0
+                    if child < 2:
+                        maxY = midY
+                    else:
+                        minY = midY
+                    if child & 1:
+                        minX = midX
+                    else:
+                        maxX = midX
+                return (minX, minY, maxX, maxY)
+        return None
+
+    def headerVLRs(self):
+        """The position, user id, record id and payload length of the VLRs
+        in the header bytes, which copies may have changed.
+        """
+        vlrs = []
+        position = self.header.headerSize
+        for i in range(struct.unpack_from("<I", self.headerBytes, 100)[0]):
+            userId, recordId, length = struct.unpack_from("<2x16sHH", self.headerBytes, position)
+            vlrs.append((position, userId.rstrip(b"\0").decode("ascii", "replace"), recordId, length))
+            position += 54 + length
+        return vlrs
+
+    def withHeaderBytes(self, header, recordLength):
+        # a copy of the points for LASWriter with other VLRs or records,
+        # all bytes before the points are the header and its VLRs
+        header = bytearray(header)
+        struct.pack_into("<I", header, 96, len(header))
+        struct.pack_into("<H", header, 105, recordLength)
+        points = copy.copy(self)
+        points.headerBytes = bytes(header)
+        points.dtype = pointType(self.pointFormat, recordLength)
+        return points
+
+    def withVLR(self, userId, recordId, description, data):
+        """A copy of the points for LASWriter with another VLR after the
+        last one.
+        """
+        vlrs = self.headerVLRs()
+        position = vlrs[-1][0] + 54 + vlrs[-1][3] if vlrs else self.header.headerSize
+        header = bytearray(self.headerBytes)
+        header[position:position] = struct.pack("<H16sHH32s", 0, userId.encode("ascii"), recordId, len(data), description.encode("ascii")) + data
+        struct.pack_into("<I", header, 100, len(vlrs) + 1)
+        return self.withHeaderBytes(header, self.dtype.itemsize)
+
+    def withoutVLR(self, userId, recordId):
+        # a copy of the points for LASWriter without the VLRs of the id
+        header = bytearray(self.headerBytes)
+        vlrs = self.headerVLRs()
+        removed = [(position, length) for position, user, record, length in vlrs if user == userId and record == recordId]
+        for position, length in reversed(removed):
+            del header[position:position + 54 + length]
+        struct.pack_into("<I", header, 100, len(vlrs) - len(removed))
+        return self.withHeaderBytes(header, self.dtype.itemsize)
+
+    def extraBytesDescriptors(self):
+        """The position of the Extra Bytes VLR, None without one, and the
+        name, byte offset in the extra bytes and numpy type of every
+        attribute it describes, None for the types of undocumented bytes.
+        """
+        for position, userId, recordId, length in self.headerVLRs():
+            if userId == "LASF_Spec" and recordId == 4:
+                attributes = []
+                offset = 0
+                for start in range(position + 54, position + 54 + length - 191, 192):
+                    dataType, options, name = struct.unpack_from("<2xBB32s", self.headerBytes, start)
+                    if dataType == 0:
+                        size, numpyType = options, None
+                    elif dataType in EXTRA_BYTES_TYPES:
+                        numpyType = numpy.dtype(EXTRA_BYTES_TYPES[dataType])
+                        size = numpyType.itemsize
+                    else:
+                        raise LAStoolsNativeUnsupported("the deprecated extra bytes data type {}".format(dataType))
+                    attributes.append((name.rstrip(b"\0").decode("ascii", "replace"), offset, numpyType))
+                    offset += size
+                return position, attributes
+        return None, []
+
+    def extraBytesAttribute(self, name):
+        """The byte offset in the point records and the numpy type of an
+        extra bytes attribute of the file, None if it has none of the name.
+        """
+        for attribute, offset, numpyType in self.extraBytesDescriptors()[1]:
+            if attribute == name and numpyType is not None:
+                return self.dtype.fields["extra_bytes"][1] + offset, numpyType
+        return None
+
+    def extraBytes(self, records, name):
+        # the values of an extra bytes attribute of the file
+        offset, numpyType = self.extraBytesAttribute(name)
+        raw = numpy.ascontiguousarray(records).view(numpy.uint8).reshape(len(records), self.dtype.itemsize)
+        return numpy.ascontiguousarray(raw[:, offset:offset + numpyType.itemsize]).view(numpyType).ravel()
+
+    def withExtraBytes(self, name, dataType, scale=None, description=""):
+        """A copy of the points for LASWriter whose header describes and
+        whose records have an additional extra bytes attribute.
+        """
+        if name in self.dtype.names:
+            raise LAStoolsNativeUnsupported("a second extra bytes attribute '{}'".format(name))
+        descriptor = struct.pack("<2xBB32s4x24x24x24x3d24x32s", dataType, 0 if scale is None else 0x08, name.encode("ascii"),
+                                 1.0 if scale is None else scale, 0.0, 0.0, description.encode("ascii"))
+        size = numpy.dtype(EXTRA_BYTES_TYPES[dataType]).itemsize
+        header = bytearray(self.headerBytes)
+        # the descriptor goes into the Extra Bytes VLR or a new one after
+        # the last VLR
+        position, attributes = self.extraBytesDescriptors()
+        if position is not None:
+            length = struct.unpack_from("<H", header, position + 20)[0]
+            if length + len(descriptor) > 0xFFFF:
+                raise LAStoolsNativeUnsupported("more extra bytes attributes than one VLR can describe")
+            struct.pack_into("<H", header, position + 20, length + len(descriptor))
+            header[position + 54 + length:position + 54 + length] = descriptor
+            points = self.withHeaderBytes(header, self.dtype.itemsize + size)
+        else:
+            points = self.withHeaderBytes(header, self.dtype.itemsize + size).withVLR("LASF_Spec", 4, "Extra Bytes", descriptor)
+        points.dtype = numpy.dtype(self.dtype.descr + [(name, EXTRA_BYTES_TYPES[dataType])])
+        return points
+
+    def withoutExtraBytes(self, name):
+        """A copy of the points for LASWriter without an extra bytes
+        attribute and the columns of the bytes of the point records it
+        keeps.
+        """
+        position, attributes = self.extraBytesDescriptors()
+        offset, numpyType = self.extraBytesAttribute(name)
+        index = [attribute for attribute, start, attributeType in attributes].index(name)
+        header = bytearray(self.headerBytes)
+        length = struct.unpack_from("<H", header, position + 20)[0]
+        del header[position + 54 + 192 * index:position + 54 + 192 * (index + 1)]
+        struct.pack_into("<H", header, position + 20, length - 192)
+        columns = numpy.r_[0:offset, offset + numpyType.itemsize:self.dtype.itemsize]
+        points = self.withHeaderBytes(header, len(columns))
+        if length == 192:
+            points = points.withoutVLR("LASF_Spec", 4)
+        return points, columns
+
+    def scanAngle(self, records):
+        if self.extended:
+            return records["scan_angle"] * 0.006
+        return records["scan_angle"].astype(numpy.float64)
+
+class LASWriter:
+
+    # writes point records with the header and the VLRs of a source file
+    # and fixes point counts and bounding box when it is closed
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.compress = os.path.splitext(path)[1].lower() == ".laz"
+        if self.compress:
+            laszipCommand()
+            handle, self.target = tempfile.mkstemp(suffix=".las", dir=os.path.dirname(os.path.abspath(path)))
+            os.close(handle)
+        else:
+            self.target = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.file = open(self.target, "wb")
+        self.file.write(source.headerBytes)
+        self.count = 0
+        self.byReturn = numpy.zeros(16, dtype=numpy.int64)
+        self.minimum = numpy.full(3, numpy.iinfo(numpy.int32).max, dtype=numpy.int64)
+        self.maximum = numpy.full(3, numpy.iinfo(numpy.int32).min, dtype=numpy.int64)
+
+    def suspend(self):
+        # closes the file until the next write, for writers of many files
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def write(self, records):
+        if len(records) == 0:
+            return
+        if self.file is None:
+            self.file = open(self.target, "r+b")
+            self.file.seek(0, os.SEEK_END)
+        records = numpy.ascontiguousarray(records, dtype=self.source.dtype)
+        self.file.write(records.tobytes())
+        self.count += len(records)
+        self.byReturn += numpy.bincount(self.source.returnNumber(records), minlength=16)[:16]
+        for i, field in enumerate(("X", "Y", "Z")):
+            self.minimum[i] = min(self.minimum[i], int(records[field].min()))
+            self.maximum[i] = max(self.maximum[i], int(records[field].max()))
+
+    def close(self, feedback=None):
+        if self.file is None:
+            self.file = open(self.target, "r+b")
+            self.file.seek(0, os.SEEK_END)
+        firstEVLR = self.file.tell()
+        self.file.write(self.source.evlrBytes)
+        if self.count:
+            minimum = self.minimum * self.source.scale + self.source.offset
+            maximum = self.maximum * self.source.scale + self.source.offset
+        else:
+            minimum = maximum = numpy.zeros(3)
+        legacy = not self.source.extended and self.count < (1 << 32)
+        self.file.seek(107)
+        self.file.write(struct.pack("<I5I", self.count if legacy else 0, *[int(c) if legacy else 0 for c in self.byReturn[1:6]]))
+        self.file.seek(179)
+        self.file.write(struct.pack("<6d", maximum[0], minimum[0], maximum[1], minimum[1], maximum[2], minimum[2]))
+        if self.source.header.headerSize >= 375:
+            self.file.seek(235)
+            self.file.write(struct.pack("<Q", firstEVLR if self.source.evlrBytes else 0))
+            self.file.seek(247)
+            self.file.write(struct.pack("<Q15Q", self.count, *[int(c) for c in self.byReturn[1:16]]))
+        self.file.close()
+        if self.compress:
+            try:
+                laszip(self.target, self.path, feedback)
+            finally:
+                os.remove(self.target)
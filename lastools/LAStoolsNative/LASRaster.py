@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    LASRaster.py
+    ---------------------
+    This script writes the rasters of the native tools as GeoTIFF, BIL or
+    ASC files and reads the BIL rasters LAStools writes, so that gridding
+    stages can take the rasters of earlier stages as points, as the
+    binaries do.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import struct
+
+import numpy
+
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+
+# the raster formats the native tools write
+
+RASTER_FORMATS = ["tif", "bil", "asc"]
+
+# the value LAStools writes into cells without points
+
+NODATA = -9999.0
+
+# rows per strip of the GeoTIFFs
+
+ROWS_PER_STRIP = 64
+
+class LASRaster:
+
+    # a grid of cells of size step whose upper left corner is at (left, top)
+
+    def __init__(self, left, top, step, rows, cols, geoKeys=None):
+        self.left = float(left)
+        self.top = float(top)
+        self.step = float(step)
+        self.rows = int(rows)
+        self.cols = int(cols)
+        self.geoKeys = geoKeys or {}
+
+    @staticmethod
+    def covering(minX, minY, maxX, maxY, step, geoKeys=None):
+        # the grid with corners on multiples of step that covers a bounding box
+        left = numpy.floor(minX / step) * step
+        bottom = numpy.floor(minY / step) * step
+        cols = int(numpy.floor((maxX - left) / step)) + 1
+        rows = int(numpy.floor((maxY - bottom) / step)) + 1
+        return LASRaster(left, bottom + rows * step, step, rows, cols, geoKeys)
+
+    @staticmethod
+    def exactly(minX, minY, maxX, maxY, step, geoKeys=None):
+        # the grid of a tile bounding box, without a cell for the points on
+        # its upper and right border
+        cols = max(1, int(round((maxX - minX) / step)))
+        rows = max(1, int(round((maxY - minY) / step)))
+        return LASRaster(minX, minY + rows * step, step, rows, cols, geoKeys)
+
+    def cells(self, x, y):
+        """The flat cell index of every point, -1 for points outside."""
+        # like the tiles of lastile every cell holds its lower and left
+        # border but not its upper and right one
+        col = numpy.floor((x - self.left) / self.step).astype(numpy.int64)
+        row = self.rows - 1 - numpy.floor((y - (self.top - self.rows * self.step)) / self.step).astype(numpy.int64)
+        inside = (col >= 0) & (col < self.cols) & (row >= 0) & (row < self.rows)
+        return numpy.where(inside, row * self.cols + col, -1)
+
+    def centers(self):
+        x = self.left + (numpy.arange(self.cols) + 0.5) * self.step
+        y = self.top - (numpy.arange(self.rows) + 0.5) * self.step
+        return x, y
+
+    def write(self, path, values, nodata=NODATA):
+        values = numpy.asarray(values, dtype=numpy.float32).reshape(self.rows, self.cols)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        extension = os.path.splitext(path)[1].lower().lstrip(".")
+        if extension == "tif":
+            self.writeGeoTIFF(path, values, nodata)
+        elif extension == "bil":
+            self.writeBIL(path, values, nodata)
+        elif extension == "asc":
+            self.writeASC(path, values, nodata)
+        else:
+            raise LAStoolsNativeUnsupported("rasters in {} format".format(extension))
+
+    def writeGeoTIFF(self, path, values, nodata):
+        data = numpy.ascontiguousarray(values, dtype="<f4")
+        strips = [data[row:row + ROWS_PER_STRIP].tobytes() for row in range(0, self.rows, ROWS_PER_STRIP)]
+        geoKeys = self.geoKeys.get(34735) or struct.pack("<4H", 1, 1, 0, 0)
+        nodataText = "{:g}".format(nodata).encode("ascii") + b"\0"
+        # (tag, type, values) with the TIFF types 2 ASCII, 3 SHORT, 4 LONG and 12 DOUBLE
+        tags = [(256, 4, [self.cols]), (257, 4, [self.rows]), (258, 3, [32]), (259, 3, [1]), (262, 3, [1]),
+                (273, 4, [0] * len(strips)), (277, 3, [1]), (278, 4, [ROWS_PER_STRIP]), (279, 4, [len(strip) for strip in strips]),
+                (284, 3, [1]), (339, 3, [3]), (33550, 12, [self.step, self.step, 0.0]),
+                (33922, 12, [0.0, 0.0, 0.0, self.left, self.top, 0.0]),
+                (34735, 3, list(struct.unpack("<{}H".format(len(geoKeys) // 2), geoKeys)))]
+        if self.geoKeys.get(34736):
+            doubles = self.geoKeys[34736]
+            tags.append((34736, 12, list(struct.unpack("<{}d".format(len(doubles) // 8), doubles))))
+        if self.geoKeys.get(34737):
+            tags.append((34737, 2, self.geoKeys[34737].rstrip(b"\0") + b"\0"))
+        tags.append((42113, 2, nodataText))
+        formats = {2: "s", 3: "H", 4: "I", 12: "d"}
+        # values longer than 4 bytes follow the IFD, the strips follow them
+        offset = 8 + 2 + 12 * len(tags) + 4
+        blocks = []
+        for tag, kind, items in tags:
+            if kind == 2:
+                blocks.append(items)
+            else:
+                blocks.append(struct.pack("<{}{}".format(len(items), formats[kind]), *items))
+        payloadSize = sum(len(block) + len(block) % 2 for block in blocks if len(block) > 4)
+        stripOffsets = []
+        position = offset + payloadSize
+        for strip in strips:
+            stripOffsets.append(position)
+            position += len(strip)
+        entries = b""
+        payload = b""
+        for (tag, kind, items), block in zip(tags, blocks):
+            if tag == 273:
+                block = struct.pack("<{}I".format(len(stripOffsets)), *stripOffsets)
+            count = len(items)
+            if len(block) <= 4:
+                entries += struct.pack("<HHI", tag, kind, count) + block.ljust(4, b"\0")
+            else:
+                entries += struct.pack("<HHII", tag, kind, count, offset + len(payload))
+                payload += block + b"\0" * (len(block) % 2)
+        with open(path, "wb") as file:
+            file.write(b"II*\0" + struct.pack("<I", 8))
+            file.write(struct.pack("<H", len(tags)) + entries + struct.pack("<I", 0))
+            file.write(payload)
+            for strip in strips:
+                file.write(strip)
+
+    def writeBIL(self, path, values, nodata):
+        numpy.ascontiguousarray(values, dtype="<f4").tofile(path)
+        with open(os.path.splitext(path)[0] + ".hdr", "w") as header:
+            header.write("nrows {}\nncols {}\nnbands 1\nnbits 32\npixeltype float\nbyteorder I\nlayout bil\n".format(self.rows, self.cols))
+            header.write("ulxmap {!r}\nulymap {!r}\nxdim {!r}\nydim {!r}\nnodata {:g}\n".format(self.left + 0.5 * self.step, self.top - 0.5 * self.step, self.step, self.step, nodata))
+
+    def writeASC(self, path, values, nodata):
+        with open(path, "w") as file:
+            file.write("ncols {}\nnrows {}\nxllcorner {!r}\nyllcorner {!r}\ncellsize {!r}\nNODATA_value {:g}\n".format(
+                self.cols, self.rows, self.left, self.top - self.rows * self.step, self.step, nodata))
+            numpy.savetxt(file, values, fmt="%.7g")
+
+    @staticmethod
+    def readBIL(path):
+        """The raster, the values and the no data value of a BIL file
+        described by the .hdr file next to it.
+        """
+        fields = {}
+        with open(os.path.splitext(path)[0] + ".hdr") as header:
+            for line in header:
+                parts = line.split()
+                if len(parts) >= 2:
+                    fields[parts[0].lower()] = parts[1]
+        rows, cols = int(fields["nrows"]), int(fields["ncols"])
+        if int(fields.get("nbands", 1)) != 1:
+            raise LAStoolsNativeUnsupported("BIL files with several bands")
+        bits = int(fields.get("nbits", 8))
+        kind = fields.get("pixeltype", "unsignedint").lower()
+        order = ">" if fields.get("byteorder", "I").upper() == "M" else "<"
+        if kind.startswith("float"):
+            dtype = "{}f{}".format(order, bits // 8)
+        elif kind.startswith("signed"):
+            dtype = "{}i{}".format(order, bits // 8)
+        else:
+            dtype = "{}u{}".format(order, bits // 8)
+        values = numpy.fromfile(path, dtype=dtype, count=rows * cols).reshape(rows, cols)
+        xdim = float(fields.get("xdim", 1.0))
+        ydim = float(fields.get("ydim", xdim))
+        if abs(xdim - ydim) > 1e-9 * max(1.0, abs(xdim)):
+            raise LAStoolsNativeUnsupported("BIL files with rectangular cells")
+        left = float(fields.get("ulxmap", 0.0)) - 0.5 * xdim
+        top = float(fields.get("ulymap", rows * ydim)) + 0.5 * ydim
+        nodata = float(fields["nodata"]) if "nodata" in fields else None
+        return LASRaster(left, top, xdim, rows, cols), values, nodata
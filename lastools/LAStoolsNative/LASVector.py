@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    LASVector.py
+    ---------------------
+    This script writes the polygons of the native tools as GeoPackages or
+    ESRI Shapefiles with QgsVectorFileWriter. Every feature is a
+    multipolygon of rings of coordinates with the attributes of the file
+    it was computed from.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import struct
+
+import numpy
+
+from qgis.PyQt.QtCore import QVariant
+from qgis.core import (QgsCoordinateReferenceSystem,
+                       QgsFeature,
+                       QgsField,
+                       QgsFields,
+                       QgsGeometry,
+                       QgsVectorFileWriter,
+                       QgsWkbTypes)
+
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+
+# the vector formats the native tools write and their OGR drivers
+
+VECTOR_FORMATS = ["gpkg", "shp"]
+DRIVERS = {"gpkg": "GPKG", "shp": "ESRI Shapefile"}
+
+# the attributes of every feature with their type, length and precision
+
+ATTRIBUTES = [("file", QVariant.String, 254, 0), ("points", QVariant.LongLong, 18, 0),
+              ("min_x", QVariant.Double, 19, 3), ("min_y", QVariant.Double, 19, 3), ("max_x", QVariant.Double, 19, 3), ("max_y", QVariant.Double, 19, 3)]
+
+class LASVector:
+
+    # the features of a layer, every feature a list of polygons, every
+    # polygon a list of rings, the exterior ring counterclockwise first
+
+    def __init__(self, crs=""):
+        self.crs = crs
+        self.features = []
+
+    def add(self, polygons, attributes):
+        self.features.append(([[numpy.asarray(ring, dtype=numpy.float64) for ring in polygon] for polygon in polygons], attributes))
+
+    def extent(self, polygons=None):
+        if polygons is None:
+            rings = [ring for polygons, attributes in self.features for polygon in polygons for ring in polygon]
+        else:
+            rings = [ring for polygon in polygons for ring in polygon]
+        if not rings:
+            return (0.0, 0.0, 0.0, 0.0)
+        points = numpy.concatenate(rings)
+        return (points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max())
+
+    def coordinateReferenceSystem(self):
+        # the CRS of the LAS header, an EPSG code or OGC WKT
+        if not self.crs:
+            return QgsCoordinateReferenceSystem()
+        if self.crs.startswith("EPSG:"):
+            return QgsCoordinateReferenceSystem(self.crs)
+        return QgsCoordinateReferenceSystem.fromWkt(self.crs)
+
+    @staticmethod
+    def wkb(polygons):
+        # a little endian WKB multipolygon
+        data = [struct.pack("<BII", 1, 6, len(polygons))]
+        for polygon in polygons:
+            data.append(struct.pack("<BII", 1, 3, len(polygon)))
+            for ring in polygon:
+                closed = numpy.concatenate([ring, ring[:1]])
+                data.append(struct.pack("<I", len(closed)) + numpy.ascontiguousarray(closed, dtype="<f8").tobytes())
+        return b"".join(data)
+
+    def write(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        extension = os.path.splitext(path)[1].lower().lstrip(".")
+        if extension not in DRIVERS:
+            raise LAStoolsNativeUnsupported("vectors in {} format".format(extension))
+        fields = QgsFields()
+        for name, kind, length, precision in ATTRIBUTES:
+            fields.append(QgsField(name, kind, "", length, precision))
+        writer = QgsVectorFileWriter(path, "UTF-8", fields, QgsWkbTypes.MultiPolygon, self.coordinateReferenceSystem(), DRIVERS[extension])
+        try:
+            if writer.hasError() != QgsVectorFileWriter.NoError:
+                raise OSError("cannot write {}: {}".format(path, writer.errorMessage()))
+            for polygons, attributes in self.features:
+                feature = QgsFeature(fields)
+                if polygons:
+                    geometry = QgsGeometry()
+                    geometry.fromWkb(self.wkb(polygons))
+                    feature.setGeometry(geometry)
+                feature.setAttributes([attributes.get(name) for name, kind, length, precision in ATTRIBUTES])
+                if not writer.addFeature(feature):
+                    raise OSError("cannot write {}: {}".format(path, writer.errorMessage()))
+        finally:
+            # the file is complete once the writer is gone
+            del writer
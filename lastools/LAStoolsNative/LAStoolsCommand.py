@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    LAStoolsCommand.py
+    ---------------------
+    This script parses the LAStools command lines the algorithms build into
+    input files, output naming, point filters and the remaining tool
+    specific options, which the native implementations of the tools take
+    one by one. A command line with an option no native implementation
+    understands raises LAStoolsNativeUnsupported before anything is
+    written, so that the binary can run instead.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import glob
+
+class LAStoolsNativeUnsupported(Exception):
+    pass
+
+# switches that only change what the binaries print
+
+IGNORED = ["-v", "-verbose", "-very_verbose", "-quiet", "-cpu64", "-no_stdout"]
+
+# output format switches and the extensions of the files they write
+
+FORMATS = {"-olas": "las", "-olaz": "laz", "-otxt": "txt", "-obil": "bil", "-otif": "tif", "-oasc": "asc",
+           "-oimg": "img", "-odtm": "dtm", "-oxyz": "xyz", "-opng": "png", "-ojpg": "jpg", "-oshp": "shp",
+           "-owkt": "wkt", "-okml": "kml", "-ogpkg": "gpkg"}
+
+def isNumber(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+class LAStoolsCommand:
+
+    def __init__(self, tool, arguments):
+        # imported here as LASFilter needs numpy, which the provider does
+        # not import until a native tool runs
+        from .LASFilter import LASFilter
+        self.tool = tool
+        self.inputs = []
+        self.output = None
+        self.odir = None
+        self.odix = ""
+        self.ocut = 0
+        self.format = None
+        self.merged = False
+        self.cores = 1
+        self.filter = LASFilter()
+        self.options = []
+        i = 0
+        while i < len(arguments):
+            argument = arguments[i]
+            values = []
+            while i + 1 < len(arguments) and (not arguments[i + 1].startswith("-") or isNumber(arguments[i + 1])):
+                i += 1
+                values.append(arguments[i])
+            i += 1
+            if argument == "-i":
+                for value in values:
+                    self.inputs.extend(sorted(glob.glob(value)) or [value])
+            elif argument == "-lof" and len(values) == 1:
+                with open(values[0]) as listOfFiles:
+                    self.inputs.extend(line.strip() for line in listOfFiles if line.strip())
+            elif argument == "-o" and len(values) == 1:
+                self.output = values[0]
+            elif argument == "-odir" and len(values) == 1:
+                self.odir = values[0]
+            elif argument == "-odix" and len(values) == 1:
+                self.odix = values[0]
+            elif argument == "-ocut" and len(values) == 1:
+                self.ocut = max(0, int(float(values[0])))
+            elif argument in FORMATS and not values:
+                self.format = FORMATS[argument]
+            elif argument == "-merged" and not values:
+                self.merged = True
+            elif argument == "-cores" and len(values) == 1:
+                self.cores = max(1, int(float(values[0])))
+            elif argument in IGNORED and not values:
+                pass
+            elif self.filter.add(argument, values):
+                pass
+            else:
+                self.options.append([argument] + values)
+
+    def switch(self, name):
+        # takes a switch without values, True if it was given
+        for option in self.options:
+            if option == [name]:
+                self.options.remove(option)
+                return True
+        return False
+
+    def values(self, name, count=None, convert=float):
+        # takes an option with its values, None if it was not given
+        for option in self.options:
+            if option[0] == name and (count is None or len(option) == count + 1):
+                self.options.remove(option)
+                try:
+                    return [convert(value) for value in option[1:]]
+                except ValueError:
+                    raise LAStoolsNativeUnsupported(" ".join(option))
+        return None
+
+    def value(self, name, default=None, convert=float):
+        values = self.values(name, 1, convert)
+        return default if values is None else values[0]
+
+    def finish(self):
+        # called by the native tools once they took all the options they
+        # know, anything left over is not supported
+        if self.options:
+            raise LAStoolsNativeUnsupported(" ".join(" ".join(option) for option in self.options))
+        if not self.inputs:
+            raise LAStoolsNativeUnsupported("no input files")
+        for path in self.inputs:
+            if not os.path.isfile(path):
+                raise LAStoolsNativeUnsupported("missing input file {}".format(path))
+
+    def hasOutput(self):
+        return self.output is not None or self.odir is not None or self.odix != "" or self.format is not None
+
+    def outputPath(self, path, extension=None):
+        """The file the binary writes for an input file, with the format
+        switch, the extension of the input file or the given extension.
+        """
+        if self.output is not None:
+            if len(self.inputs) > 1 and not self.merged:
+                raise LAStoolsNativeUnsupported("-o with several input files")
+            # like the binaries, -odir is the folder of a relative -o
+            if self.odir is not None and not os.path.isabs(self.output):
+                return os.path.join(self.odir, self.output)
+            return self.output
+        base, inputExtension = os.path.splitext(os.path.basename(path))
+        if self.ocut:
+            base = base[:-self.ocut]
+        extension = self.format or extension or inputExtension.lstrip(".").lower()
+        directory = self.odir if self.odir is not None else os.path.dirname(path)
+        output = os.path.join(directory, base + self.odix + "." + extension)
+        if os.path.normcase(os.path.abspath(output)) == os.path.normcase(os.path.abspath(path)):
+            output = os.path.join(directory, base + self.odix + "_1." + extension)
+        return output
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    blast2dem.py
+    ---------------------
+    Native blast2dem, which streams the TIN of files too large for las2dem.
+    The native las2dem triangulates in memory with the same results, so
+    blast2dem runs it.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from .las2dem import run
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    las2dem.py
+    ---------------------
+    Native las2dem and blast2dem, which triangulate the points with a
+    Delaunay triangulation and sample the elevation or intensity of the
+    triangles at the cell centers of a raster, leaving out triangles with
+    edges longer than -kill. The points read and the triangulations built
+    are kept in a cache shared by all command lines, so that command lines
+    rasterizing the same file with different -kill, -step or -use_tile_bb
+    triangulate it once, and those that only differ in filters on z, like
+    the levels of the pit-free CHM pipeline, read it once.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import struct
+import threading
+import collections
+
+import numpy
+
+from .LASPoints import LASPoints, CHUNK
+from .LASRaster import LASRaster, RASTER_FORMATS, NODATA
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+from .lasgrid import boundingBox
+
+ATTRIBUTES = ["elevation", "intensity"]
+
+# the filters applied to the points read from the cache instead of while
+# reading them
+
+Z_FILTERS = ["-drop_z_below", "-drop_z_above", "-keep_z", "-drop_z"]
+
+# the default longest edge of the triangles that are rasterized
+
+KILL = 100.0
+
+# the bytes of points and triangulations the cache keeps
+
+CACHE_BYTES = 1 << 30
+
+class LASTINCache:
+
+    # the least recently used points and triangulations, computed only once
+    # when several threads of a pipeline ask for the same one at a time
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.entries = collections.OrderedDict()
+        self.sizes = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            pending = self.pending.setdefault(key, threading.Lock())
+        with pending:
+            with self.lock:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    return self.entries[key]
+            try:
+                value, size = compute()
+            finally:
+                with self.lock:
+                    self.pending.pop(key, None)
+            with self.lock:
+                if size <= self.budget:
+                    self.entries[key] = value
+                    self.sizes[key] = size
+                    while sum(self.sizes.values()) > self.budget:
+                        oldest = next(iter(self.entries))
+                        del self.entries[oldest]
+                        del self.sizes[oldest]
+            return value
+
+CACHE = LASTINCache(CACHE_BYTES)
+
+def isInFeet(geoKeys):
+    # the ProjLinearUnitsGeoKey of the GeoKeyDirectoryTag
+    directory = geoKeys.get(34735)
+    if not directory or len(directory) < 8:
+        return False
+    keys = struct.unpack("<{}H".format(len(directory) // 2), directory)
+    for i in range(4, min(len(keys), 4 + 4 * keys[3]) - 3, 4):
+        if keys[i] == 3076 and keys[i + 1] == 0:
+            return keys[i + 3] in (9002, 9003)
+    return False
+
+def readPoints(paths, pointFilter, feedback):
+    """The points of the files that pass the filter, as the closed
+    LASPoints of every file with a copy of its records.
+    """
+    files = []
+    size = 0
+    for path in paths:
+        points = LASPoints(path, feedback)
+        try:
+            records = numpy.concatenate([records[pointFilter.mask(points, records)] for start, records in points.chunks()] or
+                                        [numpy.zeros(0, dtype=points.dtype)])
+        finally:
+            points.close()
+        files.append((points, records))
+        size += records.nbytes
+    return files, size
+
+def triangulate(files, zFilter, attribute):
+    """The Delaunay triangulation of the points that pass the filters on
+    z relative to its origin, None if they do not span a triangle, and the
+    values of its points.
+    """
+    from scipy.spatial import Delaunay, QhullError
+    x, y, values = [], [], []
+    for points, records in files:
+        records = records[zFilter.mask(points, records)]
+        x.append(points.x(records))
+        y.append(points.y(records))
+        if attribute == "elevation":
+            values.append(points.z(records))
+        else:
+            values.append(records["intensity"].astype(numpy.float64))
+    coordinates = numpy.stack([numpy.concatenate(x), numpy.concatenate(y)], axis=1)
+    values = numpy.concatenate(values)
+    if len(values) < 3:
+        return (None, None, values), values.nbytes
+    # relative to the lower left corner, as qhull loses the precision of
+    # the coordinates of projected CRSs
+    origin = coordinates.min(axis=0)
+    try:
+        tin = Delaunay(coordinates - origin)
+    except QhullError:
+        return (None, None, values), values.nbytes
+    # the transform is computed on first use, which is here and not
+    # concurrently in the threads sharing the triangulation
+    size = tin.points.nbytes + tin.transform.nbytes + 3 * tin.simplices.nbytes + values.nbytes
+    return (tin, origin, values), size
+
+def rasterize(tin, origin, values, raster, kill):
+    """The values of the triangulation at the cell centers of the raster,
+    NaN where no triangle short enough covers a center.
+    """
+    result = numpy.full(raster.rows * raster.cols, numpy.nan)
+    if tin is None:
+        return result
+    corners = tin.points[tin.simplices]
+    edges = corners - numpy.roll(corners, 1, axis=1)
+    killed = (edges ** 2).sum(axis=2).max(axis=1) > kill * kill
+    x, y = raster.centers()
+    rows = max(1, CHUNK // max(1, raster.cols))
+    for row in range(0, raster.rows, rows):
+        gridX, gridY = numpy.meshgrid(x, y[row:row + rows])
+        centers = numpy.stack([gridX.ravel() - origin[0], gridY.ravel() - origin[1]], axis=1)
+        simplex = tin.find_simplex(centers)
+        inside = numpy.nonzero(simplex >= 0)[0]
+        inside = inside[~killed[simplex[inside]]]
+        simplex = simplex[inside]
+        transform = tin.transform[simplex]
+        weights = numpy.einsum("nij,nj->ni", transform[:, :2], centers[inside] - transform[:, 2])
+        corner = values[tin.simplices[simplex]]
+        result[row * raster.cols + inside] = weights[:, 0] * corner[:, 0] + weights[:, 1] * corner[:, 1] + \
+            (1.0 - weights[:, 0] - weights[:, 1]) * corner[:, 2]
+    return result
+
+def run(command, feedback):
+    step = command.value("-step", 1.0)
+    kill = command.value("-kill", KILL)
+    attribute = "elevation"
+    for name in ATTRIBUTES:
+        if command.switch("-" + name):
+            attribute = name
+    tile = command.switch("-use_tile_bb")
+    nodata = command.value("-nodata", NODATA)
+    lowerLeft = command.values("-ll", 2)
+    cols = command.value("-ncols", None, int)
+    rows = command.value("-nrows", None, int)
+    command.finish()
+    if step <= 0 or kill <= 0:
+        raise LAStoolsNativeUnsupported("-step {} -kill {}".format(step, kill))
+    if (lowerLeft is None) != (cols is None) or (lowerLeft is None) != (rows is None):
+        raise LAStoolsNativeUnsupported("-ll without both -ncols and -nrows")
+    if tile and (command.merged or lowerLeft is not None):
+        raise LAStoolsNativeUnsupported("-use_tile_bb with -merged or -ll")
+    for path in command.inputs:
+        if os.path.splitext(path)[1].lower() not in (".las", ".laz"):
+            raise LAStoolsNativeUnsupported("input {}".format(path))
+    zFilter, pointFilter = command.filter.split(Z_FILTERS)
+
+    if command.merged:
+        jobs = [(command.outputPath(command.inputs[0], "png"), command.inputs)]
+    else:
+        jobs = [(command.outputPath(path, "png"), [path]) for path in command.inputs]
+    for output, paths in jobs:
+        if os.path.splitext(output)[1].lower().lstrip(".") not in RASTER_FORMATS:
+            raise LAStoolsNativeUnsupported("output {}".format(output))
+
+    for index, (output, paths) in enumerate(jobs):
+        if feedback.isCanceled():
+            return 1
+        boxes = [boundingBox(path, tile) for path in paths]
+        geoKeys = next((keys for box, keys in boxes if keys), {})
+        if isInFeet(geoKeys):
+            raise LAStoolsNativeUnsupported("-kill for coordinates in feet")
+        if lowerLeft is not None:
+            raster = LASRaster(lowerLeft[0], lowerLeft[1] + rows * step, step, rows, cols, geoKeys)
+        elif tile:
+            raster = LASRaster.exactly(*boxes[0][0], step=step, geoKeys=geoKeys)
+        else:
+            raster = LASRaster.covering(min(box[0] for box, keys in boxes), min(box[1] for box, keys in boxes),
+                                        max(box[2] for box, keys in boxes), max(box[3] for box, keys in boxes), step, geoKeys)
+
+        # a file that changed on disk is a different key
+        identity = tuple((os.path.abspath(path), os.stat(path).st_size, os.stat(path).st_mtime_ns) for path in paths)
+        pointsKey = (identity, repr(pointFilter.arguments))
+        files = CACHE.get(pointsKey, lambda: readPoints(paths, pointFilter, feedback))
+        tin, origin, values = CACHE.get((pointsKey, repr(zFilter.arguments), attribute), lambda: triangulate(files, zFilter, attribute))
+        result = rasterize(tin, origin, values, raster, kill)
+        result[numpy.isnan(result)] = nodata
+        raster.write(output, result, nodata)
+        feedback.pushConsoleInfo("{}: {} x {} cells from a TIN of {} points".format(output, raster.cols, raster.rows, len(values)))
+        feedback.setProgress(100.0 * (index + 1) / len(jobs))
+    return 0
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    las2las.py
+    ---------------------
+    Native las2las, which filters the points of every input file into an
+    output file chunk by chunk.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from .LASPoints import LASPoints, LASWriter
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+
+def run(command, feedback):
+    command.finish()
+    if not command.hasOutput():
+        raise LAStoolsNativeUnsupported("no output")
+    if command.merged:
+        raise LAStoolsNativeUnsupported("-merged")
+    for index, path in enumerate(command.inputs):
+        if feedback.isCanceled():
+            return 1
+        points = LASPoints(path, feedback)
+        try:
+            writer = LASWriter(command.outputPath(path), points)
+            for start, records in points.chunks():
+                writer.write(records[command.filter.mask(points, records)])
+            writer.close(feedback)
+            feedback.pushConsoleInfo("{}: kept {} of {} points".format(path, writer.count, len(points)))
+        finally:
+            points.close()
+        feedback.setProgress(100.0 * (index + 1) / len(command.inputs))
+    return 0
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    lasboundary.py
+    ---------------------
+    Native lasboundary, which computes the footprints of the points of
+    every file. The points are rasterized into an occupancy grid with
+    cells of an eighth of the concavity, which a closing with a disk of
+    half the concavity turns into the area a concave hull of that
+    concavity covers, and the edges of the occupied cells are traced into
+    rings. The files are read by threads and their grids traced by a pool
+    of processes, and with -overview the footprints of all files go into
+    one GeoPackage with a spatial index instead of one file per footprint.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import sys
+import math
+import multiprocessing
+import concurrent.futures
+
+import numpy
+
+from .LASPoints import LASPoints
+from .LASVector import LASVector, VECTOR_FORMATS
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+from .lasgrid import boundingBox
+from ..LAStoolsIndex import LASHeader
+
+# the cells of the occupancy grid per concavity and at most per file
+
+CELLS_PER_CONCAVITY = 8
+MAXIMUM_CELLS = 1 << 24
+
+# the unit steps of the edge directions, counterclockwise from east
+
+STEPS = numpy.array([[1, 0], [0, 1], [-1, 0], [0, -1]])
+
+def pythonExecutable():
+    # QGIS embeds Python, so its sys.executable may be the QGIS binary
+    # that cannot run the processes of the pool
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+    for candidate in (os.path.join(sys.exec_prefix, "python.exe"), os.path.join(sys.exec_prefix, "bin", "python3")):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def processPool(workers):
+    """A pool of processes, None where no Python to run them is found."""
+    python = pythonExecutable()
+    if workers < 2 or python is None:
+        return None
+    context = multiprocessing.get_context("spawn")
+    context.set_executable(python)
+    return concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+def occupancy(command, path, concavity, feedback):
+    """The occupancy grid of the points of a file that pass the filters,
+    with its lower left corner, cell size and the number of points.
+    """
+    points = LASPoints(path, feedback)
+    try:
+        header = points.header
+        cell = concavity / CELLS_PER_CONCAVITY
+        area = max(header.maxX - header.minX, cell) * max(header.maxY - header.minY, cell)
+        cell = max(cell, math.sqrt(area / MAXIMUM_CELLS))
+        left = math.floor(header.minX / cell) * cell
+        bottom = math.floor(header.minY / cell) * cell
+        cols = int((header.maxX - left) / cell) + 1
+        rows = int((header.maxY - bottom) / cell) + 1
+        grid = numpy.zeros(rows * cols, dtype=bool)
+        count = 0
+        for start, records in points.chunks():
+            records = records[command.filter.mask(points, records)]
+            col = numpy.clip(((points.x(records) - left) / cell).astype(numpy.int64), 0, cols - 1)
+            row = numpy.clip(((points.y(records) - bottom) / cell).astype(numpy.int64), 0, rows - 1)
+            grid[row * cols + col] = True
+            count += len(records)
+    finally:
+        points.close()
+    return grid.reshape(rows, cols), (left, bottom, cell), count
+
+def trace(grid, radius, holes):
+    """The polygons of the occupied cells of the grid after closing them
+    with a disk of the radius in cells, each polygon a list of rings of
+    cell corners, the counterclockwise exterior ring first and then the
+    clockwise holes, one polygon per 4-connected component.
+    """
+    from scipy import ndimage
+    pad = radius + 1
+    grid = numpy.pad(grid, pad)
+    if radius > 0:
+        y, x = numpy.mgrid[-radius:radius + 1, -radius:radius + 1]
+        grid = ndimage.binary_closing(grid, structure=x * x + y * y <= radius * radius)
+    if not holes:
+        grid = ndimage.binary_fill_holes(grid)
+    labels, count = ndimage.label(grid)
+    if count == 0:
+        return []
+
+    # the edges between occupied and empty cells, directed so that the
+    # occupied cell is on their left, from their start corner
+    rows, cols = grid.shape
+    starts, directions, owners = [], [], []
+    for direction, (dr, dc), (sx, sy) in ((0, (-1, 0), (0, 0)), (1, (0, 1), (1, 0)), (2, (1, 0), (1, 1)), (3, (0, -1), (0, 1))):
+        neighbour = numpy.roll(grid, (-dr, -dc), axis=(0, 1))
+        row, col = numpy.nonzero(grid & ~neighbour)
+        starts.append(numpy.stack([col + sx, row + sy], axis=1))
+        directions.append(numpy.full(len(row), direction))
+        owners.append(labels[row, col])
+    starts = numpy.concatenate(starts)
+    directions = numpy.concatenate(directions)
+    owners = numpy.concatenate(owners).astype(numpy.int64)
+    ends = starts + STEPS[directions]
+
+    # the next edge of every edge is the one of the same component that
+    # leaves its end, turning right where the component touches itself
+    # at a corner, which keeps the rings simple
+    corners = (cols + 1) * (rows + 1)
+    keys = (owners * corners + starts[:, 1] * (cols + 1) + starts[:, 0]) * 4 + directions
+    order = numpy.argsort(keys)
+    sortedKeys = keys[order]
+    following = numpy.full(len(keys), -1, dtype=numpy.int64)
+    endKeys = (owners * corners + ends[:, 1] * (cols + 1) + ends[:, 0]) * 4
+    for turn in (3, 0, 1):
+        missing = following < 0
+        wanted = endKeys[missing] + (directions[missing] + turn) % 4
+        found = numpy.minimum(numpy.searchsorted(sortedKeys, wanted), len(keys) - 1)
+        hit = sortedKeys[found] == wanted
+        following[numpy.nonzero(missing)[0][hit]] = order[found[hit]]
+
+    # the rings are the cycles of the edges, with a corner wherever the
+    # direction changes
+    polygons = {}
+    visited = bytearray(len(keys))
+    nexts = following.tolist()
+    for first in range(len(keys)):
+        if visited[first]:
+            continue
+        ring = []
+        edge = first
+        while not visited[edge]:
+            visited[edge] = 1
+            ring.append(edge)
+            edge = nexts[edge]
+        ring = numpy.array(ring)
+        turned = directions[ring] != numpy.roll(directions[ring], 1)
+        vertices = starts[ring[turned]].astype(numpy.float64) - pad
+        x, y = vertices[:, 0], vertices[:, 1]
+        area = 0.5 * numpy.sum(x * numpy.roll(y, -1) - numpy.roll(x, -1) * y)
+        exteriors, interiors = polygons.setdefault(int(owners[ring[0]]), ([], []))
+        (exteriors if area > 0.0 else interiors).append((area, vertices))
+
+    result = []
+    for label in sorted(polygons):
+        exteriors, interiors = polygons[label]
+        exteriors.sort(key=lambda ring: -ring[0])
+        result.append([exteriors[0][1]] + [vertices for area, vertices in interiors])
+        result.extend([vertices] for area, vertices in exteriors[1:])
+    return result
+
+def convexHull(command, path, feedback):
+    """The convex hull of the points of a file that pass the filters, from
+    the hulls of the chunks, and the number of points.
+    """
+    from scipy.spatial import ConvexHull, QhullError
+    points = LASPoints(path, feedback)
+    try:
+        corners = []
+        count = 0
+        for start, records in points.chunks():
+            records = records[command.filter.mask(points, records)]
+            xy = numpy.stack([points.x(records), points.y(records)], axis=1)
+            count += len(xy)
+            if len(xy) >= 3:
+                try:
+                    xy = xy[ConvexHull(xy).vertices]
+                except QhullError:
+                    pass
+            corners.append(xy)
+    finally:
+        points.close()
+    corners = numpy.concatenate(corners) if corners else numpy.zeros((0, 2))
+    try:
+        # counterclockwise, relative to the first corner for precision
+        hull = ConvexHull(corners - corners[0])
+    except (QhullError, IndexError, ValueError):
+        return [], count
+    return [[corners[hull.vertices]]], count
+
+def rectangle(box):
+    minX, minY, maxX, maxY = box
+    return [[numpy.array([[minX, minY], [maxX, minY], [maxX, maxY], [minX, maxY]])]]
+
+def run(command, feedback):
+    concavity = command.value("-concavity", 50.0)
+    holes = command.switch("-holes")
+    disjoint = command.switch("-disjoint") or command.switch("-disjoint_hull")
+    convex = command.switch("-convex") or command.switch("-convex_hull")
+    overview = command.switch("-overview")
+    # the attributes name the file of every footprint
+    command.switch("-labels")
+    useBB = command.switch("-use_bb")
+    useTileBB = command.switch("-use_tile_bb")
+    command.finish()
+    if concavity <= 0.0:
+        raise LAStoolsNativeUnsupported("-concavity {}".format(concavity))
+    for path in command.inputs:
+        if os.path.splitext(path)[1].lower() not in (".las", ".laz"):
+            raise LAStoolsNativeUnsupported("input {}".format(path))
+    if (useBB or useTileBB) and not command.filter.isEmpty():
+        raise LAStoolsNativeUnsupported("filters with bounding boxes")
+
+    if command.merged:
+        raise LAStoolsNativeUnsupported("-merged")
+    # -overview puts the footprints of all files into one file
+    if overview:
+        command.merged = True
+        outputs = [command.outputPath(command.inputs[0], "shp")] * len(command.inputs)
+    else:
+        outputs = [command.outputPath(path, "shp") for path in command.inputs]
+    for output in outputs:
+        if os.path.splitext(output)[1].lower().lstrip(".") not in VECTOR_FORMATS:
+            raise LAStoolsNativeUnsupported("output {}".format(output))
+    vectors = {}
+    for path, output in zip(command.inputs, outputs):
+        crs = LASHeader(path).crs
+        vector = vectors.setdefault(output, LASVector(crs))
+        if crs != vector.crs:
+            raise LAStoolsNativeUnsupported("files with different CRSs into {}".format(output))
+
+    footprints = {}
+    if useBB or useTileBB:
+        for path in command.inputs:
+            box, geoKeys = boundingBox(path, useTileBB)
+            footprints[path] = (rectangle(box), LASHeader(path).pointCount)
+    elif convex:
+        workers = max(1, min(command.cores, len(command.inputs)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            hulls = {executor.submit(convexHull, command, path, feedback): path for path in command.inputs}
+            for number, future in enumerate(concurrent.futures.as_completed(hulls)):
+                if feedback.isCanceled():
+                    for other in hulls:
+                        other.cancel()
+                    return 1
+                footprints[hulls[future]] = future.result()
+                feedback.setProgress(100.0 * (number + 1) / len(command.inputs))
+    else:
+        workers = max(1, min(command.cores, len(command.inputs)))
+        pool = processPool(workers)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as readers:
+                reads = {readers.submit(occupancy, command, path, concavity, feedback): path for path in command.inputs}
+                traces = {}
+                for read in concurrent.futures.as_completed(reads):
+                    if feedback.isCanceled():
+                        for other in reads:
+                            other.cancel()
+                        return 1
+                    grid, corner, count = read.result()
+                    cellRadius = int(round(concavity / 2.0 / corner[2]))
+                    if pool is not None:
+                        traces[reads[read]] = (pool.submit(trace, grid, cellRadius, holes), grid, cellRadius, corner, count)
+                    else:
+                        traces[reads[read]] = (readers.submit(trace, grid, cellRadius, holes), grid, cellRadius, corner, count)
+            for number, path in enumerate(command.inputs):
+                if feedback.isCanceled():
+                    return 1
+                future, grid, cellRadius, (left, bottom, cell), count = traces[path]
+                try:
+                    polygons = future.result()
+                except concurrent.futures.BrokenExecutor:
+                    # processes that cannot start trace in this one
+                    polygons = trace(grid, cellRadius, holes)
+                polygons = [[numpy.stack([left + ring[:, 0] * cell, bottom + ring[:, 1] * cell], axis=1) for ring in polygon] for polygon in polygons]
+                footprints[path] = (polygons, count)
+                feedback.setProgress(100.0 * (number + 1) / len(command.inputs))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    for path, output in zip(command.inputs, outputs):
+        polygons, count = footprints[path]
+        vector = vectors[output]
+        if disjoint:
+            for polygon in polygons:
+                minX, minY, maxX, maxY = vector.extent([polygon])
+                vector.add([polygon], {"file": path, "points": count, "min_x": minX, "min_y": minY, "max_x": maxX, "max_y": maxY})
+        else:
+            minX, minY, maxX, maxY = vector.extent(polygons)
+            vector.add(polygons, {"file": path, "points": count, "min_x": minX, "min_y": minY, "max_x": maxX, "max_y": maxY})
+    for output, vector in vectors.items():
+        vector.write(output)
+        feedback.pushConsoleInfo("{}: {} footprints".format(output, len(vector.features)))
+    return 0
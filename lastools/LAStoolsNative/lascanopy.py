@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    lascanopy.py
+    ---------------------
+    Native lascanopy, which computes forestry metrics of the heights and
+    intensities of the points in every grid cell. The points are read
+    once: the counts of all points, of the first returns and of the
+    height intervals are accumulated chunk by chunk, and the points above
+    the height cutoff are kept with their cell. These are then sorted by
+    cell and value once, so that the minimum, maximum and percentiles of
+    all cells are lookups into the sorted values and the moments are sums
+    over cells, and all rasters are written from them.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+
+import numpy
+
+from .LASPoints import LASPoints
+from .LASRaster import LASRaster, RASTER_FORMATS, NODATA
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+from .lasgrid import boundingBox
+
+# the statistics of the heights and, with the prefix int_, the intensities
+# of the points above the height cutoff
+
+STATISTICS = ["min", "max", "avg", "std", "ske", "kur", "qav"]
+
+# the counts and shares of points in every cell
+
+COUNTS = ["abv", "all", "cov", "dns"]
+
+def statistics(cells, values, size, names, percentiles, nodata):
+    """The rasters of the statistics and percentiles of the values of the
+    points in every cell.
+    """
+    order = numpy.lexsort((values, cells))
+    cells, values = cells[order], values[order]
+    count = numpy.bincount(cells, minlength=size)
+    used = count > 0
+    start = numpy.concatenate([[0], numpy.cumsum(count)[:-1]])
+    results = {}
+    if "min" in names:
+        results["min"] = numpy.where(used, values[numpy.minimum(start, len(values) - 1)] if len(values) else 0.0, nodata)
+    if "max" in names:
+        results["max"] = numpy.where(used, values[numpy.maximum(start + count - 1, 0)] if len(values) else 0.0, nodata)
+    for percentile in percentiles:
+        # the nearest rank, without interpolating between points
+        rank = numpy.floor(percentile / 100.0 * numpy.maximum(count - 1, 0) + 0.5).astype(numpy.int64)
+        results["p{:g}".format(percentile)] = numpy.where(used, values[numpy.minimum(start + rank, len(values) - 1)] if len(values) else 0.0, nodata)
+    if any(name in names for name in ("avg", "std", "ske", "kur", "qav")):
+        mean = numpy.bincount(cells, weights=values, minlength=size) / numpy.maximum(count, 1)
+        deviation = values - mean[cells]
+        m2 = numpy.bincount(cells, weights=deviation ** 2, minlength=size) / numpy.maximum(count, 1)
+        # skewness and kurtosis of cells whose values are all the same are 0
+        spread = numpy.where(m2 > 0.0, m2, 1.0)
+        if "avg" in names:
+            results["avg"] = numpy.where(used, mean, nodata)
+        if "std" in names:
+            results["std"] = numpy.where(used, numpy.sqrt(m2), nodata)
+        if "ske" in names:
+            m3 = numpy.bincount(cells, weights=deviation ** 3, minlength=size) / numpy.maximum(count, 1)
+            results["ske"] = numpy.where(used & (m2 > 0.0), m3 / spread ** 1.5, numpy.where(used, 0.0, nodata))
+        if "kur" in names:
+            m4 = numpy.bincount(cells, weights=deviation ** 4, minlength=size) / numpy.maximum(count, 1)
+            results["kur"] = numpy.where(used & (m2 > 0.0), m4 / spread ** 2, numpy.where(used, 0.0, nodata))
+        if "qav" in names:
+            results["qav"] = numpy.where(used, numpy.sqrt(numpy.bincount(cells, weights=values ** 2, minlength=size) / numpy.maximum(count, 1)), nodata)
+    return results
+
+def intervalName(prefix, index):
+    return "{}{:02d}".format(prefix, index)
+
+def run(command, feedback):
+    step = command.value("-step", 20.0)
+    cutoff = command.value("-height_cutoff", 1.37)
+    coverCutoff = command.value("-cover_cutoff", cutoff)
+    heights = [name for name in STATISTICS if command.switch("-" + name)]
+    intensities = [name for name in STATISTICS if command.switch("-int_" + name)]
+    counts = [name for name in COUNTS if command.switch("-" + name)]
+    gap = command.switch("-gap")
+    fractions = command.switch("-fractions")
+    percentiles = command.values("-p") or []
+    intensityPercentiles = command.values("-int_p") or []
+    bincentiles = command.values("-b") or []
+    heightIntervals = command.values("-c") or []
+    heightDensities = command.values("-d") or []
+    intensityIntervals = command.values("-int_c") or []
+    intensityDensities = command.values("-int_d") or []
+    tile = command.switch("-use_tile_bb")
+    nodata = command.value("-nodata", NODATA)
+    lowerLeft = command.values("-ll", 2)
+    cols = command.value("-ncols", None, int)
+    rows = command.value("-nrows", None, int)
+    command.finish()
+    if step <= 0:
+        raise LAStoolsNativeUnsupported("-step {}".format(step))
+    if (lowerLeft is None) != (cols is None) or (lowerLeft is None) != (rows is None):
+        raise LAStoolsNativeUnsupported("-ll without both -ncols and -nrows")
+    if tile and (command.merged or lowerLeft is not None):
+        raise LAStoolsNativeUnsupported("-use_tile_bb with -merged or -ll")
+    for values in (heightIntervals, heightDensities, intensityIntervals, intensityDensities):
+        if len(values) == 1 or any(high <= low for low, high in zip(values[:-1], values[1:])):
+            raise LAStoolsNativeUnsupported("intervals {}".format(values))
+    for values in (percentiles, intensityPercentiles, bincentiles):
+        if any(value < 0.0 or value > 100.0 for value in values):
+            raise LAStoolsNativeUnsupported("percentiles {}".format(values))
+    for path in command.inputs:
+        if os.path.splitext(path)[1].lower() not in (".las", ".laz"):
+            raise LAStoolsNativeUnsupported("input {}".format(path))
+    if not (heights or intensities or counts or percentiles or intensityPercentiles or bincentiles or
+            heightIntervals or heightDensities or intensityIntervals or intensityDensities):
+        raise LAStoolsNativeUnsupported("no metrics")
+    scale = 1.0 if fractions else 100.0
+    # the intensities of the points above the cutoff are only kept when
+    # intensity statistics are asked for
+    needIntensities = bool(intensities or intensityPercentiles)
+
+    if command.merged:
+        jobs = [(command.outputPath(command.inputs[0], "asc"), command.inputs)]
+    else:
+        jobs = [(command.outputPath(path, "asc"), [path]) for path in command.inputs]
+    for output, paths in jobs:
+        if os.path.splitext(output)[1].lower().lstrip(".") not in RASTER_FORMATS:
+            raise LAStoolsNativeUnsupported("output {}".format(output))
+
+    for index, (output, paths) in enumerate(jobs):
+        if feedback.isCanceled():
+            return 1
+        boxes = [boundingBox(path, tile) for path in paths]
+        geoKeys = next((keys for box, keys in boxes if keys), {})
+        if lowerLeft is not None:
+            raster = LASRaster(lowerLeft[0], lowerLeft[1] + rows * step, step, rows, cols, geoKeys)
+        elif tile:
+            raster = LASRaster.exactly(*boxes[0][0], step=step, geoKeys=geoKeys)
+        else:
+            raster = LASRaster.covering(min(box[0] for box, keys in boxes), min(box[1] for box, keys in boxes),
+                                        max(box[2] for box, keys in boxes), max(box[3] for box, keys in boxes), step, geoKeys)
+        size = raster.rows * raster.cols
+
+        total = numpy.zeros(size, dtype=numpy.int64)
+        first = numpy.zeros(size, dtype=numpy.int64)
+        firstCovered = numpy.zeros(size, dtype=numpy.int64)
+        covered = numpy.zeros(size, dtype=numpy.int64)
+        intervals = {}
+        for prefix, bounds in (("c", heightIntervals), ("d", heightDensities), ("int_c", intensityIntervals), ("int_d", intensityDensities)):
+            if bounds:
+                intervals[prefix] = numpy.zeros((len(bounds) - 1, size), dtype=numpy.int64)
+        aboveCells, aboveHeights, aboveIntensities = [], [], []
+        for path in paths:
+            points = LASPoints(path, feedback)
+            try:
+                for start, records in points.chunks():
+                    records = records[command.filter.mask(points, records)]
+                    cells = raster.cells(points.x(records), points.y(records))
+                    inside = cells >= 0
+                    records, cells = records[inside], cells[inside]
+                    z = points.z(records)
+                    isFirst = points.returnNumber(records) <= 1
+                    total += numpy.bincount(cells, minlength=size)
+                    first += numpy.bincount(cells[isFirst], minlength=size)
+                    firstCovered += numpy.bincount(cells[isFirst & (z > coverCutoff)], minlength=size)
+                    covered += numpy.bincount(cells[z > coverCutoff], minlength=size)
+                    for prefix, bounds in (("c", heightIntervals), ("d", heightDensities), ("int_c", intensityIntervals), ("int_d", intensityDensities)):
+                        if bounds:
+                            values = records["intensity"] if prefix.startswith("int_") else z
+                            interval = numpy.searchsorted(bounds, values, side="right") - 1
+                            chosen = (interval >= 0) & (interval < len(bounds) - 1)
+                            intervals[prefix] += numpy.bincount(interval[chosen] * size + cells[chosen], minlength=(len(bounds) - 1) * size).reshape(-1, size)
+                    above = z > cutoff
+                    aboveCells.append(cells[above])
+                    aboveHeights.append(z[above])
+                    if needIntensities:
+                        aboveIntensities.append(records["intensity"][above].astype(numpy.float64))
+            finally:
+                points.close()
+        aboveCells = numpy.concatenate(aboveCells) if aboveCells else numpy.zeros(0, dtype=numpy.int64)
+        aboveHeights = numpy.concatenate(aboveHeights) if aboveHeights else numpy.zeros(0)
+        empty = total == 0
+
+        rasters = {}
+        if heights or percentiles or bincentiles:
+            rasters.update(statistics(aboveCells, aboveHeights, size, heights + (["max"] if bincentiles else []), percentiles, nodata))
+            for bincentile in bincentiles:
+                # the share of the points above the cutoff up to a fraction
+                # of the way from the cutoff to the highest point
+                threshold = cutoff + bincentile / 100.0 * (rasters["max"] - cutoff)
+                count = numpy.bincount(aboveCells, minlength=size)
+                below = numpy.bincount(aboveCells[aboveHeights <= threshold[aboveCells]], minlength=size)
+                rasters["b{:g}".format(bincentile)] = numpy.where(count > 0, scale * below / numpy.maximum(count, 1), nodata)
+            if "max" not in heights:
+                # only computed for the bincentiles
+                rasters.pop("max", None)
+        if needIntensities:
+            intensityRasters = statistics(aboveCells, numpy.concatenate(aboveIntensities) if aboveIntensities else numpy.zeros(0),
+                                          size, intensities, intensityPercentiles, nodata)
+            rasters.update(("int_" + name, values) for name, values in intensityRasters.items())
+        if "abv" in counts:
+            rasters["abv"] = numpy.where(empty, nodata, numpy.bincount(aboveCells, minlength=size))
+        if "all" in counts:
+            rasters["all"] = numpy.where(empty, nodata, total)
+        if "cov" in counts:
+            share = firstCovered / numpy.maximum(first, 1)
+            rasters["cov"] = numpy.where(first == 0, nodata, scale * ((1.0 - share) if gap else share))
+        if "dns" in counts:
+            share = covered / numpy.maximum(total, 1)
+            rasters["dns"] = numpy.where(empty, nodata, scale * ((1.0 - share) if gap else share))
+        for prefix, values in intervals.items():
+            for i, counted in enumerate(values):
+                if prefix.endswith("d"):
+                    counted = scale * counted / numpy.maximum(total, 1)
+                rasters[intervalName(prefix, i)] = numpy.where(empty, nodata, counted)
+
+        base, extension = os.path.splitext(output)
+        for name, values in rasters.items():
+            raster.write("{}_{}{}".format(base, name, extension), values, nodata)
+        feedback.pushConsoleInfo("{}: {} rasters of {} x {} cells from {} points".format(output, len(rasters), raster.cols, raster.rows, int(total.sum())))
+        feedback.setProgress(100.0 * (index + 1) / len(jobs))
+    return 0
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    lasduplicate.py
+    ---------------------
+    Native lasduplicate, which removes the points with the same x and y,
+    or x, y and z, integer coordinates, or with an earlier point in the
+    27 cells of the -nearby tolerance around them. The coordinates of
+    every point are packed into one integer key, so that all duplicates
+    of a file are found by a single sort of the keys. The files are read and written by threads and their
+    keys sorted by a pool of processes.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import itertools
+import concurrent.futures
+
+import numpy
+
+from .LASPoints import LASPoints, LASWriter
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+from .lasboundary import processPool
+
+def packedKeys(columns, margin=0):
+    """The columns of integers packed into one int64 key per row, each
+    relative to its minimum and with room for the margin on both sides,
+    and the shift of every column, or None if they do not fit.
+    """
+    shifted = [column.astype(numpy.int64) - (int(column.min()) - margin) for column in columns]
+    bits = [max(1, (int(values.max()) + margin).bit_length()) for values in shifted]
+    if sum(bits) > 63:
+        return None
+    keys = numpy.zeros(len(shifted[0]), dtype=numpy.int64)
+    shifts = []
+    for values, width in zip(shifted, bits):
+        keys = (keys << width) | values
+        shifts = [shift + width for shift in shifts] + [0]
+    return keys, shifts
+
+def neighbours(unique, shifts):
+    """The index of each of the 27 voxels around every voxel of the sorted
+    unique keys packed with a margin of 1, -1 where they are empty.
+    """
+    for offsets in itertools.product((-1, 0, 1), repeat=3):
+        keys = unique + sum(offset << shift for offset, shift in zip(offsets, shifts))
+        found = numpy.minimum(numpy.searchsorted(unique, keys), len(unique) - 1)
+        yield numpy.where(unique[found] == keys, found, -1)
+
+def nearbyDuplicates(columns):
+    """The mask of the points without an earlier point in the 27 cells
+    around them, and the mask of those with later points there.
+    """
+    if len(columns[0]) == 0:
+        return numpy.zeros(0, dtype=bool), numpy.zeros(0, dtype=bool)
+    packed = packedKeys(columns, 1)
+    if packed is None:
+        raise LAStoolsNativeUnsupported("-nearby for the extent of the points")
+    keys, shifts = packed
+    # unique returns the first point of every cell
+    unique, first, inverse, counts = numpy.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    earliest = first.copy()
+    total = numpy.zeros(len(unique), dtype=numpy.int64)
+    for found in neighbours(unique, shifts):
+        hit = found >= 0
+        earliest[hit] = numpy.minimum(earliest[hit], first[found[hit]])
+        total[hit] += counts[found[hit]]
+    inverse = inverse.ravel()
+    survivors = earliest[inverse] == numpy.arange(len(keys))
+    return survivors, survivors & (total[inverse] > 1)
+
+def duplicates(columns, z, keep):
+    """The mask of the points that survive, the first, lowest or highest
+    of every set of points with the same columns, and the mask of the
+    survivors that had duplicates.
+    """
+    if len(z) == 0:
+        return numpy.zeros(0, dtype=bool), numpy.zeros(0, dtype=bool)
+    packed = packedKeys(columns)
+    if packed is None:
+        keys = numpy.unique(numpy.stack(columns, axis=1), axis=0, return_inverse=True)[1].ravel()
+    else:
+        keys = packed[0]
+    if keep == "lowest":
+        order = numpy.argsort(z, kind="stable")
+    elif keep == "highest":
+        order = numpy.argsort(-z, kind="stable")
+    else:
+        order = numpy.arange(len(z))
+    # unique returns the first key of every set in this order
+    unique, first, counts = numpy.unique(keys[order], return_index=True, return_counts=True)
+    survivors = numpy.zeros(len(z), dtype=bool)
+    survivors[order[first]] = True
+    merged = numpy.zeros(len(z), dtype=bool)
+    merged[order[first[counts > 1]]] = True
+    return survivors, merged
+
+def removeFile(command, path, output, settings, pool):
+    keep, unique, nearby, singleReturns = settings
+    points = LASPoints(path)
+    try:
+        selected, X, Y, Z = [], [], [], []
+        for start, records in points.chunks():
+            index = numpy.nonzero(command.filter.mask(points, records))[0]
+            selected.append(start + index)
+            X.append(records["X"][index])
+            Y.append(records["Y"][index])
+            Z.append(records["Z"][index])
+        selected, X, Y, Z = [numpy.concatenate(values) for values in (selected, X, Y, Z)]
+        if nearby is not None:
+            # like the binary, the coordinates rounded to the tolerance
+            function = nearbyDuplicates
+            arguments = ([numpy.round((values * points.scale[i] + points.offset[i]) / nearby).astype(numpy.int64) for i, values in enumerate((X, Y, Z))],)
+        else:
+            function = duplicates
+            arguments = ([X, Y, Z] if unique else [X, Y], Z, keep)
+        if pool is not None:
+            try:
+                survivors, merged = pool.submit(function, *arguments).result()
+            except concurrent.futures.BrokenExecutor:
+                survivors, merged = function(*arguments)
+        else:
+            survivors, merged = function(*arguments)
+        merged = selected[merged]
+        selected = selected[survivors]
+
+        writer = LASWriter(output, points)
+        for start, records in points.chunks():
+            begin, end = numpy.searchsorted(selected, [start, start + len(records)])
+            kept = records[selected[begin:end] - start]
+            if singleReturns:
+                # the survivors of duplicates become single returns
+                chosen = numpy.isin(selected[begin:end], merged)
+                if points.extended:
+                    kept["returns"][chosen] = 0x11
+                else:
+                    kept["returns"][chosen] = (kept["returns"][chosen] & 0xC0) | 0x09
+            writer.write(kept)
+        writer.close()
+        return ["{}: removed {} of {} points".format(path, len(X) - writer.count, len(X))]
+    finally:
+        points.close()
+
+def run(command, feedback):
+    lowest = command.switch("-lowest_z")
+    highest = command.switch("-highest_z")
+    unique = command.switch("-unique_xyz")
+    singleReturns = command.switch("-single_returns")
+    nearby = command.value("-nearby")
+    command.finish()
+    if not command.hasOutput():
+        raise LAStoolsNativeUnsupported("no output")
+    if command.merged:
+        raise LAStoolsNativeUnsupported("-merged")
+    if lowest and highest:
+        raise LAStoolsNativeUnsupported("-lowest_z with -highest_z")
+    if nearby is not None and (nearby <= 0.0 or lowest or highest):
+        raise LAStoolsNativeUnsupported("-nearby {} with -lowest_z or -highest_z".format(nearby))
+    settings = ("lowest" if lowest else "highest" if highest else "first", unique, nearby, singleReturns)
+    outputs = [command.outputPath(path) for path in command.inputs]
+
+    workers = max(1, min(command.cores, len(command.inputs)))
+    pool = processPool(workers)
+    try:
+        done = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(removeFile, command, path, output, settings, pool) for path, output in zip(command.inputs, outputs)]
+            for future in concurrent.futures.as_completed(futures):
+                if feedback.isCanceled():
+                    for other in futures:
+                        other.cancel()
+                    return 1
+                for message in future.result():
+                    feedback.pushConsoleInfo(message)
+                done += 1
+                feedback.setProgress(100.0 * done / len(futures))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return 0
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    lasgrid.py
+    ---------------------
+    Native lasgrid, which reduces the elevations, intensities or
+    classifications of the points falling into every cell of a raster to
+    their lowest, highest, average or standard deviation, or counts them.
+    Points are binned chunk by chunk with bincount and ufunc.at, so memory
+    stays bounded by the raster and not by the number of points. Like the
+    binary it also takes BIL rasters as input, whose cells are points.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+
+import numpy
+
+from ..LAStoolsIndex import LASHeader
+from .LASPoints import LASPoints, CHUNK
+from .LASRaster import LASRaster, RASTER_FORMATS, NODATA
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+
+ATTRIBUTES = ["elevation", "intensity", "classification"]
+METHODS = ["lowest", "highest", "average", "stddev"]
+
+# the counters and the largest count their number of bits can hold
+
+COUNTERS = {"counter": None, "counter_8bit": 255, "counter_16bit": 65535, "counter_32bit": None,
+            "point_density": None, "point_density_8bit": 255, "point_density_16bit": 65535, "point_density_32bit": None}
+
+class LASGrid:
+
+    # the running reduction of the values of the points in every cell
+
+    def __init__(self, size, method):
+        self.method = method
+        self.count = numpy.zeros(size, dtype=numpy.int64)
+        if method == "lowest":
+            self.values = numpy.full(size, numpy.inf)
+        elif method == "highest":
+            self.values = numpy.full(size, -numpy.inf)
+        elif method in ("average", "stddev"):
+            self.mean = numpy.zeros(size)
+            self.m2 = numpy.zeros(size)
+
+    def add(self, cells, values):
+        inside = cells >= 0
+        cells = cells[inside]
+        if len(cells) == 0:
+            return
+        values = values[inside].astype(numpy.float64)
+        count = numpy.bincount(cells, minlength=len(self.count))
+        if self.method == "lowest":
+            numpy.minimum.at(self.values, cells, values)
+        elif self.method == "highest":
+            numpy.maximum.at(self.values, cells, values)
+        elif self.method in ("average", "stddev"):
+            # mean and squared deviations of the chunk, merged with those of
+            # the earlier chunks as in the parallel variance algorithm
+            used = count > 0
+            mean = numpy.bincount(cells, weights=values, minlength=len(self.count))[used] / count[used]
+            chunkMean = numpy.zeros(len(self.count))
+            chunkMean[used] = mean
+            m2 = numpy.bincount(cells, weights=(values - chunkMean[cells]) ** 2, minlength=len(self.count))[used]
+            total = self.count[used] + count[used]
+            delta = mean - self.mean[used]
+            self.m2[used] += m2 + delta * delta * self.count[used] * count[used] / total
+            self.mean[used] += delta * count[used] / total
+        self.count += count
+
+    def result(self, nodata=NODATA):
+        empty = self.count == 0
+        if self.method in ("lowest", "highest"):
+            values = self.values.copy()
+        elif self.method == "average":
+            values = self.mean.copy()
+        elif self.method == "stddev":
+            values = numpy.sqrt(self.m2 / numpy.maximum(self.count, 1))
+        else:
+            return self.count.astype(numpy.float64)
+        values[empty] = nodata
+        return values
+
+def boundingBox(path, tile):
+    # the bounding box of a LAS, LAZ or BIL file without reading its points
+    if os.path.splitext(path)[1].lower() == ".bil":
+        if tile:
+            raise LAStoolsNativeUnsupported("-use_tile_bb with BIL input")
+        raster = LASRaster.readBIL(path)[0]
+        return (raster.left, raster.top - raster.rows * raster.step, raster.left + raster.cols * raster.step, raster.top), {}
+    header = LASHeader(path)
+    if tile:
+        box = LASPoints.tileBoundingBox(header)
+        if box is None:
+            raise LAStoolsNativeUnsupported("-use_tile_bb for {}, which is not a tile".format(path))
+        return box, LASPoints.geoKeys(header)
+    return (header.minX, header.minY, header.maxX, header.maxY), LASPoints.geoKeys(header)
+
+def pointChunks(command, path, attribute, feedback):
+    """Coordinates and values of the points of a file that pass the
+    filters, chunk by chunk.
+    """
+    if os.path.splitext(path)[1].lower() == ".bil":
+        if attribute != "elevation" or not command.filter.isEmpty():
+            raise LAStoolsNativeUnsupported("filters or attributes other than elevation for BIL input")
+        raster, values, nodata = LASRaster.readBIL(path)
+        x, y = raster.centers()
+        rows = max(1, CHUNK // max(1, raster.cols))
+        for row in range(0, raster.rows, rows):
+            block = values[row:row + rows].astype(numpy.float64)
+            valid = numpy.isfinite(block) if nodata is None else (block != nodata) & numpy.isfinite(block)
+            rowIndex, colIndex = numpy.nonzero(valid)
+            yield x[colIndex], y[row + rowIndex], block[valid]
+        return
+    points = LASPoints(path, feedback)
+    try:
+        for start, records in points.chunks():
+            records = records[command.filter.mask(points, records)]
+            if attribute == "elevation":
+                values = points.z(records)
+            elif attribute == "intensity":
+                values = records["intensity"]
+            else:
+                values = points.classification(records)
+            yield points.x(records), points.y(records), values
+    finally:
+        points.close()
+
+def run(command, feedback):
+    step = command.value("-step", 1.0)
+    attribute = "elevation"
+    method = "lowest"
+    for name in ATTRIBUTES:
+        if command.switch("-" + name):
+            attribute = name
+    for name in METHODS:
+        if command.switch("-" + name):
+            method = name
+    for name in ATTRIBUTES:
+        for other in METHODS:
+            if command.switch("-{}_{}".format(name, other)):
+                attribute, method = name, other
+    limit = None
+    density = False
+    for name, maximum in COUNTERS.items():
+        if command.switch("-" + name):
+            method, limit, density = "counter", maximum, name.startswith("point_density")
+    tile = command.switch("-use_tile_bb")
+    nodata = command.value("-nodata", NODATA)
+    command.finish()
+    if step <= 0:
+        raise LAStoolsNativeUnsupported("-step {}".format(step))
+    if tile and command.merged:
+        raise LAStoolsNativeUnsupported("-use_tile_bb with -merged")
+
+    # the rasters to write and the files gridded into each of them
+    if command.merged:
+        jobs = [(command.outputPath(command.inputs[0], "asc"), command.inputs)]
+    else:
+        jobs = [(command.outputPath(path, "asc"), [path]) for path in command.inputs]
+    for output, paths in jobs:
+        if os.path.splitext(output)[1].lower().lstrip(".") not in RASTER_FORMATS:
+            raise LAStoolsNativeUnsupported("output {}".format(output))
+
+    for index, (output, paths) in enumerate(jobs):
+        if feedback.isCanceled():
+            return 1
+        boxes = [boundingBox(path, tile) for path in paths]
+        geoKeys = next((keys for box, keys in boxes if keys), {})
+        minX = min(box[0] for box, keys in boxes)
+        minY = min(box[1] for box, keys in boxes)
+        maxX = max(box[2] for box, keys in boxes)
+        maxY = max(box[3] for box, keys in boxes)
+        if tile:
+            raster = LASRaster.exactly(minX, minY, maxX, maxY, step, geoKeys)
+        else:
+            raster = LASRaster.covering(minX, minY, maxX, maxY, step, geoKeys)
+        grid = LASGrid(raster.rows * raster.cols, method)
+        for path in paths:
+            for x, y, values in pointChunks(command, path, attribute, feedback):
+                grid.add(raster.cells(x, y), values)
+        values = grid.result(nodata)
+        if method == "counter":
+            if density:
+                values = values / (step * step)
+            if limit is not None:
+                values = numpy.minimum(values, limit)
+        raster.write(output, values, nodata)
+        feedback.pushConsoleInfo("{}: {} x {} cells from {} points".format(output, raster.cols, raster.rows, int(grid.count.sum())))
+        feedback.setProgress(100.0 * (index + 1) / len(jobs))
+    return 0
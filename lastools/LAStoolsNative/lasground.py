@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    lasground.py
+    ---------------------
+    Native lasground and lasground_new, which classify the ground points
+    with a progressive TIN densification. The lowest point of every cell
+    of the terrain's step seeds the ground, seeds standing out from their
+    neighbours as spikes are removed and the seeds are refined over finer
+    grids, as many as the granularity asks for. Then, iteration by
+    iteration, every triangle of the ground TIN takes the point closest
+    above it that lies no further above it than the offset plus a bulge
+    growing towards the middle of large triangles. Tiles are classified
+    in parallel by a thread pool, as qhull and numpy do the work without
+    holding the GIL.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import concurrent.futures
+
+import numpy
+
+from .LASPoints import LASPoints, LASWriter
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+from .lasheight import surfaceAt, heights, quantize
+
+# the step of every terrain type of the TERRAINS of the algorithms
+
+TERRAINS = {"archaeology": 1.0, "archeology": 1.0, "wilderness": 3.0, "nature": 5.0, "town": 10.0, "city": 25.0, "metro": 50.0}
+
+# the number of times the seeds are refined over a grid of half the size
+# for every granularity of the GRANULARITIES of the algorithms
+
+GRANULARITIES = {"extra_coarse": 0, "coarse": 1, "default": 2, "fine": 3, "extra_fine": 4, "ultra_fine": 5, "hyper_fine": 6}
+
+# meters in feet, as the binaries convert them
+
+FEET = 3.28
+
+# the most densification iterations
+
+REFINE = 50
+
+class LASGroundFilter:
+
+    def __init__(self, step, levels, offset, bulge, spike, spikeDown, clean=True, iterations=REFINE):
+        self.step = step
+        self.levels = levels
+        self.offset = offset
+        self.bulge = bulge
+        self.spike = spike
+        self.spikeDown = spikeDown
+        self.clean = clean
+        self.iterations = iterations
+
+    @staticmethod
+    def lowest(x, y, z, size, origin):
+        # the index of the lowest point of every cell
+        col = numpy.floor((x - origin[0]) / size).astype(numpy.int64)
+        row = numpy.floor((y - origin[1]) / size).astype(numpy.int64)
+        key = row * (int(col.max()) + 1) + col
+        order = numpy.lexsort((z, key))
+        first = numpy.ones(len(order), dtype=bool)
+        first[1:] = key[order][1:] != key[order][:-1]
+        return order[first]
+
+    def removeSpikes(self, seeds, x, y, z, origin):
+        """The seeds without those that are more than spike above or
+        spikeDown below the median of their neighbours in the TIN.
+        """
+        from scipy.spatial import Delaunay, QhullError
+        for loop in range(3):
+            if len(seeds) < 4:
+                return seeds
+            try:
+                tin = Delaunay(numpy.stack([x[seeds] - origin[0], y[seeds] - origin[1]], axis=1))
+            except QhullError:
+                return seeds
+            indptr, neighbours = tin.vertex_neighbor_vertices
+            counts = numpy.diff(indptr)
+            owner = numpy.repeat(numpy.arange(len(seeds)), counts)
+            heights = z[seeds][neighbours]
+            order = numpy.lexsort((heights, owner))
+            median = z[seeds].copy()
+            connected = counts > 0
+            median[connected] = heights[order][indptr[:-1][connected] + counts[connected] // 2]
+            spikes = (z[seeds] - median > self.spike) | (median - z[seeds] > self.spikeDown)
+            if not spikes.any():
+                return seeds
+            seeds = seeds[~spikes]
+        return seeds
+
+    def classify(self, x, y, z):
+        """The mask of the ground points among the candidate points."""
+        from scipy.spatial import Delaunay, QhullError
+        ground = numpy.zeros(len(x), dtype=bool)
+        if len(x) < 3:
+            return ground
+        origin = numpy.array([x.min(), y.min()])
+        seeds = self.lowest(x, y, z, self.step, origin)
+        if self.clean:
+            seeds = self.removeSpikes(seeds, x, y, z, origin)
+        # seeds of finer grids close to the TIN of the coarser ones, but not
+        # of cells smaller than twice the spacing of the points
+        spacing = numpy.sqrt(max(numpy.ptp(x) * numpy.ptp(y), 1e-12) / len(x))
+        for level in range(1, self.levels + 1):
+            size = self.step / (1 << level)
+            if size < 2.0 * spacing or len(seeds) < 3:
+                break
+            try:
+                tin = Delaunay(numpy.stack([x[seeds] - origin[0], y[seeds] - origin[1]], axis=1))
+            except QhullError:
+                break
+            candidates = numpy.setdiff1d(self.lowest(x, y, z, size, origin), seeds)
+            simplex, surface = surfaceAt(tin, origin, numpy.stack([x[seeds], y[seeds], z[seeds]], axis=1), x[candidates], y[candidates])
+            above = z[candidates] - surface
+            close = (simplex >= 0) & (above <= self.spike) & (-above <= self.spikeDown)
+            seeds = numpy.union1d(seeds, candidates[close])
+            if self.clean:
+                seeds = self.removeSpikes(seeds, x, y, z, origin)
+        if len(seeds) < 3:
+            return ground
+        ground[seeds] = True
+
+        # the TIN of the ground is triangulated again every iteration, which
+        # qhull does much faster than inserting the points added into it
+        vertices = seeds
+        for iteration in range(self.iterations):
+            rest = numpy.nonzero(~ground)[0]
+            if len(rest) == 0:
+                break
+            try:
+                tin = Delaunay(numpy.stack([x[vertices] - origin[0], y[vertices] - origin[1]], axis=1))
+            except QhullError:
+                break
+            simplex, surface = surfaceAt(tin, origin, numpy.stack([x[vertices], y[vertices], z[vertices]], axis=1), x[rest], y[rest])
+            inside = simplex >= 0
+            rest, simplex, above = rest[inside], simplex[inside], z[rest][inside] - surface[inside]
+            # the bulge grows with the distance to the closest corner
+            corners = tin.points[tin.simplices[simplex]]
+            distance = numpy.sqrt(((corners - numpy.stack([x[rest] - origin[0], y[rest] - origin[1]], axis=1)[:, None, :]) ** 2).sum(axis=2)).min(axis=1)
+            allowed = self.offset + self.bulge * numpy.minimum(1.0, 2.0 * distance / self.step)
+            accepted = (above <= allowed) & (-above <= self.spikeDown)
+            if not accepted.any():
+                break
+            # the point closest to its triangle, one per triangle
+            rest, simplex, above = rest[accepted], simplex[accepted], above[accepted]
+            order = numpy.lexsort((above, simplex))
+            first = numpy.ones(len(order), dtype=bool)
+            first[1:] = simplex[order][1:] != simplex[order][:-1]
+            added = rest[order[first]]
+            ground[added] = True
+            vertices = numpy.concatenate([vertices, added])
+        return ground
+
+def groundTIN(x, y, z, ground):
+    # the TIN of the final ground points for the heights above it
+    from scipy.spatial import Delaunay, QhullError
+    if ground.sum() < 3:
+        return None
+    origin = numpy.array([x[ground].min(), y[ground].min()])
+    try:
+        tin = Delaunay(numpy.stack([x[ground] - origin[0], y[ground] - origin[1]], axis=1))
+    except QhullError:
+        return None
+    return tin, origin, numpy.stack([x[ground], y[ground], z[ground]], axis=1)
+
+def classifyFile(command, path, output, settings):
+    """Classifies the ground of one file and writes it, returns the
+    messages for the console.
+    """
+    points = LASPoints(path)
+    try:
+        maximum = 255 if points.extended else 31
+        if settings["groundClass"] > maximum or settings["nonGroundClass"] > maximum:
+            raise LAStoolsNativeUnsupported("classifications above 31 for point format {}".format(points.pointFormat))
+        x, y, z, candidate, ignored, source = [], [], [], [], [], []
+        for start, records in points.chunks():
+            records = records[command.filter.mask(points, records)]
+            skipped = numpy.isin(points.classification(records), settings["ignored"])
+            if settings["ignoreWithheld"]:
+                skipped |= points.flag(records, 2)
+            if settings["ignoreOverlap"]:
+                skipped |= points.flag(records, 3)
+            considered = ~skipped
+            if not settings["allReturns"]:
+                considered &= points.returnNumber(records) >= points.numberOfReturns(records)
+            if settings["cutoff"] is not None:
+                considered &= points.z(records) <= settings["cutoff"]
+            x.append(points.x(records))
+            y.append(points.y(records))
+            z.append(points.z(records))
+            candidate.append(considered)
+            ignored.append(skipped)
+            source.append(records["point_source_id"] if settings["byFlightline"] else numpy.zeros(len(records), dtype=numpy.uint16))
+        x, y, z = [numpy.concatenate(values) if values else numpy.zeros(0) for values in (x, y, z)]
+        candidate, ignored = [numpy.concatenate(values) if values else numpy.zeros(0, dtype=bool) for values in (candidate, ignored)]
+        source = numpy.concatenate(source) if source else numpy.zeros(0, dtype=numpy.uint16)
+
+        ground = numpy.zeros(len(x), dtype=bool)
+        for flightline in numpy.unique(source[candidate]):
+            chosen = numpy.nonzero(candidate & (source == flightline))[0]
+            ground[chosen[settings["filter"].classify(x[chosen], y[chosen], z[chosen])]] = True
+        messages = ["{}: {} of {} points are ground".format(path, int(ground.sum()), len(x))]
+        tin = groundTIN(x, y, z, ground) if settings["computeHeight"] or settings["replaceZ"] else None
+        if ground.sum() < 3:
+            messages.append("{}: too few ground points".format(path))
+            if settings["skip"]:
+                return messages
+
+        writer = LASWriter(output, points)
+        position = 0
+        for start, records in points.chunks():
+            records = numpy.array(records[command.filter.mask(points, records)])
+            end = position + len(records)
+            isGround = ground[position:end]
+            changed = isGround | (~ignored[position:end] & (not settings["nonGroundUnchanged"]))
+            classification = numpy.where(isGround, settings["groundClass"], settings["nonGroundClass"]).astype(numpy.uint8)
+            if points.extended:
+                records["classification"][changed] = classification[changed]
+            else:
+                records["classification"][changed] = (records["classification"][changed] & 0xE0) | classification[changed]
+            if settings["computeHeight"] or settings["replaceZ"]:
+                if tin is None:
+                    height = numpy.zeros(len(records))
+                else:
+                    height = heights(tin[0], tin[1], tin[2], x[position:end], y[position:end], z[position:end])
+                if settings["replaceZ"]:
+                    records["Z"] = quantize((height - points.offset[2]) / points.scale[2])
+                if settings["computeHeight"] and not settings["replaceZ"] or settings["storeInUserData"]:
+                    records["user_data"] = numpy.clip(quantize(height * 10.0), 0, 255)
+            writer.write(records)
+            position = end
+        writer.close()
+        return messages
+    finally:
+        points.close()
+
+def run(command, feedback):
+    step = 5.0
+    levels = GRANULARITIES["default"]
+    for name, value in TERRAINS.items():
+        if command.switch("-" + name):
+            step = value
+    for name, value in GRANULARITIES.items():
+        if command.switch("-" + name):
+            levels = value
+    step = command.value("-step", step)
+    feet = command.switch("-feet")
+    elevationFeet = command.switch("-elevation_feet")
+    offset = command.value("-offset", 0.05)
+    bulge = command.value("-bulge", None)
+    if command.switch("-no_bulge"):
+        bulge = 0.0
+    spike = command.value("-spike", 1.0)
+    spikeDown = command.value("-spike_down", 10.0 * spike)
+    clean = not command.switch("-no_clean")
+    iterations = command.value("-refine", REFINE, int)
+    if command.switch("-no_refine"):
+        iterations = 0
+    # without the planar patch test the filter always runs as with -no_stddev
+    command.switch("-no_stddev")
+    # -extra_pass only saves memory in the binary
+    command.switch("-extra_pass")
+    ignored = []
+    ignore = command.values("-ignore_class", None, int)
+    while ignore is not None:
+        ignored.extend(ignore)
+        ignore = command.values("-ignore_class", None, int)
+    settings = {
+        "ignored": ignored,
+        "ignoreWithheld": command.switch("-ignore_withheld"),
+        "ignoreOverlap": command.switch("-ignore_overlap"),
+        "allReturns": command.switch("-all_returns"),
+        "cutoff": command.value("-cutoff_z_above", None),
+        "byFlightline": command.switch("-by_flightline"),
+        "groundClass": command.value("-ground_class", 2, int),
+        "nonGroundClass": command.value("-non_ground_class", 1, int),
+        "nonGroundUnchanged": command.switch("-non_ground_unchanged"),
+        "computeHeight": command.switch("-compute_height"),
+        "replaceZ": command.switch("-replace_z"),
+        "storeInUserData": command.switch("-store_in_user_data"),
+        "skip": command.switch("-skip_files"),
+    }
+    command.finish()
+    if not command.hasOutput():
+        raise LAStoolsNativeUnsupported("no output")
+    if command.merged:
+        raise LAStoolsNativeUnsupported("-merged")
+    if step <= 0.0:
+        raise LAStoolsNativeUnsupported("-step {}".format(step))
+    if bulge is None:
+        bulge = step / 10.0 if step > 5.0 else step / 5.0
+    # the parameters are in meters
+    if feet:
+        step *= FEET
+    if elevationFeet:
+        offset, bulge, spike, spikeDown = offset * FEET, bulge * FEET, spike * FEET, spikeDown * FEET
+    settings["filter"] = LASGroundFilter(step, levels, offset, bulge, spike, spikeDown, clean, iterations)
+
+    outputs = [command.outputPath(path) for path in command.inputs]
+    done = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(command.cores, len(command.inputs)))) as executor:
+        futures = [executor.submit(classifyFile, command, path, output, settings) for path, output in zip(command.inputs, outputs)]
+        for future in concurrent.futures.as_completed(futures):
+            if feedback.isCanceled():
+                for other in futures:
+                    other.cancel()
+                return 1
+            for message in future.result():
+                feedback.pushConsoleInfo(message)
+            done += 1
+            feedback.setProgress(100.0 * done / len(futures))
+    return 0
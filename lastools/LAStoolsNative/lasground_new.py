@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    lasground_new.py
+    ---------------------
+    Native lasground_new, the lasground with the custom terrain type of
+    explicit step, bulge, spike, down spike and offset. The native
+    lasground takes all of them, so lasground_new runs it.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from .lasground import run
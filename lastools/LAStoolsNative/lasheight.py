@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    lasheight.py
+    ---------------------
+    Native lasheight, which computes the height of every point above the
+    Delaunay TIN of the ground points and stores it in the user data, as
+    extra bytes or as the new z, or classifies and drops points by it.
+    Heights are interpolated chunk by chunk with barycentric weights of
+    the triangles, which are looked up for the points sorted in strips so
+    that every lookup walks from a nearby triangle. The ground TINs are
+    kept on disk under the hash of the ground points, so that re-runs and
+    later stages with the same ground do not triangulate it again. They
+    are stored as plain arrays, which a walk along the neighbours of the
+    triangles searches once they are read back.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import glob
+import zipfile
+import hashlib
+import tempfile
+
+import numpy
+
+from qgis.core import QgsApplication
+
+from .LASPoints import LASPoints, LASWriter
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+from .las2dem import CACHE
+
+# the extra bytes attribute of the heights, with its data type and scale
+
+EXTRA_BYTES = "height above ground"
+EXTRA_BYTES_SHORT = (4, 0.01)
+EXTRA_BYTES_PRECISE = (6, 0.001)
+
+# the bytes of ground TINs kept on disk
+
+TIN_CACHE_BYTES = 2 << 30
+
+def tinFolder():
+    folder = os.path.join(QgsApplication.qgisSettingsDirPath(), "lastools", "tins")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+# the tolerance of the barycentric coordinates of points on the edges of
+# a triangle, the one of scipy.spatial.Delaunay.find_simplex
+
+EPSILON = 100.0 * numpy.finfo(numpy.float64).eps
+
+class StoredTIN:
+
+    # a ground TIN read back from disk with the arrays of a Delaunay
+    # triangulation that surfaceAt uses, whose triangles are found by a
+    # walk from the triangle with the nearest center towards the points
+
+    ARRAYS = ["simplices", "neighbors", "transform"]
+
+    def __init__(self, points, simplices, neighbors, transform):
+        self.points = points
+        self.simplices = simplices
+        self.neighbors = neighbors
+        self.transform = transform
+        self.centers = None
+
+    def find_simplex(self, xi):
+        from scipy.spatial import cKDTree
+        if self.centers is None:
+            self.centers = cKDTree(self.points[self.simplices].mean(axis=1))
+        found = numpy.full(len(xi), -1, dtype=numpy.int64)
+        active = numpy.arange(len(xi))
+        current = self.centers.query(xi)[1]
+        # a walk on a Delaunay triangulation never takes a triangle twice
+        for step in range(len(self.simplices)):
+            if len(active) == 0:
+                break
+            transform = self.transform[current]
+            weights = numpy.einsum("nij,nj->ni", transform[:, :2], xi[active] - transform[:, 2])
+            weights = numpy.column_stack([weights, 1.0 - weights.sum(axis=1)])
+            worst = weights.argmin(axis=1)
+            inside = weights[numpy.arange(len(active)), worst] >= -EPSILON
+            found[active[inside]] = current[inside]
+            following = self.neighbors[current, worst]
+            # leaving through the hull means outside of it
+            walking = ~inside & (following >= 0)
+            active = active[walking]
+            current = following[walking]
+        return found
+
+    @staticmethod
+    def read(path, points):
+        with numpy.load(path, allow_pickle=False) as stored:
+            arrays = [stored[name] for name in StoredTIN.ARRAYS]
+        simplices, neighbors, transform = arrays
+        if simplices.ndim != 2 or simplices.shape[1] != 3 or neighbors.shape != simplices.shape or transform.shape != (len(simplices), 3, 2):
+            raise ValueError("{} is not a TIN".format(path))
+        if len(simplices) == 0 or simplices.min() < 0 or simplices.max() >= len(points) or neighbors.max() >= len(simplices):
+            raise ValueError("{} is not a TIN of these points".format(path))
+        return StoredTIN(points, simplices.astype(numpy.int64), neighbors.astype(numpy.int64), transform.astype(numpy.float64))
+
+def triangulateGround(ground):
+    from scipy.spatial import Delaunay, QhullError
+    # relative to the lower left corner, as qhull loses the precision of
+    # the coordinates of projected CRSs
+    origin = ground[:, :2].min(axis=0)
+    try:
+        tin = Delaunay(ground[:, :2] - origin)
+    except QhullError:
+        return None
+    # computed before the TIN is stored, shared and used by several threads
+    tin.transform
+    return tin, origin
+
+def groundTIN(ground, feedback):
+    """The Delaunay triangulation of the ground points relative to its
+    origin, None if they do not span a triangle, from memory, from disk or
+    triangulated.
+    """
+    if len(ground) < 3:
+        return None
+    digest = hashlib.sha1(numpy.ascontiguousarray(ground[:, :2]).tobytes()).hexdigest()
+
+    def load():
+        path = os.path.join(tinFolder(), digest + ".npz")
+        origin = ground[:, :2].min(axis=0)
+        try:
+            tin = (StoredTIN.read(path, ground[:, :2] - origin), origin)
+            os.utime(path)
+            feedback.pushConsoleInfo("reusing the ground TIN {}".format(path))
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            tin = triangulateGround(ground)
+            if tin is not None:
+                storeTIN(path, tin[0])
+        size = 0 if tin is None else tin[0].points.nbytes + tin[0].transform.nbytes + 3 * tin[0].simplices.nbytes
+        return tin, size
+    return CACHE.get(("ground", digest), load)
+
+def storeTIN(path, tin):
+    handle, temporary = tempfile.mkstemp(suffix=".npz", dir=os.path.dirname(path))
+    with os.fdopen(handle, "wb") as file:
+        numpy.savez(file, **dict((name, getattr(tin, name)) for name in StoredTIN.ARRAYS))
+    os.replace(temporary, path)
+    # the least recently used TINs go once the cache is over budget
+    files = []
+    for other in glob.glob(os.path.join(os.path.dirname(path), "*.npz")):
+        try:
+            status = os.stat(other)
+        except OSError:
+            continue
+        files.append((status.st_mtime, status.st_size, other))
+    total = sum(size for mtime, size, other in files)
+    for mtime, size, other in sorted(files):
+        if total <= TIN_CACHE_BYTES:
+            break
+        if other != path:
+            try:
+                os.remove(other)
+                total -= size
+            except OSError:
+                pass
+
+def surfaceAt(tin, origin, ground, x, y):
+    """The triangle of the TIN of the ground points below every point,
+    -1 outside of it, and the elevation of the TIN there.
+    """
+    simplex = numpy.full(len(x), -1, dtype=numpy.int64)
+    surface = numpy.full(len(x), numpy.nan)
+    if len(x) == 0:
+        return simplex, surface
+    # in strips a few ground points wide, ordered along x
+    spacing = numpy.sqrt(max(numpy.ptp(ground[:, 0]) * numpy.ptp(ground[:, 1]), 1e-12) / len(ground))
+    order = numpy.lexsort((x, numpy.floor(y / (4.0 * spacing))))
+    points = numpy.stack([x[order] - origin[0], y[order] - origin[1]], axis=1)
+    found = tin.find_simplex(points)
+    inside = found >= 0
+    transform = tin.transform[found[inside]]
+    weights = numpy.einsum("nij,nj->ni", transform[:, :2], points[inside] - transform[:, 2])
+    corner = ground[tin.simplices[found[inside]], 2]
+    values = numpy.full(len(points), numpy.nan)
+    values[inside] = weights[:, 0] * corner[:, 0] + weights[:, 1] * corner[:, 1] + (1.0 - weights[:, 0] - weights[:, 1]) * corner[:, 2]
+    simplex[order] = found
+    surface[order] = values
+    return simplex, surface
+
+def heights(tin, origin, ground, x, y, z):
+    """The heights of the points above the ground TIN, above the nearest
+    ground point outside of it.
+    """
+    from scipy.spatial import cKDTree
+    simplex, surface = surfaceAt(tin, origin, ground, x, y)
+    outside = simplex < 0
+    if outside.any():
+        nearest = cKDTree(ground[:, :2] - origin).query(numpy.stack([x[outside] - origin[0], y[outside] - origin[1]], axis=1))[1]
+        surface[outside] = ground[nearest, 2]
+    return z - surface
+
+def quantize(values):
+    # rounds half away from zero like the binaries
+    return numpy.where(values >= 0.0, numpy.floor(values + 0.5), numpy.ceil(values - 0.5))
+
+def run(command, feedback):
+    groundClasses = command.values("-classification") or command.values("-class") or [2]
+    groundClasses = [int(c) for c in groundClasses]
+    replaceZ = command.switch("-replace_z")
+    userData = command.switch("-store_in_user_data")
+    noUserData = command.switch("-do_not_store_in_user_data")
+    scaleU = command.value("-scale_u", 10.0)
+    extraBytes = None
+    if command.switch("-store_as_extra_bytes"):
+        extraBytes = EXTRA_BYTES_SHORT
+    if command.switch("-store_precise_as_extra_bytes"):
+        extraBytes = EXTRA_BYTES_PRECISE
+    dropBelow = command.value("-drop_below")
+    dropAbove = command.value("-drop_above")
+    classify = []
+    below = command.values("-classify_below", 2)
+    if below is not None:
+        classify.append((-numpy.inf, below[0], int(below[1])))
+    above = command.values("-classify_above", 2)
+    if above is not None:
+        classify.append((numpy.nextafter(above[0], numpy.inf), numpy.inf, int(above[1])))
+    between = command.values("-classify_between", 3)
+    while between is not None:
+        classify.append((between[0], between[1], int(between[2])))
+        between = command.values("-classify_between", 3)
+    ignored = []
+    ignore = command.values("-ignore_class", None, int)
+    while ignore is not None:
+        ignored.extend(ignore)
+        ignore = command.values("-ignore_class", None, int)
+    skip = command.switch("-skip_files")
+    command.finish()
+    if not command.hasOutput():
+        raise LAStoolsNativeUnsupported("no output")
+    if command.merged:
+        raise LAStoolsNativeUnsupported("-merged")
+    # without -replace_z or extra bytes the heights go to the user data
+    storeUserData = userData or (not noUserData and not replaceZ and extraBytes is None)
+
+    for number, path in enumerate(command.inputs):
+        if feedback.isCanceled():
+            return 1
+        points = LASPoints(path, feedback)
+        try:
+            if any(c > (255 if points.extended else 31) for low, high, c in classify):
+                raise LAStoolsNativeUnsupported("classifications above 31 for point format {}".format(points.pointFormat))
+            ground = []
+            for start, records in points.chunks():
+                records = records[command.filter.mask(points, records)]
+                records = records[numpy.isin(points.classification(records), groundClasses)]
+                ground.append(numpy.stack([points.x(records), points.y(records), points.z(records)], axis=1))
+            ground = numpy.concatenate(ground) if ground else numpy.zeros((0, 3))
+            tin = groundTIN(ground, feedback)
+            if tin is None:
+                feedback.pushConsoleInfo("{}: {} ground points do not span a TIN".format(path, len(ground)))
+                if skip:
+                    continue
+            layout = points
+            if extraBytes is not None:
+                layout = points.withExtraBytes(EXTRA_BYTES, extraBytes[0], extraBytes[1])
+            writer = LASWriter(command.outputPath(path), layout)
+            for start, records in points.chunks():
+                records = records[command.filter.mask(points, records)]
+                z = points.z(records)
+                if tin is None:
+                    # like the binary, without a ground TIN files are copied
+                    # with zero elevations for -replace_z
+                    height = numpy.zeros(len(records)) if replaceZ else None
+                else:
+                    height = heights(tin[0], tin[1], ground, points.x(records), points.y(records), z)
+                output = numpy.zeros(len(records), dtype=layout.dtype)
+                for name in points.dtype.names:
+                    output[name] = records[name]
+                if height is not None:
+                    if storeUserData:
+                        output["user_data"] = numpy.clip(quantize(height * scaleU), 0, 255)
+                    if extraBytes is not None:
+                        limit = numpy.iinfo(layout.dtype[EXTRA_BYTES]).max
+                        output[EXTRA_BYTES] = numpy.clip(quantize(height / extraBytes[1]), -limit - 1, limit)
+                    if replaceZ:
+                        output["Z"] = quantize((height - points.offset[2]) / points.scale[2])
+                    free = ~numpy.isin(points.classification(records), ignored)
+                    for low, high, classification in classify:
+                        chosen = free & (height >= low) & (height < high)
+                        if points.extended:
+                            output["classification"][chosen] = classification
+                        else:
+                            output["classification"][chosen] = (output["classification"][chosen] & 0xE0) | classification
+                    keep = numpy.ones(len(records), dtype=bool)
+                    if dropBelow is not None:
+                        keep &= ~(free & (height < dropBelow))
+                    if dropAbove is not None:
+                        keep &= ~(free & (height > dropAbove))
+                    output = output[keep]
+                writer.write(output)
+            writer.close(feedback)
+            feedback.pushConsoleInfo("{}: heights of {} points above a TIN of {} ground points".format(path, writer.count, len(ground)))
+        finally:
+            points.close()
+        feedback.setProgress(100.0 * (number + 1) / len(command.inputs))
+    return 0
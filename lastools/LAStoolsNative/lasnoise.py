@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    lasnoise.py
+    ---------------------
+    Native lasnoise, which classifies or removes the isolated points, those
+    with only a few other points in the 3 by 3 by 3 voxels of -step_xy and
+    -step_z around them. The voxels of all points are packed into integer
+    keys and counted once, and the 27 neighbours of every occupied voxel
+    are looked up in the sorted keys. The files are read and written by
+    threads and their voxels counted by a pool of processes. Files whose
+    points all stay get the classification written into a copy of them,
+    without rewriting the other fields of the points.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import shutil
+import tempfile
+import concurrent.futures
+
+import numpy
+
+from .LASPoints import LASPoints, LASWriter, laszip, laszipCommand
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+from .lasboundary import processPool
+from .lasduplicate import packedKeys, neighbours
+
+def isolatedPoints(x, y, z, stepXY, stepZ, isolated):
+    """The mask of the points with only isolated or fewer other points in
+    the 27 voxels around them.
+    """
+    if len(x) == 0:
+        return numpy.zeros(0, dtype=bool)
+    voxels = [numpy.floor(x / stepXY).astype(numpy.int64), numpy.floor(y / stepXY).astype(numpy.int64), numpy.floor(z / stepZ).astype(numpy.int64)]
+    packed = packedKeys(voxels, 1)
+    if packed is None:
+        raise LAStoolsNativeUnsupported("-step_xy {} -step_z {} for the extent of the points".format(stepXY, stepZ))
+    keys, shifts = packed
+    unique, inverse, counts = numpy.unique(keys, return_inverse=True, return_counts=True)
+    total = numpy.zeros(len(unique), dtype=numpy.int64)
+    for found in neighbours(unique, shifts):
+        total += numpy.where(found >= 0, counts[found], 0)
+    return total[inverse.ravel()] - 1 <= isolated
+
+def classifyInPlace(points, output, noise, classification, feedback):
+    """Writes the file with the classification of the noise points, from a
+    copy of its uncompressed points.
+    """
+    directory = os.path.dirname(os.path.abspath(output))
+    os.makedirs(directory, exist_ok=True)
+    compress = os.path.splitext(output)[1].lower() == ".laz"
+    if not compress:
+        target = output
+        shutil.copyfile(points.temporary or points.path, target)
+    elif points.temporary is not None:
+        # the uncompressed copy of the input is classified and compressed
+        target = points.temporary
+    else:
+        laszipCommand()
+        handle, target = tempfile.mkstemp(suffix=".las", dir=directory)
+        os.close(handle)
+        shutil.copyfile(points.path, target)
+    try:
+        records = numpy.memmap(target, dtype=points.dtype, mode="r+", offset=points.header.offsetToPointData, shape=(len(points),))
+        if points.extended:
+            records["classification"][noise] = classification
+        else:
+            records["classification"][noise] = (records["classification"][noise] & 0xE0) | classification
+        records.flush()
+        del records
+        if compress:
+            laszip(target, output, feedback)
+    finally:
+        if compress and target != points.temporary:
+            os.remove(target)
+
+def denoiseFile(command, path, output, settings, pool):
+    stepXY, stepZ, isolated, ignored, remove, classification = settings
+    points = LASPoints(path)
+    try:
+        if classification > (255 if points.extended else 31):
+            raise LAStoolsNativeUnsupported("-classify_as {} for point format {}".format(classification, points.pointFormat))
+        selected, x, y, z = [], [], [], []
+        total = 0
+        for start, records in points.chunks():
+            passed = command.filter.mask(points, records)
+            total += int(passed.sum())
+            # ignored points are neither counted nor classified
+            index = numpy.nonzero(passed & ~numpy.isin(points.classification(records), ignored))[0]
+            selected.append(start + index)
+            x.append(points.x(records[index]))
+            y.append(points.y(records[index]))
+            z.append(points.z(records[index]))
+        selected, x, y, z = [numpy.concatenate(values) for values in (selected, x, y, z)]
+        if pool is not None:
+            try:
+                noise = pool.submit(isolatedPoints, x, y, z, stepXY, stepZ, isolated).result()
+            except concurrent.futures.BrokenExecutor:
+                noise = isolatedPoints(x, y, z, stepXY, stepZ, isolated)
+        else:
+            noise = isolatedPoints(x, y, z, stepXY, stepZ, isolated)
+        noise = selected[noise]
+
+        if not remove and total == len(points):
+            classifyInPlace(points, output, noise, classification, None)
+        else:
+            writer = LASWriter(output, points)
+            for start, records in points.chunks():
+                records = numpy.array(records)
+                chosen = noise[(noise >= start) & (noise < start + len(records))] - start
+                keep = command.filter.mask(points, records)
+                if remove:
+                    keep[chosen] = False
+                elif points.extended:
+                    records["classification"][chosen] = classification
+                else:
+                    records["classification"][chosen] = (records["classification"][chosen] & 0xE0) | classification
+                writer.write(records[keep])
+            writer.close()
+        return ["{}: {} of {} points are isolated".format(path, len(noise), total)]
+    finally:
+        points.close()
+
+def run(command, feedback):
+    step = command.value("-step", 4.0)
+    stepXY = command.value("-step_xy", step)
+    stepZ = command.value("-step_z", step)
+    isolated = command.value("-isolated", 5, int)
+    ignored = []
+    ignore = command.values("-ignore_class", None, int)
+    while ignore is not None:
+        ignored.extend(ignore)
+        ignore = command.values("-ignore_class", None, int)
+    remove = command.switch("-remove_noise")
+    classification = command.value("-classify_as", 7, int)
+    command.finish()
+    if not command.hasOutput():
+        raise LAStoolsNativeUnsupported("no output")
+    if command.merged:
+        raise LAStoolsNativeUnsupported("-merged")
+    if stepXY <= 0.0 or stepZ <= 0.0:
+        raise LAStoolsNativeUnsupported("-step_xy {} -step_z {}".format(stepXY, stepZ))
+    settings = (stepXY, stepZ, isolated, ignored, remove, classification)
+    outputs = [command.outputPath(path) for path in command.inputs]
+
+    workers = max(1, min(command.cores, len(command.inputs)))
+    pool = processPool(workers)
+    try:
+        done = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(denoiseFile, command, path, output, settings, pool) for path, output in zip(command.inputs, outputs)]
+            for future in concurrent.futures.as_completed(futures):
+                if feedback.isCanceled():
+                    for other in futures:
+                        other.cancel()
+                    return 1
+                for message in future.result():
+                    feedback.pushConsoleInfo(message)
+                done += 1
+                feedback.setProgress(100.0 * done / len(futures))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return 0
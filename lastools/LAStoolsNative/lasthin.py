@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    lasthin.py
+    ---------------------
+    Native lasthin, which keeps the lowest, highest or most central point
+    of every grid cell. Like the binary it reads the points in file order
+    and on ties keeps the point read first, so that both select the same
+    points. With -subcircle every point also stands for eight points on a
+    circle around it, which are splatted one offset at a time instead of
+    replicating the points, and the winning splats are output.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import numpy
+
+from .LASPoints import LASPoints, LASWriter
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+
+OPERATIONS = ["lowest", "highest", "central"]
+
+def splatOffsets(points, radius):
+    # the point itself and eight points on the circle around it, in the
+    # quantized coordinates of the file
+    if radius <= 0.0:
+        return numpy.zeros((1, 2), dtype=numpy.int64)
+    angles = numpy.arange(8) * (numpy.pi / 4.0)
+    dx = numpy.round(radius * numpy.cos(angles) / points.scale[0]).astype(numpy.int64)
+    dy = numpy.round(radius * numpy.sin(angles) / points.scale[1]).astype(numpy.int64)
+    return numpy.concatenate([[[0, 0]], numpy.stack([dx, dy], axis=1)])
+
+def reduce(cells, scores, keys):
+    """The winner of every cell, the highest score and on ties the
+    smallest key, as cells, scores and keys sorted by cell.
+    """
+    order = numpy.lexsort((keys, -scores, cells))
+    cells = cells[order]
+    first = numpy.ones(len(cells), dtype=bool)
+    first[1:] = cells[1:] != cells[:-1]
+    return cells[first], scores[order][first], keys[order][first]
+
+def winners(command, points, step, operation, offsets):
+    """The keys, point index times the number of offsets plus the offset,
+    of the points that win their cells, in file order.
+    """
+    originX = numpy.floor(points.header.minX / step) * step
+    originY = numpy.floor(points.header.minY / step) * step
+    count = len(offsets)
+    # splats reach this many cells below or left of the origin, so the
+    # rows and columns of the keys are shifted by it to stay positive
+    radius = numpy.abs(offsets * numpy.asarray(points.scale[:2])).max()
+    reach = int(numpy.ceil(radius / step)) + 1
+    best = (numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0), numpy.zeros(0, dtype=numpy.int64))
+    for start, records in points.chunks():
+        index = numpy.nonzero(command.filter.mask(points, records))[0]
+        selected = records[index]
+        candidates = [best]
+        for k, (dx, dy) in enumerate(offsets):
+            x = (selected["X"] + dx) * points.scale[0] + points.offset[0]
+            y = (selected["Y"] + dy) * points.scale[1] + points.offset[1]
+            col = numpy.floor((x - originX) / step).astype(numpy.int64)
+            row = numpy.floor((y - originY) / step).astype(numpy.int64)
+            cells = (row + reach) * (1 << 31) + (col + reach)
+            if operation == "lowest":
+                scores = -selected["Z"].astype(numpy.float64)
+            elif operation == "highest":
+                scores = selected["Z"].astype(numpy.float64)
+            else:
+                scores = -((x - originX - (col + 0.5) * step) ** 2 + (y - originY - (row + 0.5) * step) ** 2)
+            keys = (start + index) * count + k
+            candidates.append(reduce(cells, scores, keys))
+        best = reduce(*[numpy.concatenate(parts) for parts in zip(*candidates)])
+    return numpy.sort(best[2])
+
+def run(command, feedback):
+    step = command.value("-step", 1.0)
+    radius = command.value("-subcircle", 0.0)
+    operation = "lowest"
+    for name in OPERATIONS:
+        if command.switch("-" + name):
+            operation = name
+    withheld = command.switch("-withheld")
+    classifyAs = command.value("-classify_as", None, int)
+    command.finish()
+    if not command.hasOutput():
+        raise LAStoolsNativeUnsupported("no output")
+    if step <= 0.0:
+        raise LAStoolsNativeUnsupported("-step {}".format(step))
+    if radius > 0.0 and (withheld or classifyAs is not None):
+        raise LAStoolsNativeUnsupported("-subcircle with -withheld or -classify_as")
+    if command.merged:
+        raise LAStoolsNativeUnsupported("-merged")
+
+    for number, path in enumerate(command.inputs):
+        if feedback.isCanceled():
+            return 1
+        points = LASPoints(path, feedback)
+        try:
+            if classifyAs is not None and not points.extended and classifyAs > 31:
+                raise LAStoolsNativeUnsupported("-classify_as {} for point format {}".format(classifyAs, points.pointFormat))
+            offsets = splatOffsets(points, radius)
+            keys = winners(command, points, step, operation, offsets)
+            writer = LASWriter(command.outputPath(path), points)
+            if withheld or classifyAs is not None:
+                # all points pass, the thinned-away ones are marked withheld
+                # and the survivors reclassified
+                for start, records in points.chunks():
+                    index = numpy.nonzero(command.filter.mask(points, records))[0]
+                    records = numpy.array(records[index])
+                    position = numpy.minimum(numpy.searchsorted(keys, start + index), max(0, len(keys) - 1))
+                    won = (len(keys) > 0) & (keys[position] == start + index)
+                    if withheld:
+                        if points.extended:
+                            records["flags"][~won] |= 0x04
+                        else:
+                            records["classification"][~won] |= 0x80
+                    if classifyAs is not None:
+                        if points.extended:
+                            records["classification"][won] = classifyAs
+                        else:
+                            records["classification"][won] = (records["classification"][won] & 0xE0) | classifyAs
+                    writer.write(records)
+            else:
+                for begin in range(0, len(keys), 1 << 22):
+                    part = keys[begin:begin + (1 << 22)]
+                    index = part // len(offsets)
+                    records = numpy.array(points.records[index])
+                    if len(offsets) > 1:
+                        shift = offsets[part % len(offsets)]
+                        records["X"] += shift[:, 0].astype(numpy.int32)
+                        records["Y"] += shift[:, 1].astype(numpy.int32)
+                    writer.write(records)
+            writer.close(feedback)
+            feedback.pushConsoleInfo("{}: kept {} of {} points".format(path, len(keys), len(points)))
+        finally:
+            points.close()
+        feedback.setProgress(100.0 * (number + 1) / len(command.inputs))
+    return 0
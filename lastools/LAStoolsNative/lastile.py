@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    lastile.py
+    ---------------------
+    Native lastile, which splits the points of all input files into square
+    tiles with a buffer in a single pass. The records of every tile are
+    buffered in memory and appended to its file once enough of them are
+    buffered, and only the most recently written tile files stay open, so
+    that tilings into thousands of tiles neither read the input again nor
+    run out of file handles. With -reversible every point stores its index
+    in the input as an extra bytes attribute, and -reverse_tiling puts
+    the points of the tiles back into that order by scattering them to
+    their index, without sorting.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import math
+import struct
+import tempfile
+import collections
+
+import numpy
+
+from .LASPoints import LASPoints, LASWriter, CHUNK
+from .LAStoolsCommand import LAStoolsNativeUnsupported
+
+# the extra bytes attribute of the index of the points of reversible
+# tilings, buffer points have the highest bit set
+
+INDEX = "original index"
+BUFFER_BIT = numpy.uint64(1 << 63)
+
+# the bytes buffered for one tile before they are written, for all tiles
+# before the largest buffers are written, and the tile files kept open
+
+TILE_BYTES = 1 << 22
+BUFFER_BYTES = 1 << 28
+OPEN_FILES = 128
+
+class LASTileWriters:
+
+    # the writers of all tiles, which buffer the records of every tile and
+    # keep at most OPEN_FILES files open
+
+    def __init__(self, create):
+        self.create = create
+        self.writers = {}
+        self.open = collections.OrderedDict()
+        self.buffers = collections.defaultdict(list)
+        self.sizes = collections.Counter()
+        self.total = 0
+
+    def add(self, tile, records):
+        self.buffers[tile].append(records)
+        self.sizes[tile] += records.nbytes
+        self.total += records.nbytes
+        if self.sizes[tile] >= TILE_BYTES:
+            self.flush(tile)
+        while self.total > BUFFER_BYTES:
+            self.flush(max(self.sizes, key=self.sizes.get))
+
+    def flush(self, tile):
+        if tile not in self.writers:
+            self.writers[tile] = self.create(tile)
+        self.open[tile] = True
+        self.open.move_to_end(tile)
+        while len(self.open) > OPEN_FILES:
+            oldest, _ = self.open.popitem(last=False)
+            self.writers[oldest].suspend()
+        self.writers[tile].write(numpy.concatenate(self.buffers.pop(tile)))
+        self.total -= self.sizes.pop(tile)
+
+    def close(self, feedback):
+        for tile in list(self.buffers):
+            self.flush(tile)
+        for tile, writer in self.writers.items():
+            writer.suspend()
+        for tile, writer in self.writers.items():
+            writer.close(feedback)
+        return self.writers
+
+def tileName(path, size, col, row):
+    # the binary appends the lower left corner of the tile to the name
+    base, extension = os.path.splitext(path)
+    if float(size).is_integer():
+        return "{}_{}_{}{}".format(base, int(col * size), int(row * size), extension)
+    return "{}_{}_{}{}".format(base, repr(col * size), repr(row * size), extension)
+
+def tileVLR(size, col, row, buffer, reversible):
+    # the tiling VLR of the binary, a quadtree of one level in the tile
+    flags = (1 << 30 if buffer > 0.0 else 0) | (1 << 31 if reversible else 0)
+    return struct.pack("<III4f", 0, 0, flags, col * size, (col + 1) * size, row * size, (row + 1) * size)
+
+def tile(command, feedback, size, buffer, flagWithheld, reversible, flightlines, fileSourceId):
+    command.merged = True
+    template = command.outputPath(command.inputs[0])
+    first = layout = None
+    primaries = collections.Counter()
+
+    def create(key):
+        col, row = key
+        tileLayout = layout.withVLR("LAStools", 10, "tile", tileVLR(size, col, row, buffer, reversible))
+        tileLayout.dtype = layout.dtype
+        return LASWriter(tileName(template, size, col, row), tileLayout)
+
+    writers = LASTileWriters(create)
+    reach = int(math.ceil(buffer / size)) if buffer > 0.0 else 0
+    total = 0
+    for number, path in enumerate(command.inputs):
+        if feedback.isCanceled():
+            return 1
+        points = LASPoints(path, feedback)
+        try:
+            if first is None:
+                first = layout = points
+                if reversible:
+                    layout = points.withExtraBytes(INDEX, 7, None, "index of the point before tiling")
+            if points.pointFormat != first.pointFormat or points.dtype.itemsize != first.dtype.itemsize:
+                raise LAStoolsNativeUnsupported("input files with different point formats")
+            rescale = not numpy.array_equal(points.scale, first.scale) or not numpy.array_equal(points.offset, first.offset)
+            for start, records in points.chunks():
+                index = numpy.nonzero(command.filter.mask(points, records))[0]
+                selected = numpy.zeros(len(index), dtype=layout.dtype)
+                for name in points.dtype.names:
+                    selected[name] = records[name][index]
+                if rescale:
+                    # the coordinates go onto the scale and offset of the
+                    # first file, which all tiles get
+                    for axis, field in enumerate(("X", "Y", "Z")):
+                        value = numpy.floor((records[field][index] * points.scale[axis] + points.offset[axis] - first.offset[axis]) / first.scale[axis] + 0.5)
+                        if len(value) and (value.min() < numpy.iinfo(numpy.int32).min or value.max() > numpy.iinfo(numpy.int32).max):
+                            raise ValueError("the coordinates of {} do not fit the scale and offset of {}".format(path, first.path))
+                        selected[field] = value
+                if flightlines:
+                    selected["point_source_id"] = number + 1
+                elif fileSourceId:
+                    selected["point_source_id"] = struct.unpack_from("<H", points.headerBytes, 4)[0]
+                if reversible:
+                    selected[INDEX] = total + start + index
+                x, y = first.x(selected), first.y(selected)
+                col = numpy.floor(x / size).astype(numpy.int64)
+                row = numpy.floor(y / size).astype(numpy.int64)
+                for dc in range(-reach, reach + 1):
+                    for dr in range(-reach, reach + 1):
+                        if dc == 0 and dr == 0:
+                            chosen = numpy.ones(len(selected), dtype=bool)
+                        else:
+                            # points in the buffer of a neighbouring tile
+                            chosen = (x >= (col + dc) * size - buffer) & (x < (col + dc + 1) * size + buffer) & \
+                                     (y >= (row + dr) * size - buffer) & (y < (row + dr + 1) * size + buffer)
+                            if not chosen.any():
+                                continue
+                        part = selected[chosen]
+                        if dc != 0 or dr != 0:
+                            if flagWithheld:
+                                if points.extended:
+                                    part["flags"] |= 0x04
+                                else:
+                                    part["classification"] |= 0x80
+                            if reversible:
+                                part[INDEX] |= BUFFER_BIT
+                        keys = (col[chosen] + dc + (1 << 24)) * (1 << 32) + (row[chosen] + dr + (1 << 24))
+                        order = numpy.argsort(keys, kind="stable")
+                        keys = keys[order]
+                        bounds = numpy.r_[0, numpy.nonzero(keys[1:] != keys[:-1])[0] + 1, len(keys)]
+                        for begin, end in zip(bounds[:-1], bounds[1:]):
+                            key = (int(keys[begin] >> 32) - (1 << 24), int(keys[begin] & 0xFFFFFFFF) - (1 << 24))
+                            if dc == 0 and dr == 0:
+                                primaries[key] += end - begin
+                            writers.add(key, part[order[begin:end]])
+            total += len(points)
+        finally:
+            points.close()
+        feedback.setProgress(90.0 * (number + 1) / len(command.inputs))
+
+    written = writers.close(feedback)
+    # tiles that only got buffer points are not output
+    for key, writer in written.items():
+        if primaries[key] == 0:
+            os.remove(writer.path)
+    feedback.pushConsoleInfo("{} points in {} tiles of {}".format(total, len(primaries), template))
+    return 0
+
+def reverse(command, feedback):
+    command.merged = True
+    output = command.outputPath(command.inputs[0])
+    layout = columns = None
+    folder = os.path.dirname(os.path.abspath(output))
+    os.makedirs(folder, exist_ok=True)
+    handle, scattered = tempfile.mkstemp(suffix=".points", dir=folder)
+    present = numpy.zeros(0, dtype=bool)
+    try:
+        with os.fdopen(handle, "r+b") as file:
+            for number, path in enumerate(command.inputs):
+                if feedback.isCanceled():
+                    return 1
+                points = LASPoints(path, feedback)
+                try:
+                    if points.extraBytesAttribute(INDEX) is None:
+                        raise LAStoolsNativeUnsupported("{} is not a tile of the native -reversible".format(path))
+                    tileLayout, tileColumns = points.withoutVLR("LAStools", 10).withoutExtraBytes(INDEX)
+                    if layout is None:
+                        layout, columns = tileLayout, tileColumns
+                    elif tileLayout.pointFormat != layout.pointFormat or tileLayout.dtype != layout.dtype:
+                        raise LAStoolsNativeUnsupported("tiles with different point records")
+                    for start, records in points.chunks():
+                        index = points.extraBytes(records, INDEX)
+                        primary = (index & BUFFER_BIT) == 0
+                        index = index[primary].astype(numpy.int64)
+                        if len(index) == 0:
+                            continue
+                        raw = numpy.ascontiguousarray(records[primary]).view(numpy.uint8).reshape(len(index), points.dtype.itemsize)
+                        # the points go to their index in a file that grows
+                        # with the largest index
+                        count = int(index.max()) + 1
+                        if count > len(present):
+                            count = max(count, len(present) + len(present) // 2)
+                            file.truncate(count * layout.dtype.itemsize)
+                            present = numpy.concatenate([present, numpy.zeros(count - len(present), dtype=bool)])
+                        target = numpy.memmap(file, dtype=layout.dtype, mode="r+", shape=(len(present),))
+                        target[index] = raw[:, columns].copy().view(layout.dtype).ravel()
+                        target.flush()
+                        del target
+                        present[index] = True
+                finally:
+                    points.close()
+                feedback.setProgress(80.0 * (number + 1) / len(command.inputs))
+
+            if layout is None:
+                raise LAStoolsNativeUnsupported("no tiles")
+            # the points of the file in their order, without those dropped
+            # after tiling
+            writer = LASWriter(output, layout)
+            if len(present):
+                source = numpy.memmap(file, dtype=layout.dtype, mode="r", shape=(len(present),))
+                for start in range(0, len(present), CHUNK):
+                    writer.write(source[start:start + CHUNK][present[start:start + CHUNK]])
+                del source
+            writer.close(feedback)
+    finally:
+        os.remove(scattered)
+    feedback.pushConsoleInfo("{}: {} points of {} tiles".format(output, writer.count, len(command.inputs)))
+    return 0
+
+def run(command, feedback):
+    reverseTiling = command.switch("-reverse_tiling")
+    size = command.value("-tile_size", 1000.0)
+    buffer = command.value("-buffer", 0.0)
+    flagWithheld = command.switch("-flag_as_withheld")
+    reversible = command.switch("-reversible")
+    flightlines = command.switch("-files_are_flightlines")
+    fileSourceId = command.switch("-apply_file_source_ID")
+    # -extra_pass only saves memory in the binary
+    command.switch("-extra_pass")
+    command.finish()
+    if not command.hasOutput():
+        raise LAStoolsNativeUnsupported("no output")
+    if reverseTiling:
+        return reverse(command, feedback)
+    if size <= 0.0 or buffer < 0.0:
+        raise LAStoolsNativeUnsupported("-tile_size {} -buffer {}".format(size, buffer))
+    return tile(command, feedback, size, buffer, flagWithheld, reversible, flightlines, fileSourceId)
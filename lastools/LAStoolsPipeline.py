@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    LAStoolsPipeline.py
+    ---------------------
+    This script runs the stages of a LAStools pipeline as a graph, starting
+    every stage whose inputs are ready as long as the core budget allows.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import glob
+import json
+import queue
+import re
+import fnmatch
+import hashlib
+import concurrent.futures
+
+from qgis.core import QgsProcessingException
+from processing.core.ProcessingConfig import ProcessingConfig
+
+from .LAStoolsUtils import LAStoolsUtils
+
+def wildcardsIntersect(a, b):
+    # true if some file name can be matched by both wildcards ('*' and '?')
+    memo = {}
+    def intersect(i, j):
+        key = (i, j)
+        if key in memo:
+            return memo[key]
+        if i == len(a):
+            result = all(c == '*' for c in b[j:])
+        elif j == len(b):
+            result = all(c == '*' for c in a[i:])
+        elif a[i] == '*' or b[j] == '*':
+            result = (a[i] == '*' and intersect(i + 1, j)) or (b[j] == '*' and intersect(i, j + 1)) or \
+                     (a[i] == '*' and intersect(i, j + 1)) or (b[j] == '*' and intersect(i + 1, j))
+        else:
+            result = (a[i] == b[j] or a[i] == '?' or b[j] == '?') and intersect(i + 1, j + 1)
+        memo[key] = result
+        return result
+    return intersect(0, 0)
+
+class LAStoolsStage:
+
+    def __init__(self, name, commands, inputs, outputs, tiled=False, wildcards=None):
+        self.name = name
+        self.commands = commands
+        self.inputs = inputs
+        self.outputs = outputs
+        self.tiled = tiled
+        self.wildcards = wildcards if wildcards is not None else []
+        self.tile = None
+        self.priority = (0, 0)
+        self.cores = LAStoolsStage.coresOf(commands)
+        self.predecessors = set()
+        self.successors = set()
+
+    @staticmethod
+    def coresOf(commands):
+        if "-cores" in commands:
+            index = commands.index("-cores")
+            try:
+                return max(1, int(commands[index + 1]))
+            except (IndexError, ValueError):
+                pass
+        return 1
+
+    def forTile(self, index, star):
+        # the instance of a per-tile stage that only processes one tile
+        commands = []
+        for argument in self.commands:
+            for wildcard in self.wildcards:
+                argument = argument.replace(wildcard, wildcard.replace("*", star, 1))
+            commands.append(argument)
+        if "-cores" in commands:
+            del commands[commands.index("-cores"):commands.index("-cores") + 2]
+        stage = LAStoolsStage("{} {}".format(self.name, star.strip("_")), commands,
+                              [wildcard.replace("*", star, 1) for wildcard in self.inputs],
+                              [wildcard.replace("*", star, 1) for wildcard in self.outputs])
+        stage.tile = index
+        return stage
+
+class LAStoolsStageFeedback:
+
+    # hands the console output of a stage running in a worker thread over
+    # to the pipeline, which pushes it to the real feedback tagged with the
+    # name of the stage
+
+    def __init__(self, feedback, stage, messages):
+        self.feedback = feedback
+        self.stage = stage
+        self.messages = messages
+        self.progress = 0.0
+
+    def isCanceled(self):
+        return self.feedback.isCanceled()
+
+    def pushInfo(self, info):
+        self.messages.put((self.stage, info))
+
+    def pushConsoleInfo(self, info):
+        self.messages.put((self.stage, info))
+
+    def pushCommandInfo(self, info):
+        self.messages.put((self.stage, info))
+
+    def setProgress(self, progress):
+        self.progress = progress
+
+class LAStoolsStageCache:
+
+    # remembers for every stage a key made from its command line and the
+    # size, mtime and content hash of its input files together with the
+    # outputs it produced, so that a re-run can skip stages whose key still
+    # matches and a failed run resumes at the first stage that failed
+
+    MANIFEST = "lastools_pipeline.json"
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, LAStoolsStageCache.MANIFEST)
+        self.stages = {}
+        self.hashes = {}
+        try:
+            with open(self.path) as manifest:
+                content = json.load(manifest)
+            self.stages = content.get("stages", {})
+            self.hashes = content.get("hashes", {})
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as manifest:
+            json.dump({"stages": self.stages, "hashes": self.hashes}, manifest, indent=1)
+        os.replace(temporary, self.path)
+
+    def fileHash(self, path, status):
+        # hashing multi-gigabyte tiles is not free so a hash is only
+        # recomputed when size or mtime of the file changed
+        known = self.hashes.get(path)
+        if known is not None and known[0] == status.st_size and known[1] == status.st_mtime_ns:
+            return known[2]
+        digest = hashlib.sha1()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        self.hashes[path] = [status.st_size, status.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def stageKey(self, stage, files):
+        # the number of cores does not change the results
+        commands = list(stage.commands)
+        if "-cores" in commands:
+            del commands[commands.index("-cores"):commands.index("-cores") + 2]
+        description = [" ".join(commands)]
+        for path in files:
+            status = os.stat(path)
+            description.append([path, status.st_size, status.st_mtime_ns, self.fileHash(path, status)])
+        return hashlib.sha1(json.dumps(description).encode("utf-8")).hexdigest()
+
+    def isValid(self, stage, key):
+        entry = self.stages.get(stage.name)
+        if entry is None or entry["key"] != key:
+            return False
+        for path, (size, mtime) in entry["outputs"].items():
+            try:
+                status = os.stat(path)
+            except OSError:
+                return False
+            if status.st_size != size or status.st_mtime_ns != mtime:
+                return False
+        return True
+
+    def record(self, stage, key, files):
+        outputs = {}
+        for path in files:
+            status = os.stat(path)
+            outputs[path] = [status.st_size, status.st_mtime_ns]
+        self.stages[stage.name] = {"key": key, "outputs": outputs}
+        self.save()
+
+    def forget(self, stage):
+        if self.stages.pop(stage.name, None) is not None:
+            self.save()
+
+class LAStoolsPipeline:
+
+    def __init__(self, directory, budget=None, resume=False, wavefront=False):
+        self.directory = directory
+        if budget is None:
+            budget = LAStoolsPipeline.coreBudget()
+        self.budget = max(1, budget)
+        self.stages = []
+        self.cache = LAStoolsStageCache(directory) if resume else None
+        self.wavefront = wavefront
+
+    @staticmethod
+    def coreBudget():
+        budget = ProcessingConfig.getSetting("LASTOOLS_PIPELINE_CORES")
+        try:
+            budget = int(budget)
+        except (TypeError, ValueError):
+            budget = 0
+        if budget <= 0:
+            budget = os.cpu_count() or 1
+        return budget
+
+    def wildcardPath(self, wildcard):
+        # relative wildcards live in the temporary directory
+        if not os.path.isabs(wildcard):
+            wildcard = os.path.join(self.directory, wildcard)
+        return os.path.normcase(os.path.normpath(wildcard))
+
+    def addStage(self, name, commands, inputs, outputs, tiled=False):
+        # a tiled stage processes every tile on its own, so in wavefront mode
+        # it is split into one stage per tile once the tiles exist
+        stage = LAStoolsStage(name, commands, [self.wildcardPath(i) for i in inputs], [self.wildcardPath(o) for o in outputs], tiled, inputs)
+        stage.priority = (0, -len(self.stages))
+        for earlier in self.stages:
+            if self.conflicts(earlier.outputs, stage.inputs) or self.conflicts(earlier.inputs, stage.outputs) or self.conflicts(earlier.outputs, stage.outputs):
+                stage.predecessors.add(earlier)
+                earlier.successors.add(stage)
+        self.stages.append(stage)
+        return stage
+
+    def conflicts(self, wildcards1, wildcards2):
+        for wildcard1 in wildcards1:
+            for wildcard2 in wildcards2:
+                if wildcardsIntersect(wildcard1, wildcard2):
+                    return True
+        return False
+
+    def matchingFiles(self, stage, wildcards):
+        # the files a wildcard of the stage would have matched in a clean
+        # run, i.e. without the products of this or any later stage
+        index = self.stages.index(stage)
+        if wildcards is stage.outputs:
+            index += 1
+        later = [output for other in self.stages[index:] for output in other.outputs]
+        files = set()
+        for wildcard in wildcards:
+            for path in glob.glob(wildcard):
+                path = os.path.normcase(os.path.normpath(path))
+                if os.path.basename(path) == LAStoolsStageCache.MANIFEST:
+                    continue
+                if not any(fnmatch.fnmatchcase(path, output) for output in later):
+                    files.add(path)
+        return sorted(files)
+
+    def descendants(self, stage):
+        found = []
+        todo = [stage]
+        while todo:
+            for successor in todo.pop().successors:
+                if successor not in found:
+                    found.append(successor)
+                    todo.append(successor)
+        return found
+
+    def invalidate(self, stage):
+        # results of this stage and of everything downstream are stale, so
+        # remove those left in the temporary directory by an earlier run
+        directory = os.path.normcase(os.path.normpath(self.directory))
+        for stale in [stage] + self.descendants(stage):
+            self.cache.forget(stale)
+            for output in stale.outputs:
+                if not output.startswith(directory + os.sep):
+                    continue
+                for path in glob.glob(output):
+                    if os.path.basename(path) != LAStoolsStageCache.MANIFEST and os.path.isfile(path):
+                        os.remove(path)
+
+    def tileStars(self, producer):
+        # what the '*' of the tiling stage's output wildcard stands for in
+        # each of the tiles it created
+        patterns = []
+        for output in producer.outputs:
+            parts = [re.escape(part).replace("\\?", ".") for part in output.split("*")]
+            if len(parts) > 1:
+                patterns.append(re.compile(parts[0] + "(.*?)" + ".*".join(parts[1:]) + "$"))
+        stars = []
+        for path in self.matchingFiles(producer, producer.outputs):
+            for pattern in patterns:
+                match = pattern.match(path)
+                if match and match.group(1) not in stars:
+                    stars.append(match.group(1))
+        return stars
+
+    def expand(self, producer, templates):
+        # replaces the per-tile stages by one instance per tile, so that a
+        # tile moves on to its next stage as soon as it is done with the
+        # previous one instead of waiting for all other tiles
+        instances = {}
+        stars = self.tileStars(producer)
+        for template in templates:
+            for index, star in enumerate(stars):
+                instance = template.forTile(index, star)
+                instance.priority = (index, template.priority[1])
+                for predecessor in template.predecessors:
+                    if predecessor in templates:
+                        instance.predecessors.add(instances[(predecessor, index)])
+                    else:
+                        instance.predecessors.add(predecessor)
+                instances[(template, index)] = instance
+        for stage in self.stages:
+            if stage not in templates and stage.predecessors & set(templates):
+                stage.predecessors = (stage.predecessors - set(templates)) | set(instance for (template, index), instance in instances.items() if template in stage.predecessors)
+        byTile = {}
+        for (template, index), instance in instances.items():
+            byTile.setdefault(index, []).append(instance)
+        return byTile
+
+    def release(self, stage, tileStages, remaining):
+        # removes the intermediates of a tile once none of the remaining
+        # stages of that tile or of the whole pipeline still reads them
+        directory = os.path.normcase(os.path.normpath(self.directory)) + os.sep
+        readers = [other for other in remaining if other in tileStages or other.tile is None]
+        for wildcard in stage.inputs:
+            if not wildcard.startswith(directory):
+                continue
+            if any(self.conflicts([wildcard], other.inputs) for other in readers):
+                continue
+            for path in glob.glob(wildcard):
+                if os.path.isfile(path):
+                    os.remove(path)
+
+    def pushMessages(self, messages, feedback):
+        while True:
+            try:
+                stage, message = messages.get_nowait()
+            except queue.Empty:
+                return
+            feedback.pushConsoleInfo("[{}] {}".format(stage.name, message))
+
+    def run(self, feedback):
+        templates = [stage for stage in self.stages if self.wavefront and stage.tiled]
+        producers = set(predecessor for template in templates for predecessor in template.predecessors if predecessor not in templates)
+        pending = [stage for stage in self.stages if stage not in templates]
+        total = len(pending)
+        tiles = {}
+        finished = set()
+        running = {}
+        messages = queue.Queue()
+        used = 0
+        failed = None
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.budget) as executor:
+            while pending or running:
+                if templates and producers.issubset(finished):
+                    # older tiles first and, within a tile, later stages first
+                    tiles = self.expand(max(producers, key=self.stages.index), templates)
+                    templates = []
+                    for instances in tiles.values():
+                        pending.extend(instances)
+                        total += len(instances)
+                    pending.sort(key=lambda stage: stage.priority)
+                if failed is None and not feedback.isCanceled():
+                    for stage in list(pending):
+                        if not stage.predecessors.issubset(finished):
+                            continue
+                        cores = min(stage.cores, self.budget)
+                        if running and used + cores > self.budget:
+                            continue
+                        pending.remove(stage)
+                        if self.cache is not None and stage.tile is None:
+                            stage.key = self.cache.stageKey(stage, self.matchingFiles(stage, stage.inputs))
+                            if self.cache.isValid(stage, stage.key):
+                                finished.add(stage)
+                                feedback.pushConsoleInfo("LAStools pipeline stage '{}' skipped, the results of an earlier run are still valid".format(stage.name))
+                                continue
+                            self.invalidate(stage)
+                        used += cores
+                        stageFeedback = LAStoolsStageFeedback(feedback, stage, messages)
+                        future = executor.submit(LAStoolsUtils.runLAStools, stage.commands, stageFeedback)
+                        running[future] = (stage, stageFeedback, cores)
+                elif not running:
+                    break
+                done, _ = concurrent.futures.wait(running, timeout=0.5, return_when=concurrent.futures.FIRST_COMPLETED)
+                self.pushMessages(messages, feedback)
+                for future in done:
+                    stage, stageFeedback, cores = running.pop(future)
+                    used -= cores
+                    try:
+                        returncode = future.result()
+                    except Exception as e:
+                        returncode = e
+                    if returncode:
+                        if failed is None:
+                            failed = (stage, returncode)
+                    else:
+                        finished.add(stage)
+                        if self.cache is not None and stage.tile is None:
+                            self.cache.record(stage, stage.key, self.matchingFiles(stage, stage.outputs))
+                        if stage.tile is not None:
+                            self.release(stage, tiles[stage.tile], pending + [other for other, _, _ in running.values()])
+                        feedback.pushConsoleInfo("LAStools pipeline stage '{}' finished".format(stage.name))
+                partial = sum(stageFeedback.progress for _, stageFeedback, _ in running.values()) / 100.0
+                feedback.setProgress(100.0 * (len(finished) + partial) / total)
+        self.pushMessages(messages, feedback)
+        if feedback.isCanceled() and (failed is not None or pending or templates):
+            # the outputs of the stages left are not there
+            raise QgsProcessingException("LAStools pipeline canceled with {} stages left".format(len(pending) + len(templates) + (failed is not None)))
+        if failed is not None:
+            raise QgsProcessingException("LAStools pipeline stage '{}' failed ({})".format(failed[0].name, failed[1]))
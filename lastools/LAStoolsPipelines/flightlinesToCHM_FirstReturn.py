@@ -28,6 +28,7 @@ from qgis.core import QgsProcessingParameterString
 
 from ..LAStoolsUtils import LAStoolsUtils
 from ..LAStoolsAlgorithm import LAStoolsAlgorithm
+from ..LAStoolsPipeline import LAStoolsPipeline
 
 class flightlinesToCHM_FirstReturn(LAStoolsAlgorithm):
 
@@ -39,11 +40,14 @@ class flightlinesToCHM_FirstReturn(LAStoolsAlgorithm):
 
     def initAlgorithm(self, config):
         self.addParametersPointInputFolderGUI()
+        self.addParametersAreaOfInterestGUI()
         self.addParameter(QgsProcessingParameterNumber(flightlinesToCHM_FirstReturn.TILE_SIZE, "tile size (side length of square tile)", QgsProcessingParameterNumber.Double, 1000.0, False, 0.0))
         self.addParameter(QgsProcessingParameterNumber(flightlinesToCHM_FirstReturn.BUFFER, "buffer around tiles (avoids edge artifacts)", QgsProcessingParameterNumber.Double, 25.0, False, 0.0))
         self.addParameter(QgsProcessingParameterEnum(flightlinesToCHM_FirstReturn.TERRAIN, "terrain type", flightlinesToCHM_FirstReturn.TERRAINS, False, 2))
         self.addParametersStepGUI()
         self.addParametersTemporaryDirectoryGUI()
+        self.addParametersResumePipelineGUI()
+        self.addParametersWavefrontPipelineGUI()
         self.addParametersOutputDirectoryGUI()
         self.addParameter(QgsProcessingParameterString(flightlinesToCHM_FirstReturn.BASE_NAME, "tile base name (using 'sydney' creates sydney_274000_4714000...)", "tile"))
         self.addParametersRasterOutputFormatGUI()
@@ -52,6 +56,12 @@ class flightlinesToCHM_FirstReturn(LAStoolsAlgorithm):
 
     def processAlgorithm(self, parameters, context, feedback):
 
+        files = self.getParametersPointInputFolderFiles(parameters, context, feedback)
+        if files == []:
+            return {"": None}
+
+        pipeline = LAStoolsPipeline(self.getParametersTemporaryDirectoryValue(parameters, context), resume=self.getParametersResumePipelineValue(parameters, context), wavefront=self.getParametersWavefrontPipelineValue(parameters, context))
+
         # first we tile the data
 
         commands = [os.path.join(LAStoolsUtils.LAStoolsPath(), "bin", "lastile")]
@@ -73,7 +83,7 @@ class flightlinesToCHM_FirstReturn(LAStoolsAlgorithm):
         commands.append(base_name)
         commands.append("-olaz")
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lastile", commands, self.getParametersPointInputFolderValues(parameters, context), [base_name + "*.laz"])
 
         # then we ground classify the tiles
 
@@ -95,7 +105,7 @@ class flightlinesToCHM_FirstReturn(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasground", commands, [base_name + "*.laz"], [base_name + "*_g.laz"], tiled=True)
 
         # then we height-normalize the tiles
 
@@ -109,7 +119,7 @@ class flightlinesToCHM_FirstReturn(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasheight", commands, [base_name + "*_g.laz"], [base_name + "*_gh.laz"], tiled=True)
 
         # then we rasterize the normalized tiles into CHMs
 
@@ -126,8 +136,10 @@ class flightlinesToCHM_FirstReturn(LAStoolsAlgorithm):
         self.addParametersRasterOutputFormatCommands(parameters, context, commands)
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
-        
+        pipeline.addStage("las2dem_chm_fr", commands, [base_name + "*_gh.laz"], [os.path.join(self.getParametersOutputDirectoryValue(parameters, context), base_name + "*_chm_fr.*")], tiled=True)
+
+        pipeline.run(feedback)
+
         return {"": None}
 
     def name(self):
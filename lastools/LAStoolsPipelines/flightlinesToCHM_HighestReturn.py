@@ -28,6 +28,7 @@ from qgis.core import QgsProcessingParameterString
 
 from ..LAStoolsUtils import LAStoolsUtils
 from ..LAStoolsAlgorithm import LAStoolsAlgorithm
+from ..LAStoolsPipeline import LAStoolsPipeline
 
 class flightlinesToCHM_HighestReturn(LAStoolsAlgorithm):
 
@@ -40,12 +41,15 @@ class flightlinesToCHM_HighestReturn(LAStoolsAlgorithm):
 
     def initAlgorithm(self, config):
         self.addParametersPointInputFolderGUI()
+        self.addParametersAreaOfInterestGUI()
         self.addParameter(QgsProcessingParameterNumber(flightlinesToCHM_HighestReturn.TILE_SIZE, "tile size (side length of square tile)", QgsProcessingParameterNumber.Double, 1000.0, False, 0.0))
         self.addParameter(QgsProcessingParameterNumber(flightlinesToCHM_HighestReturn.BUFFER, "buffer around tiles (avoids edge artifacts)", QgsProcessingParameterNumber.Double, 25.0, False, 0.0))
         self.addParameter(QgsProcessingParameterEnum(flightlinesToCHM_HighestReturn.TERRAIN, "terrain type", flightlinesToCHM_HighestReturn.TERRAINS, False, 2))
         self.addParameter(QgsProcessingParameterNumber(flightlinesToCHM_HighestReturn.BEAM_WIDTH, "laser beam width (diameter of laser footprint)", QgsProcessingParameterNumber.Double, 0.2, False, 0.0))
         self.addParametersStepGUI()
         self.addParametersTemporaryDirectoryGUI()
+        self.addParametersResumePipelineGUI()
+        self.addParametersWavefrontPipelineGUI()
         self.addParametersOutputDirectoryGUI()
         self.addParameter(QgsProcessingParameterString(flightlinesToCHM_HighestReturn.BASE_NAME, "tile base name (using 'sydney' creates sydney_274000_4714000...)", "tile"))
         self.addParametersRasterOutputFormatGUI()
@@ -54,6 +58,12 @@ class flightlinesToCHM_HighestReturn(LAStoolsAlgorithm):
 
     def processAlgorithm(self, parameters, context, feedback):
 
+        files = self.getParametersPointInputFolderFiles(parameters, context, feedback)
+        if files == []:
+            return {"": None}
+
+        pipeline = LAStoolsPipeline(self.getParametersTemporaryDirectoryValue(parameters, context), resume=self.getParametersResumePipelineValue(parameters, context), wavefront=self.getParametersWavefrontPipelineValue(parameters, context))
+
         # first we tile the data
 
         commands = [os.path.join(LAStoolsUtils.LAStoolsPath(), "bin", "lastile")]
@@ -75,7 +85,7 @@ class flightlinesToCHM_HighestReturn(LAStoolsAlgorithm):
         commands.append(base_name)
         commands.append("-olaz")
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lastile", commands, self.getParametersPointInputFolderValues(parameters, context), [base_name + "*.laz"])
 
         # then we ground classify the tiles
 
@@ -97,7 +107,7 @@ class flightlinesToCHM_HighestReturn(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasground", commands, [base_name + "*.laz"], [base_name + "*_g.laz"], tiled=True)
 
         # then we height-normalize the tiles
 
@@ -111,7 +121,7 @@ class flightlinesToCHM_HighestReturn(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasheight", commands, [base_name + "*_g.laz"], [base_name + "*_gh.laz"], tiled=True)
 
         # then we thin and splat the tiles
 
@@ -132,7 +142,7 @@ class flightlinesToCHM_HighestReturn(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasthin", commands, [base_name + "*_gh.laz"], [base_name + "*_ght.laz"], tiled=True)
 
         # then we rasterize the normalized tiles into CHMs
 
@@ -149,8 +159,10 @@ class flightlinesToCHM_HighestReturn(LAStoolsAlgorithm):
         self.addParametersRasterOutputFormatCommands(parameters, context, commands)
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
-        
+        pipeline.addStage("las2dem_chm_hr", commands, [base_name + "*_ght.laz"], [os.path.join(self.getParametersOutputDirectoryValue(parameters, context), base_name + "*_chm_hr.*")], tiled=True)
+
+        pipeline.run(feedback)
+
         return {"": None}
 
     def name(self):
@@ -28,6 +28,7 @@ from qgis.core import QgsProcessingParameterString
 
 from ..LAStoolsUtils import LAStoolsUtils
 from ..LAStoolsAlgorithm import LAStoolsAlgorithm
+from ..LAStoolsPipeline import LAStoolsPipeline
 
 class flightlinesToCHM_SpikeFree(LAStoolsAlgorithm):
 
@@ -41,6 +42,7 @@ class flightlinesToCHM_SpikeFree(LAStoolsAlgorithm):
 
     def initAlgorithm(self, config):
         self.addParametersPointInputFolderGUI()
+        self.addParametersAreaOfInterestGUI()
         self.addParameter(QgsProcessingParameterNumber(flightlinesToCHM_SpikeFree.TILE_SIZE, "tile size (side length of square tile)", QgsProcessingParameterNumber.Double, 1000.0, False, 0.0))
         self.addParameter(QgsProcessingParameterNumber(flightlinesToCHM_SpikeFree.BUFFER, "buffer around tiles (avoids edge artifacts)", QgsProcessingParameterNumber.Double, 25.0, False, 0.0))
         self.addParameter(QgsProcessingParameterEnum(flightlinesToCHM_SpikeFree.TERRAIN, "terrain type", flightlinesToCHM_SpikeFree.TERRAINS, False, 2))
@@ -48,6 +50,8 @@ class flightlinesToCHM_SpikeFree(LAStoolsAlgorithm):
         self.addParametersStepGUI()
         self.addParameter(QgsProcessingParameterNumber(flightlinesToCHM_SpikeFree.FREEZE_VALUE, "spike-free freeze value (by default 3 times step)", QgsProcessingParameterNumber.Double, 0.0, False, 0.0))
         self.addParametersTemporaryDirectoryGUI()
+        self.addParametersResumePipelineGUI()
+        self.addParametersWavefrontPipelineGUI()
         self.addParametersOutputDirectoryGUI()
         self.addParameter(QgsProcessingParameterString(flightlinesToCHM_SpikeFree.BASE_NAME, "tile base name (using 'sydney' creates sydney_274000_4714000...)", "tile"))
         self.addParametersRasterOutputFormatGUI()
@@ -56,6 +60,12 @@ class flightlinesToCHM_SpikeFree(LAStoolsAlgorithm):
 
     def processAlgorithm(self, parameters, context, feedback):
 
+        files = self.getParametersPointInputFolderFiles(parameters, context, feedback)
+        if files == []:
+            return {"": None}
+
+        pipeline = LAStoolsPipeline(self.getParametersTemporaryDirectoryValue(parameters, context), resume=self.getParametersResumePipelineValue(parameters, context), wavefront=self.getParametersWavefrontPipelineValue(parameters, context))
+
         # needed for thinning and spike-free
 
         step = self.getParametersStepValue(parameters, context)
@@ -81,7 +91,7 @@ class flightlinesToCHM_SpikeFree(LAStoolsAlgorithm):
         commands.append(base_name)
         commands.append("-olaz")
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lastile", commands, self.getParametersPointInputFolderValues(parameters, context), [base_name + "*.laz"])
 
         # then we ground classify the tiles
 
@@ -103,7 +113,7 @@ class flightlinesToCHM_SpikeFree(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasground", commands, [base_name + "*.laz"], [base_name + "*_g.laz"], tiled=True)
 
         # then we height-normalize the tiles
 
@@ -117,7 +127,7 @@ class flightlinesToCHM_SpikeFree(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasheight", commands, [base_name + "*_g.laz"], [base_name + "*_gh.laz"], tiled=True)
 
         # then we thin and splat the tiles
 
@@ -137,7 +147,7 @@ class flightlinesToCHM_SpikeFree(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasthin", commands, [base_name + "*_gh.laz"], [base_name + "*_ght.laz"], tiled=True)
 
         # then we rasterize the normalized tiles into CHMs
 
@@ -160,8 +170,10 @@ class flightlinesToCHM_SpikeFree(LAStoolsAlgorithm):
         self.addParametersRasterOutputFormatCommands(parameters, context, commands)
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
-        
+        pipeline.addStage("las2dem_chm_sf", commands, [base_name + "*_ght.laz"], [os.path.join(self.getParametersOutputDirectoryValue(parameters, context), base_name + "*_chm_sf.*")], tiled=True)
+
+        pipeline.run(feedback)
+
         return {"": None}
 
     def name(self):
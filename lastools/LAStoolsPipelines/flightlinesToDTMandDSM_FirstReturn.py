@@ -28,6 +28,7 @@ from qgis.core import QgsProcessingParameterString
 
 from ..LAStoolsUtils import LAStoolsUtils
 from ..LAStoolsAlgorithm import LAStoolsAlgorithm
+from ..LAStoolsPipeline import LAStoolsPipeline
 
 class flightlinesToDTMandDSM_FirstReturn(LAStoolsAlgorithm):
 
@@ -39,11 +40,14 @@ class flightlinesToDTMandDSM_FirstReturn(LAStoolsAlgorithm):
 
     def initAlgorithm(self, config):
         self.addParametersPointInputFolderGUI()
+        self.addParametersAreaOfInterestGUI()
         self.addParameter(QgsProcessingParameterNumber(flightlinesToDTMandDSM_FirstReturn.TILE_SIZE, "tile size (side length of square tile)", QgsProcessingParameterNumber.Double, 1000.0, False, 0.0))
         self.addParameter(QgsProcessingParameterNumber(flightlinesToDTMandDSM_FirstReturn.BUFFER, "buffer around tiles (avoids edge artifacts)", QgsProcessingParameterNumber.Double, 25.0, False, 0.0))
         self.addParameter(QgsProcessingParameterEnum(flightlinesToDTMandDSM_FirstReturn.TERRAIN, "terrain type", flightlinesToDTMandDSM_FirstReturn.TERRAINS, False, 2))
         self.addParametersStepGUI()
         self.addParametersTemporaryDirectoryGUI()
+        self.addParametersResumePipelineGUI()
+        self.addParametersWavefrontPipelineGUI()
         self.addParametersOutputDirectoryGUI()
         self.addParameter(QgsProcessingParameterString(flightlinesToDTMandDSM_FirstReturn.BASE_NAME, "tile base name (using 'sydney' creates sydney_274000_4714000...)", "tile"))
         self.addParametersRasterOutputFormatGUI()
@@ -51,7 +55,13 @@ class flightlinesToDTMandDSM_FirstReturn(LAStoolsAlgorithm):
         self.addParametersVerboseGUI()
 
     def processAlgorithm(self, parameters, context, feedback):
-    
+
+        files = self.getParametersPointInputFolderFiles(parameters, context, feedback)
+        if files == []:
+            return {"": None}
+
+        pipeline = LAStoolsPipeline(self.getParametersTemporaryDirectoryValue(parameters, context), resume=self.getParametersResumePipelineValue(parameters, context), wavefront=self.getParametersWavefrontPipelineValue(parameters, context))
+
         # needed for thinning
 
         step = self.getParametersStepValue(parameters, context)
@@ -77,7 +87,7 @@ class flightlinesToDTMandDSM_FirstReturn(LAStoolsAlgorithm):
         commands.append(base_name)
         commands.append("-olaz")
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lastile", commands, self.getParametersPointInputFolderValues(parameters, context), [base_name + "*.laz"])
 
         # then we ground classify the tiles
  
@@ -99,7 +109,7 @@ class flightlinesToDTMandDSM_FirstReturn(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasground", commands, [base_name + "*.laz"], [base_name + "*_g.laz"], tiled=True)
 
         # then we rasterize the classified tiles into DTMs
 
@@ -120,7 +130,7 @@ class flightlinesToDTMandDSM_FirstReturn(LAStoolsAlgorithm):
         self.addParametersRasterOutputFormatCommands(parameters, context, commands)
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_dtm", commands, [base_name + "*_g.laz"], [os.path.join(self.getParametersOutputDirectoryValue(parameters, context), base_name + "*_dtm.*")], tiled=True)
 
         # then we rasterize the classified tiles into first return DSMs
 
@@ -140,8 +150,10 @@ class flightlinesToDTMandDSM_FirstReturn(LAStoolsAlgorithm):
         self.addParametersRasterOutputFormatCommands(parameters, context, commands)
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
-        
+        pipeline.addStage("las2dem_dsm", commands, [base_name + "*_g.laz"], [os.path.join(self.getParametersOutputDirectoryValue(parameters, context), base_name + "*_dsm.*")], tiled=True)
+
+        pipeline.run(feedback)
+
         return {"": None}
 
     def name(self):
@@ -28,6 +28,7 @@ from qgis.core import QgsProcessingParameterString
 
 from ..LAStoolsUtils import LAStoolsUtils
 from ..LAStoolsAlgorithm import LAStoolsAlgorithm
+from ..LAStoolsPipeline import LAStoolsPipeline
 
 class flightlinesToDTMandDSM_SpikeFree(LAStoolsAlgorithm):
 
@@ -40,12 +41,15 @@ class flightlinesToDTMandDSM_SpikeFree(LAStoolsAlgorithm):
 
     def initAlgorithm(self, config):
         self.addParametersPointInputFolderGUI()
+        self.addParametersAreaOfInterestGUI()
         self.addParameter(QgsProcessingParameterNumber(flightlinesToDTMandDSM_SpikeFree.TILE_SIZE, "tile size (side length of square tile)", QgsProcessingParameterNumber.Double, 1000.0, False, 0.0))
         self.addParameter(QgsProcessingParameterNumber(flightlinesToDTMandDSM_SpikeFree.BUFFER, "buffer around tiles (avoids edge artifacts)", QgsProcessingParameterNumber.Double, 25.0, False, 0.0))
         self.addParameter(QgsProcessingParameterEnum(flightlinesToDTMandDSM_SpikeFree.TERRAIN, "terrain type", flightlinesToDTMandDSM_SpikeFree.TERRAINS, False, 2))
         self.addParametersStepGUI()
         self.addParameter(QgsProcessingParameterNumber(flightlinesToDTMandDSM_SpikeFree.FREEZE_VALUE, "spike-free freeze value (by default 3 times step)", QgsProcessingParameterNumber.Double, 0.0, False, 0.0))
         self.addParametersTemporaryDirectoryGUI()
+        self.addParametersResumePipelineGUI()
+        self.addParametersWavefrontPipelineGUI()
         self.addParametersOutputDirectoryGUI()
         self.addParameter(QgsProcessingParameterString(flightlinesToDTMandDSM_SpikeFree.BASE_NAME, "tile base name (using 'sydney' creates sydney_274000_4714000...)", "tile"))
         self.addParametersRasterOutputFormatGUI()
@@ -53,7 +57,13 @@ class flightlinesToDTMandDSM_SpikeFree(LAStoolsAlgorithm):
         self.addParametersVerboseGUI()
 
     def processAlgorithm(self, parameters, context, feedback):
-    
+
+        files = self.getParametersPointInputFolderFiles(parameters, context, feedback)
+        if files == []:
+            return {"": None}
+
+        pipeline = LAStoolsPipeline(self.getParametersTemporaryDirectoryValue(parameters, context), resume=self.getParametersResumePipelineValue(parameters, context), wavefront=self.getParametersWavefrontPipelineValue(parameters, context))
+
         # needed for thinning and spike-free
 
         step = self.getParametersStepValue(parameters, context)
@@ -79,7 +89,7 @@ class flightlinesToDTMandDSM_SpikeFree(LAStoolsAlgorithm):
         commands.append(base_name)
         commands.append("-olaz")
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lastile", commands, self.getParametersPointInputFolderValues(parameters, context), [base_name + "*.laz"])
 
         # then we ground classify the tiles
  
@@ -101,7 +111,7 @@ class flightlinesToDTMandDSM_SpikeFree(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasground", commands, [base_name + "*.laz"], [base_name + "*_g.laz"], tiled=True)
 
         # then we rasterize the classified tiles into DTMs
 
@@ -122,7 +132,7 @@ class flightlinesToDTMandDSM_SpikeFree(LAStoolsAlgorithm):
         self.addParametersRasterOutputFormatCommands(parameters, context, commands)
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_dtm", commands, [base_name + "*_g.laz"], [os.path.join(self.getParametersOutputDirectoryValue(parameters, context), base_name + "*_dtm.*")], tiled=True)
 
         # then we rasterize the classified tiles into spike-free DSMs
 
@@ -145,8 +155,10 @@ class flightlinesToDTMandDSM_SpikeFree(LAStoolsAlgorithm):
         self.addParametersRasterOutputFormatCommands(parameters, context, commands)
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
-        
+        pipeline.addStage("las2dem_dsm", commands, [base_name + "*_g.laz"], [os.path.join(self.getParametersOutputDirectoryValue(parameters, context), base_name + "*_dsm.*")], tiled=True)
+
+        pipeline.run(feedback)
+
         return {"": None}
 
     def name(self):
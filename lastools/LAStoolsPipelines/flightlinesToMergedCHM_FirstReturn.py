@@ -27,6 +27,7 @@ from qgis.core import QgsProcessingParameterEnum
 
 from ..LAStoolsUtils import LAStoolsUtils
 from ..LAStoolsAlgorithm import LAStoolsAlgorithm
+from ..LAStoolsPipeline import LAStoolsPipeline
 
 class flightlinesToMergedCHM_FirstReturn(LAStoolsAlgorithm):
 
@@ -37,17 +38,26 @@ class flightlinesToMergedCHM_FirstReturn(LAStoolsAlgorithm):
 
     def initAlgorithm(self, config):
         self.addParametersPointInputFolderGUI()
+        self.addParametersAreaOfInterestGUI()
         self.addParameter(QgsProcessingParameterNumber(flightlinesToMergedCHM_FirstReturn.TILE_SIZE, "tile size (side length of square tile)", QgsProcessingParameterNumber.Double, 1000.0, False, 0.0))
         self.addParameter(QgsProcessingParameterNumber(flightlinesToMergedCHM_FirstReturn.BUFFER, "buffer around tiles (avoids edge artifacts)", QgsProcessingParameterNumber.Double, 25.0, False, 0.0))
         self.addParameter(QgsProcessingParameterEnum(flightlinesToMergedCHM_FirstReturn.TERRAIN, "terrain type", flightlinesToMergedCHM_FirstReturn.TERRAINS, False, 2))      
         self.addParametersStepGUI()
         self.addParametersTemporaryDirectoryGUI()
+        self.addParametersResumePipelineGUI()
+        self.addParametersWavefrontPipelineGUI()
         self.addParametersRasterOutputGUI()
         self.addParametersCoresGUI()
         self.addParametersVerboseGUI()
 
     def processAlgorithm(self, parameters, context, feedback):
 
+        files = self.getParametersPointInputFolderFiles(parameters, context, feedback)
+        if files == []:
+            return {"": None}
+
+        pipeline = LAStoolsPipeline(self.getParametersTemporaryDirectoryValue(parameters, context), resume=self.getParametersResumePipelineValue(parameters, context), wavefront=self.getParametersWavefrontPipelineValue(parameters, context))
+
         # needed for thinning and killing
 
         step = self.getParametersStepValue(parameters, context)
@@ -69,7 +79,7 @@ class flightlinesToMergedCHM_FirstReturn(LAStoolsAlgorithm):
         commands.append("-o")
         commands.append("tile.laz")
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lastile", commands, self.getParametersPointInputFolderValues(parameters, context), ["tile*.laz"])
 
         # then we ground classify the tiles
 
@@ -91,7 +101,7 @@ class flightlinesToMergedCHM_FirstReturn(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasground", commands, ["tile*.laz"], ["tile*_g.laz"], tiled=True)
 
         # then we height-normalize the tiles
 
@@ -105,7 +115,7 @@ class flightlinesToMergedCHM_FirstReturn(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasheight", commands, ["tile*_g.laz"], ["tile*_gh.laz"], tiled=True)
 
         # then we rasterize the height-normalized tiles into trivial zero-level DTMs
 
@@ -125,7 +135,7 @@ class flightlinesToMergedCHM_FirstReturn(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_dtm", commands, ["tile*_gh.laz"], ["tile*_dtm.bil"], tiled=True)
 
         # then we rasterize the normalized tiles into first-return CHMs (with kill)
 
@@ -145,7 +155,7 @@ class flightlinesToMergedCHM_FirstReturn(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_chm_fr", commands, ["tile*_gh.laz"], ["tile*_chm_fr.bil"], tiled=True)
 
         # then we combine the zero-level DTMs and the first-return CHMs into a single output CHM
 
@@ -157,8 +167,10 @@ class flightlinesToMergedCHM_FirstReturn(LAStoolsAlgorithm):
         commands.append("-highest")
         self.addParametersRasterOutputCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
-        
+        pipeline.addStage("lasgrid", commands, ["tile_*.bil"], [self.getParametersRasterOutputValue(parameters, context)])
+
+        pipeline.run(feedback)
+
         return {"": None}
 
     def name(self):
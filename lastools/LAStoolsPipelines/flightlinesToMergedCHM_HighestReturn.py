@@ -27,6 +27,7 @@ from qgis.core import QgsProcessingParameterEnum
 
 from ..LAStoolsUtils import LAStoolsUtils
 from ..LAStoolsAlgorithm import LAStoolsAlgorithm
+from ..LAStoolsPipeline import LAStoolsPipeline
 
 class flightlinesToMergedCHM_HighestReturn(LAStoolsAlgorithm):
 
@@ -38,18 +39,27 @@ class flightlinesToMergedCHM_HighestReturn(LAStoolsAlgorithm):
 
     def initAlgorithm(self, config):
         self.addParametersPointInputFolderGUI()
+        self.addParametersAreaOfInterestGUI()
         self.addParameter(QgsProcessingParameterNumber(flightlinesToMergedCHM_HighestReturn.TILE_SIZE, "tile size (side length of square tile)", QgsProcessingParameterNumber.Double, 1000.0, False, 0.0))
         self.addParameter(QgsProcessingParameterNumber(flightlinesToMergedCHM_HighestReturn.BUFFER, "buffer around tiles (avoids edge artifacts)", QgsProcessingParameterNumber.Double, 25.0, False, 0.0))
         self.addParameter(QgsProcessingParameterEnum(flightlinesToMergedCHM_HighestReturn.TERRAIN, "terrain type", flightlinesToMergedCHM_HighestReturn.TERRAINS, False, 2))
         self.addParameter(QgsProcessingParameterNumber(flightlinesToMergedCHM_HighestReturn.BEAM_WIDTH, "laser beam width (diameter of laser footprint)", QgsProcessingParameterNumber.Double, 0.2, False, 0.0))       
         self.addParametersStepGUI()
         self.addParametersTemporaryDirectoryGUI()
+        self.addParametersResumePipelineGUI()
+        self.addParametersWavefrontPipelineGUI()
         self.addParametersRasterOutputGUI()
         self.addParametersCoresGUI()
         self.addParametersVerboseGUI()
 
     def processAlgorithm(self, parameters, context, feedback):
 
+        files = self.getParametersPointInputFolderFiles(parameters, context, feedback)
+        if files == []:
+            return {"": None}
+
+        pipeline = LAStoolsPipeline(self.getParametersTemporaryDirectoryValue(parameters, context), resume=self.getParametersResumePipelineValue(parameters, context), wavefront=self.getParametersWavefrontPipelineValue(parameters, context))
+
         # needed for thinning and killing
 
         step = self.getParametersStepValue(parameters, context)
@@ -71,7 +81,7 @@ class flightlinesToMergedCHM_HighestReturn(LAStoolsAlgorithm):
         commands.append("-o")
         commands.append("tile.laz")
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lastile", commands, self.getParametersPointInputFolderValues(parameters, context), ["tile*.laz"])
 
         # then we ground classify the tiles
 
@@ -93,7 +103,7 @@ class flightlinesToMergedCHM_HighestReturn(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasground", commands, ["tile*.laz"], ["tile*_g.laz"], tiled=True)
 
         # then we height-normalize the tiles
 
@@ -107,7 +117,7 @@ class flightlinesToMergedCHM_HighestReturn(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasheight", commands, ["tile*_g.laz"], ["tile*_gh.laz"], tiled=True)
 
         # then we thin and splat the tiles
 
@@ -127,7 +137,7 @@ class flightlinesToMergedCHM_HighestReturn(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasthin", commands, ["tile*_gh.laz"], ["tile*_ght.laz"], tiled=True)
 
         # then we rasterize the height-normalized tiles into trivial zero-level DTMs
 
@@ -147,7 +157,7 @@ class flightlinesToMergedCHM_HighestReturn(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_dtm", commands, ["tile*_gh.laz"], ["tile*_dtm.bil"], tiled=True)
 
         # then we rasterize the normalized tiles into highest-return CHMs (with kill)
 
@@ -166,7 +176,7 @@ class flightlinesToMergedCHM_HighestReturn(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_chm_hr", commands, ["tile*_ght.laz"], ["tile*_chm_hr.bil"], tiled=True)
 
         # then we combine the zero-level DTMs and the highest-return CHMs into a single output CHM
 
@@ -178,8 +188,10 @@ class flightlinesToMergedCHM_HighestReturn(LAStoolsAlgorithm):
         commands.append("-highest")
         self.addParametersRasterOutputCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
-        
+        pipeline.addStage("lasgrid", commands, ["tile_*.bil"], [self.getParametersRasterOutputValue(parameters, context)])
+
+        pipeline.run(feedback)
+
         return {"": None}
 
     def name(self):
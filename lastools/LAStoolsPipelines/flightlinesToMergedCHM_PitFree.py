@@ -27,6 +27,7 @@ from qgis.core import QgsProcessingParameterEnum
 
 from ..LAStoolsUtils import LAStoolsUtils
 from ..LAStoolsAlgorithm import LAStoolsAlgorithm
+from ..LAStoolsPipeline import LAStoolsPipeline
 
 class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
 
@@ -38,18 +39,27 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
 
     def initAlgorithm(self, config):
         self.addParametersPointInputFolderGUI()
+        self.addParametersAreaOfInterestGUI()
         self.addParameter(QgsProcessingParameterNumber(flightlinesToMergedCHM_PitFree.TILE_SIZE, "tile size (side length of square tile)", QgsProcessingParameterNumber.Double, 1000.0, False, 0.0))
         self.addParameter(QgsProcessingParameterNumber(flightlinesToMergedCHM_PitFree.BUFFER, "buffer around tiles (avoids edge artifacts)", QgsProcessingParameterNumber.Double, 25.0, False, 0.0))
         self.addParameter(QgsProcessingParameterEnum(flightlinesToMergedCHM_PitFree.TERRAIN, "terrain type", flightlinesToMergedCHM_PitFree.TERRAINS, False, 2))
         self.addParameter(QgsProcessingParameterNumber(flightlinesToMergedCHM_PitFree.BEAM_WIDTH, "laser beam width (diameter of laser footprint)", QgsProcessingParameterNumber.Double, 0.2, False, 0.0))
         self.addParametersStepGUI()
         self.addParametersTemporaryDirectoryGUI()
+        self.addParametersResumePipelineGUI()
+        self.addParametersWavefrontPipelineGUI()
         self.addParametersRasterOutputGUI()
         self.addParametersCoresGUI()
         self.addParametersVerboseGUI()
 
     def processAlgorithm(self, parameters, context, feedback):
 
+        files = self.getParametersPointInputFolderFiles(parameters, context, feedback)
+        if files == []:
+            return {"": None}
+
+        pipeline = LAStoolsPipeline(self.getParametersTemporaryDirectoryValue(parameters, context), resume=self.getParametersResumePipelineValue(parameters, context), wavefront=self.getParametersWavefrontPipelineValue(parameters, context))
+
         # needed for thinning and killing
 
         step = self.getParametersStepValue(parameters, context)
@@ -71,7 +81,7 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
         commands.append("-o")
         commands.append("tile.laz")
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lastile", commands, self.getParametersPointInputFolderValues(parameters, context), ["tile*.laz"])
 
         # then we ground classify the tiles
 
@@ -93,7 +103,7 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasground", commands, ["tile*.laz"], ["tile*_g.laz"], tiled=True)
 
         # then we height-normalize the tiles
 
@@ -107,7 +117,7 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasheight", commands, ["tile*_g.laz"], ["tile*_gh.laz"], tiled=True)
 
         # then we thin and splat the tiles
 
@@ -127,7 +137,7 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasthin", commands, ["tile*_gh.laz"], ["tile*_ght.laz"], tiled=True)
 
         # then we rasterize the height-normalized tiles into trivial zero-level DTMs
 
@@ -147,7 +157,7 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_dtm", commands, ["tile*_gh.laz"], ["tile*_dtm.bil"], tiled=True)
 
         # then we rasterize the normalized tiles into the partial CHMs at level 00
 
@@ -166,7 +176,7 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_chm00", commands, ["tile*_ght.laz"], ["tile*_chm00.bil"], tiled=True)
 
         # then we rasterize the normalized tiles into the partial CHMs at level 02
 
@@ -187,7 +197,7 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_chm02", commands, ["tile*_ght.laz"], ["tile*_chm02.bil"], tiled=True)
 
         # then we rasterize the normalized tiles into the partial CHMs at level 05
 
@@ -208,7 +218,7 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_chm05", commands, ["tile*_ght.laz"], ["tile*_chm05.bil"], tiled=True)
 
         # then we rasterize the normalized tiles into the partial CHMs at level 10
 
@@ -229,7 +239,7 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_chm10", commands, ["tile*_ght.laz"], ["tile*_chm10.bil"], tiled=True)
 
         # then we rasterize the normalized tiles into the partial CHMs at level 15
 
@@ -250,7 +260,7 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_chm15", commands, ["tile*_ght.laz"], ["tile*_chm15.bil"], tiled=True)
 
         # then we rasterize the normalized tiles into the partial CHMs at level 20
 
@@ -271,7 +281,7 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_chm20", commands, ["tile*_ght.laz"], ["tile*_chm20.bil"], tiled=True)
 
         # then we rasterize the normalized tiles into the partial CHMs at level 25
 
@@ -292,7 +302,7 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_chm25", commands, ["tile*_ght.laz"], ["tile*_chm25.bil"], tiled=True)
 
         # then we combine the partial CHMs into a single output CHM
 
@@ -304,8 +314,10 @@ class flightlinesToMergedCHM_PitFree(LAStoolsAlgorithm):
         commands.append("-highest")
         self.addParametersRasterOutputCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
-        
+        pipeline.addStage("lasgrid", commands, ["tile_*.bil"], [self.getParametersRasterOutputValue(parameters, context)])
+
+        pipeline.run(feedback)
+
         return {"": None}
 
     def name(self):
@@ -27,6 +27,7 @@ from qgis.core import QgsProcessingParameterEnum
 
 from ..LAStoolsUtils import LAStoolsUtils
 from ..LAStoolsAlgorithm import LAStoolsAlgorithm
+from ..LAStoolsPipeline import LAStoolsPipeline
 
 class flightlinesToMergedCHM_SpikeFree(LAStoolsAlgorithm):
 
@@ -39,6 +40,7 @@ class flightlinesToMergedCHM_SpikeFree(LAStoolsAlgorithm):
 
     def initAlgorithm(self, config):
         self.addParametersPointInputFolderGUI()
+        self.addParametersAreaOfInterestGUI()
         self.addParameter(QgsProcessingParameterNumber(flightlinesToMergedCHM_SpikeFree.TILE_SIZE, "tile size (side length of square tile)", QgsProcessingParameterNumber.Double, 1000.0, False, 0.0))
         self.addParameter(QgsProcessingParameterNumber(flightlinesToMergedCHM_SpikeFree.BUFFER, "buffer around tiles (avoids edge artifacts)", QgsProcessingParameterNumber.Double, 25.0, False, 0.0))
         self.addParameter(QgsProcessingParameterEnum(flightlinesToMergedCHM_SpikeFree.TERRAIN, "terrain type", flightlinesToMergedCHM_SpikeFree.TERRAINS, False, 2))
@@ -46,12 +48,20 @@ class flightlinesToMergedCHM_SpikeFree(LAStoolsAlgorithm):
         self.addParameter(QgsProcessingParameterNumber(flightlinesToMergedCHM_SpikeFree.FREEZE_VALUE, "spike-free freeze value (by default 3 times step)", QgsProcessingParameterNumber.Double, 0.0, False, 0.0))        
         self.addParametersStepGUI()
         self.addParametersTemporaryDirectoryGUI()
+        self.addParametersResumePipelineGUI()
+        self.addParametersWavefrontPipelineGUI()
         self.addParametersRasterOutputGUI()
         self.addParametersCoresGUI()
         self.addParametersVerboseGUI()
 
     def processAlgorithm(self, parameters, context, feedback):
 
+        files = self.getParametersPointInputFolderFiles(parameters, context, feedback)
+        if files == []:
+            return {"": None}
+
+        pipeline = LAStoolsPipeline(self.getParametersTemporaryDirectoryValue(parameters, context), resume=self.getParametersResumePipelineValue(parameters, context), wavefront=self.getParametersWavefrontPipelineValue(parameters, context))
+
         # needed for thinning and killing
 
         step = self.getParametersStepValue(parameters, context)
@@ -73,7 +83,7 @@ class flightlinesToMergedCHM_SpikeFree(LAStoolsAlgorithm):
         commands.append("-o")
         commands.append("tile.laz")
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lastile", commands, self.getParametersPointInputFolderValues(parameters, context), ["tile*.laz"])
 
         # then we ground classify the tiles
 
@@ -95,7 +105,7 @@ class flightlinesToMergedCHM_SpikeFree(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasground", commands, ["tile*.laz"], ["tile*_g.laz"], tiled=True)
 
         # then we height-normalize the tiles
 
@@ -109,7 +119,7 @@ class flightlinesToMergedCHM_SpikeFree(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasheight", commands, ["tile*_g.laz"], ["tile*_gh.laz"], tiled=True)
 
         # then we thin and splat the tiles
 
@@ -129,7 +139,7 @@ class flightlinesToMergedCHM_SpikeFree(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasthin", commands, ["tile*_gh.laz"], ["tile*_ght.laz"], tiled=True)
 
         # then we rasterize the height-normalized tiles into trivial zero-level DTMs
 
@@ -149,7 +159,7 @@ class flightlinesToMergedCHM_SpikeFree(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_dtm", commands, ["tile*_gh.laz"], ["tile*_dtm.bil"], tiled=True)
 
         # then we rasterize the normalized tiles into spike-free CHMs (with kill)
 
@@ -174,7 +184,7 @@ class flightlinesToMergedCHM_SpikeFree(LAStoolsAlgorithm):
         commands.append("-obil")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("las2dem_chm_sf", commands, ["tile*_ght.laz"], ["tile*_chm_sf.bil"], tiled=True)
 
         # then we combine the zero-level DTMs and the spike-free CHMs into a single output CHM
 
@@ -186,8 +196,10 @@ class flightlinesToMergedCHM_SpikeFree(LAStoolsAlgorithm):
         commands.append("-highest")
         self.addParametersRasterOutputCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
-        
+        pipeline.addStage("lasgrid", commands, ["tile_*.bil"], [self.getParametersRasterOutputValue(parameters, context)])
+
+        pipeline.run(feedback)
+
         return {"": None}
 
     def name(self):
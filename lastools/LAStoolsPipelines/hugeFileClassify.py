@@ -28,6 +28,7 @@ from qgis.core import QgsProcessingParameterEnum
 
 from ..LAStoolsUtils import LAStoolsUtils
 from ..LAStoolsAlgorithm import LAStoolsAlgorithm
+from ..LAStoolsPipeline import LAStoolsPipeline
 
 class hugeFileClassify(LAStoolsAlgorithm):
 
@@ -47,12 +48,16 @@ class hugeFileClassify(LAStoolsAlgorithm):
         self.addParameter(QgsProcessingParameterEnum(hugeFileClassify.TERRAIN, "terrain type", hugeFileClassify.TERRAINS, False, 2))
         self.addParameter(QgsProcessingParameterEnum(hugeFileClassify.GRANULARITY, "preprocessing", hugeFileClassify.GRANULARITIES, False, 1))
         self.addParametersTemporaryDirectoryGUI()
+        self.addParametersResumePipelineGUI()
+        self.addParametersWavefrontPipelineGUI()
         self.addParametersPointOutputGUI()
         self.addParametersCoresGUI()
         self.addParametersVerboseGUI()
 
     def processAlgorithm(self, parameters, context, feedback):
 
+        pipeline = LAStoolsPipeline(self.getParametersTemporaryDirectoryValue(parameters, context), resume=self.getParametersResumePipelineValue(parameters, context), wavefront=self.getParametersWavefrontPipelineValue(parameters, context))
+
         # first we tile the data with option '-reversible'
 
         commands = [os.path.join(LAStoolsUtils.LAStoolsPath(), "bin", "lastile")]
@@ -70,7 +75,7 @@ class hugeFileClassify(LAStoolsAlgorithm):
         commands.append("-o")
         commands.append("hugeFileClassify.laz")
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lastile", commands, [self.getParametersPointInputValue(parameters, context)], ["hugeFileClassify*.laz"])
 
         # then we ground classify the reversible tiles
 
@@ -92,7 +97,7 @@ class hugeFileClassify(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasground", commands, ["hugeFileClassify*.laz"], ["hugeFileClassify*_g.laz"], tiled=True)
 
         # then we compute the height for each points in the reversible tiles
 
@@ -105,7 +110,7 @@ class hugeFileClassify(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasheight", commands, ["hugeFileClassify*_g.laz"], ["hugeFileClassify*_gh.laz"], tiled=True)
 
         # then we classify buildings and trees in the reversible tiles
 
@@ -118,7 +123,7 @@ class hugeFileClassify(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasclassify", commands, ["hugeFileClassify*_gh.laz"], ["hugeFileClassify*_ghc.laz"], tiled=True)
 
         # then we reverse the tiling
 
@@ -128,8 +133,10 @@ class hugeFileClassify(LAStoolsAlgorithm):
         commands.append("-reverse_tiling")
         self.addParametersPointOutputCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
-        
+        pipeline.addStage("lastile_reverse", commands, ["hugeFileClassify*_ghc.laz"], [self.getParametersPointOutputValue(parameters, context)])
+
+        pipeline.run(feedback)
+
         return {"": None}
 
     def name(self):
@@ -28,6 +28,7 @@ from qgis.core import QgsProcessingParameterEnum
 					   
 from ..LAStoolsUtils import LAStoolsUtils
 from ..LAStoolsAlgorithm import LAStoolsAlgorithm
+from ..LAStoolsPipeline import LAStoolsPipeline
 
 class hugeFileGroundClassify(LAStoolsAlgorithm):
 
@@ -47,12 +48,16 @@ class hugeFileGroundClassify(LAStoolsAlgorithm):
         self.addParameter(QgsProcessingParameterEnum(hugeFileGroundClassify.TERRAIN, "terrain type", hugeFileGroundClassify.TERRAINS, False, 2))
         self.addParameter(QgsProcessingParameterEnum(hugeFileGroundClassify.GRANULARITY, "preprocessing", hugeFileGroundClassify.GRANULARITIES, False, 1))
         self.addParametersTemporaryDirectoryGUI()
+        self.addParametersResumePipelineGUI()
+        self.addParametersWavefrontPipelineGUI()
         self.addParametersPointOutputGUI()
         self.addParametersCoresGUI()
         self.addParametersVerboseGUI()
 
     def processAlgorithm(self, parameters, context, feedback):
 
+        pipeline = LAStoolsPipeline(self.getParametersTemporaryDirectoryValue(parameters, context), resume=self.getParametersResumePipelineValue(parameters, context), wavefront=self.getParametersWavefrontPipelineValue(parameters, context))
+
         # first we tile the data with option '-reversible'
 
         commands = [os.path.join(LAStoolsUtils.LAStoolsPath(), "bin", "lastile")]
@@ -70,7 +75,7 @@ class hugeFileGroundClassify(LAStoolsAlgorithm):
         commands.append("-o")
         commands.append("hugeFileGroundClassify.laz")
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lastile", commands, [self.getParametersPointInputValue(parameters, context)], ["hugeFileGroundClassify*.laz"])
 
         # then we ground classify the reversible tiles
 
@@ -92,7 +97,7 @@ class hugeFileGroundClassify(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasground", commands, ["hugeFileGroundClassify*.laz"], ["hugeFileGroundClassify*_g.laz"], tiled=True)
 
         # then we reverse the tiling
 
@@ -102,8 +107,10 @@ class hugeFileGroundClassify(LAStoolsAlgorithm):
         commands.append("-reverse_tiling")
         self.addParametersPointOutputCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
-        
+        pipeline.addStage("lastile_reverse", commands, ["hugeFileGroundClassify*_g.laz"], [self.getParametersPointOutputValue(parameters, context)])
+
+        pipeline.run(feedback)
+
         return {"": None}
 
     def name(self):
@@ -28,6 +28,7 @@ from qgis.core import QgsProcessingParameterEnum
 
 from ..LAStoolsUtils import LAStoolsUtils
 from ..LAStoolsAlgorithm import LAStoolsAlgorithm
+from ..LAStoolsPipeline import LAStoolsPipeline
 
 class hugeFileNormalize(LAStoolsAlgorithm):
 
@@ -47,12 +48,16 @@ class hugeFileNormalize(LAStoolsAlgorithm):
         self.addParameter(QgsProcessingParameterEnum(hugeFileNormalize.TERRAIN, "terrain type", hugeFileNormalize.TERRAINS, False, 2))
         self.addParameter(QgsProcessingParameterEnum(hugeFileNormalize.GRANULARITY, "preprocessing", hugeFileNormalize.GRANULARITIES, False, 1))
         self.addParametersTemporaryDirectoryGUI()
+        self.addParametersResumePipelineGUI()
+        self.addParametersWavefrontPipelineGUI()
         self.addParametersPointOutputGUI()
         self.addParametersCoresGUI()
         self.addParametersVerboseGUI()
 
     def processAlgorithm(self, parameters, context, feedback):
 
+        pipeline = LAStoolsPipeline(self.getParametersTemporaryDirectoryValue(parameters, context), resume=self.getParametersResumePipelineValue(parameters, context), wavefront=self.getParametersWavefrontPipelineValue(parameters, context))
+
         # first we tile the data with option '-reversible'
 
         commands = [os.path.join(LAStoolsUtils.LAStoolsPath(), "bin", "lastile")]
@@ -70,7 +75,7 @@ class hugeFileNormalize(LAStoolsAlgorithm):
         commands.append("-o")
         commands.append("hugeFileNormalize.laz")
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lastile", commands, [self.getParametersPointInputValue(parameters, context)], ["hugeFileNormalize*.laz"])
 
         # then we ground classify the reversible tiles
 
@@ -92,7 +97,7 @@ class hugeFileNormalize(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasground", commands, ["hugeFileNormalize*.laz"], ["hugeFileNormalize*_g.laz"], tiled=True)
 
         # then we height-normalize each points in the reversible tiles
 
@@ -106,7 +111,7 @@ class hugeFileNormalize(LAStoolsAlgorithm):
         commands.append("-olaz")
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        pipeline.addStage("lasheight", commands, ["hugeFileNormalize*_g.laz"], ["hugeFileNormalize*_gh.laz"], tiled=True)
 
         # then we reverse the tiling
 
@@ -116,8 +121,10 @@ class hugeFileNormalize(LAStoolsAlgorithm):
         commands.append("-reverse_tiling")
         self.addParametersPointOutputCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
-        
+        pipeline.addStage("lastile_reverse", commands, ["hugeFileNormalize*_gh.laz"], [self.getParametersPointOutputValue(parameters, context)])
+
+        pipeline.run(feedback)
+
         return {"": None}
 
     def name(self):
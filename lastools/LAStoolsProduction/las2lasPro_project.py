@@ -61,6 +61,7 @@ class las2lasPro_project(LAStoolsAlgorithm):
         self.addParametersPointOutputFormatGUI()
         self.addParametersAdditionalGUI()
         self.addParametersCoresGUI()
+        self.addParametersShardsGUI()
         self.addParametersVerboseGUI64()
 
     def processAlgorithm(self, parameters, context, feedback):
@@ -120,7 +121,7 @@ class las2lasPro_project(LAStoolsAlgorithm):
         self.addParametersAdditionalCommands(parameters, context, commands)
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        self.runLAStoolsSharded(parameters, context, feedback, commands)
 
         return {"": None}
 
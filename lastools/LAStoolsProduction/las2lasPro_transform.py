@@ -48,6 +48,7 @@ class las2lasPro_transform(LAStoolsAlgorithm):
         self.addParametersPointOutputFormatGUI()
         self.addParametersAdditionalGUI()
         self.addParametersCoresGUI()
+        self.addParametersShardsGUI()
         self.addParametersVerboseGUI64()
 
     def processAlgorithm(self, parameters, context, feedback):
@@ -72,7 +73,7 @@ class las2lasPro_transform(LAStoolsAlgorithm):
         self.addParametersAdditionalCommands(parameters, context, commands)
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        self.runLAStoolsSharded(parameters, context, feedback, commands)
 
         return {"": None}
 
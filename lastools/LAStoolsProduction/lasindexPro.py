@@ -38,6 +38,7 @@ class lasindexPro(LAStoolsAlgorithm):
         self.addParameter(QgsProcessingParameterBoolean(lasindexPro.MOBILE_OR_TERRESTRIAL, "is mobile or terrestrial LiDAR (not airborne)", False))
         self.addParametersAdditionalGUI()
         self.addParametersCoresGUI()
+        self.addParametersShardsGUI()
         self.addParametersVerboseGUI()
 
     def processAlgorithm(self, parameters, context, feedback):
@@ -57,7 +58,7 @@ class lasindexPro(LAStoolsAlgorithm):
         self.addParametersAdditionalCommands(parameters, context, commands)
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        self.runLAStoolsSharded(parameters, context, feedback, commands)
 
         return {"": None}
 
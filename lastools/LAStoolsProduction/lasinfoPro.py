@@ -57,6 +57,7 @@ class lasinfoPro(LAStoolsAlgorithm):
         self.addParametersOutputAppendixGUI()
         self.addParametersAdditionalGUI()
         self.addParametersCoresGUI()
+        self.addParametersShardsGUI()
         self.addParametersVerboseGUI()
 
     def processAlgorithm(self, parameters, context, feedback):
@@ -93,7 +94,7 @@ class lasinfoPro(LAStoolsAlgorithm):
         self.addParametersAdditionalCommands(parameters, context, commands)
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        self.runLAStoolsSharded(parameters, context, feedback, commands)
 
         return {"": None}
 
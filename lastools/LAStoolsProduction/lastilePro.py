@@ -22,12 +22,14 @@ __date__ = 'April 2014'
 __copyright__ = '(C) 2014, Martin Isenburg'
 
 import os
+import math
 from qgis.core import QgsProcessingParameterBoolean
 from qgis.core import QgsProcessingParameterNumber
 from qgis.core import QgsProcessingParameterString
 
 from ..LAStoolsUtils import LAStoolsUtils
 from ..LAStoolsAlgorithm import LAStoolsAlgorithm
+from ..LAStoolsIndex import LAStoolsIndex
 
 class lastilePro(LAStoolsAlgorithm):
 
@@ -39,6 +41,7 @@ class lastilePro(LAStoolsAlgorithm):
 
     def initAlgorithm(self, config):
         self.addParametersPointInputFolderGUI()
+        self.addParametersAreaOfInterestGUI()
         self.addParametersFilesAreFlightlinesGUI()
         self.addParametersApplyFileSourceIdGUI()
         self.addParameter(QgsProcessingParameterNumber(lastilePro.TILE_SIZE, "tile size (side length of square tile)", QgsProcessingParameterNumber.Double, 1000.0, False, 4.0, 10000.0))
@@ -52,6 +55,9 @@ class lastilePro(LAStoolsAlgorithm):
         self.addParametersVerboseGUI64()
 
     def processAlgorithm(self, parameters, context, feedback):
+        files = self.getParametersPointInputFolderFiles(parameters, context, feedback)
+        if files == []:
+            return {"": None}
         commands = [os.path.join(LAStoolsUtils.LAStoolsPath(), "bin", "lastile")]
         self.addParametersVerboseCommands64(parameters, context, commands)
         self.addParametersPointInputFolderCommands(parameters, context, commands)
@@ -66,7 +72,15 @@ class lastilePro(LAStoolsAlgorithm):
             commands.append(unicode(buffer))
         if (self.parameterAsBool(parameters, lastilePro.FLAG_AS_WITHHELD, context)):
             commands.append("-flag_as_withheld")
-        if (self.parameterAsBool(parameters, lastilePro.EXTRA_PASS, context)):
+        extra_pass = self.parameterAsBool(parameters, lastilePro.EXTRA_PASS, context)
+        if (not extra_pass and files):
+            # the bounding boxes in the index tell how many tiles there will be
+            extent = LAStoolsIndex.extent(files)
+            tiles = math.ceil((extent[2] - extent[0]) / max(tile_size, 1)) * math.ceil((extent[3] - extent[1]) / max(tile_size, 1))
+            if (tiles > 2000):
+                feedback.pushInfo("about {} output tiles, adding '-extra_pass'".format(tiles))
+                extra_pass = True
+        if (extra_pass):
             commands.append("-extra_pass")
         self.addParametersOutputDirectoryCommands(parameters, context, commands)
         base_name = self.parameterAsString(parameters, lastilePro.BASE_NAME, context)
@@ -43,6 +43,7 @@ class laszipPro(LAStoolsAlgorithm):
         self.addParametersPointOutputFormatGUI()
         self.addParametersAdditionalGUI()
         self.addParametersCoresGUI()
+        self.addParametersShardsGUI()
         self.addParametersVerboseGUI64()
 
     def processAlgorithm(self, parameters, context, feedback):
@@ -64,7 +65,7 @@ class laszipPro(LAStoolsAlgorithm):
         self.addParametersAdditionalCommands(parameters, context, commands)
         self.addParametersCoresCommands(parameters, context, commands)
 
-        LAStoolsUtils.runLAStools(commands, feedback)
+        self.runLAStoolsSharded(parameters, context, feedback, commands)
 
         return {"": None}
 
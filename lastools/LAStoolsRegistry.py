@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    LAStoolsRegistry.py
+    ---------------------
+    This script lists the algorithms of the provider without importing
+    them. The provider registers a lightweight stand-in for every entry and
+    imports the module of an algorithm only when an instance of it is
+    created to open its dialog or to run it.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import importlib
+
+from .LAStoolsAlgorithm import LAStoolsAlgorithm
+
+# module, class, group and whether the algorithm needs Windows or Wine
+# (the name and display name of every algorithm is its class name)
+
+ALGORITHMS = [
+    # LAStools for processing single files
+
+    ("LAStools.lasground", "lasground", "file - processing points", True),
+    ("LAStools.lasheight", "lasheight", "file - processing points", True),
+    ("LAStools.lasclassify", "lasclassify", "file - processing points", True),
+    ("LAStools.lasclip", "lasclip", "file - processing points", True),
+    ("LAStools.lastile", "lastile", "file - conversion", True),
+    ("LAStools.lascolor", "lascolor", "file - processing points", True),
+    ("LAStools.lasgrid", "lasgrid", "file - raster derivatives", True),
+    ("LAStools.las2dem", "las2dem", "file - raster derivatives", True),
+    ("LAStools.blast2dem", "blast2dem", "file - raster derivatives", True),
+    ("LAStools.las2iso", "las2iso", "file - vector derivatives", True),
+    ("LAStools.blast2iso", "blast2iso", "file - vector derivatives", True),
+    ("LAStools.lasview", "lasview", "file - checking quality", True),
+    ("LAStools.lasboundary", "lasboundary", "file - vector derivatives", True),
+    ("LAStools.lasinfo", "lasinfo", "file - checking quality", False),
+    ("LAStools.lasprecision", "lasprecision", "file - checking quality", False),
+    ("LAStools.las2tin", "las2tin", "file - vector derivatives", True),
+    ("LAStools.lasvalidate", "lasvalidate", "file - checking quality", True),
+    ("LAStools.lasduplicate", "lasduplicate", "file - processing points", True),
+    ("LAStools.las2txt", "las2txt", "file - conversion", False),
+    ("LAStools.txt2las", "txt2las", "file - conversion", False),
+    ("LAStools.laszip", "laszip", "file - conversion", False),
+    ("LAStools.lasindex", "lasindex", "file - processing points", False),
+    ("LAStools.lasthin", "lasthin", "file - processing points", True),
+    ("LAStools.lassort", "lassort", "file - processing points", True),
+    ("LAStools.lascanopy", "lascanopy", "file - raster derivatives", True),
+    ("LAStools.lasmerge", "lasmerge", "file - conversion", False),
+    ("LAStools.las2shp", "las2shp", "file - conversion", True),
+    ("LAStools.shp2las", "shp2las", "file - conversion", True),
+    ("LAStools.lasnoise", "lasnoise", "file - processing points", True),
+    ("LAStools.lassplit", "lassplit", "file - processing points", True),
+    ("LAStools.las2las_filter", "las2las_filter", "file - processing points", False),
+    ("LAStools.las2las_project", "las2las_project", "file - processing points", False),
+    ("LAStools.las2las_transform", "las2las_transform", "file - processing points", False),
+    ("LAStools.lasoverage", "lasoverage", "file - processing points", True),
+    ("LAStools.lasoverlap", "lasoverlap", "file - checking quality", True),
+    ("LAStools.laspublish", "laspublish", "file - conversion", True),
+    ("LAStools.lasground_new", "lasground_new", "file - processing points", True),
+    ("LAStools.lascontrol", "lascontrol", "file - checking quality", True),
+    ("LAStools.lasdiff", "lasdiff", "file - checking quality", False),
+    ("LAStools.lasheight_classify", "lasheight_classify", "file - processing points", True),
+
+    # LAStools Production for processing folders of files
+
+    ("LAStoolsProduction.lastilePro", "lastilePro", "folder - conversion", True),
+    ("LAStoolsProduction.lasgroundPro", "lasgroundPro", "folder - processing points", True),
+    ("LAStoolsProduction.las2demPro", "las2demPro", "folder - raster derivatives", True),
+    ("LAStoolsProduction.lasheightPro", "lasheightPro", "folder - processing points", True),
+    ("LAStoolsProduction.laszipPro", "laszipPro", "folder - conversion", False),
+    ("LAStoolsProduction.lasduplicatePro", "lasduplicatePro", "folder - processing points", True),
+    ("LAStoolsProduction.lasgridPro", "lasgridPro", "folder - raster derivatives", True),
+    ("LAStoolsProduction.lassortPro", "lassortPro", "folder - processing points", True),
+    ("LAStoolsProduction.lasclassifyPro", "lasclassifyPro", "folder - processing points", True),
+    ("LAStoolsProduction.lasthinPro", "lasthinPro", "folder - processing points", True),
+    ("LAStoolsProduction.lasnoisePro", "lasnoisePro", "folder - processing points", True),
+    ("LAStoolsProduction.lasindexPro", "lasindexPro", "folder - processing points", False),
+    ("LAStoolsProduction.lascanopyPro", "lascanopyPro", "folder - raster derivatives", True),
+    ("LAStoolsProduction.blast2demPro", "blast2demPro", "folder - raster derivatives", True),
+    ("LAStoolsProduction.lasboundaryPro", "lasboundaryPro", "folder - vector derivatives", True),
+    ("LAStoolsProduction.lasinfoPro", "lasinfoPro", "folder - checking quality", False),
+    ("LAStoolsProduction.las2lasPro_filter", "las2lasPro_filter", "folder - processing points", False),
+    ("LAStoolsProduction.las2lasPro_project", "las2lasPro_project", "folder - processing points", False),
+    ("LAStoolsProduction.las2lasPro_transform", "las2lasPro_transform", "folder - processing points", False),
+    ("LAStoolsProduction.lasoveragePro", "lasoveragePro", "folder - processing points", True),
+    ("LAStoolsProduction.txt2lasPro", "txt2lasPro", "folder - conversion", False),
+    ("LAStoolsProduction.las2txtPro", "las2txtPro", "folder - conversion", False),
+    ("LAStoolsProduction.blast2isoPro", "blast2isoPro", "folder - vector derivatives", True),
+    ("LAStoolsProduction.lasvalidatePro", "lasvalidatePro", "folder - checking quality", True),
+    ("LAStoolsProduction.lasmergePro", "lasmergePro", "folder - conversion", False),
+    ("LAStoolsProduction.lasviewPro", "lasviewPro", "folder - checking quality", True),
+    ("LAStoolsProduction.lasoverlapPro", "lasoverlapPro", "folder - checking quality", True),
+    ("LAStoolsProduction.laspublishPro", "laspublishPro", "folder - conversion", True),
+    ("LAStoolsProduction.lasgroundPro_new", "lasgroundPro_new", "folder - processing points", True),
+    ("LAStoolsProduction.lasheightPro_classify", "lasheightPro_classify", "folder - processing points", True),
+
+    # LAStools pipelines
+
+    ("LAStoolsPipelines.hugeFileClassify", "hugeFileClassify", "pipeline - file", True),
+    ("LAStoolsPipelines.hugeFileGroundClassify", "hugeFileGroundClassify", "pipeline - file", True),
+    ("LAStoolsPipelines.hugeFileNormalize", "hugeFileNormalize", "pipeline - file", True),
+    ("LAStoolsPipelines.flightlinesToCHM_FirstReturn", "flightlinesToCHM_FirstReturn", "pipeline - strips", True),
+    ("LAStoolsPipelines.flightlinesToCHM_HighestReturn", "flightlinesToCHM_HighestReturn", "pipeline - strips", True),
+    ("LAStoolsPipelines.flightlinesToCHM_SpikeFree", "flightlinesToCHM_SpikeFree", "pipeline - strips", True),
+    ("LAStoolsPipelines.flightlinesToDTMandDSM_FirstReturn", "flightlinesToDTMandDSM_FirstReturn", "pipeline - strips", True),
+    ("LAStoolsPipelines.flightlinesToDTMandDSM_SpikeFree", "flightlinesToDTMandDSM_SpikeFree", "pipeline - strips", True),
+    ("LAStoolsPipelines.flightlinesToMergedCHM_FirstReturn", "flightlinesToMergedCHM_FirstReturn", "pipeline - strips", True),
+    ("LAStoolsPipelines.flightlinesToMergedCHM_HighestReturn", "flightlinesToMergedCHM_HighestReturn", "pipeline - strips", True),
+    ("LAStoolsPipelines.flightlinesToMergedCHM_PitFree", "flightlinesToMergedCHM_PitFree", "pipeline - strips", True),
+    ("LAStoolsPipelines.flightlinesToMergedCHM_SpikeFree", "flightlinesToMergedCHM_SpikeFree", "pipeline - strips", True),
+
+    # other LAStools pipelines, which still use the old processing API and
+    # are therefore imported and instantiated when the provider loads
+
+    ("LAStoolsPipelinesOthers.flightlinesToDTMandDSM", "flightlinesToDTMandDSM", None, True),
+    ("LAStoolsPipelinesOthers.flightlinesToCHM", "flightlinesToCHM", None, True),
+    ("LAStoolsPipelinesOthers.flightlinesToSingleCHMpitFree", "flightlinesToSingleCHMpitFree", None, True),
+]
+
+def algorithmClass(module, className):
+    return getattr(importlib.import_module("." + module, __package__), className)
+
+class LAStoolsLazyAlgorithm(LAStoolsAlgorithm):
+
+    # stands in for an algorithm in the processing registry, which only
+    # needs name and group, until an instance of it is created
+
+    def __init__(self, module, className, group):
+        super().__init__()
+        self.module = module
+        self.className = className
+        self._group = group
+
+    def initAlgorithm(self, config=None):
+        pass
+
+    def name(self):
+        return self.className
+
+    def displayName(self):
+        return self.className
+
+    def group(self):
+        return self._group
+
+    def groupId(self):
+        return self._group
+
+    def createInstance(self):
+        return algorithmClass(self.module, self.className)()
@@ -26,11 +26,19 @@ __date__ = 'August 2012'
 __copyright__ = '(C) 2012, Victor Olaya'
 
 import os
+import glob
+import time
+import queue
+import shlex
+import signal
+import threading
 import subprocess
 
 from processing.core.ProcessingConfig import ProcessingConfig
 from processing.tools.system import isWindows
 
+from .LAStoolsBackend import LAStoolsBackend
+
 class LAStoolsUtils:
  
     @staticmethod
@@ -51,11 +59,123 @@ class LAStoolsUtils:
             folder = wine_folder + "/wine " + lastools_folder
         return folder
 
+    @staticmethod
+    def commandLineArguments(commandline):
+        # the argv list the shell would have built, so no /bin/sh is needed
+        if isWindows():
+            return commandline
+        return shlex.split(commandline)
+
+    @staticmethod
+    def killProcessTree(process):
+        try:
+            if isWindows():
+                subprocess.call(["taskkill", "/F", "/T", "/PID", str(process.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            else:
+                os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+        except OSError:
+            process.kill()
+
+    @staticmethod
+    def progressEstimator(arguments):
+        # estimates the progress of a run that creates one output per input
+        # file by counting the files that appeared in the output directory
+        if isinstance(arguments, str):
+            arguments = shlex.split(arguments, posix=False)
+        arguments = [argument.strip('"') for argument in arguments]
+        # skip the wine loader in front of the LAStools executable
+        i = 0
+        while i < len(arguments) - 1 and os.path.basename(arguments[i]).lower().startswith("wine"):
+            i += 1
+        if i >= len(arguments):
+            return None
+        tool = os.path.splitext(os.path.basename(arguments[i]))[0].lower()
+        if tool in ("lastile", "lassplit", "lasmerge") or "-merged" in arguments:
+            return None
+        inputs = []
+        odir = None
+        odix = ""
+        i += 1
+        while i < len(arguments):
+            if arguments[i] == "-i":
+                i += 1
+                while i < len(arguments) and not arguments[i].startswith("-"):
+                    inputs.extend(glob.glob(arguments[i].replace("\\", os.sep)) or [arguments[i]])
+                    i += 1
+                continue
+            if arguments[i] == "-lof" and i + 1 < len(arguments):
+                try:
+                    with open(arguments[i + 1]) as lof:
+                        inputs.extend(line.strip() for line in lof if line.strip())
+                except OSError:
+                    pass
+            elif arguments[i] == "-odir" and i + 1 < len(arguments):
+                odir = arguments[i + 1]
+            elif arguments[i] == "-odix" and i + 1 < len(arguments):
+                odix = arguments[i + 1]
+            i += 1
+        if len(inputs) < 2:
+            return None
+        if odir is None:
+            odir = os.path.dirname(inputs[0])
+        start = time.time()
+        def estimate():
+            done = 0
+            try:
+                with os.scandir(odir or ".") as entries:
+                    for entry in entries:
+                        if odix in os.path.splitext(entry.name)[0] and entry.stat().st_mtime >= start:
+                            done += 1
+            except OSError:
+                return None
+            return min(100.0, 100.0 * done / len(inputs))
+        return estimate
+
     @staticmethod
     def runLAStools(commands, feedback):
         commandline = " ".join(commands)
         feedback.pushConsoleInfo("LAStools command line")
         feedback.pushConsoleInfo(commandline)
         feedback.pushConsoleInfo("LAStools console output")
-        output = subprocess.Popen(commandline, shell=True, stdout=subprocess.PIPE, stdin=open(os.devnull), stderr=subprocess.STDOUT, universal_newlines=False).communicate()[0]
-        feedback.pushConsoleInfo(output.decode("utf-8"))
+        # tools with a native implementation may run in-process
+        returncode = LAStoolsBackend.run(commands, feedback)
+        if returncode is not None:
+            return returncode
+        arguments = LAStoolsUtils.commandLineArguments(commandline)
+        estimate = LAStoolsUtils.progressEstimator(arguments)
+        if isWindows():
+            options = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            options = {"start_new_session": True}
+        process = subprocess.Popen(arguments, stdout=subprocess.PIPE, stdin=subprocess.DEVNULL, stderr=subprocess.STDOUT, universal_newlines=True, encoding="utf-8", errors="replace", **options)
+        # a reader thread hands over the output line by line so that the
+        # loop below stays responsive to cancellation
+        lines = queue.Queue()
+        def read():
+            for line in process.stdout:
+                lines.put(line)
+            lines.put(None)
+        reader = threading.Thread(target=read, daemon=True)
+        reader.start()
+        checked = time.time()
+        while True:
+            try:
+                line = lines.get(timeout=0.5)
+            except queue.Empty:
+                line = ""
+            if line is None:
+                break
+            if line:
+                feedback.pushConsoleInfo(line.rstrip("\n"))
+            if feedback.isCanceled():
+                LAStoolsUtils.killProcessTree(process)
+                feedback.pushConsoleInfo("LAStools run canceled")
+                break
+            if estimate is not None and time.time() - checked > 2.0:
+                checked = time.time()
+                progress = estimate()
+                if progress is not None:
+                    feedback.setProgress(progress)
+        process.wait()
+        reader.join(1.0)
+        return process.returncode
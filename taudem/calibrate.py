@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    calibrate.py
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import time
+import shutil
+import tempfile
+
+import numpy
+from osgeo import gdal
+
+from qgis.core import (QgsProcessingException,
+                       QgsProcessingParameterNumber
+                      )
+
+from taudem.taudemAlgorithm import TauDemAlgorithm
+from taudem import taudemUtils
+
+
+class Calibrate(TauDemAlgorithm):
+
+    SIZE = "SIZE"
+    MAX_PROCESSES = "MAX_PROCESSES"
+
+    # the tools timed, in an order where each one finds its inputs
+    CHAIN = [("pitremove", ["-z", "{dem}", "-fel", "{fel}"]),
+             ("d8flowdir", ["-fel", "{fel}", "-p", "{p}", "-sd8", "{sd8}"]),
+             ("dinfflowdir", ["-fel", "{fel}", "-ang", "{ang}", "-slp", "{slp}"]),
+             ("aread8", ["-p", "{p}", "-ad8", "{ad8}"]),
+             ("areadinf", ["-ang", "{ang}", "-sca", "{sca}"]),
+             ("threshold", ["-ssa", "{ad8}", "-thresh", "100", "-src", "{src}"])]
+
+    def name(self):
+        return "calibrate"
+
+    def displayName(self):
+        return self.tr("Calibrate MPI process counts")
+
+    def group(self):
+        return self.tr("Basic grid analysis")
+
+    def groupId(self):
+        return "basicanalysis"
+
+    def tags(self):
+        return self.tr("mpi,processes,benchmark,calibration").split(",")
+
+    def shortHelpString(self):
+        return self.tr("Times the basic TauDEM tools on a synthetic grid "
+                       "with different numbers of MPI processes. The "
+                       "resulting curves are used to choose the number of "
+                       "processes of every run when \"MPI processes to use\" "
+                       "is 0 in the provider settings.")
+
+    def __init__(self):
+        super().__init__()
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterNumber(self.SIZE,
+                                                       self.tr("Calibration grid size (cells per side)"),
+                                                       QgsProcessingParameterNumber.Integer,
+                                                       2000,
+                                                       minValue=100))
+        self.addParameter(QgsProcessingParameterNumber(self.MAX_PROCESSES,
+                                                       self.tr("Largest number of processes (0 for all cores)"),
+                                                       QgsProcessingParameterNumber.Integer,
+                                                       0,
+                                                       minValue=0))
+
+    def writeDem(self, fileName, size):
+        # a tilted surface with waves and noise, which has plenty of pits
+        y, x = numpy.mgrid[0:size, 0:size] / size
+        noise = numpy.random.default_rng(0).random((size, size))
+        dem = 50.0 * (x + y) + 10.0 * numpy.sin(6.0 * numpy.pi * x) * numpy.cos(6.0 * numpy.pi * y) + noise
+
+        dataset = gdal.GetDriverByName("GTiff").Create(fileName, size, size, 1, gdal.GDT_Float32)
+        dataset.SetGeoTransform((0.0, 1.0, 0.0, float(size), 0.0, -1.0))
+        dataset.GetRasterBand(1).SetNoDataValue(-32768.0)
+        dataset.GetRasterBand(1).WriteArray(dem.astype(numpy.float32))
+        dataset = None
+
+    def fitCurve(self, samples, cells):
+        # least squares fit of seconds = a + b * n + c * cells / n
+        counts = numpy.array([n for n, seconds in samples], dtype=float)
+        seconds = numpy.array([seconds for n, seconds in samples])
+        design = numpy.stack([numpy.ones_like(counts), counts, 1.0 / counts], axis=1)
+        a, b, c = numpy.linalg.lstsq(design, seconds, rcond=None)[0]
+        return [max(float(a), 0.0), max(float(b), 0.0), max(float(c), 0.0) / cells]
+
+    def processAlgorithm(self, parameters, context, feedback):
+        size = self.parameterAsInt(parameters, self.SIZE, context)
+        maxProcesses = self.parameterAsInt(parameters, self.MAX_PROCESSES, context)
+        if maxProcesses <= 0:
+            maxProcesses = taudemUtils.availableCores()
+        counts = [1]
+        while counts[-1] * 2 <= maxProcesses:
+            counts.append(counts[-1] * 2)
+        if counts[-1] != maxProcesses:
+            counts.append(maxProcesses)
+
+        folder = tempfile.mkdtemp(prefix="taudem_calibration_")
+        try:
+            grids = {name: os.path.join(folder, name + ".tif") for name in ("dem", "fel", "p", "sd8", "ang", "slp", "ad8", "sca", "src")}
+            self.writeDem(grids["dem"], size)
+
+            curves = {}
+            step = 0
+            for tool, switches in self.CHAIN:
+                samples = []
+                for n in counts:
+                    if feedback.isCanceled():
+                        return {}
+                    arguments = [os.path.join(taudemUtils.taudemDirectory(), tool)] + [switch.format(**grids) for switch in switches]
+                    start = time.perf_counter()
+                    if taudemUtils.execute(arguments, feedback, processes=n, useCache=False, native=False):
+                        raise QgsProcessingException(self.tr("{} failed, see the log for details.").format(tool))
+                    samples.append((n, time.perf_counter() - start))
+                    step += 1
+                    feedback.setProgress(100.0 * step / (len(self.CHAIN) * len(counts)))
+
+                curves[tool] = self.fitCurve(samples, size * size)
+                feedback.pushInfo(self.tr("{}: {}").format(tool, ", ".join("{} processes {:.2f} s".format(n, seconds) for n, seconds in samples)))
+
+            taudemUtils.saveScalingCurves(curves)
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+
+        return {}
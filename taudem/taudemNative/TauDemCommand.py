@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    TauDemCommand.py
+    ---------------------
+    This script parses the TauDEM command lines the algorithms build into
+    their switches and values, which the native implementations of the
+    tools take one by one. A command line with a switch the native
+    implementation does not understand raises TauDemNativeUnsupported
+    before anything is written, so that TauDEM can run instead.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+class TauDemNativeUnsupported(Exception):
+    pass
+
+def isNumber(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+class TauDemCommand:
+
+    def __init__(self, tool, arguments):
+        self.tool = tool
+        self.options = {}
+        i = 0
+        while i < len(arguments):
+            switch = arguments[i]
+            if not switch.startswith("-") or isNumber(switch):
+                raise TauDemNativeUnsupported(switch)
+            # negative numbers are values, not switches
+            if i + 1 < len(arguments) and (not arguments[i + 1].startswith("-") or isNumber(arguments[i + 1])):
+                self.options[switch] = arguments[i + 1]
+                i += 2
+            else:
+                self.options[switch] = None
+                i += 1
+
+    def switch(self, name):
+        if name not in self.options:
+            return False
+        if self.options.pop(name) is not None:
+            raise TauDemNativeUnsupported(name)
+        return True
+
+    def value(self, name, default=None, convert=str):
+        if name not in self.options:
+            return default
+        value = self.options.pop(name)
+        if value is None:
+            raise TauDemNativeUnsupported(name)
+        return convert(value)
+
+    def finish(self):
+        # every switch has to be taken by the tool
+        if self.options:
+            raise TauDemNativeUnsupported(" ".join(self.options))
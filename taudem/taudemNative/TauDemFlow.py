@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    TauDemFlow.py
+    ---------------------
+    This script computes the D8 and D-infinity flow directions and slopes
+    of the native d8flowdir and dinfflowdir. Both are local operations on
+    the 3 by 3 neighbourhood of every cell, which are done on whole
+    windows of rows at once as shifts of NumPy arrays, with two rows of
+    halo around each window so that the status of the neighbours of its
+    border cells is known too. The windows are read and written by the
+    calling thread and computed by a pool of threads, as NumPy releases
+    the GIL.
+
+    The cells without a lower neighbour, which pitremove leaves on flat
+    surfaces, get their directions from the method of Garbrecht and Martz
+    (1997) in the form of Barnes et al. (2014) that TauDEM uses, which
+    drains every flat towards its lower edges and away from its higher
+    ones. Only the flat cells and their neighbours are collected from the
+    windows, so that flats across windows are resolved as a whole.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import math
+import collections
+import concurrent.futures
+
+import numpy
+from osgeo import gdal
+
+from .TauDemGrid import TauDemGrid, FLOAT_NODATA
+from taudem import taudemUtils
+
+# the D8 directions 1 to 8 of TauDEM as (row, column) shifts, starting
+# east and turning counterclockwise
+
+D8_SHIFTS = [(0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (1, 1)]
+
+# the triangular facets of D-infinity (Tarboton 1997) as the D8 direction
+# of their cardinal and of their diagonal corner and their multipliers ac
+# and af
+
+FACETS = [(1, 2, 0, 1), (3, 2, 1, -1), (3, 4, 1, 1), (5, 4, 2, -1),
+          (5, 6, 2, 1), (7, 6, 3, -1), (7, 8, 3, 1), (1, 8, 4, -1)]
+
+# the status of a cell, which is its D8 direction from 1 to 8 where it
+# has a lower neighbour
+
+NODATA = -2
+EDGE = -1
+FLAT = 0
+
+# the value TauDEM writes into D8 cells without data
+
+D8_NODATA = -32768
+
+# the most cells computed at once by a thread
+
+WINDOW_CELLS = 1 << 20
+
+def readWindow(grid, first, last):
+    """The elevations of the rows from first to last with two rows of halo,
+    and one column on both sides, where the cells outside the grid and
+    without data are closed and infinitely high."""
+    values = grid.read(first - 2, last + 2)
+    elevation = numpy.full((last - first + 4, grid.cols + 2), numpy.inf)
+    closed = numpy.ones(elevation.shape, dtype=bool)
+    top = max(0, first - 2) - (first - 2)
+    closed[top:top + len(values), 1:-1] = grid.nodataMask(values)
+    elevation[top:top + len(values), 1:-1] = numpy.where(closed[top:top + len(values), 1:-1], numpy.inf, values)
+    return elevation, closed
+
+def d8Directions(elevation, closed, cellX, cellY):
+    """The status and the D8 slope of the cells inside the padding, the
+    first steepest direction winning like in TauDEM."""
+    rows, cols = elevation.shape
+    center = elevation[1:-1, 1:-1]
+    status = numpy.zeros(center.shape, dtype=numpy.int16)
+    slope = numpy.zeros(center.shape)
+    edge = numpy.zeros(center.shape, dtype=bool)
+    with numpy.errstate(invalid="ignore"):
+        for direction, (dy, dx) in enumerate(D8_SHIFTS, 1):
+            edge |= closed[1 + dy:rows - 1 + dy, 1 + dx:cols - 1 + dx]
+            drop = (center - elevation[1 + dy:rows - 1 + dy, 1 + dx:cols - 1 + dx]) / math.hypot(dx * cellX, dy * cellY)
+            steeper = drop > slope
+            status[steeper] = direction
+            slope[steeper] = drop[steeper]
+    status[edge] = EDGE
+    status[closed[1:-1, 1:-1]] = NODATA
+    return status, slope
+
+def dinfDirections(elevation, closed, cellX, cellY):
+    """The status, the D-infinity angle and the slope of the cells inside
+    the padding, from the steepest of their eight triangular facets."""
+    rows, cols = elevation.shape
+    center = elevation[1:-1, 1:-1]
+    angle = numpy.zeros(center.shape)
+    slope = numpy.zeros(center.shape)
+    edge = numpy.zeros(center.shape, dtype=bool)
+    for dy, dx in D8_SHIFTS:
+        edge |= closed[1 + dy:rows - 1 + dy, 1 + dx:cols - 1 + dx]
+    with numpy.errstate(invalid="ignore"):
+        for cardinal, diagonal, ac, af in FACETS:
+            dy1, dx1 = D8_SHIFTS[cardinal - 1]
+            dy2, dx2 = D8_SHIFTS[diagonal - 1]
+            e1 = elevation[1 + dy1:rows - 1 + dy1, 1 + dx1:cols - 1 + dx1]
+            e2 = elevation[1 + dy2:rows - 1 + dy2, 1 + dx2:cols - 1 + dx2]
+            d1, d2 = (cellX, cellY) if dx1 else (cellY, cellX)
+            s1 = (center - e1) / d1
+            s2 = (e1 - e2) / d2
+            r = numpy.arctan2(s2, s1)
+            s = numpy.hypot(s1, s2)
+            # the flow stays within the facet
+            s = numpy.where(r < 0.0, s1, s)
+            r = numpy.maximum(r, 0.0)
+            limit = math.atan2(d2, d1)
+            s = numpy.where(r > limit, (center - e2) / math.hypot(d1, d2), s)
+            r = numpy.minimum(r, limit)
+            steeper = s > slope
+            angle[steeper] = (af * r + ac * math.pi / 2.0)[steeper]
+            slope[steeper] = s[steeper]
+    angle[angle >= 2.0 * math.pi] -= 2.0 * math.pi
+    status = numpy.where(slope > 0.0, 1, FLAT).astype(numpy.int16)
+    status[edge] = EDGE
+    status[closed[1:-1, 1:-1]] = NODATA
+    return status, angle, slope
+
+def computeWindow(elevation, closed, first, cols, cellX, cellY, dinf):
+    """The output values of the rows of a window and the flat cells among
+    them with their neighbours."""
+    if dinf:
+        status, angle, slope = dinfDirections(elevation, closed, cellX, cellY)
+        directions = numpy.where(status > 0, angle, FLOAT_NODATA)[1:-1]
+    else:
+        status, slope = d8Directions(elevation, closed, cellX, cellY)
+        directions = numpy.where(status > 0, status, D8_NODATA).astype(numpy.int16)[1:-1]
+    slopes = numpy.where(status >= FLAT, slope, FLOAT_NODATA)[1:-1]
+
+    # the status of the halo row around the window and of the padding
+    padded = numpy.full((status.shape[0], cols + 2), NODATA, dtype=numpy.int16)
+    padded[:, 1:-1] = status
+    rows, columns = numpy.nonzero(status[1:-1] == FLAT)
+    cells = (first + rows) * cols + columns
+    neighbours = numpy.empty((len(cells), 8), dtype=numpy.int64)
+    neighbourElevation = numpy.empty((len(cells), 8))
+    neighbourStatus = numpy.empty((len(cells), 8), dtype=numpy.int16)
+    for k, (dy, dx) in enumerate(D8_SHIFTS):
+        neighbours[:, k] = cells + dy * cols + dx
+        neighbourElevation[:, k] = elevation[rows + 2 + dy, columns + 1 + dx]
+        neighbourStatus[:, k] = padded[rows + 1 + dy, columns + 1 + dx]
+    flats = (cells, elevation[rows + 2, columns + 1], neighbours, neighbourElevation, neighbourStatus)
+    return directions, slopes.astype(numpy.float32), flats
+
+def breadthFirst(starts, adjacent, allowed):
+    """The breadth first distance of the cells from the start cells, 1 for
+    the start cells themselves and 0 for those not reached."""
+    distance = [0] * len(adjacent)
+    queue = collections.deque()
+    for cell in starts:
+        distance[cell] = 1
+        queue.append(cell)
+    while queue:
+        cell = queue.popleft()
+        for other in adjacent[cell]:
+            if other >= 0 and not distance[other] and allowed[other]:
+                distance[other] = distance[cell] + 1
+                queue.append(other)
+    return distance
+
+def resolveFlats(cells, elevation, neighbours, neighbourElevation, neighbourStatus):
+    """The D8 direction of every flat cell, 0 for those of flats without a
+    lower edge. Flats drain towards the cells of their elevation which
+    have a direction or are on the edge, and away from higher cells.
+    """
+    count = len(cells)
+    if count == 0:
+        return numpy.zeros(0, dtype=numpy.int16)
+    same = neighbourElevation == elevation[:, None]
+    lower = same & ((neighbourStatus > 0) | (neighbourStatus == EDGE))
+    higher = ((neighbourElevation > elevation[:, None]) & (neighbourStatus != NODATA)).any(axis=1)
+    # the cells are sorted, so that neighbours are found by a search
+    position = numpy.minimum(numpy.searchsorted(cells, neighbours), count - 1)
+    adjacent = numpy.where(same & (neighbourStatus == FLAT) & (cells[position] == neighbours), position, -1)
+    adjacent = adjacent.tolist()
+    lowerEdge = lower.any(axis=1)
+
+    # flats are the connected cells of one elevation, with their own label
+    label = [0] * count
+    drains = [False]
+    for start in range(count):
+        if label[start]:
+            continue
+        label[start] = len(drains)
+        queue = collections.deque([start])
+        draining = False
+        while queue:
+            cell = queue.popleft()
+            draining = draining or lowerEdge[cell]
+            for other in adjacent[cell]:
+                if other >= 0 and not label[other]:
+                    label[other] = label[start]
+                    queue.append(other)
+        drains.append(draining)
+    allowed = [drains[label[cell]] for cell in range(count)]
+
+    # the lower edges themselves are one step away from the flat
+    towards = breadthFirst(numpy.flatnonzero(lowerEdge).tolist(), adjacent, allowed)
+    away = breadthFirst([cell for cell in numpy.flatnonzero(higher).tolist() if allowed[cell]], adjacent, allowed)
+    height = [0] * len(drains)
+    for cell in range(count):
+        height[label[cell]] = max(height[label[cell]], away[cell])
+    mask = [2 * (towards[cell] + 1) + (height[label[cell]] - away[cell] if away[cell] else 0) for cell in range(count)]
+
+    directions = numpy.zeros(count, dtype=numpy.int16)
+    lower = lower.tolist()
+    for cell in range(count):
+        if not allowed[cell]:
+            continue
+        best = mask[cell]
+        for k in range(8):
+            if lower[cell][k]:
+                value = 2
+            elif adjacent[cell][k] >= 0:
+                value = mask[adjacent[cell][k]]
+            else:
+                continue
+            if value < best:
+                best = value
+                directions[cell] = k + 1
+    return directions
+
+def flowDirections(elevationPath, directionPath, slopePath, dinf, feedback):
+    grid = TauDemGrid(elevationPath)
+    try:
+        cellX, cellY = grid.cellSize()
+        if dinf:
+            directionSet = grid.create(directionPath)
+        else:
+            directionSet = grid.create(directionPath, gdal.GDT_Int16, D8_NODATA)
+        slopeSet = grid.create(slopePath)
+        directionBand = directionSet.GetRasterBand(1)
+        slopeBand = slopeSet.GetRasterBand(1)
+
+        windowRows = max(1, WINDOW_CELLS // grid.cols)
+        windows = [(first, min(grid.rows, first + windowRows)) for first in range(0, grid.rows, windowRows)]
+        workers = taudemUtils.availableCores()
+        flats = []
+        pending = collections.deque()
+
+        def write(limit):
+            while len(pending) > limit:
+                first, future = pending.popleft()
+                directions, slopes, flat = future.result()
+                directionBand.WriteArray(directions, 0, first)
+                slopeBand.WriteArray(slopes, 0, first)
+                flats.append(flat)
+                feedback.setProgress(80.0 * len(flats) / len(windows))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for first, last in windows:
+                if feedback.isCanceled():
+                    for first, future in pending:
+                        future.cancel()
+                    return 1
+                # the grid is read by this thread only
+                elevation, closed = readWindow(grid, first, last)
+                pending.append((first, executor.submit(computeWindow, elevation, closed, first, grid.cols, cellX, cellY, dinf)))
+                write(2 * workers)
+            write(0)
+
+        cells, elevation, neighbours, neighbourElevation, neighbourStatus = [numpy.concatenate(values) for values in zip(*flats)]
+        resolved = resolveFlats(cells, elevation, neighbours, neighbourElevation, neighbourStatus)
+        if dinf:
+            values = numpy.where(resolved > 0, (resolved - 1) * math.pi / 4.0, FLOAT_NODATA)
+        else:
+            values = numpy.where(resolved > 0, resolved, D8_NODATA)
+        for first, last in windows:
+            begin, end = numpy.searchsorted(cells, [first * grid.cols, last * grid.cols])
+            if begin < end:
+                block = directionBand.ReadAsArray(0, first, grid.cols, last - first)
+                block.flat[cells[begin:end] - first * grid.cols] = values[begin:end]
+                directionBand.WriteArray(block, 0, first)
+        feedback.setProgress(100.0)
+        feedback.pushConsoleInfo("{} of {} flat cells drained".format(int((resolved > 0).sum()), len(cells)))
+    finally:
+        directionBand = slopeBand = None
+        directionSet = slopeSet = None
+        grid.close()
+    return 0
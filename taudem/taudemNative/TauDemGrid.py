@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    TauDemGrid.py
+    ---------------------
+    This script reads the grids of the native tools by windows of rows,
+    straight from a memory map of the file where GDAL can make one, that
+    is for uncompressed GeoTIFF and BIL files, and through GDAL otherwise,
+    and creates the GeoTIFFs they write.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+
+import numpy
+from osgeo import gdal, osr
+
+from .TauDemCommand import TauDemNativeUnsupported
+
+# the value TauDEM writes into float cells without data
+
+FLOAT_NODATA = -3.4028234663852886e38
+
+# the grid formats the native tools write
+
+GRID_FORMATS = [".tif", ".tiff"]
+
+class TauDemGrid:
+
+    def __init__(self, path):
+        self.path = path
+        self.dataset = gdal.Open(path, gdal.GA_ReadOnly)
+        if self.dataset is None:
+            raise TauDemNativeUnsupported("grid {}".format(path))
+        self.band = self.dataset.GetRasterBand(1)
+        self.cols = self.dataset.RasterXSize
+        self.rows = self.dataset.RasterYSize
+        self.nodata = self.band.GetNoDataValue()
+        gdal.PushErrorHandler("CPLQuietErrorHandler")
+        try:
+            self.mapped = self.band.GetVirtualMemAutoArray(gdal.GF_Read)
+        except (RuntimeError, AttributeError, TypeError, ValueError):
+            self.mapped = None
+        finally:
+            gdal.PopErrorHandler()
+
+    def read(self, first, last):
+        """The values of the rows from first to last, clipped to the grid."""
+        first = max(0, first)
+        last = min(self.rows, last)
+        if self.mapped is not None:
+            return numpy.array(self.mapped[first:last], dtype=numpy.float64)
+        return self.band.ReadAsArray(0, first, self.cols, last - first).astype(numpy.float64)
+
+    def cellSize(self):
+        """The width and height of the cells, which have to be in the
+        units of a projected coordinate system."""
+        projection = self.dataset.GetProjection()
+        if projection and osr.SpatialReference(projection).IsGeographic():
+            raise TauDemNativeUnsupported("geographic coordinates")
+        transform = self.dataset.GetGeoTransform()
+        if transform[2] != 0.0 or transform[4] != 0.0:
+            raise TauDemNativeUnsupported("rotated grid")
+        return abs(transform[1]), abs(transform[5])
+
+    def nodataMask(self, values):
+        mask = numpy.isnan(values)
+        if self.nodata is not None:
+            mask |= values == self.nodata
+        return mask
+
+    def create(self, path, dataType=gdal.GDT_Float32, nodata=FLOAT_NODATA):
+        """A GeoTIFF with the size and georeferencing of this grid."""
+        if os.path.splitext(path)[1].lower() not in GRID_FORMATS:
+            raise TauDemNativeUnsupported("output {}".format(path))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        dataset = gdal.GetDriverByName("GTiff").Create(path, self.cols, self.rows, 1, dataType, ["BIGTIFF=IF_SAFER"])
+        if dataset is None:
+            raise OSError("cannot create {}".format(path))
+        dataset.SetGeoTransform(self.dataset.GetGeoTransform())
+        dataset.SetProjection(self.dataset.GetProjection())
+        dataset.GetRasterBand(1).SetNoDataValue(nodata)
+        return dataset
+
+    def close(self):
+        self.mapped = None
+        self.band = None
+        self.dataset = None
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    d8flowdir.py
+    ---------------------
+    Native d8flowdir, which writes the D8 direction of every cell towards
+    its steepest lower neighbour and the slope towards it, with the
+    directions on flats from TauDemFlow.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from .TauDemCommand import TauDemNativeUnsupported
+from .TauDemFlow import flowDirections
+
+def run(command, feedback):
+    elevation = command.value("-fel")
+    directions = command.value("-p")
+    slopes = command.value("-sd8")
+    command.finish()
+    if elevation is None or directions is None or slopes is None:
+        raise TauDemNativeUnsupported("no -fel, -p or -sd8")
+    return flowDirections(elevation, directions, slopes, False, feedback)
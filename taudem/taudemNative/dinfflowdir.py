@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    dinfflowdir.py
+    ---------------------
+    Native dinfflowdir, which writes the D-infinity angle of every cell
+    down its steepest triangular facet and the slope along it, with the
+    directions on flats from TauDemFlow.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from .TauDemCommand import TauDemNativeUnsupported
+from .TauDemFlow import flowDirections
+
+def run(command, feedback):
+    elevation = command.value("-fel")
+    angles = command.value("-ang")
+    slopes = command.value("-slp")
+    command.finish()
+    if elevation is None or angles is None or slopes is None:
+        raise TauDemNativeUnsupported("no -fel, -ang or -slp")
+    return flowDirections(elevation, angles, slopes, True, feedback)
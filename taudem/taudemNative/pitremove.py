@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    pitremove.py
+    ---------------------
+    Native pitremove, which raises every cell of the elevation grid to the
+    lowest level at which it drains off the edge of the grid, into a cell
+    without data or into a cell of the depression mask, by a priority
+    flood (Barnes et al. 2014) whose queue holds the cells in order of
+    their level, and whose cells filled up to that level go through a
+    plain first in first out queue instead.
+
+    Grids larger than one block are flooded by strips of rows, where the
+    cells on the seams between strips are seeds of their own label. The
+    levels at which the labels spill into each other, within the strips
+    and across the seams, make a small graph whose own priority flood
+    gives the final level of every label (Barnes 2016), which a second
+    pass over the strips applies to their cells.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import array
+import heapq
+import shutil
+import collections
+
+import numpy
+
+from .TauDemCommand import TauDemNativeUnsupported
+from .TauDemGrid import TauDemGrid, FLOAT_NODATA
+from taudem import taudemUtils
+
+# the most cells flooded at once
+
+BLOCK_CELLS = 1 << 22
+
+# the label of the cells that drain within their strip, and of the
+# cells without data and around the strip
+
+OUTLET = 1
+CLOSED = -1
+
+def neighbourShifts(fourWay):
+    if fourWay:
+        return [(-1, 0), (0, -1), (0, 1), (1, 0)]
+    return [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+def shifted(mask, dy, dx, fill=False):
+    """The mask moved so that every cell holds the value of its neighbour
+    at (dy, dx)."""
+    rows, cols = mask.shape
+    result = numpy.full(mask.shape, fill, dtype=mask.dtype)
+    result[max(0, -dy):rows - max(0, dy), max(0, -dx):cols - max(0, dx)] = mask[max(0, dy):rows - max(0, -dy), max(0, dx):cols - max(0, -dx)]
+    return result
+
+def flood(z, closed, outlets, seeds, fourWay):
+    """Fills the strip. Returns the filled levels, the labels of the cells,
+    OUTLET for those draining into an outlet and 2 and up for those filled
+    from one of the seeds, and the lowest level at which each pair of
+    labels spills into each other.
+    """
+    rows, cols = z.shape
+    width = cols + 2
+    padded = numpy.zeros((rows + 2, width))
+    padded[1:-1, 1:-1] = z
+    labels = numpy.full((rows + 2, width), CLOSED, dtype=numpy.intc)
+    labels[1:-1, 1:-1] = numpy.where(closed, CLOSED, numpy.where(outlets, OUTLET, 0))
+    offsets = [dy * width + dx for dy, dx in neighbourShifts(fourWay)]
+
+    # python arrays are much faster than numpy for one cell at a time
+    level = array.array("d", padded.ravel().tobytes())
+    label = array.array(labels.dtype.char, labels.tobytes())
+    done = bytearray(len(level))
+    start = numpy.flatnonzero(labels == OUTLET).tolist() + numpy.flatnonzero(numpy.pad(seeds & ~outlets & ~closed, 1)).tolist()
+    queue = [(level[cell], cell) for cell in start]
+    heapq.heapify(queue)
+    pit = collections.deque()
+    spills = {}
+    nextLabel = OUTLET + 1
+    while queue or pit:
+        if pit:
+            cell = pit.popleft()
+        else:
+            cell = heapq.heappop(queue)[1]
+            if done[cell]:
+                continue
+        done[cell] = 1
+        current = label[cell]
+        if current == 0:
+            current = label[cell] = nextLabel
+            nextLabel += 1
+        height = level[cell]
+        for offset in offsets:
+            other = cell + offset
+            otherLabel = label[other]
+            if otherLabel == 0:
+                label[other] = current
+                if level[other] <= height:
+                    level[other] = height
+                    pit.append(other)
+                else:
+                    heapq.heappush(queue, (level[other], other))
+            elif otherLabel != current and otherLabel != CLOSED:
+                pair = (current, otherLabel) if current < otherLabel else (otherLabel, current)
+                spill = level[other] if level[other] > height else height
+                if spill < spills.get(pair, numpy.inf):
+                    spills[pair] = spill
+
+    level = numpy.frombuffer(level, dtype=numpy.float64).reshape(rows + 2, width)[1:-1, 1:-1]
+    label = numpy.frombuffer(label, dtype=numpy.intc).reshape(rows + 2, width)[1:-1, 1:-1]
+    return level, label, spills
+
+def spillLevels(count, pairs):
+    """The lowest level at which every label drains into an outlet, from
+    the levels at which the pairs of labels spill into each other.
+    """
+    graph = collections.defaultdict(list)
+    for (first, second), spill in pairs.items():
+        graph[first].append((second, spill))
+        graph[second].append((first, spill))
+    levels = numpy.full(count, -numpy.inf)
+    done = bytearray(count)
+    queue = [(-numpy.inf, OUTLET)]
+    while queue:
+        height, current = heapq.heappop(queue)
+        if done[current]:
+            continue
+        done[current] = 1
+        levels[current] = height
+        for other, spill in graph[current]:
+            if not done[other]:
+                heapq.heappush(queue, (max(height, spill), other))
+    return levels
+
+def seamSpills(upper, lower, fourWay):
+    """The levels at which the labels of the last row of a strip and the
+    first row of the next strip spill into each other."""
+    upperLevel, upperLabel = upper
+    lowerLevel, lowerLabel = lower
+    cols = len(upperLevel)
+    pairs = {}
+    for dy, dx in neighbourShifts(fourWay):
+        if dy != 1:
+            continue
+        a = slice(max(0, -dx), cols - max(0, dx))
+        b = slice(max(0, dx), cols - max(0, -dx))
+        first, second = upperLabel[a], lowerLabel[b]
+        spill = numpy.maximum(upperLevel[a], lowerLevel[b])
+        valid = (first > 0) & (second > 0) & (first != second)
+        for x, y, s in zip(numpy.minimum(first, second)[valid].tolist(), numpy.maximum(first, second)[valid].tolist(), spill[valid].tolist()):
+            if s < pairs.get((x, y), numpy.inf):
+                pairs[(x, y)] = s
+    return pairs
+
+def run(command, feedback):
+    elevation = command.value("-z")
+    output = command.value("-fel")
+    depressions = command.value("-depmask")
+    fourWay = command.switch("-4way")
+    command.finish()
+    if elevation is None or output is None:
+        raise TauDemNativeUnsupported("no -z or -fel")
+
+    grid = TauDemGrid(elevation)
+    mask = TauDemGrid(depressions) if depressions is not None else None
+    if mask is not None and (mask.rows, mask.cols) != (grid.rows, grid.cols):
+        raise TauDemNativeUnsupported("-depmask of another size")
+    result = grid.create(output)
+    band = result.GetRasterBand(1)
+    stripRows = max(1, min(grid.rows, BLOCK_CELLS // max(1, grid.cols)))
+    strips = [(first, min(grid.rows, first + stripRows)) for first in range(0, grid.rows, stripRows)]
+    scratch = taudemUtils.scratchDirectory(8 * grid.rows * grid.cols) if len(strips) > 1 else None
+    try:
+        edges = []
+        pairs = {}
+        count = OUTLET + 1
+        for index, (first, last) in enumerate(strips):
+            if feedback.isCanceled():
+                return 1
+            # a row of halo on both sides finds the cells next to nodata
+            halo = grid.read(first - 1, last + 1)
+            haloNodata = grid.nodataMask(halo)
+            top = 1 if first > 0 else 0
+            z = halo[top:top + last - first]
+            closed = haloNodata[top:top + last - first]
+            nextToNodata = numpy.zeros(haloNodata.shape, dtype=bool)
+            for dy, dx in neighbourShifts(fourWay):
+                nextToNodata |= shifted(haloNodata, dy, dx)
+            outlets = nextToNodata[top:top + last - first].copy()
+            outlets[:, 0] = True
+            outlets[:, -1] = True
+            if first == 0:
+                outlets[0] = True
+            if last == grid.rows:
+                outlets[-1] = True
+            if mask is not None:
+                outlets |= mask.read(first, last) == 1
+            outlets &= ~closed
+            seeds = numpy.zeros(z.shape, dtype=bool)
+            seeds[0] = first > 0
+            seeds[-1] |= last < grid.rows
+
+            level, label, spills = flood(z, closed, outlets, seeds, fourWay)
+            if scratch is None:
+                band.WriteArray(numpy.where(closed, FLOAT_NODATA, level).astype(numpy.float32), 0, first)
+            else:
+                # the labels of all strips are numbered one after the other
+                label = numpy.where(label > OUTLET, label + (count - OUTLET - 1), label)
+                for (a, b), spill in spills.items():
+                    a = a + (count - OUTLET - 1) if a > OUTLET else a
+                    b = b + (count - OUTLET - 1) if b > OUTLET else b
+                    pairs[(a, b)] = min(spill, pairs.get((a, b), numpy.inf))
+                count = max(count, int(label.max()) + 1)
+                edges.append(((level[0].copy(), label[0].copy()), (level[-1].copy(), label[-1].copy())))
+                numpy.save(os.path.join(scratch, "level{}.npy".format(index)), numpy.where(closed, FLOAT_NODATA, level).astype(numpy.float32))
+                numpy.save(os.path.join(scratch, "label{}.npy".format(index)), label)
+            feedback.setProgress((80.0 if scratch is not None else 100.0) * (index + 1) / len(strips))
+
+        if scratch is not None:
+            for (upper, lower) in zip(edges[:-1], edges[1:]):
+                for pair, spill in seamSpills(upper[1], lower[0], fourWay).items():
+                    pairs[pair] = min(spill, pairs.get(pair, numpy.inf))
+            levels = spillLevels(count, pairs)
+            for index, (first, last) in enumerate(strips):
+                if feedback.isCanceled():
+                    return 1
+                level = numpy.load(os.path.join(scratch, "level{}.npy".format(index)), mmap_mode="r")
+                label = numpy.load(os.path.join(scratch, "label{}.npy".format(index)), mmap_mode="r")
+                raised = numpy.where(label > OUTLET, numpy.maximum(level, levels[numpy.maximum(label, 0)]), level)
+                band.WriteArray(raised.astype(numpy.float32), 0, first)
+                del level, label
+                feedback.setProgress(80.0 + 20.0 * (index + 1) / len(strips))
+    finally:
+        band = None
+        result = None
+        grid.close()
+        if mask is not None:
+            mask.close()
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+    feedback.pushConsoleInfo("filled {} by {} cells in {} strips".format(grid.rows, grid.cols, len(strips)))
+    return 0
@@ -40,6 +40,7 @@ from taudem.d8flowdir import D8FlowDir
 from taudem.areadinf import AreaDinf
 from taudem.dinfflowdir import DinfFlowDir
 from taudem.gridnet import GridNet
+from taudem.calibrate import Calibrate
 
 from taudem.peukerdouglas import PeukerDouglas
 from taudem.threshold import Threshold
@@ -51,6 +52,7 @@ from taudem.streamnet import StreamNet
 from taudem.moveoutletstostreams import MoveOutletsToStreams
 from taudem.gagewatershed import GageWatershed
 from taudem.connectdown import ConnectDown
+from taudem.watershed import Watershed
 
 from taudem.slopearearatio import SlopeAreaRatio
 from taudem.d8hdisttostrm import D8HDistToStrm
@@ -103,13 +105,36 @@ class TauDemProvider(QgsProcessingProvider):
                                             valuetype=Setting.FOLDER))
         ProcessingConfig.addSetting(Setting(self.name(),
                                             taudemUtils.TAUDEM_PROCESSES,
-                                            self.tr("MPI processes to use"),
-                                            2,
+                                            self.tr("MPI processes to use (0 to choose for every run)"),
+                                            0,
                                             valuetype=Setting.INT))
         ProcessingConfig.addSetting(Setting(self.name(),
                                             taudemUtils.TAUDEM_VERBOSE,
                                             self.tr("Log commands output"),
                                             False))
+        ProcessingConfig.addSetting(Setting(self.name(),
+                                            taudemUtils.TAUDEM_SCRATCH,
+                                            self.tr("Scratch directory for intermediate grids (tmpfs if empty)"),
+                                            "",
+                                            valuetype=Setting.FOLDER))
+        ProcessingConfig.addSetting(Setting(self.name(),
+                                            taudemUtils.TAUDEM_CACHE,
+                                            self.tr("Cache directory for derived grids (no cache if empty)"),
+                                            "",
+                                            valuetype=Setting.FOLDER))
+        ProcessingConfig.addSetting(Setting(self.name(),
+                                            taudemUtils.TAUDEM_CACHE_SIZE,
+                                            self.tr("Cache size (MB)"),
+                                            4096,
+                                            valuetype=Setting.INT))
+        ProcessingConfig.addSetting(Setting(self.name(),
+                                            taudemUtils.TAUDEM_CACHE_PINNED,
+                                            self.tr("Tools whose cached grids are never evicted (comma separated)"),
+                                            ""))
+        ProcessingConfig.addSetting(Setting(self.name(),
+                                            taudemUtils.TAUDEM_NATIVE,
+                                            self.tr("Run tools with a native implementation in-process"),
+                                            False))
         ProcessingConfig.readSettings()
         self.refreshAlgorithms()
         return True
@@ -120,6 +145,11 @@ class TauDemProvider(QgsProcessingProvider):
         ProcessingConfig.removeSetting(taudemUtils.TAUDEM_MPICH)
         ProcessingConfig.removeSetting(taudemUtils.TAUDEM_PROCESSES)
         ProcessingConfig.removeSetting(taudemUtils.TAUDEM_VERBOSE)
+        ProcessingConfig.removeSetting(taudemUtils.TAUDEM_SCRATCH)
+        ProcessingConfig.removeSetting(taudemUtils.TAUDEM_CACHE)
+        ProcessingConfig.removeSetting(taudemUtils.TAUDEM_CACHE_SIZE)
+        ProcessingConfig.removeSetting(taudemUtils.TAUDEM_CACHE_PINNED)
+        ProcessingConfig.removeSetting(taudemUtils.TAUDEM_NATIVE)
 
     def isActive(self):
         return ProcessingConfig.getSetting(taudemUtils.TAUDEM_ACTIVE)
@@ -137,6 +167,7 @@ class TauDemProvider(QgsProcessingProvider):
                 AreaDinf(),
                 DinfFlowDir(),
                 GridNet(),
+                Calibrate(),
 
                 PeukerDouglas(),
                 Threshold(),
@@ -148,6 +179,7 @@ class TauDemProvider(QgsProcessingProvider):
                 MoveOutletsToStreams(),
                 GageWatershed(),
                 ConnectDown(),
+                Watershed(),
 
                 SlopeAreaRatio(),
                 D8HDistToStrm(),
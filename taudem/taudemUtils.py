@@ -26,21 +26,92 @@ __copyright__ = '(C) 2012-2018, Alexander Bruy'
 __revision__ = '$Format:%H$'
 
 import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import importlib
+import threading
 import subprocess
 
+from osgeo import gdal
+
 from qgis.core import (Qgis,
                        QgsApplication,
                        QgsProcessingProvider,
                        QgsMessageLog,
+                       QgsProcessingException,
                        QgsProcessingFeedback)
 from processing.core.ProcessingLog import ProcessingLog
 from processing.core.ProcessingConfig import ProcessingConfig
 
+from taudem.taudemNative.TauDemCommand import TauDemCommand, TauDemNativeUnsupported
+
 TAUDEM_ACTIVE = "TAUDEM_ACTIVE"
 TAUDEM_DIRECTORY = "TAUDEM_DIRECTORY"
 TAUDEM_MPICH = "TAUDEM_MPICH"
 TAUDEM_PROCESSES = "TAUDEM_PROCESSES"
 TAUDEM_VERBOSE = "TAUDEM_VERBOSE"
+TAUDEM_SCRATCH = "TAUDEM_SCRATCH"
+TAUDEM_CACHE = "TAUDEM_CACHE"
+TAUDEM_CACHE_SIZE = "TAUDEM_CACHE_SIZE"
+TAUDEM_CACHE_PINNED = "TAUDEM_CACHE_PINNED"
+TAUDEM_NATIVE = "TAUDEM_NATIVE"
+
+# tmpfs directories tried for scratch grids before the temporary directory
+
+MEMORY_DIRECTORIES = ["/dev/shm", "/run/shm"]
+
+# the tools with a module of the same name in taudemNative
+
+NATIVE_TOOLS = ["pitremove", "d8flowdir", "dinfflowdir"]
+
+# switches of the grids written by each tool. Runs of other tools, or
+# writing other files than GeoTIFFs, are not cached
+
+OUTPUT_SWITCHES = {"pitremove": ["-fel"],
+                   "d8flowdir": ["-p", "-sd8"],
+                   "dinfflowdir": ["-ang", "-slp"],
+                   "aread8": ["-ad8"],
+                   "areadinf": ["-sca"],
+                   "gridnet": ["-plen", "-tlen", "-gord"],
+                   "peukerdouglas": ["-ss"],
+                   "threshold": ["-src"],
+                   "d8flowpathextremeup": ["-ssa"],
+                   "slopearea": ["-sa"],
+                   "lengtharea": ["-ss"],
+                   "gagewatershed": ["-gw", "-id"],
+                   "slopearearatio": ["-sar"],
+                   "d8hdisttostrm": ["-dist"],
+                   "dinfupdependence": ["-dep"],
+                   "dinfdecayaccum": ["-dsca"],
+                   "dinfconclimaccum": ["-ctpt"],
+                   "dinftranslimaccum": ["-tla", "-tdep"],
+                   "dinfrevaccum": ["-racc", "-dmax"],
+                   "dinfdistdown": ["-dd"],
+                   "dinfdistup": ["-du"],
+                   "dinfavalanche": ["-rz", "-dfs"],
+                   "slopeavedown": ["-slpd"],
+                   "twi": ["-twi"]}
+CACHED_EXTENSIONS = [".tif", ".tiff"]
+
+# files hashed together with an input of the same name
+
+SIDECAR_EXTENSIONS = [".shx", ".dbf", ".prj", ".cpg", ".tfw"]
+
+# cost of a run on n processes in seconds, a + b * n + c * cells / n, for
+# the tools that were not calibrated
+
+DEFAULT_CURVE = [0.0, 0.25, 2e-7]
+
+# memory of the grids of a run per cell, and of every MPI process
+
+BYTES_PER_CELL = 16
+PROCESS_MEMORY = 64 * 1024 * 1024
+
+cacheLock = threading.Lock()
+calibrationResult = {}
 
 
 def taudemDirectory():
@@ -53,25 +124,420 @@ def mpichDirectory():
     return filePath if filePath is not None else ""
 
 
+def scratchDirectory(size=0):
+    """Creates a directory for intermediate grids of about the given
+    number of bytes, in the configured scratch directory or in memory
+    backed storage if it has room for them, else in the temporary
+    directory. The caller removes it.
+    """
+    candidates = []
+    configured = ProcessingConfig.getSetting(TAUDEM_SCRATCH)
+    if configured:
+        candidates.append(configured)
+    candidates.extend(MEMORY_DIRECTORIES)
+    for candidate in candidates:
+        try:
+            if os.path.isdir(candidate) and os.access(candidate, os.W_OK) and shutil.disk_usage(candidate).free > size:
+                return tempfile.mkdtemp(prefix="taudem_", dir=candidate)
+        except OSError:
+            pass
+    return tempfile.mkdtemp(prefix="taudem_")
+
+
+def cacheDirectory():
+    directory = ProcessingConfig.getSetting(TAUDEM_CACHE)
+    return directory if directory else None
+
+
+def pinnedTools():
+    tools = ProcessingConfig.getSetting(TAUDEM_CACHE_PINNED)
+    return [tool.strip().lower() for tool in tools.split(",")] if tools else []
+
+
+def readCacheIndex(directory):
+    try:
+        with open(os.path.join(directory, "index.json")) as index:
+            return json.load(index)
+    except (OSError, ValueError):
+        return {"entries": {}, "digests": {}}
+
+
+def writeCacheIndex(directory, index):
+    handle, path = tempfile.mkstemp(suffix=".json", dir=directory)
+    with os.fdopen(handle, "w") as temporary:
+        json.dump(index, temporary)
+    os.replace(path, os.path.join(directory, "index.json"))
+
+
+def isNumber(argument):
+    try:
+        float(argument)
+        return True
+    except ValueError:
+        return False
+
+
+def fileDigest(path, digests):
+    """The content hash of an input file and of its sidecar files,
+    remembered in the digests by their size and modification time.
+    """
+    root = os.path.splitext(path)[0]
+    files = [path] + [root + extension for extension in SIDECAR_EXTENSIONS if os.path.isfile(root + extension)]
+    digest = hashlib.sha256()
+    for fileName in files:
+        fileName = os.path.abspath(fileName)
+        info = os.stat(fileName)
+        stamp = [info.st_size, info.st_mtime_ns]
+        if fileName not in digests or digests[fileName][:2] != stamp:
+            content = hashlib.sha256()
+            with open(fileName, "rb") as data:
+                for block in iter(lambda: data.read(1 << 20), b""):
+                    content.update(block)
+            digests[fileName] = stamp + [content.hexdigest()]
+        digest.update(digests[fileName][2].encode())
+    return digest.hexdigest()
+
+
+def nativeVersion():
+    """The hash of the sources of the native tools, which changes with
+    every version of them.
+    """
+    folder = os.path.join(os.path.dirname(__file__), "taudemNative")
+    digest = hashlib.sha256()
+    for fileName in sorted(os.listdir(folder)):
+        if fileName.endswith(".py"):
+            with open(os.path.join(folder, fileName), "rb") as source:
+                digest.update(fileName.encode() + b"\0" + source.read())
+    return digest.hexdigest()
+
+
+def cacheEntry(commands, native=False):
+    """The cache key of a TauDEM command line, its tool and its outputs by
+    switch, or None if the command is not cached. The key covers the
+    engine that writes the outputs, the native tool or the TauDEM
+    executable, with its version, the switches and values, and the
+    contents of the input files, but not the names of the outputs.
+    """
+    directory = cacheDirectory()
+    tool = os.path.basename(commands[0]).lower()
+    if directory is None or tool not in OUTPUT_SWITCHES:
+        return None
+    key = hashlib.sha256()
+    if native:
+        key.update("native {} {}".format(tool, nativeVersion()).encode())
+    else:
+        try:
+            info = os.stat(commands[0])
+            key.update("taudem {} {} {}".format(tool, info.st_size, info.st_mtime_ns).encode())
+        except OSError:
+            key.update("taudem {}".format(tool).encode())
+    outputs = []
+    previous = None
+    with cacheLock:
+        index = readCacheIndex(directory)
+        for argument in commands[1:]:
+            argument = str(argument)
+            if previous in OUTPUT_SWITCHES[tool]:
+                extension = os.path.splitext(argument)[1].lower()
+                if extension not in CACHED_EXTENSIONS:
+                    return None
+                outputs.append((previous, argument))
+                value = extension
+            elif argument.startswith("-") or isNumber(argument):
+                value = argument
+            elif os.path.isfile(argument):
+                value = fileDigest(argument, index["digests"])
+            else:
+                # layer sources which are not plain files can change unseen
+                return None
+            key.update(value.encode() + b"\0")
+            previous = argument
+        os.makedirs(directory, exist_ok=True)
+        writeCacheIndex(directory, index)
+    return key.hexdigest(), tool, outputs
+
+
+def linkFile(source, target):
+    if os.path.exists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def fetchCached(entry, feedback):
+    """Links or copies the stored outputs of a cached command line to its
+    outputs, False if it is not cached.
+    """
+    directory = cacheDirectory()
+    key, tool, outputs = entry
+    with cacheLock:
+        index = readCacheIndex(directory)
+        stored = index["entries"].get(key)
+        if stored is None:
+            return False
+        for switch, outputFile in outputs:
+            source = os.path.join(directory, key, stored["files"][switch][0])
+            try:
+                info = os.stat(source)
+                valid = [info.st_size, info.st_mtime_ns] == stored["files"][switch][1:]
+            except OSError:
+                valid = False
+            if not valid:
+                # a stored grid that was removed or written over
+                shutil.rmtree(os.path.join(directory, key), ignore_errors=True)
+                del index["entries"][key]
+                writeCacheIndex(directory, index)
+                return False
+        for switch, outputFile in outputs:
+            linkFile(os.path.join(directory, key, stored["files"][switch][0]), outputFile)
+        stored["used"] = time.time()
+        stored["pinned"] = stored["pinned"] or tool in pinnedTools()
+        writeCacheIndex(directory, index)
+    feedback.pushInfo("TauDEM outputs reused from cache entry {}".format(key))
+    return True
+
+
+def storeCached(entry, feedback):
+    """Stores the outputs of a command line in the cache, then evicts the
+    least recently used entries that are not pinned until the cache fits
+    its size budget.
+    """
+    directory = cacheDirectory()
+    key, tool, outputs = entry
+    with cacheLock:
+        index = readCacheIndex(directory)
+        os.makedirs(os.path.join(directory, key), exist_ok=True)
+        files = {}
+        size = 0
+        for switch, outputFile in outputs:
+            if not os.path.isfile(outputFile):
+                shutil.rmtree(os.path.join(directory, key), ignore_errors=True)
+                return
+            fileName = switch[1:] + os.path.splitext(outputFile)[1].lower()
+            linkFile(outputFile, os.path.join(directory, key, fileName))
+            info = os.stat(os.path.join(directory, key, fileName))
+            files[switch] = [fileName, info.st_size, info.st_mtime_ns]
+            size += info.st_size
+        index["entries"][key] = {"tool": tool, "files": files, "size": size, "used": time.time(), "pinned": tool in pinnedTools()}
+
+        budget = int(ProcessingConfig.getSetting(TAUDEM_CACHE_SIZE) or 0) * 1024 * 1024
+        total = sum(stored["size"] for stored in index["entries"].values())
+        for oldest in sorted(index["entries"], key=lambda name: index["entries"][name]["used"]):
+            if total <= budget:
+                break
+            if index["entries"][oldest]["pinned"]:
+                continue
+            total -= index["entries"][oldest]["size"]
+            shutil.rmtree(os.path.join(directory, oldest), ignore_errors=True)
+            del index["entries"][oldest]
+            if oldest == key:
+                feedback.pushInfo("TauDEM outputs larger than the cache size")
+        index["digests"] = {path: digest for path, digest in index["digests"].items() if os.path.exists(path)}
+        writeCacheIndex(directory, index)
+
+
+def pinCached(commands, pinned=True):
+    """Pins or unpins the cache entries of a command line by the native
+    tool and by TauDEM, so that they are never evicted. Returns False if
+    it is not cached.
+    """
+    entries = [cacheEntry(commands, native) for native in (True, False)]
+    if entries[0] is None:
+        return False
+    directory = cacheDirectory()
+    found = False
+    with cacheLock:
+        index = readCacheIndex(directory)
+        for entry in entries:
+            if entry[0] in index["entries"]:
+                index["entries"][entry[0]]["pinned"] = pinned
+                found = True
+        writeCacheIndex(directory, index)
+    return found
+
+
+def calibrationPath():
+    folder = os.path.join(QgsApplication.qgisSettingsDirPath(), "taudem")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, "calibration.json")
+
+
+def scalingCurves():
+    """Returns the cost curve of every calibrated tool for the TauDEM and
+    MPI installation in use, read once from the calibration file.
+    """
+    global calibrationResult
+
+    key = [os.path.normcase(taudemDirectory()), os.path.normcase(mpichDirectory()), os.cpu_count()]
+    if calibrationResult.get("key") == key:
+        return calibrationResult["curves"]
+
+    calibrationResult = {"key": key, "curves": {}}
+    try:
+        with open(calibrationPath()) as f:
+            result = json.load(f)
+        if result["key"] == key:
+            calibrationResult = result
+    except (OSError, ValueError, KeyError):
+        pass
+    return calibrationResult["curves"]
+
+
+def saveScalingCurves(curves):
+    global calibrationResult
+
+    scalingCurves()
+    calibrationResult["curves"].update(curves)
+    calibrationFile = calibrationPath()
+    try:
+        with open(calibrationFile + ".tmp", "w") as f:
+            json.dump(calibrationResult, f)
+        os.replace(calibrationFile + ".tmp", calibrationFile)
+    except OSError:
+        pass
+
+
+def availableCores():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def availableMemory():
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def rasterCells(commands):
+    """Returns the number of cells of the largest input grid of a command
+    line, None if it has none.
+    """
+    cells = None
+    for argument in commands[1:]:
+        argument = str(argument)
+        if argument.startswith("-") or not os.path.isfile(argument):
+            continue
+        gdal.PushErrorHandler("CPLQuietErrorHandler")
+        try:
+            dataset = gdal.OpenEx(argument, gdal.OF_RASTER)
+        except RuntimeError:
+            dataset = None
+        finally:
+            gdal.PopErrorHandler()
+        if dataset is not None:
+            cells = max(cells or 0, dataset.RasterXSize * dataset.RasterYSize)
+    return cells
+
+
+def processCount(commands):
+    """Picks the number of MPI processes for a command line from the size
+    of its grids, the cores and memory available and the cost curve of
+    the tool, 1 if MPI would only add overhead.
+    """
+    cores = availableCores()
+    cells = rasterCells(commands)
+    if cells is None:
+        return min(2, cores)
+    memory = availableMemory()
+    if memory is not None:
+        # the processes share the grids, but each one has its own runtime
+        # which has to fit in what the grids leave, or at least a quarter
+        cores = max(1, min(cores, max(memory - BYTES_PER_CELL * cells, memory // 4) // PROCESS_MEMORY))
+    tool = os.path.splitext(os.path.basename(commands[0]))[0].lower()
+    a, b, c = scalingCurves().get(tool, DEFAULT_CURVE)
+    return min(range(1, cores + 1), key=lambda n: a + b * n + c * cells / n)
+
+
 def descriptionPath():
     return os.path.normpath(os.path.join(os.path.dirname(__file__), "descriptions"))
 
 
-def execute(commands, feedback=None):
-    cmds = []
-    cmds.append(os.path.join(mpichDirectory(), "mpiexec"))
+def nativeTool(commands):
+    # the tool of the command line if it runs natively, None otherwise
+    if not ProcessingConfig.getSetting(TAUDEM_NATIVE):
+        return None
+    tool = os.path.splitext(os.path.basename(commands[0]))[0].lower()
+    return tool if tool in NATIVE_TOOLS else None
 
-    processes = ProcessingConfig.getSetting(TAUDEM_PROCESSES)
-    if int(processes) <= 0:
-      processes = 1
 
-    cmds.append("-n")
-    cmds.append(processes)
-    cmds.extend(commands)
+def runNative(commands, feedback):
+    """Runs the command line in-process and returns the exit code, or None
+    if TauDEM has to run.
+    """
+    tool = nativeTool(commands)
+    if tool is None:
+        return None
+    try:
+        command = TauDemCommand(tool, [str(c) for c in commands[1:]])
+        module = importlib.import_module("taudem.taudemNative." + tool)
+        feedback.pushInfo("Running native {}".format(tool))
+        return module.run(command, feedback)
+    except TauDemNativeUnsupported as e:
+        feedback.pushInfo("Native {} does not support '{}', running TauDEM".format(tool, e))
+        return None
+    except QgsProcessingException:
+        raise
+    except Exception as e:
+        # TauDEM may not even be installed here, so the error is not hidden
+        # behind a run of it
+        raise QgsProcessingException("native {} failed: {}".format(tool, e)) from e
+
 
+def execute(commands, feedback=None, processes=None, useCache=True, native=True):
     if feedback is None:
         feedback = QgsProcessingFeedback()
 
+    # the outputs of the native tools and of TauDEM are cached apart, and
+    # TauDEM only runs if the native tool does not support the command
+    engines = [True, False] if native and nativeTool(commands) is not None else [False]
+    for engine in engines:
+        cached = cacheEntry(commands, engine) if useCache else None
+        if cached is not None:
+            if fetchCached(cached, feedback):
+                return 0
+            # outputs still linked to stored grids are not written over
+            for switch, outputFile in cached[2]:
+                if os.path.exists(outputFile):
+                    os.remove(outputFile)
+
+        if engine:
+            returncode = runNative(commands, feedback)
+            if returncode is None:
+                continue
+        else:
+            returncode = runTauDem(commands, feedback, processes)
+
+        if cached is not None and returncode == 0:
+            storeCached(cached, feedback)
+        return returncode
+
+
+def runTauDem(commands, feedback, processes=None):
+    if processes is None:
+        processes = int(ProcessingConfig.getSetting(TAUDEM_PROCESSES))
+        if processes <= 0:
+            processes = processCount(commands)
+            feedback.pushInfo("TauDEM processes: {}".format(processes))
+
+    cmds = []
+    # a single process runs without mpiexec
+    if processes > 1:
+        cmds.append(os.path.join(mpichDirectory(), "mpiexec"))
+        cmds.append("-n")
+        cmds.append(processes)
+    cmds.extend(commands)
+
     fused_command = " ".join([str(c) for c in cmds])
     # QgsMessageLog.logMessage(fused_command, "Processing", QgsMessageLog.INFO)
     QgsMessageLog.logMessage(fused_command, "Processing", Qgis.Info)
@@ -80,12 +546,18 @@ def execute(commands, feedback=None):
     feedback.pushInfo("TauDEM command output:")
 
     loglines = []
-    with subprocess.Popen(fused_command,
-                          shell=True,
-                          stdout=subprocess.PIPE,
-                          stdin=subprocess.DEVNULL,
-                          stderr=subprocess.STDOUT,
-                          universal_newlines=True) as proc:
+    # the arguments are passed as they are, so paths may contain spaces
+    try:
+        proc = subprocess.Popen([str(c) for c in cmds],
+                                stdout=subprocess.PIPE,
+                                stdin=subprocess.DEVNULL,
+                                stderr=subprocess.STDOUT,
+                                universal_newlines=True)
+    except OSError as e:
+        # like a shell that cannot find the executable
+        feedback.reportError("Cannot run {}: {}".format(cmds[0], e))
+        return 127
+    with proc:
         try:
             for line in iter(proc.stdout.readline, ""):
                 feedback.pushConsoleInfo(line)
@@ -96,3 +568,5 @@ def execute(commands, feedback=None):
     if ProcessingConfig.getSetting(TAUDEM_VERBOSE):
         # QgsMessageLog.logMessage("\n".join(loglines), "Processing", QgsMessageLog.INFO)
         QgsMessageLog.logMessage("\n".join(loglines), "Processing", Qgis.Info)
+
+    return proc.returncode
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    watershed.py
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import shutil
+
+from qgis.core import (QgsProcessing,
+                       QgsProcessingException,
+                       QgsProcessingParameterRasterLayer,
+                       QgsProcessingParameterVectorLayer,
+                       QgsProcessingParameterBoolean,
+                       QgsProcessingParameterNumber,
+                       QgsProcessingParameterRasterDestination,
+                       QgsProcessingParameterVectorDestination,
+                       QgsProcessingParameterFileDestination
+                      )
+
+from taudem.taudemAlgorithm import TauDemAlgorithm
+from taudem import taudemUtils
+
+
+class Watershed(TauDemAlgorithm):
+
+    ELEVATION = "ELEVATION"
+    DEPRESSION_MASK = "DEPRESSION_MASK"
+    FOUR_NEIGHBOURS = "FOUR_NEIGHBOURS"
+    EDGE_CONTAMINATION = "EDGE_CONTAMINATION"
+    THRESHOLD = "THRESHOLD"
+    OUTLETS = "OUTLETS"
+    SINGLE_WATERSHED = "SINGLE_WATERSHED"
+    PIT_FILLED = "PIT_FILLED"
+    D8_FLOWDIR = "D8_FLOWDIR"
+    D8_SLOPE = "D8_SLOPE"
+    D8_CONTRIB_AREA = "D8_CONTRIB_AREA"
+    STREAM_RASTER = "STREAM_RASTER"
+    STREAM_ORDER = "STREAM_ORDER"
+    WATERSHED = "WATERSHED"
+    STREAM_REACH = "STREAM_REACH"
+    NETWORK_CONNECTIVITY = "NETWORK_CONNECTIVITY"
+    NETWORK_COORDINATES = "NETWORK_COORDINATES"
+
+    # the TauDEM tools of the chain with the switches of the grids they
+    # write, and the output of the algorithm and file extension of each
+    STAGES = [("pitremove", ["-fel"]),
+              ("d8flowdir", ["-p", "-sd8"]),
+              ("aread8", ["-ad8"]),
+              ("threshold", ["-src"]),
+              ("streamnet", ["-ord", "-w", "-net", "-tree", "-coord"])]
+    OUTPUTS = {"-fel": (PIT_FILLED, ".tif"),
+               "-p": (D8_FLOWDIR, ".tif"),
+               "-sd8": (D8_SLOPE, ".tif"),
+               "-ad8": (D8_CONTRIB_AREA, ".tif"),
+               "-src": (STREAM_RASTER, ".tif"),
+               "-ord": (STREAM_ORDER, ".tif"),
+               "-w": (WATERSHED, ".tif"),
+               "-net": (STREAM_REACH, ".shp"),
+               "-tree": (NETWORK_CONNECTIVITY, ".dat"),
+               "-coord": (NETWORK_COORDINATES, ".dat")}
+
+    def name(self):
+        return "watershed"
+
+    def displayName(self):
+        return self.tr("Watershed delineation")
+
+    def group(self):
+        return self.tr("Stream network analysis")
+
+    def groupId(self):
+        return "streamanalysis"
+
+    def tags(self):
+        return self.tr("dem,hydrology,pit,d8,contributing area,threshold,stream,network,watershed").split(",")
+
+    def shortHelpString(self):
+        return self.tr("Runs Pit remove, D8 flow directions, D8 contributing "
+                       "area, Stream definition by threshold and Stream reach "
+                       "and watershed in one go. Intermediate grids that are "
+                       "not requested as outputs are kept in a scratch "
+                       "directory, and the chain stops after the last tool "
+                       "whose outputs are requested.")
+
+    def helpUrl(self):
+        return "http://hydrology.usu.edu/taudem/taudem5/help53/StreamReachAndWatershed.html"
+
+    def __init__(self):
+        super().__init__()
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterRasterLayer(self.ELEVATION,
+                                                            self.tr("Elevation")))
+        self.addParameter(QgsProcessingParameterRasterLayer(self.DEPRESSION_MASK,
+                                                            self.tr("Depression mask "),
+                                                            optional=True))
+        self.addParameter(QgsProcessingParameterBoolean(self.FOUR_NEIGHBOURS,
+                                                        self.tr("Consider only 4 way neighbors"),
+                                                        defaultValue=False))
+        self.addParameter(QgsProcessingParameterBoolean(self.EDGE_CONTAMINATION,
+                                                        self.tr("Check for edge contamination"),
+                                                        defaultValue=True))
+        self.addParameter(QgsProcessingParameterNumber(self.THRESHOLD,
+                                                       self.tr("Threshold"),
+                                                       QgsProcessingParameterNumber.Double,
+                                                       100.0,
+                                                       minValue=0.0))
+        self.addParameter(QgsProcessingParameterVectorLayer(self.OUTLETS,
+                                                            self.tr("Outlets"),
+                                                            types=[QgsProcessing.TypeVectorPoint],
+                                                            optional=True))
+        self.addParameter(QgsProcessingParameterBoolean(self.SINGLE_WATERSHED,
+                                                        self.tr("Delineate single watershed"),
+                                                        defaultValue=False))
+
+        self.addParameter(QgsProcessingParameterRasterDestination(self.PIT_FILLED,
+                                                                  self.tr("Pit removed elevation"),
+                                                                  optional=True,
+                                                                  createByDefault=False))
+        self.addParameter(QgsProcessingParameterRasterDestination(self.D8_FLOWDIR,
+                                                                  self.tr("D8 flow directions"),
+                                                                  optional=True,
+                                                                  createByDefault=False))
+        self.addParameter(QgsProcessingParameterRasterDestination(self.D8_SLOPE,
+                                                                  self.tr("D8 slope"),
+                                                                  optional=True,
+                                                                  createByDefault=False))
+        self.addParameter(QgsProcessingParameterRasterDestination(self.D8_CONTRIB_AREA,
+                                                                  self.tr("D8 contributing area"),
+                                                                  optional=True,
+                                                                  createByDefault=False))
+        self.addParameter(QgsProcessingParameterRasterDestination(self.STREAM_RASTER,
+                                                                  self.tr("Stream raster"),
+                                                                  optional=True,
+                                                                  createByDefault=False))
+        self.addParameter(QgsProcessingParameterRasterDestination(self.STREAM_ORDER,
+                                                                  self.tr("Stream order"),
+                                                                  optional=True,
+                                                                  createByDefault=False))
+        self.addParameter(QgsProcessingParameterRasterDestination(self.WATERSHED,
+                                                                  self.tr("Watershed"),
+                                                                  optional=True))
+        self.addParameter(QgsProcessingParameterVectorDestination(self.STREAM_REACH,
+                                                                  self.tr("Channel network"),
+                                                                  QgsProcessing.TypeVectorLine,
+                                                                  optional=True))
+        self.addParameter(QgsProcessingParameterFileDestination(self.NETWORK_CONNECTIVITY,
+                                                                self.tr("Network connectivity tree"),
+                                                                self.tr("Data files (*.dat)"),
+                                                                optional=True,
+                                                                createByDefault=False))
+        self.addParameter(QgsProcessingParameterFileDestination(self.NETWORK_COORDINATES,
+                                                                self.tr("Network coordinates"),
+                                                                self.tr("Data files (*.dat)"),
+                                                                optional=True,
+                                                                createByDefault=False))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        requested = {}
+        for switch, (outputName, extension) in self.OUTPUTS.items():
+            if extension == ".dat":
+                outputFile = self.parameterAsFileOutput(parameters, outputName, context)
+            else:
+                outputFile = self.parameterAsOutputLayer(parameters, outputName, context)
+            if outputFile:
+                requested[switch] = outputFile
+
+        # the chain ends with the last tool that writes a requested output
+        stages = [stage for stage, (tool, switches) in enumerate(self.STAGES) if any(switch in requested for switch in switches)]
+        if not stages:
+            raise QgsProcessingException(self.tr("No outputs requested."))
+        stages = self.STAGES[:stages[-1] + 1]
+
+        elevation = self.parameterAsRasterLayer(parameters, self.ELEVATION, context)
+        unrequested = sum(1 for tool, switches in stages for switch in switches if switch not in requested)
+        scratch = taudemUtils.scratchDirectory(4 * elevation.width() * elevation.height() * unrequested)
+        feedback.pushInfo(self.tr("Intermediate grids in {}").format(scratch))
+        grids = {}
+        for tool, switches in stages:
+            for switch in switches:
+                grids[switch] = requested.get(switch, os.path.join(scratch, switch[1:] + self.OUTPUTS[switch][1]))
+
+        try:
+            for step, (tool, switches) in enumerate(stages):
+                # the outputs of the tools left are not written
+                if feedback.isCanceled():
+                    raise QgsProcessingException(self.tr("Canceled before {}.").format(tool))
+
+                arguments = []
+                arguments.append(os.path.join(taudemUtils.taudemDirectory(), tool))
+                if tool == "pitremove":
+                    arguments.append("-z")
+                    arguments.append(elevation.source())
+                    mask = self.parameterAsRasterLayer(parameters, self.DEPRESSION_MASK, context)
+                    if mask:
+                        arguments.append("-depmask")
+                        arguments.append(mask.source())
+                    if self.parameterAsBool(parameters, self.FOUR_NEIGHBOURS, context):
+                        arguments.append("-4way")
+                elif tool == "d8flowdir":
+                    arguments.append("-fel")
+                    arguments.append(grids["-fel"])
+                elif tool == "aread8":
+                    arguments.append("-p")
+                    arguments.append(grids["-p"])
+                    if not self.parameterAsBool(parameters, self.EDGE_CONTAMINATION, context):
+                        arguments.append("-nc")
+                elif tool == "threshold":
+                    arguments.append("-ssa")
+                    arguments.append(grids["-ad8"])
+                    arguments.append("-thresh")
+                    arguments.append("{}".format(self.parameterAsDouble(parameters, self.THRESHOLD, context)))
+                else:
+                    for switch in ("-fel", "-p", "-ad8", "-src"):
+                        arguments.append(switch)
+                        arguments.append(grids[switch])
+                    outlets = self.parameterAsVectorLayer(parameters, self.OUTLETS, context)
+                    if outlets:
+                        arguments.append("-o")
+                        arguments.append(outlets.source())
+                    if self.parameterAsBool(parameters, self.SINGLE_WATERSHED, context):
+                        arguments.append("-sw")
+                for switch in switches:
+                    arguments.append(switch)
+                    arguments.append(grids[switch])
+
+                if taudemUtils.execute(arguments, feedback):
+                    raise QgsProcessingException(self.tr("{} failed, see the log for details.").format(tool))
+                feedback.setProgress(100.0 * (step + 1) / len(stages))
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+        results = {}
+        for switch, outputFile in requested.items():
+            results[self.OUTPUTS[switch][0]] = outputFile
+
+        return results
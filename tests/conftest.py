@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    conftest.py
+    ---------------------
+    Fixtures of the tests: a feedback that keeps its messages, and small
+    LAS files and grids with points chosen by the tests, so that their
+    expected outputs can be computed by hand.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import struct
+
+import numpy
+import pytest
+
+# the point records of the LAS files of the tests, point format 1
+
+POINT_FORMAT_1 = numpy.dtype([("X", "<i4"), ("Y", "<i4"), ("Z", "<i4"), ("intensity", "<u2"), ("returns", "u1"),
+                              ("classification", "u1"), ("scan_angle", "i1"), ("user_data", "u1"),
+                              ("point_source_id", "<u2"), ("gps_time", "<f8")])
+
+class Feedback:
+
+    # the feedback of a run, which keeps its messages and can be canceled
+
+    def __init__(self):
+        self.messages = []
+        self.errors = []
+        self.progress = 0.0
+        self.canceled = False
+
+    def isCanceled(self):
+        return self.canceled
+
+    def setProgress(self, progress):
+        self.progress = progress
+
+    def pushInfo(self, info):
+        self.messages.append(info)
+
+    pushConsoleInfo = pushCommandInfo = pushDebugInfo = pushInfo
+
+    def reportError(self, error, fatalError=False):
+        self.errors.append(error)
+
+def writeLAS(path, x, y, z, classification=1, returnNumber=1, numberOfReturns=1, intensity=0,
+             scale=(0.01, 0.01, 0.01), offset=(0.0, 0.0, 0.0)):
+    """Writes the points as a LAS 1.2 file of point format 1 without VLRs
+    and returns its point records.
+    """
+    x, y, z = (numpy.asarray(values, dtype=float) for values in (x, y, z))
+    points = numpy.zeros(len(x), dtype=POINT_FORMAT_1)
+    for field, values, axis in (("X", x, 0), ("Y", y, 1), ("Z", z, 2)):
+        points[field] = numpy.floor((values - offset[axis]) / scale[axis] + 0.5)
+    points["intensity"] = intensity
+    points["returns"] = numpy.asarray(returnNumber) | (numpy.asarray(numberOfReturns) << 3)
+    points["classification"] = classification
+    points["point_source_id"] = 1
+    points["gps_time"] = numpy.arange(len(x), dtype=float)
+    returns = numpy.broadcast_to(numpy.asarray(returnNumber), len(x))
+    byReturn = [int(numpy.count_nonzero(returns == r)) for r in range(1, 6)]
+    real = [points[field] * scale[axis] + offset[axis] for axis, field in enumerate(("X", "Y", "Z"))]
+    bounds = [value for axis in real for value in ((axis.max(), axis.min()) if len(axis) else (0.0, 0.0))]
+    header = struct.pack("<4sHH16sBB32s32sHHHIIBHI5I3d3d6d", b"LASF", 0, 0, b"\0" * 16, 1, 2, b"tests", b"tests/conftest.py",
+                         1, 2026, 227, 227, 0, 1, POINT_FORMAT_1.itemsize, len(points), *byReturn,
+                         *scale, *offset, *bounds)
+    with open(path, "wb") as file:
+        file.write(header)
+        points.tofile(file)
+    return points
+
+def readASC(path):
+    """The header values and the cells of an ESRI ASCII grid."""
+    with open(path) as file:
+        fields = dict(next(file).split() for _ in range(6))
+        values = numpy.loadtxt(file, ndmin=2)
+    return {name.lower(): float(value) for name, value in fields.items()}, values
+
+@pytest.fixture
+def feedback():
+    return Feedback()
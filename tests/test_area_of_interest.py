@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    test_area_of_interest.py
+    ---------------------
+    Tests of the input files the index of an input folder finds for an
+    area of interest, with files in other CRSs than the area.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import struct
+
+import pytest
+
+pytest.importorskip("qgis.core")
+
+from lastools.LAStoolsAlgorithm import LAStoolsAlgorithm
+from lastools.LAStoolsIndex import LAStoolsIndex
+
+from .conftest import writeLAS
+
+def writeProjectedLAS(path, x, y, epsg):
+    # a LAS file whose GeoKeyDirectoryTag holds the EPSG code of its CRS
+    writeLAS(path, x, y, [0.0] * len(x))
+    with open(path, "rb") as file:
+        data = bytearray(file.read())
+    keys = struct.pack("<8H", 1, 1, 0, 1, 3072, 0, 1, epsg)
+    vlr = struct.pack("<H16sHH32s", 0, b"LASF_Projection", 34735, len(keys), b"") + keys
+    offset = struct.unpack_from("<I", data, 96)[0]
+    struct.pack_into("<II", data, 96, offset + len(vlr), 1)
+    with open(path, "wb") as file:
+        file.write(bytes(data[:227]) + vlr + bytes(data[227:]))
+
+class Rectangle:
+
+    def __init__(self, xMin, yMin, xMax, yMax):
+        self.box = (xMin, yMin, xMax, yMax)
+
+    def isNull(self):
+        return False
+
+    def xMinimum(self):
+        return self.box[0]
+
+    def yMinimum(self):
+        return self.box[1]
+
+    def xMaximum(self):
+        return self.box[2]
+
+    def yMaximum(self):
+        return self.box[3]
+
+class Algorithm(LAStoolsAlgorithm):
+
+    # an area of interest around (0, 0) to (10, 10) in EPSG:32632, which is
+    # 1000 units further east in EPSG:25833
+
+    SHIFTS = {"EPSG:32632": 0.0, "EPSG:25833": 1000.0}
+
+    def __init__(self, directory):
+        self.values = {LAStoolsAlgorithm.INPUT_DIRECTORY: directory, LAStoolsAlgorithm.INPUT_WILDCARDS: "*.las"}
+
+    def parameterDefinition(self, name):
+        return name
+
+    def parameterAsString(self, parameters, name, context):
+        return self.values[name]
+
+    @staticmethod
+    def coordinateReferenceSystem(crs):
+        return crs
+
+    def parameterAsExtent(self, parameters, name, context, crs=""):
+        shift = Algorithm.SHIFTS.get(crs, 0.0)
+        return Rectangle(shift, 0.0, shift + 10.0, 10.0)
+
+def test_files_of_other_crss(tmp_path, monkeypatch):
+    monkeypatch.setattr(LAStoolsIndex, "databasePath", staticmethod(lambda directory: str(tmp_path / "index.sqlite")))
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    writeProjectedLAS(str(inputs / "near.las"), [1.0, 5.0], [1.0, 5.0], 32632)
+    writeProjectedLAS(str(inputs / "far.las"), [500.0, 505.0], [1.0, 5.0], 32632)
+    # the same place as near.las in the other CRS, and a file that only
+    # touches the area when it is taken for coordinates in EPSG:32632
+    writeProjectedLAS(str(inputs / "shifted.las"), [1001.0, 1005.0], [1.0, 5.0], 25833)
+    writeProjectedLAS(str(inputs / "unshifted.las"), [1.0, 5.0], [1.0, 5.0], 25833)
+    # files without a CRS are taken to be in the CRS of the area
+    writeLAS(str(inputs / "unknown.las"), [2.0], [2.0], [0.0])
+
+    index = LAStoolsIndex(str(inputs))
+    try:
+        assert index.coordinateReferenceSystems(["*.las"]) == ["", "EPSG:25833", "EPSG:32632"]
+        assert [os.path.basename(f["path"]) for f in index.files(["*.las"], crs="EPSG:25833")] == ["shifted.las", "unshifted.las"]
+    finally:
+        index.close()
+
+    files = Algorithm(str(inputs)).getParametersPointInputFolderFiles({LAStoolsAlgorithm.AREA_OF_INTEREST: "0,10,0,10"}, None)
+    assert [os.path.basename(f["path"]) for f in files] == ["near.las", "shifted.las", "unknown.las"]
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    test_lascanopy.py
+    ---------------------
+    Tests of the rasters of the native lascanopy, alone and together,
+    against statistics of the points computed by hand.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+
+import numpy
+import pytest
+
+pytest.importorskip("qgis.core")
+
+from lastools.LAStoolsNative import lascanopy
+from lastools.LAStoolsNative.LASRaster import NODATA
+from lastools.LAStoolsNative.LAStoolsCommand import LAStoolsCommand, LAStoolsNativeUnsupported
+
+from .conftest import writeLAS, readASC
+
+# two cells of 10 units, the first with the points above the cutoff of
+# 1.37 at 2, 4, 6 and 10 and the second only with points below it
+
+X = [1.0, 2.0, 3.0, 4.0, 5.0, 15.0, 16.0]
+Y = [1.0, 2.0, 3.0, 4.0, 5.0, 5.0, 6.0]
+Z = [0.5, 2.0, 4.0, 6.0, 10.0, 0.5, 1.0]
+RETURNS = [1, 1, 2, 1, 2, 1, 1]
+
+@pytest.fixture
+def points(tmp_path):
+    path = str(tmp_path / "points.las")
+    writeLAS(path, X, Y, Z, returnNumber=RETURNS, numberOfReturns=2)
+    return path
+
+def canopy(points, arguments, feedback):
+    output = os.path.join(os.path.dirname(points), "canopy.asc")
+    command = LAStoolsCommand("lascanopy", ["-i", points, "-step", "10"] + arguments + ["-o", output])
+    assert lascanopy.run(command, feedback) == 0
+    return {name[len("canopy_"):-len(".asc")]: readASC(os.path.join(os.path.dirname(points), name))[1]
+            for name in os.listdir(os.path.dirname(points)) if name.startswith("canopy_")}
+
+def test_percentile_alone(points, feedback):
+    rasters = canopy(points, ["-p", "50"], feedback)
+    assert sorted(rasters) == ["p50"]
+    # the nearest rank of 2, 4, 6 and 10
+    assert rasters["p50"].tolist() == [[6.0, NODATA]]
+
+def test_average_alone(points, feedback):
+    rasters = canopy(points, ["-avg"], feedback)
+    assert sorted(rasters) == ["avg"]
+    assert rasters["avg"].tolist() == [[5.5, NODATA]]
+
+def test_statistics(points, feedback):
+    rasters = canopy(points, ["-min", "-max", "-std", "-p", "25", "75"], feedback)
+    assert sorted(rasters) == ["max", "min", "p25", "p75", "std"]
+    above = numpy.array([2.0, 4.0, 6.0, 10.0])
+    assert rasters["min"].tolist() == [[2.0, NODATA]]
+    assert rasters["max"].tolist() == [[10.0, NODATA]]
+    assert rasters["std"][0, 0] == pytest.approx(above.std(), abs=1e-6)
+    assert rasters["p25"].tolist() == [[4.0, NODATA]]
+    assert rasters["p75"].tolist() == [[6.0, NODATA]]
+
+def test_bincentiles_without_max(points, feedback):
+    rasters = canopy(points, ["-b", "50"], feedback)
+    # the maximum is only computed for them and not written
+    assert sorted(rasters) == ["b50"]
+    # 2 and 4 of 2, 4, 6 and 10 are below 1.37 + 0.5 * (10 - 1.37)
+    assert rasters["b50"].tolist() == [[50.0, NODATA]]
+
+def test_counts(points, feedback):
+    rasters = canopy(points, ["-all", "-abv", "-cov", "-dns", "-c", "0", "5", "20"], feedback)
+    assert rasters["all"].tolist() == [[5.0, 2.0]]
+    assert rasters["abv"].tolist() == [[4.0, 0.0]]
+    # 2 of the 3 first returns of the first cell and 4 of its 5 points are
+    # above the cutoff
+    assert rasters["cov"][0].tolist() == pytest.approx([200.0 / 3.0, 0.0], abs=1e-4)
+    assert rasters["dns"].tolist() == [[80.0, 0.0]]
+    assert rasters["c00"].tolist() == [[3.0, 2.0]]
+    assert rasters["c01"].tolist() == [[2.0, 0.0]]
+
+def test_unsupported(points, feedback):
+    for arguments in (["-avg", "-files_are_plots"], ["-p", "150"], []):
+        with pytest.raises(LAStoolsNativeUnsupported):
+            canopy(points, arguments, feedback)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    test_lasheight.py
+    ---------------------
+    Tests of the heights of the native lasheight above a TIN of ground
+    points on a plane, and of the ground TINs it keeps on disk against
+    the triangulations of scipy.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import numpy
+import pytest
+
+pytest.importorskip("qgis.core")
+pytest.importorskip("scipy")
+
+from lastools.LAStoolsNative import lasheight
+from lastools.LAStoolsNative.LASPoints import LASPoints
+from lastools.LAStoolsNative.LAStoolsCommand import LAStoolsCommand
+
+from .conftest import writeLAS
+
+def plane(x, y):
+    return 100.0 + 0.1 * x + 0.2 * y
+
+@pytest.fixture
+def tins(tmp_path, monkeypatch):
+    folder = tmp_path / "tins"
+    folder.mkdir()
+    monkeypatch.setattr(lasheight, "tinFolder", lambda: str(folder))
+    return folder
+
+@pytest.fixture
+def points(tmp_path):
+    # ground points on a plane every 10 units and points above it, one of
+    # them outside of the TIN
+    gx, gy = numpy.meshgrid(numpy.arange(0.0, 41.0, 10.0), numpy.arange(0.0, 41.0, 10.0))
+    gx, gy = gx.ravel(), gy.ravel()
+    x = numpy.concatenate([gx, [5.0, 12.5, 33.0, 45.0]])
+    y = numpy.concatenate([gy, [5.0, 27.5, 8.0, 20.0]])
+    above = numpy.array([1.5, 12.0, 30.0, 2.0])
+    z = numpy.concatenate([plane(gx, gy), plane(x[-4:-1], y[-4:-1]) + above[:3], [plane(40.0, 20.0) + above[3]]])
+    path = str(tmp_path / "points.las")
+    writeLAS(path, x, y, z, classification=[2] * len(gx) + [1] * 4)
+    return path, len(gx), above
+
+def test_replace_z(tmp_path, tins, points, feedback):
+    path, ground, above = points
+    output = str(tmp_path / "heights.las")
+    assert lasheight.run(LAStoolsCommand("lasheight", ["-i", path, "-replace_z", "-o", output]), feedback) == 0
+    result = LASPoints(output)
+    try:
+        z = result.z(result.records)
+    finally:
+        result.close()
+    numpy.testing.assert_allclose(z[:ground], 0.0, atol=0.011)
+    # the last point is outside of the TIN and above its nearest ground point
+    numpy.testing.assert_allclose(z[ground:], above, atol=0.011)
+
+def test_classify_and_drop(tmp_path, tins, points, feedback):
+    path, ground, above = points
+    output = str(tmp_path / "classified.las")
+    arguments = ["-i", path, "-classify_between", "1", "20", "4", "-classify_above", "20", "5", "-drop_below", "-1", "-o", output]
+    assert lasheight.run(LAStoolsCommand("lasheight", arguments), feedback) == 0
+    result = LASPoints(output)
+    try:
+        classification = result.classification(result.records)
+        userData = result.records["user_data"]
+    finally:
+        result.close()
+    assert classification.tolist() == [2] * ground + [4, 4, 5, 4]
+    # the heights in decimeters in the user data
+    assert userData[ground:].tolist() == [15, 120, 255, 20]
+
+def test_stored_tin_finds_the_triangles_of_scipy(tmp_path):
+    from scipy.spatial import Delaunay
+    random = numpy.random.RandomState(3)
+    ground = random.uniform(0.0, 100.0, (500, 2))
+    tin = Delaunay(ground)
+    path = str(tmp_path / "tin.npz")
+    lasheight.storeTIN(path, tin)
+    stored = lasheight.StoredTIN.read(path, ground)
+    # inside and outside of the hull, on vertices and on edges
+    queries = numpy.concatenate([random.uniform(-20.0, 120.0, (2000, 2)), ground[:50],
+                                 (ground[tin.simplices[:50, 0]] + ground[tin.simplices[:50, 1]]) / 2.0])
+    expected = tin.find_simplex(queries)
+    found = stored.find_simplex(queries)
+    assert ((found >= 0) == (expected >= 0)).all()
+    # on edges and vertices both triangles are right
+    inside = found >= 0
+    weights = numpy.einsum("nij,nj->ni", tin.transform[found[inside], :2], queries[inside] - tin.transform[found[inside], 2])
+    weights = numpy.column_stack([weights, 1.0 - weights.sum(axis=1)])
+    assert (weights >= -lasheight.EPSILON).all()
+
+def test_stored_tin_of_other_points(tmp_path):
+    from scipy.spatial import Delaunay
+    random = numpy.random.RandomState(4)
+    ground = random.uniform(0.0, 100.0, (50, 2))
+    path = str(tmp_path / "tin.npz")
+    lasheight.storeTIN(path, Delaunay(ground))
+    with pytest.raises(ValueError):
+        lasheight.StoredTIN.read(path, ground[:10])
+
+def test_ground_tin_is_stored(tins, feedback):
+    random = numpy.random.RandomState(5)
+    ground = numpy.column_stack([random.uniform(0.0, 100.0, (300, 2)), random.uniform(0.0, 5.0, 300)])
+    tin, origin = lasheight.groundTIN(ground, feedback)
+    stored = list(tins.glob("*.npz"))
+    assert len(stored) == 1
+    again = lasheight.StoredTIN.read(str(stored[0]), ground[:, :2] - origin)
+    queries = random.uniform(0.0, 100.0, (1000, 2)) - origin
+    assert (again.find_simplex(queries) == tin.find_simplex(queries)).all()
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    test_laspoints.py
+    ---------------------
+    Tests of reading and writing LAS files natively, of the command lines
+    of the native tools and of their filters.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+
+import numpy
+import pytest
+
+pytest.importorskip("qgis.core")
+
+from lastools.LAStoolsNative.LASPoints import LASPoints, LASWriter
+from lastools.LAStoolsNative.LAStoolsCommand import LAStoolsCommand, LAStoolsNativeUnsupported
+
+from .conftest import writeLAS
+
+def test_read(tmp_path):
+    path = str(tmp_path / "points.las")
+    written = writeLAS(path, [1.0, 2.5, 3.25], [4.0, 5.0, 6.0], [7.0, 8.0, 9.99],
+                       classification=[2, 1, 5], returnNumber=[1, 2, 1], numberOfReturns=[1, 2, 1],
+                       offset=(1000.0, 2000.0, 0.0))
+    points = LASPoints(path)
+    try:
+        assert len(points) == 3
+        assert points.pointFormat == 1
+        assert not points.extended
+        records = points.records
+        numpy.testing.assert_allclose(points.x(records), [1.0, 2.5, 3.25])
+        numpy.testing.assert_allclose(points.y(records), [4.0, 5.0, 6.0])
+        numpy.testing.assert_allclose(points.z(records), [7.0, 8.0, 9.99])
+        assert points.classification(records).tolist() == [2, 1, 5]
+        assert points.returnNumber(records).tolist() == [1, 2, 1]
+        assert points.numberOfReturns(records).tolist() == [1, 2, 1]
+        assert records["gps_time"].tolist() == written["gps_time"].tolist()
+    finally:
+        points.close()
+
+def test_write_keeps_records_and_fixes_header(tmp_path):
+    source = str(tmp_path / "source.las")
+    target = str(tmp_path / "target.las")
+    writeLAS(source, numpy.arange(10.0), numpy.arange(10.0) * 2.0, numpy.arange(10.0) * 3.0,
+             returnNumber=numpy.arange(10) % 2 + 1, numberOfReturns=2)
+    points = LASPoints(source)
+    try:
+        writer = LASWriter(target, points)
+        writer.write(points.records[2:5])
+        writer.write(points.records[7:8])
+        writer.close()
+        chosen = numpy.concatenate([points.records[2:5], points.records[7:8]])
+    finally:
+        points.close()
+
+    written = LASPoints(target)
+    try:
+        assert written.records.tobytes() == chosen.tobytes()
+        header = written.header
+        assert header.pointCount == 4
+        assert (header.minX, header.maxX) == pytest.approx((2.0, 7.0))
+        assert (header.minY, header.maxY) == pytest.approx((4.0, 14.0))
+        assert (header.minZ, header.maxZ) == pytest.approx((6.0, 21.0))
+    finally:
+        written.close()
+
+def test_write_nothing(tmp_path):
+    source = str(tmp_path / "source.las")
+    target = str(tmp_path / "target.las")
+    writeLAS(source, [1.0], [1.0], [1.0])
+    points = LASPoints(source)
+    try:
+        LASWriter(target, points).close()
+    finally:
+        points.close()
+    written = LASPoints(target)
+    try:
+        assert len(written) == 0
+        assert written.header.pointCount == 0
+    finally:
+        written.close()
+
+def test_command_line():
+    command = LAStoolsCommand("lasthin", ["-i", "a.las", "b.las", "-step", "2", "-drop_z_below", "-5",
+                                          "-odir", "out", "-odix", "_thin", "-olaz", "-v"])
+    assert command.inputs == ["a.las", "b.las"]
+    assert command.value("-step") == 2.0
+    assert command.options == []
+    assert not command.filter.isEmpty()
+    assert command.outputPath("a.las") == os.path.join("out", "a_thin.laz")
+
+def test_unknown_options_are_unsupported(tmp_path):
+    path = str(tmp_path / "points.las")
+    writeLAS(path, [1.0], [1.0], [1.0])
+    command = LAStoolsCommand("lasthin", ["-i", path, "-step", "2", "-some_new_option", "-o", "out.las"])
+    command.value("-step")
+    with pytest.raises(LAStoolsNativeUnsupported):
+        command.finish()
+
+def test_output_over_the_input():
+    command = LAStoolsCommand("las2las", ["-i", "a.las"])
+    assert command.outputPath("a.las") == "a_1.las"
+
+def filtered(path, arguments):
+    command = LAStoolsCommand("las2las", ["-i", path] + arguments)
+    points = LASPoints(path)
+    try:
+        return numpy.flatnonzero(command.filter.mask(points, points.records)).tolist()
+    finally:
+        points.close()
+
+def test_filters(tmp_path):
+    path = str(tmp_path / "points.las")
+    writeLAS(path, [0.0, 1.0, 2.0, 3.0, 4.0, 5.0], [0.0, 10.0, 20.0, 30.0, 40.0, 50.0], [-1.0, 0.0, 1.0, 2.0, 3.0, 4.0],
+             classification=[2, 2, 1, 1, 5, 7], returnNumber=[1, 1, 2, 1, 2, 3], numberOfReturns=[1, 2, 2, 3, 3, 3],
+             intensity=[10, 20, 30, 40, 50, 60])
+    assert filtered(path, []) == [0, 1, 2, 3, 4, 5]
+    assert filtered(path, ["-keep_class", "2", "5"]) == [0, 1, 4]
+    assert filtered(path, ["-drop_class", "2"]) == [2, 3, 4, 5]
+    assert filtered(path, ["-keep_first"]) == [0, 1, 3]
+    assert filtered(path, ["-keep_last"]) == [0, 2, 5]
+    assert filtered(path, ["-keep_middle"]) == [4]
+    assert filtered(path, ["-keep_single"]) == [0]
+    assert filtered(path, ["-keep_return", "2"]) == [2, 4]
+    assert filtered(path, ["-drop_z_below", "1"]) == [2, 3, 4, 5]
+    assert filtered(path, ["-drop_z_above", "1"]) == [0, 1, 2]
+    assert filtered(path, ["-keep_z", "0", "2"]) == [1, 2]
+    assert filtered(path, ["-keep_intensity", "20", "50"]) == [1, 2, 3]
+    assert filtered(path, ["-keep_xy", "1", "10", "4", "40"]) == [1, 2, 3]
+    # all filters have to pass
+    assert filtered(path, ["-keep_class", "1", "2", "-keep_first", "-drop_z_below", "0"]) == [1, 3]
+
+def test_split_filters(tmp_path):
+    path = str(tmp_path / "points.las")
+    writeLAS(path, [0.0, 1.0, 2.0], [0.0, 1.0, 2.0], [0.0, 1.0, 2.0], classification=[2, 1, 2])
+    command = LAStoolsCommand("las2las", ["-i", path, "-keep_class", "2", "-drop_z_above", "1"])
+    selected, others = command.filter.split(["-keep_class"])
+    points = LASPoints(path)
+    try:
+        assert numpy.flatnonzero(selected.mask(points, points.records)).tolist() == [0, 2]
+        assert numpy.flatnonzero(others.mask(points, points.records)).tolist() == [0, 1]
+    finally:
+        points.close()
+
+def test_unsupported_filters():
+    with pytest.raises(LAStoolsNativeUnsupported):
+        LAStoolsCommand("las2las", ["-i", "a.las", "-keep_random_fraction", "0.5"])
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    test_lastile.py
+    ---------------------
+    Tests of the tiles of the native lastile, with buffers, with inputs
+    of different scales and offsets, and of reversing a tiling.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import glob
+import os
+
+import numpy
+import pytest
+
+pytest.importorskip("qgis.core")
+
+from lastools.LAStoolsNative import lastile
+from lastools.LAStoolsNative.LASPoints import LASPoints
+from lastools.LAStoolsNative.LAStoolsCommand import LAStoolsCommand
+
+from .conftest import writeLAS
+
+def runTile(arguments, feedback):
+    assert lastile.run(LAStoolsCommand("lastile", arguments), feedback) == 0
+
+def tiles(folder):
+    """The coordinates and records of the points of every tile by name."""
+    result = {}
+    for path in sorted(glob.glob(os.path.join(folder, "*.las"))):
+        points = LASPoints(path)
+        try:
+            records = numpy.array(points.records)
+            result[os.path.basename(path)] = (sorted(zip(points.x(records).round(2), points.y(records).round(2))), records, points)
+        finally:
+            points.close()
+    return result
+
+def test_tiles(tmp_path, feedback):
+    source = str(tmp_path / "source.las")
+    writeLAS(source, [1.0, 12.0, 3.0, 14.5], [1.0, 3.0, 14.0, 12.0], [1.0, 2.0, 3.0, 4.0])
+    runTile(["-i", source, "-tile_size", "10", "-o", str(tmp_path / "tiles" / "tile.las")], feedback)
+    found = tiles(str(tmp_path / "tiles"))
+    assert sorted(found) == ["tile_0_0.las", "tile_0_10.las", "tile_10_0.las", "tile_10_10.las"]
+    assert found["tile_0_0.las"][0] == [(1.0, 1.0)]
+    assert found["tile_10_0.las"][0] == [(12.0, 3.0)]
+    assert found["tile_0_10.las"][0] == [(3.0, 14.0)]
+    assert found["tile_10_10.las"][0] == [(14.5, 12.0)]
+    # every tile knows its bounding box
+    assert LASPoints.tileBoundingBox(found["tile_10_0.las"][2].header) == pytest.approx((10.0, 0.0, 20.0, 10.0))
+
+def test_buffer(tmp_path, feedback):
+    source = str(tmp_path / "source.las")
+    writeLAS(source, [1.0, 9.0, 15.0], [5.0, 5.0, 5.0], [1.0, 2.0, 3.0])
+    runTile(["-i", source, "-tile_size", "10", "-buffer", "2", "-flag_as_withheld", "-o", str(tmp_path / "tiles" / "tile.las")], feedback)
+    found = tiles(str(tmp_path / "tiles"))
+    assert sorted(found) == ["tile_0_0.las", "tile_10_0.las"]
+    assert found["tile_0_0.las"][0] == [(1.0, 5.0), (9.0, 5.0)]
+    assert found["tile_10_0.las"][0] == [(9.0, 5.0), (15.0, 5.0)]
+    # only the point in the buffer is withheld
+    records = found["tile_10_0.las"][1]
+    withheld = (records["classification"] & 0x80) != 0
+    assert sorted(records["X"][withheld].tolist()) == [900]
+    assert not ((found["tile_0_0.las"][1]["classification"] & 0x80) != 0).any()
+
+def test_inputs_with_other_scales_and_offsets(tmp_path, feedback):
+    first = str(tmp_path / "first.las")
+    second = str(tmp_path / "second.las")
+    writeLAS(first, [1.0, 12.0], [1.0, 3.0], [1.0, 2.0])
+    writeLAS(second, [2.125, 11.5], [2.5, 12.25], [3.0, 4.0], scale=(0.001, 0.001, 0.001), offset=(5.0, 5.0, 0.0))
+    runTile(["-i", first, second, "-tile_size", "10", "-o", str(tmp_path / "tiles" / "tile.las")], feedback)
+    found = tiles(str(tmp_path / "tiles"))
+    assert sorted(found) == ["tile_0_0.las", "tile_10_0.las", "tile_10_10.las"]
+    # the points of the second file are on the scale and offset of the
+    # first, rounded to its centimeters
+    assert found["tile_0_0.las"][0] == [(1.0, 1.0), (2.13, 2.5)]
+    assert found["tile_10_0.las"][0] == [(12.0, 3.0)]
+    assert found["tile_10_10.las"][0] == [(11.5, 12.25)]
+    for name, (coordinates, records, points) in found.items():
+        assert points.scale.tolist() == [0.01, 0.01, 0.01]
+        assert points.offset.tolist() == [0.0, 0.0, 0.0]
+
+def test_reverse_tiling(tmp_path, feedback):
+    source = str(tmp_path / "source.las")
+    random = numpy.random.RandomState(1)
+    written = writeLAS(source, random.uniform(0.0, 30.0, 200), random.uniform(0.0, 30.0, 200), random.uniform(0.0, 5.0, 200))
+    runTile(["-i", source, "-tile_size", "10", "-buffer", "1", "-reversible", "-o", str(tmp_path / "tiles" / "tile.las")], feedback)
+    output = str(tmp_path / "reversed.las")
+    runTile(["-i", str(tmp_path / "tiles" / "*.las"), "-reverse_tiling", "-o", output], feedback)
+    points = LASPoints(output)
+    try:
+        assert points.records.tobytes() == written.tobytes()
+    finally:
+        points.close()
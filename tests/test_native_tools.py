@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    test_native_tools.py
+    ---------------------
+    Tests of the outputs of the native tools that need no fixtures of
+    their own, and of how the backend chooses between the native tools
+    and the binaries.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import math
+import shutil
+import importlib
+
+import numpy
+import pytest
+
+pytest.importorskip("qgis.core")
+
+from qgis.core import QgsProcessingException
+
+from lastools.LAStoolsBackend import LAStoolsBackend
+from lastools.LAStoolsNative.LASPoints import LASPoints
+from lastools.LAStoolsNative.LASRaster import NODATA
+from lastools.LAStoolsNative.LAStoolsCommand import LAStoolsCommand, LAStoolsNativeUnsupported
+
+from .conftest import writeLAS, readASC
+
+def runTool(tool, arguments, feedback):
+    module = importlib.import_module("lastools.LAStoolsNative." + tool)
+    return module.run(LAStoolsCommand(tool, arguments), feedback)
+
+def readPoints(path):
+    points = LASPoints(path)
+    try:
+        records = numpy.array(points.records)
+        return records, points.x(records), points.y(records), points.z(records), points.classification(records)
+    finally:
+        points.close()
+
+def test_las2las_filters(tmp_path, feedback):
+    source = str(tmp_path / "source.las")
+    output = str(tmp_path / "output.las")
+    written = writeLAS(source, [1.0, 2.0, 3.0, 4.0], [1.0, 2.0, 3.0, 4.0], [1.0, 2.0, 3.0, 4.0], classification=[2, 1, 2, 5])
+    assert runTool("las2las", ["-i", source, "-keep_class", "2", "-o", output], feedback) == 0
+    records = readPoints(output)[0]
+    assert records.tobytes() == written[[0, 2]].tobytes()
+
+def test_lasthin(tmp_path, feedback):
+    source = str(tmp_path / "source.las")
+    writeLAS(source, [1.0, 2.0, 8.0, 12.0, 18.0, 5.0], [1.0, 3.0, 9.0, 2.0, 8.0, 15.0], [5.0, 3.0, 4.0, 9.0, 7.0, 1.0])
+    # the cells of 10 units hold the points 0 to 2, 3 and 4, and 5
+    for operation, expected in (("-lowest", [1, 4, 5]), ("-highest", [0, 3, 5])):
+        output = str(tmp_path / "thinned{}.las".format(operation))
+        assert runTool("lasthin", ["-i", source, "-step", "10", operation, "-o", output], feedback) == 0
+        z = readPoints(output)[3]
+        assert z.tolist() == pytest.approx([[5.0, 3.0, 4.0, 9.0, 7.0, 1.0][i] for i in expected])
+
+def test_lasthin_classify_as(tmp_path, feedback):
+    source = str(tmp_path / "source.las")
+    output = str(tmp_path / "output.las")
+    writeLAS(source, [1.0, 2.0, 12.0], [1.0, 2.0, 2.0], [5.0, 3.0, 9.0])
+    assert runTool("lasthin", ["-i", source, "-step", "10", "-classify_as", "8", "-o", output], feedback) == 0
+    classification = readPoints(output)[4]
+    assert classification.tolist() == [1, 8, 8]
+
+def test_lasthin_subcircle(tmp_path, feedback):
+    # splats with a radius of several steps reach cells left of and below
+    # the origin, which have to stay apart from the cells of other rows
+    source = str(tmp_path / "source.las")
+    output = str(tmp_path / "output.las")
+    random = numpy.random.RandomState(13)
+    x, y, z = random.uniform(0.0, 6.0, 40), random.uniform(0.0, 6.0, 40), random.uniform(0.0, 10.0, 40)
+    writeLAS(source, x, y, z)
+    assert runTool("lasthin", ["-i", source, "-step", "1", "-subcircle", "2.5", "-highest", "-o", output], feedback) == 0
+    records, thinnedX, thinnedY, thinnedZ = readPoints(output)[:4]
+
+    x, y, z = (numpy.round(values * 100.0) / 100.0 for values in (x, y, z))
+    angles = numpy.arange(8) * (numpy.pi / 4.0)
+    splats = [(0.0, 0.0)] + list(zip(numpy.round(250.0 * numpy.cos(angles)) / 100.0, numpy.round(250.0 * numpy.sin(angles)) / 100.0))
+    best = {}
+    for i in range(len(x)):
+        for dx, dy in splats:
+            cell = (math.floor(y[i] + dy - math.floor(y.min())), math.floor(x[i] + dx - math.floor(x.min())))
+            if cell not in best or z[i] > best[cell][2]:
+                best[cell] = (x[i] + dx, y[i] + dy, z[i])
+    assert len(records) == len(best)
+    numpy.testing.assert_allclose(sorted(zip(thinnedX, thinnedY, thinnedZ)), sorted(best.values()), atol=1e-9)
+
+def test_lasgrid(tmp_path, feedback):
+    source = str(tmp_path / "source.las")
+    writeLAS(source, [1.0, 2.0, 15.0, 5.0], [1.0, 2.0, 3.0, 15.0], [5.0, 7.0, 2.0, 9.0])
+    for method, expected in (("-highest", [[9.0, NODATA], [7.0, 2.0]]),
+                             ("-lowest", [[9.0, NODATA], [5.0, 2.0]]),
+                             ("-average", [[9.0, NODATA], [6.0, 2.0]])):
+        output = str(tmp_path / "grid{}.asc".format(method))
+        assert runTool("lasgrid", ["-i", source, "-step", "10", "-elevation", method, "-o", output], feedback) == 0
+        header, values = readASC(output)
+        assert (header["ncols"], header["nrows"], header["xllcorner"], header["yllcorner"], header["cellsize"]) == (2, 2, 0.0, 0.0, 10.0)
+        numpy.testing.assert_allclose(values, expected)
+
+def test_lasgrid_counter(tmp_path, feedback):
+    source = str(tmp_path / "source.las")
+    output = str(tmp_path / "grid.asc")
+    writeLAS(source, [1.0, 2.0, 15.0, 5.0], [1.0, 2.0, 3.0, 15.0], [5.0, 7.0, 2.0, 9.0])
+    assert runTool("lasgrid", ["-i", source, "-step", "10", "-counter_16bit", "-o", output], feedback) == 0
+    # cells without points count none
+    assert readASC(output)[1].tolist() == [[1.0, 0.0], [2.0, 1.0]]
+
+def test_lasduplicate(tmp_path, feedback):
+    source = str(tmp_path / "source.las")
+    writeLAS(source, [1.0, 1.0, 2.0, 1.0, 2.0], [1.0, 1.0, 2.0, 1.0, 2.0], [3.0, 1.0, 5.0, 3.0, 5.0])
+    for switches, expected in (([], [0, 2]), (["-lowest_z"], [1, 2]), (["-highest_z"], [0, 2]), (["-unique_xyz"], [0, 1, 2])):
+        output = str(tmp_path / "output{}.las".format("".join(switches)))
+        assert runTool("lasduplicate", ["-i", source] + switches + ["-o", output], feedback) == 0
+        z = readPoints(output)[3]
+        assert z.tolist() == pytest.approx([[3.0, 1.0, 5.0, 3.0, 5.0][i] for i in expected])
+
+def test_lasnoise(tmp_path, feedback):
+    source = str(tmp_path / "source.las")
+    cluster = numpy.arange(10) * 0.1
+    x = numpy.concatenate([1.0 + cluster, [50.0]])
+    y = numpy.concatenate([1.0 + cluster, [50.0]])
+    z = numpy.concatenate([1.0 + cluster, [50.0]])
+    writeLAS(source, x, y, z)
+
+    classified = str(tmp_path / "classified.las")
+    assert runTool("lasnoise", ["-i", source, "-step", "4", "-isolated", "5", "-o", classified], feedback) == 0
+    assert readPoints(classified)[4].tolist() == [1] * 10 + [7]
+
+    removed = str(tmp_path / "removed.las")
+    assert runTool("lasnoise", ["-i", source, "-step", "4", "-isolated", "5", "-remove_noise", "-o", removed], feedback) == 0
+    assert len(readPoints(removed)[0]) == 10
+
+def test_backend_runs_the_binary_for_unsupported_options(tmp_path, feedback, monkeypatch):
+    monkeypatch.setattr(LAStoolsBackend, "isNative", staticmethod(lambda: True))
+    source = str(tmp_path / "source.las")
+    writeLAS(source, [1.0], [1.0], [1.0])
+    commands = ["las2las", "-i", '"' + source + '"', "-some_new_option", "-o", '"' + str(tmp_path / "output.las") + '"']
+    assert LAStoolsBackend.run(commands, feedback) is None
+    assert LAStoolsBackend.run(["lasinfo", "-i", source], feedback) is None
+
+def test_backend_runs_pipeline_inputs(tmp_path, feedback, monkeypatch):
+    # the inputs of pipeline stages are wildcards in the temporary directory
+    # joined with a backslash, with and without quotes
+    monkeypatch.setattr(LAStoolsBackend, "isNative", staticmethod(lambda: True))
+    inputs = tmp_path / "temporary directory"
+    inputs.mkdir()
+    writeLAS(str(inputs / "a.las"), [1.0, 2.0], [1.0, 2.0], [1.0, 2.0], classification=[2, 1])
+    writeLAS(str(inputs / "b.las"), [3.0], [3.0], [3.0], classification=2)
+    for wildcard in ('"' + str(inputs) + '\\*.las"', str(tmp_path) + "\\temporary*\\*.las"):
+        output = tmp_path / "output"
+        commands = ["las2las", "-i", wildcard, "-keep_class", "2", "-odir", '"' + str(output) + '"']
+        assert LAStoolsBackend.run(commands, feedback) == 0
+        assert sorted(os.listdir(output)) == ["a.las", "b.las"]
+        assert list(readPoints(str(output / "a.las"))[4]) == [2]
+        shutil.rmtree(output)
+
+def test_backend_reports_native_errors(tmp_path, feedback, monkeypatch):
+    monkeypatch.setattr(LAStoolsBackend, "isNative", staticmethod(lambda: True))
+    source = tmp_path / "broken.las"
+    source.write_bytes(b"not a LAS file")
+    commands = ["las2las", "-i", '"' + str(source) + '"', "-o", '"' + str(tmp_path / "output.las") + '"']
+    with pytest.raises(QgsProcessingException):
+        LAStoolsBackend.run(commands, feedback)
+
+def test_tools_take_all_options(tmp_path, feedback):
+    source = str(tmp_path / "source.las")
+    writeLAS(source, [1.0], [1.0], [1.0])
+    with pytest.raises(LAStoolsNativeUnsupported):
+        runTool("lasgrid", ["-i", source, "-step", "10", "-rgb", "-o", str(tmp_path / "grid.asc")], feedback)
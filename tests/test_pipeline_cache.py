@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    test_pipeline_cache.py
+    ---------------------
+    Tests of the keys and the manifest with which resumed LAStools
+    pipelines skip the stages whose inputs and outputs did not change.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("qgis.core")
+
+from lastools.LAStoolsPipeline import LAStoolsStage, LAStoolsStageCache, wildcardsIntersect
+
+def stage(commands, name="lasthin"):
+    return LAStoolsStage(name, commands, [], [])
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for name in ("a.las", "b.las"):
+        path = tmp_path / name
+        path.write_bytes(name.encode() * 100)
+        paths.append(str(path))
+    return paths
+
+def test_same_stage_same_key(tmp_path, files):
+    cache = LAStoolsStageCache(str(tmp_path))
+    commands = ["lasthin", "-i", "*.las", "-step", "1"]
+    assert cache.stageKey(stage(commands), files) == cache.stageKey(stage(list(commands)), files)
+
+def test_cores_do_not_change_the_key(tmp_path, files):
+    cache = LAStoolsStageCache(str(tmp_path))
+    commands = ["lasthin", "-i", "*.las", "-step", "1"]
+    assert cache.stageKey(stage(commands + ["-cores", "4"]), files) == cache.stageKey(stage(commands), files)
+
+def test_command_line_changes_the_key(tmp_path, files):
+    cache = LAStoolsStageCache(str(tmp_path))
+    key = cache.stageKey(stage(["lasthin", "-i", "*.las", "-step", "1"]), files)
+    assert cache.stageKey(stage(["lasthin", "-i", "*.las", "-step", "2"]), files) != key
+    assert cache.stageKey(stage(["lasthin", "-i", "*.las", "-step", "1"]), files[:1]) != key
+
+def test_inputs_change_the_key(tmp_path, files):
+    cache = LAStoolsStageCache(str(tmp_path))
+    commands = ["lasthin", "-i", "*.las", "-step", "1"]
+    key = cache.stageKey(stage(commands), files)
+    status = os.stat(files[0])
+    # content changed behind the same size and modification time is only
+    # hashed again without a manifest that remembers the file
+    with open(files[0], "r+b") as file:
+        file.write(b"x")
+    os.utime(files[0], ns=(status.st_atime_ns, status.st_mtime_ns))
+    assert cache.stageKey(stage(commands), files) == key
+    assert LAStoolsStageCache(str(tmp_path / "other")).stageKey(stage(commands), files) != key
+    os.utime(files[0], ns=(status.st_atime_ns, status.st_mtime_ns + 1000000000))
+    assert cache.stageKey(stage(commands), files) != key
+
+def test_manifest(tmp_path, files):
+    cache = LAStoolsStageCache(str(tmp_path))
+    thin = stage(["lasthin", "-i", files[0], "-o", files[1]])
+    key = cache.stageKey(thin, files[:1])
+    assert not cache.isValid(thin, key)
+    cache.record(thin, key, files[1:])
+
+    # a resumed run reads the manifest
+    resumed = LAStoolsStageCache(str(tmp_path))
+    assert resumed.isValid(thin, key)
+    assert not resumed.isValid(thin, "other key")
+    assert not resumed.isValid(stage(thin.commands, "lasgrid"), key)
+
+    # outputs that changed or are gone make the stage run again
+    with open(files[1], "ab") as file:
+        file.write(b"more")
+    assert not resumed.isValid(thin, key)
+    cache.record(thin, key, files[1:])
+    os.remove(files[1])
+    assert not LAStoolsStageCache(str(tmp_path)).isValid(thin, key)
+
+    cache.forget(thin)
+    assert LAStoolsStageCache(str(tmp_path)).stages == {}
+
+def test_broken_manifest(tmp_path):
+    (tmp_path / LAStoolsStageCache.MANIFEST).write_text("{")
+    assert LAStoolsStageCache(str(tmp_path)).stages == {}
+
+def test_wildcards_intersect():
+    assert wildcardsIntersect("tiles/tile_*.las", "tiles/tile_0_0.las")
+    assert wildcardsIntersect("tiles/*_ground.las", "tiles/tile_*.las")
+    assert not wildcardsIntersect("tiles/*.las", "tiles/*.laz")
+    assert not wildcardsIntersect("tiles/tile_?.las", "tiles/tile_10.las")
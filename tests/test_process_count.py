@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    test_process_count.py
+    ---------------------
+    Tests of the number of MPI processes picked for TauDEM runs from the
+    cost curves of the tools, and of fitting these curves to the timings
+    of the calibration.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import pytest
+
+pytest.importorskip("qgis.core")
+pytest.importorskip("osgeo")
+
+from taudem import taudemUtils
+from taudem.calibrate import Calibrate
+
+@pytest.fixture
+def machine(monkeypatch):
+    # eight cores, unknown memory and no calibration
+    state = {"cores": 8, "memory": None, "cells": None, "curves": {}}
+    monkeypatch.setattr(taudemUtils, "availableCores", lambda: state["cores"])
+    monkeypatch.setattr(taudemUtils, "availableMemory", lambda: state["memory"])
+    monkeypatch.setattr(taudemUtils, "rasterCells", lambda commands: state["cells"])
+    monkeypatch.setattr(taudemUtils, "scalingCurves", lambda: state["curves"])
+    return state
+
+COMMANDS = ["/usr/local/taudem/pitremove", "-z", "dem.tif", "-fel", "fel.tif"]
+
+def test_without_grids(machine):
+    assert taudemUtils.processCount(COMMANDS) == 2
+    machine["cores"] = 1
+    assert taudemUtils.processCount(COMMANDS) == 1
+
+def test_default_curve(machine):
+    # 0.25 * n + 2e-7 * cells / n is lowest at n = sqrt(8e-7 * cells)
+    for cells, processes in ((10 ** 6, 1), (2 * 10 ** 7, 4), (10 ** 8, 8)):
+        machine["cells"] = cells
+        assert taudemUtils.processCount(COMMANDS) == processes
+
+def test_calibrated_curve(machine):
+    machine["cells"] = 10 ** 6
+    machine["curves"] = {"pitremove": [1.0, 0.0, 1e-6]}
+    assert taudemUtils.processCount(COMMANDS) == 8
+    machine["curves"] = {"pitremove": [1.0, 1.0, 1e-9]}
+    assert taudemUtils.processCount(COMMANDS) == 1
+    # other tools keep the default curve
+    assert taudemUtils.processCount(["aread8"] + COMMANDS[1:]) == 1
+
+def test_memory_limits_the_processes(machine):
+    machine["cells"] = 10 ** 8
+    # the grids take more than the memory, so a quarter of it is left for
+    # the runtimes of the processes
+    machine["memory"] = 12 * taudemUtils.PROCESS_MEMORY
+    assert taudemUtils.processCount(COMMANDS) == 3
+    machine["memory"] = taudemUtils.PROCESS_MEMORY
+    assert taudemUtils.processCount(COMMANDS) == 1
+
+def test_fit_curve():
+    cells = 10 ** 6
+    samples = [(n, 1.0 + 0.5 * n + 8.0 / n) for n in (1, 2, 4, 8)]
+    a, b, c = Calibrate().fitCurve(samples, cells)
+    assert (a, b, c * cells) == pytest.approx((1.0, 0.5, 8.0))
+
+def test_fit_curve_without_negative_costs():
+    # timings that only grow with the processes give no parallel part
+    samples = [(n, 2.0 + 0.5 * n) for n in (1, 2, 4, 8)]
+    a, b, c = Calibrate().fitCurve(samples, 10 ** 6)
+    assert a == pytest.approx(2.0)
+    assert b == pytest.approx(0.5)
+    assert c == pytest.approx(0.0, abs=1e-12)
+    samples = [(n, 10.0 - n) for n in (1, 2, 4, 8)]
+    assert Calibrate().fitCurve(samples, 10 ** 6)[1] == 0.0
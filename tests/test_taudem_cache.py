@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    test_taudem_cache.py
+    ---------------------
+    Tests of the keys of the cache of TauDEM outputs, of storing and
+    reusing cached grids, and of keeping the grids of the native tools and
+    of TauDEM apart.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("qgis.core")
+pytest.importorskip("osgeo")
+
+from taudem import taudemUtils
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    values = {taudemUtils.TAUDEM_CACHE: str(tmp_path / "cache"), taudemUtils.TAUDEM_CACHE_SIZE: 100,
+              taudemUtils.TAUDEM_NATIVE: True}
+
+    class Settings:
+
+        @staticmethod
+        def getSetting(name):
+            return values.get(name)
+
+    monkeypatch.setattr(taudemUtils, "ProcessingConfig", Settings)
+    return values
+
+@pytest.fixture
+def commands(tmp_path):
+    # a fake TauDEM executable and an input grid, which the cache only hashes
+    executable = tmp_path / "bin" / "pitremove"
+    executable.parent.mkdir()
+    executable.write_bytes(b"pitremove")
+    dem = tmp_path / "dem.tif"
+    dem.write_bytes(b"elevations")
+    return [str(executable), "-z", str(dem), "-fel", str(tmp_path / "fel.tif")]
+
+def test_uncached_command_lines(tmp_path, settings, commands):
+    assert taudemUtils.cacheEntry(["streamnet", "-fel", commands[2]]) is None
+    assert taudemUtils.cacheEntry(commands[:4] + [str(tmp_path / "fel.asc")]) is None
+    # inputs which are not plain files
+    assert taudemUtils.cacheEntry(commands[:2] + ["PG: dbname=dem"] + commands[3:]) is None
+    settings[taudemUtils.TAUDEM_CACHE] = None
+    assert taudemUtils.cacheEntry(commands) is None
+
+def test_outputs_do_not_change_the_key(tmp_path, settings, commands):
+    key, tool, outputs = taudemUtils.cacheEntry(commands)
+    assert tool == "pitremove"
+    assert outputs == [("-fel", str(tmp_path / "fel.tif"))]
+    other = taudemUtils.cacheEntry(commands[:4] + [str(tmp_path / "other.tif")])
+    assert other[0] == key
+
+def test_inputs_and_values_change_the_key(tmp_path, settings, commands):
+    key = taudemUtils.cacheEntry(commands)[0]
+    assert taudemUtils.cacheEntry(commands + ["-4way"])[0] != key
+    with open(commands[2], "ab") as dem:
+        dem.write(b" changed")
+    assert taudemUtils.cacheEntry(commands)[0] != key
+
+def test_engines_have_their_own_keys(tmp_path, settings, commands, monkeypatch):
+    taudem = taudemUtils.cacheEntry(commands, False)[0]
+    native = taudemUtils.cacheEntry(commands, True)[0]
+    assert taudem != native
+    # a new TauDEM executable or new native sources change their keys
+    info = os.stat(commands[0])
+    os.utime(commands[0], ns=(info.st_atime_ns, info.st_mtime_ns + 1000000000))
+    assert taudemUtils.cacheEntry(commands, False)[0] != taudem
+    assert taudemUtils.cacheEntry(commands, True)[0] == native
+    monkeypatch.setattr(taudemUtils, "nativeVersion", lambda: "other version")
+    assert taudemUtils.cacheEntry(commands, True)[0] != native
+
+def test_store_and_fetch(tmp_path, settings, commands, feedback):
+    entry = taudemUtils.cacheEntry(commands)
+    output = tmp_path / "fel.tif"
+    output.write_bytes(b"filled")
+    taudemUtils.storeCached(entry, feedback)
+    output.unlink()
+    assert taudemUtils.fetchCached(entry, feedback)
+    assert output.read_bytes() == b"filled"
+
+    # stored grids that were written over are not reused
+    stored = os.path.join(settings[taudemUtils.TAUDEM_CACHE], entry[0], "fel.tif")
+    os.remove(stored)
+    with open(stored, "wb") as file:
+        file.write(b"written over")
+    assert not taudemUtils.fetchCached(entry, feedback)
+    assert not taudemUtils.fetchCached(entry, feedback)
+
+def test_eviction_spares_pinned_entries(tmp_path, settings, commands, feedback):
+    settings[taudemUtils.TAUDEM_CACHE_SIZE] = 0
+    entry = taudemUtils.cacheEntry(commands)
+    (tmp_path / "fel.tif").write_bytes(b"filled")
+    taudemUtils.storeCached(entry, feedback)
+    assert not taudemUtils.fetchCached(entry, feedback)
+
+    settings[taudemUtils.TAUDEM_CACHE_PINNED] = "pitremove"
+    taudemUtils.storeCached(entry, feedback)
+    assert taudemUtils.fetchCached(entry, feedback)
+    settings[taudemUtils.TAUDEM_CACHE_PINNED] = None
+    assert taudemUtils.pinCached(commands, False)
+
+def test_execute_keeps_engines_apart(tmp_path, settings, commands, feedback, monkeypatch):
+    runs = []
+
+    def runNative(commands, feedback):
+        runs.append("native")
+        if not native[0]:
+            return None
+        with open(commands[-1], "wb") as output:
+            output.write(b"native")
+        return 0
+
+    def runTauDem(commands, feedback, processes=None):
+        runs.append("taudem")
+        with open(commands[-1], "wb") as output:
+            output.write(b"taudem")
+        return 0
+
+    monkeypatch.setattr(taudemUtils, "runNative", runNative)
+    monkeypatch.setattr(taudemUtils, "runTauDem", runTauDem)
+    output = tmp_path / "fel.tif"
+
+    # the native tool does not support the command, TauDEM runs once
+    native = [False]
+    assert taudemUtils.execute(commands, feedback) == 0
+    assert taudemUtils.execute(commands, feedback) == 0
+    assert runs == ["native", "taudem", "native"]
+    assert output.read_bytes() == b"taudem"
+
+    # the outputs of TauDEM are not taken for those of the native tool
+    runs.clear()
+    native[0] = True
+    assert taudemUtils.execute(commands, feedback) == 0
+    assert taudemUtils.execute(commands, feedback) == 0
+    assert runs == ["native"]
+    assert output.read_bytes() == b"native"
+
+    runs.clear()
+    assert taudemUtils.execute(commands, feedback, native=False) == 0
+    assert runs == []
+    assert output.read_bytes() == b"taudem"
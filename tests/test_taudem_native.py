@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    test_taudem_native.py
+    ---------------------
+    Tests of the filling of the native pitremove and of the D8 and
+    D-infinity directions of the native d8flowdir and dinfflowdir against
+    brute force versions of them, of filling grids in strips, and of the
+    errors of the native tools.
+    ---------------------
+    Date                 : October 2026
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+import math
+import tempfile
+
+import numpy
+import pytest
+
+pytest.importorskip("qgis.core")
+pytest.importorskip("osgeo")
+
+from qgis.core import QgsProcessingException
+
+from taudem import taudemUtils
+from taudem.taudemNative import pitremove
+from taudem.taudemNative.TauDemCommand import TauDemCommand, TauDemNativeUnsupported
+from taudem.taudemNative.TauDemGrid import FLOAT_NODATA
+from taudem.taudemNative.TauDemFlow import D8_SHIFTS, EDGE, NODATA, FLAT, d8Directions, dinfDirections
+
+def bruteForceFill(z, closed, fourWay):
+    """The lowest levels from which every cell drains off the grid or into
+    a cell without data, by lowering levels until nothing changes.
+    """
+    rows, cols = z.shape
+    shifts = pitremove.neighbourShifts(fourWay)
+    outlets = numpy.zeros(z.shape, dtype=bool)
+    outlets[0] = outlets[-1] = True
+    outlets[:, 0] = outlets[:, -1] = True
+    for dy, dx in shifts:
+        outlets |= pitremove.shifted(closed, dy, dx)
+    level = numpy.where(outlets, z, numpy.inf)
+    changed = True
+    while changed:
+        changed = False
+        for row in range(rows):
+            for col in range(cols):
+                if closed[row, col] or outlets[row, col]:
+                    continue
+                lowest = min(level[row + dy, col + dx] for dy, dx in shifts
+                             if 0 <= row + dy < rows and 0 <= col + dx < cols and not closed[row + dy, col + dx])
+                candidate = max(z[row, col], lowest)
+                if candidate < level[row, col]:
+                    level[row, col] = candidate
+                    changed = True
+    return level
+
+def fill(z, closed, fourWay):
+    # a single strip, as the native pitremove floods grids that fit in memory
+    outlets = numpy.zeros(z.shape, dtype=bool)
+    outlets[0] = outlets[-1] = True
+    outlets[:, 0] = outlets[:, -1] = True
+    for dy, dx in pitremove.neighbourShifts(fourWay):
+        outlets |= pitremove.shifted(closed, dy, dx)
+    outlets &= ~closed
+    level, label, spills = pitremove.flood(z, closed, outlets, numpy.zeros(z.shape, dtype=bool), fourWay)
+    return level, label
+
+@pytest.mark.parametrize("fourWay", [False, True])
+def test_pitremove(fourWay):
+    random = numpy.random.RandomState(7)
+    z = random.uniform(0.0, 10.0, (12, 15))
+    closed = numpy.zeros(z.shape, dtype=bool)
+    closed[5:7, 6:8] = True
+    level, label = fill(z, closed, fourWay)
+    expected = bruteForceFill(z, closed, fourWay)
+    free = ~closed
+    numpy.testing.assert_array_equal(level[free], expected[free])
+    assert (label[free] == pitremove.OUTLET).all()
+    assert (label[closed] == pitremove.CLOSED).all()
+
+def test_pitremove_fills_a_pit_to_its_spill():
+    z = numpy.full((5, 5), 5.0)
+    z[1:4, 1:4] = [[6.0, 7.0, 6.0], [4.0, 1.0, 6.0], [6.0, 6.0, 6.0]]
+    level = fill(z, numpy.zeros(z.shape, dtype=bool), False)[0]
+    # the pit and its rim on the left spill over the border at 5
+    assert level[2, 2] == 5.0
+    assert level[2, 1] == 5.0
+    assert level[1, 2] == 7.0
+
+class Grid:
+
+    # an in-memory stand-in for the GDAL grids of the native tools
+
+    grids = {}
+
+    def __init__(self, path):
+        self.values = Grid.grids[path]
+        self.rows, self.cols = self.values.shape
+        self.nodata = None
+
+    def read(self, first, last):
+        return self.values[max(0, first):min(self.rows, last)].copy()
+
+    def nodataMask(self, values):
+        return numpy.isnan(values)
+
+    def create(self, path):
+        output = Grid.grids[path] = numpy.zeros(self.values.shape, dtype=numpy.float32)
+
+        class Band:
+
+            @staticmethod
+            def WriteArray(values, col, row):
+                output[row:row + len(values), col:col + values.shape[1]] = values
+
+        class Dataset:
+
+            @staticmethod
+            def GetRasterBand(number):
+                return Band
+
+        return Dataset
+
+    def close(self):
+        pass
+
+@pytest.mark.parametrize("fourWay", [False, True])
+@pytest.mark.parametrize("stripRows", [1, 3, 7])
+def test_pitremove_in_strips(tmp_path, feedback, monkeypatch, fourWay, stripRows):
+    # depressions that span several strips are raised to their spill over
+    # the seams between the strips
+    monkeypatch.setattr(pitremove, "TauDemGrid", Grid)
+    monkeypatch.setattr(taudemUtils, "scratchDirectory", lambda size=0: tempfile.mkdtemp(dir=str(tmp_path)))
+    random = numpy.random.RandomState(stripRows)
+    for attempt in range(5):
+        z = random.uniform(0.0, 10.0, (20, 13)).astype(numpy.float32).astype(float)
+        closed = random.uniform(size=z.shape) < 0.05
+        Grid.grids["dem"] = numpy.where(closed, numpy.nan, z)
+        monkeypatch.setattr(pitremove, "BLOCK_CELLS", stripRows * z.shape[1])
+        command = TauDemCommand("pitremove", ["-z", "dem", "-fel", "fel"] + (["-4way"] if fourWay else []))
+        assert pitremove.run(command, feedback) == 0
+        filled = Grid.grids["fel"]
+        expected = bruteForceFill(z, closed, fourWay)
+        numpy.testing.assert_array_equal(filled[~closed], expected[~closed].astype(numpy.float32))
+        assert (filled[closed] == numpy.float32(FLOAT_NODATA)).all()
+    assert "in {} strips".format(-(-20 // stripRows)) in feedback.messages[-1]
+    assert os.listdir(str(tmp_path)) == []
+
+def bruteForceD8(elevation, closed, cellX, cellY):
+    rows, cols = elevation.shape
+    status = numpy.zeros((rows - 2, cols - 2), dtype=int)
+    slope = numpy.zeros((rows - 2, cols - 2))
+    for row in range(1, rows - 1):
+        for col in range(1, cols - 1):
+            if closed[row, col]:
+                status[row - 1, col - 1] = NODATA
+                continue
+            if any(closed[row + dy, col + dx] for dy, dx in D8_SHIFTS):
+                status[row - 1, col - 1] = EDGE
+            best = 0.0
+            for direction, (dy, dx) in enumerate(D8_SHIFTS, 1):
+                drop = (elevation[row, col] - elevation[row + dy, col + dx]) / math.hypot(dx * cellX, dy * cellY)
+                if drop > best:
+                    best = drop
+                    if status[row - 1, col - 1] != EDGE:
+                        status[row - 1, col - 1] = direction
+            slope[row - 1, col - 1] = best
+    return status, slope
+
+def test_d8_directions():
+    random = numpy.random.RandomState(8)
+    elevation = random.randint(0, 6, (10, 12)).astype(float)
+    closed = numpy.zeros(elevation.shape, dtype=bool)
+    closed[0] = closed[-1] = True
+    closed[:, 0] = closed[:, -1] = True
+    closed[4, 5] = True
+    elevation[closed] = numpy.inf
+    status, slope = d8Directions(elevation, closed, 2.0, 3.0)
+    expectedStatus, expectedSlope = bruteForceD8(elevation, closed, 2.0, 3.0)
+    numpy.testing.assert_array_equal(status, expectedStatus)
+    inner = status > 0
+    numpy.testing.assert_allclose(slope[inner], expectedSlope[inner])
+    assert (status == FLAT).any() and (status > 0).any()
+
+@pytest.mark.parametrize("gradient, angle", [((1.0, 0.0), 0.0), ((0.0, 1.0), math.pi / 2.0), ((-1.0, 0.0), math.pi),
+                                             ((0.0, -1.0), 1.5 * math.pi), ((1.0, 1.0), math.pi / 4.0),
+                                             ((1.0, 0.5), math.atan(0.5)), ((-0.5, -1.0), math.pi + math.atan(2.0))])
+def test_dinf_directions_on_planes(gradient, angle):
+    # a plane falling towards east by gradient[0] and north by gradient[1]
+    # per unit, where rows grow towards south
+    rows, cols = numpy.mgrid[0:7, 0:7].astype(float)
+    elevation = 100.0 - gradient[0] * cols + gradient[1] * rows
+    closed = numpy.zeros(elevation.shape, dtype=bool)
+    status, angles, slopes = dinfDirections(elevation, closed, 1.0, 1.0)
+    assert (status == 1).all()
+    numpy.testing.assert_allclose(angles, angle, atol=1e-12)
+    numpy.testing.assert_allclose(slopes, math.hypot(*gradient))
+
+def test_dinf_flat():
+    elevation = numpy.full((5, 5), 3.0)
+    status, angles, slopes = dinfDirections(elevation, numpy.zeros(elevation.shape, dtype=bool), 1.0, 1.0)
+    assert (status == FLAT).all()
+    assert (slopes == 0.0).all()
+
+def test_native_errors_are_reported(tmp_path, feedback, monkeypatch):
+    class Settings:
+
+        @staticmethod
+        def getSetting(name):
+            return name == taudemUtils.TAUDEM_NATIVE
+
+    monkeypatch.setattr(taudemUtils, "ProcessingConfig", Settings)
+    commands = ["pitremove", "-z", str(tmp_path / "dem.tif"), "-fel", str(tmp_path / "fel.tif")]
+
+    def unsupported(command, feedback):
+        raise TauDemNativeUnsupported("-z")
+
+    monkeypatch.setattr(pitremove, "run", unsupported)
+    assert taudemUtils.runNative(commands, feedback) is None
+
+    # other errors are not hidden behind a run of TauDEM
+    def failing(command, feedback):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pitremove, "run", failing)
+    with pytest.raises(QgsProcessingException, match="native pitremove failed: disk full"):
+        taudemUtils.runNative(commands, feedback)
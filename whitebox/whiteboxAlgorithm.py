@@ -53,7 +53,7 @@ pluginPath = os.path.dirname(__file__)
 
 class WhiteboxAlgorithm(QgsProcessingAlgorithm):
 
-    def __init__(self, descriptionFile):
+    def __init__(self, descriptionFile, description=None):
         super().__init__()
 
         self.descriptionFile = descriptionFile
@@ -65,9 +65,22 @@ class WhiteboxAlgorithm(QgsProcessingAlgorithm):
 
         self.params = []
 
-        self.defineCharacteristicsFromFile()
+        if description is None:
+            self.defineCharacteristicsFromFile()
+        else:
+            # algorithms registered from the description index only know what
+            # the toolbox shows, parameters are read from the description file
+            # by the instances created to open or run the tool
+            self._name = description['name']
+            self._displayName = description['displayName']
+            self._group = description['group']
+            self._groupId = description['groupId']
+            self._shortHelp = description['help']
+            self.params = None
 
     def createInstance(self):
+        if not os.path.isfile(self.descriptionFile):
+            whiteboxUtils.generateDescription(self._name)
         return self.__class__(self.descriptionFile)
 
     def name(self):
@@ -92,6 +105,9 @@ class WhiteboxAlgorithm(QgsProcessingAlgorithm):
         return QCoreApplication.translate('WhiteboxAlgorithm', text)
 
     def initAlgorithm(self, config=None):
+        if self.params is None:
+            return
+
         for p in self.params:
             self.addParameter(p, True)
 
@@ -105,18 +105,37 @@ class WhiteboxProvider(QgsProcessingProvider):
         self.algs = []
         folder = whiteboxUtils.descriptionPath()
 
-        for descriptionFile in os.listdir(folder):
-            if descriptionFile.endswith('txt'):
-                try:
-                    alg = WhiteboxAlgorithm(os.path.join(folder, descriptionFile))
-                    if alg.name().strip() != '':
-                        self.algs.append(alg)
-                    else:
-                        QgsMessageLog.logMessage(self.tr('Could not load WhiteBoxTools algorithm from file: {}'.format(descriptionFile)),
-                                                 self.tr('Processing'), Qgis.Critical)
-                except Exception as e:
-                    QgsMessageLog.logMessage(self.tr('Could not load WhiteBoxTools algorithm from file: {}\n{}'.format(descriptionFile, str(e))),
+        descriptions = []
+        try:
+            descriptions = [(folder, d) for d in whiteboxUtils.descriptionIndex(folder)]
+        except Exception as e:
+            QgsMessageLog.logMessage(self.tr('Could not read WhiteBoxTools descriptions from folder: {}\n{}'.format(folder, str(e))),
+                                     self.tr('Processing'), Qgis.Critical)
+
+        # tools of the installed executable the descriptions folder lacks,
+        # whose description files are generated when first opened or run
+        if self.isActive():
+            try:
+                generated = whiteboxUtils.generatedDescriptionPath()
+                if os.path.isdir(generated):
+                    descriptions.extend((generated, d) for d in whiteboxUtils.descriptionIndex(generated))
+                descriptions.extend((generated, d) for d in whiteboxUtils.missingDescriptions([d['name'] for f, d in descriptions]))
+            except Exception as e:
+                QgsMessageLog.logMessage(self.tr('Could not list WhiteBoxTools tools\n{}'.format(str(e))),
+                                         self.tr('Processing'), Qgis.Critical)
+
+        for descriptionFolder, description in descriptions:
+            descriptionFile = description['file']
+            try:
+                alg = WhiteboxAlgorithm(os.path.join(descriptionFolder, descriptionFile), description)
+                if alg.name().strip() != '':
+                    self.algs.append(alg)
+                else:
+                    QgsMessageLog.logMessage(self.tr('Could not load WhiteBoxTools algorithm from file: {}'.format(descriptionFile)),
                                              self.tr('Processing'), Qgis.Critical)
+            except Exception as e:
+                QgsMessageLog.logMessage(self.tr('Could not load WhiteBoxTools algorithm from file: {}\n{}'.format(descriptionFile, str(e))),
+                                         self.tr('Processing'), Qgis.Critical)
 
         for a in self.algs:
             self.addAlgorithm(a)
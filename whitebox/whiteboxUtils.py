@@ -27,9 +27,12 @@ __revision__ = '$Format:%H$'
 
 import os
 import re
+import json
+import shutil
+import hashlib
 import subprocess
 
-from qgis.core import Qgis, QgsMessageLog, QgsProcessingFeedback
+from qgis.core import Qgis, QgsApplication, QgsMessageLog, QgsProcessingFeedback
 from processing.core.ProcessingLog import ProcessingLog
 from processing.core.ProcessingConfig import ProcessingConfig
 
@@ -40,6 +43,19 @@ WHITEBOX_ACTIVE = 'WHITEBOX_ACTIVE'
 WHITEBOX_EXECUTABLE = 'WHITEBOX_EXECUTABLE'
 WHITEBOX_VERBOSE = 'WHITEBOX_VERBOSE'
 
+# the last probe result, so that the provider name can be shown without
+# reading the probe file again
+probeResult = {}
+
+# how the parameter types of --toolparameters map to description lines
+vectorTypes = {'Point': 'QgsProcessing.TypeVectorPoint',
+               'Line': 'QgsProcessing.TypeVectorLine',
+               'Polygon': 'QgsProcessing.TypeVectorPolygon'}
+fileExtensions = {'Lidar': 'las',
+                  'Csv': 'csv',
+                  'Text': 'txt',
+                  'Html': 'html'}
+
 
 def whiteboxToolsExecutable():
     filePath = ProcessingConfig.getSetting(WHITEBOX_EXECUTABLE)
@@ -50,25 +66,244 @@ def descriptionPath():
     return os.path.normpath(os.path.join(os.path.dirname(__file__), 'descriptions'))
 
 
-def version():
-    commands = whiteboxToolsExecutable()
-    if commands == '':
-        commands = 'whitebox_tools'
-    commands += ' --version'
+def cachePath():
+    folder = os.path.join(QgsApplication.qgisSettingsDirPath(), 'whitebox')
+    os.makedirs(folder, exist_ok=True)
+    return folder
 
-    with subprocess.Popen([commands],
-                          shell=True,
-                          stdout=subprocess.PIPE,
-                          stdin=subprocess.DEVNULL,
-                          stderr=subprocess.STDOUT,
-                          universal_newlines=True) as proc:
-        try:
-            for line in proc.stdout:
-                if line.startswith('whitebox-tools'):
-                    return versionRegex.search(line.strip()).group(0)
-            return None
-        except:
-            return None
+
+def generatedDescriptionPath():
+    return os.path.join(cachePath(), 'generated')
+
+
+def descriptionIndex(folder=None):
+    """Returns file, name, display name, group, group id and help of every
+    description file. They are kept in a JSON index which is only rebuilt
+    when the descriptions folder or one of the files in it changed.
+    """
+    if folder is None:
+        folder = descriptionPath()
+    files = sorted((entry.name, entry.stat().st_mtime_ns) for entry in os.scandir(folder) if entry.name.endswith('txt'))
+    key = hashlib.sha1(json.dumps([folder, os.stat(folder).st_mtime_ns, files]).encode('utf-8')).hexdigest()
+
+    indexFile = os.path.join(cachePath(), '{}.json'.format(os.path.basename(folder)))
+    try:
+        with open(indexFile) as f:
+            index = json.load(f)
+        if index['key'] == key:
+            return index['descriptions']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    descriptions = []
+    for fileName, mtime in files:
+        with open(os.path.join(folder, fileName)) as lines:
+            header = [lines.readline().strip('\n').strip() for i in range(5)]
+        descriptions.append({'file': fileName,
+                             'name': header[0],
+                             'displayName': header[1],
+                             'group': header[2],
+                             'groupId': header[3],
+                             'help': header[4]})
+
+    try:
+        with open(indexFile + '.tmp', 'w') as f:
+            json.dump({'key': key, 'descriptions': descriptions}, f)
+        os.replace(indexFile + '.tmp', indexFile)
+    except OSError:
+        pass
+
+    return descriptions
+
+
+def executablePath():
+    wb = whiteboxToolsExecutable()
+    if wb == '':
+        wb = 'whitebox_tools'
+    if os.path.isfile(wb):
+        return os.path.abspath(wb)
+    return shutil.which(wb)
+
+
+def runExecutable(executable, arguments):
+    try:
+        return subprocess.run([executable] + arguments,
+                              stdout=subprocess.PIPE,
+                              stdin=subprocess.DEVNULL,
+                              stderr=subprocess.STDOUT,
+                              universal_newlines=True,
+                              timeout=60).stdout
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def probe():
+    """Returns version and tool list of the WhiteboxTools executable. The
+    executable is only run once, the result is cached on disk together with
+    path and mtime of the executable and reused until either changes.
+    """
+    global probeResult
+
+    executable = executablePath()
+    if executable is None:
+        return None
+    status = os.stat(executable)
+    key = [os.path.normcase(executable), status.st_mtime_ns, status.st_size]
+    if probeResult.get('key') == key:
+        return probeResult
+
+    probeFile = os.path.join(cachePath(), 'probe.json')
+    try:
+        with open(probeFile) as f:
+            result = json.load(f)
+        if result['key'] == key:
+            probeResult = result
+            return probeResult
+    except (OSError, ValueError, KeyError):
+        pass
+
+    result = {'key': key, 'version': None, 'tools': {}}
+    for line in runExecutable(executable, ['--version']).splitlines():
+        if line.startswith('whitebox-tools') or line.startswith('WhiteboxTools'):
+            match = versionRegex.search(line.strip())
+            if match:
+                result['version'] = match.group(0)
+                break
+    for line in runExecutable(executable, ['--listtools']).splitlines():
+        name, sep, description = line.partition(':')
+        if sep and name.strip() and ' ' not in name.strip():
+            result['tools'][name.strip()] = description.strip()
+
+    # descriptions generated for an older executable are stale
+    shutil.rmtree(generatedDescriptionPath(), ignore_errors=True)
+
+    saveProbe(result)
+    return probeResult
+
+
+def saveProbe(result):
+    global probeResult
+
+    probeResult = result
+    probeFile = os.path.join(cachePath(), 'probe.json')
+    try:
+        with open(probeFile + '.tmp', 'w') as f:
+            json.dump(result, f)
+        os.replace(probeFile + '.tmp', probeFile)
+    except OSError:
+        pass
+
+
+def toolKey(name):
+    # --listtools prints AbsoluteValue or absolute_value depending on version
+    return name.replace('_', '').lower()
+
+
+def parameterLine(parameter):
+    """Translates one parameter of --toolparameters into a description line
+    """
+    name = parameter['flags'][-1].lstrip('-')
+    description = parameter['name'].replace('|', '/')
+    optional = str(bool(parameter.get('optional', False)))
+    default = parameter.get('default_value')
+    kind = parameter['parameter_type']
+    if isinstance(kind, dict):
+        kind, detail = list(kind.items())[0]
+    else:
+        detail = None
+
+    if kind == 'Boolean':
+        return 'QgsProcessingParameterBoolean|{}|{}|{}|{}'.format(name, description, str(default).lower() == 'true', optional)
+    elif kind in ('Integer', 'Float'):
+        dataType = 'QgsProcessingParameterNumber.Integer' if kind == 'Integer' else 'QgsProcessingParameterNumber.Double'
+        return 'QgsProcessingParameterNumber|{}|{}|{}|{}|{}|None|None'.format(name, description, dataType, default, optional)
+    elif kind == 'OptionList':
+        index = detail.index(default) if default in detail else 0
+        return 'QgsProcessingParameterEnum|{}|{}|{}|False|{}|{}'.format(name, description, ';'.join(detail), index, optional)
+    elif kind in ('ExistingFile', 'ExistingFileOrFloat'):
+        if detail == 'Raster':
+            return 'QgsProcessingParameterRasterLayer|{}|{}|None|{}'.format(name, description, optional)
+        elif isinstance(detail, dict) and 'Vector' in detail:
+            return 'QgsProcessingParameterFeatureSource|{}|{}|{}|None|{}'.format(name, description, vectorTypes.get(detail['Vector'], 'QgsProcessing.TypeVectorAnyGeometry'), optional)
+        return 'QgsProcessingParameterFile|{}|{}|QgsProcessingParameterFile.File|{}|None|{}'.format(name, description, fileExtensions.get(detail, 'None'), optional)
+    elif kind == 'FileList' and detail == 'Raster':
+        return 'QgsProcessingParameterMultipleLayers|{}|{}|QgsProcessing.TypeRaster|None|{}'.format(name, description, optional)
+    elif kind == 'NewFile':
+        if detail == 'Raster':
+            return 'QgsProcessingParameterRasterDestination|{}|{}|None|{}'.format(name, description, optional)
+        elif isinstance(detail, dict) and 'Vector' in detail:
+            return 'QgsProcessingParameterVectorDestination|{}|{}|{}|None|{}'.format(name, description, vectorTypes.get(detail['Vector'], 'QgsProcessing.TypeVectorAnyGeometry'), optional)
+        extension = fileExtensions.get(detail, 'txt')
+        return 'QgsProcessingParameterFileDestination|{}|{}|{} files (*.{} *.{})|None|{}'.format(name, description, extension.upper(), extension, extension.upper(), optional)
+    elif kind == 'Directory':
+        return 'QgsProcessingParameterFile|{}|{}|QgsProcessingParameterFile.Folder|None|None|{}'.format(name, description, optional)
+    return 'QgsProcessingParameterString|{}|{}|{}|False|{}'.format(name, description, default, optional)
+
+
+def toolName(tool):
+    # the name of a tool in the toolbox, AbsoluteValue for absolute_value
+    return ''.join(part[:1].upper() + part[1:] for part in tool.split('_'))
+
+
+def missingDescriptions(known):
+    """Returns file, name, display name, group, group id and help of the
+    tools of the WhiteboxTools executable which are neither among the known
+    tool names nor generated yet. Their description files are only written
+    by generateDescription when the tool is first opened or run, as that
+    needs two runs of the executable per tool.
+    """
+    result = probe()
+    if result is None:
+        return []
+    folder = generatedDescriptionPath()
+    knownKeys = set(toolKey(name) for name in known)
+    descriptions = []
+    for tool, help in sorted(result['tools'].items()):
+        name = toolName(tool)
+        if toolKey(tool) in knownKeys or os.path.isfile(os.path.join(folder, '{}.txt'.format(name))):
+            continue
+        descriptions.append({'file': '{}.txt'.format(name),
+                             'name': name,
+                             'displayName': name,
+                             'group': 'Other Tools',
+                             'groupId': 'othertools',
+                             'help': help})
+    return descriptions
+
+
+def generateDescription(name):
+    """Writes the description file of a tool of the WhiteboxTools executable
+    from its parameters and toolbox and returns its path.
+    """
+    executable = executablePath()
+    result = probe()
+    if executable is None or result is None:
+        raise OSError('WhiteboxTools executable not found')
+    tools = dict((toolKey(tool), (tool, help)) for tool, help in result['tools'].items())
+    if toolKey(name) not in tools:
+        raise ValueError('WhiteboxTools has no tool {}'.format(name))
+    tool, help = tools[toolKey(name)]
+
+    try:
+        parameters = json.loads(runExecutable(executable, ['--toolparameters={}'.format(tool)]))['parameters']
+        lines = [parameterLine(p) for p in parameters]
+    except (ValueError, KeyError, IndexError, TypeError):
+        raise ValueError('Could not read parameters of WhiteBoxTools tool {}'.format(tool))
+    group = runExecutable(executable, ['--toolbox={}'.format(tool)]).strip().splitlines()
+    group = group[0].strip() if group else 'Other Tools'
+
+    folder = generatedDescriptionPath()
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, '{}.txt'.format(toolName(tool)))
+    with open(path + '.tmp', 'w') as f:
+        f.write('\n'.join([toolName(tool), toolName(tool), group, re.sub('[^a-z]', '', group.lower()), help] + lines) + '\n')
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def version():
+    result = probe()
+    return result['version'] if result is not None else None
 
 
 def execute(commands, feedback=None):